@@ -0,0 +1,53 @@
+"""Measure event-loop lag while parsing large pages inline vs in a process pool.
+
+Run from backend/ai-service:
+    python -m benchmarks.loop_lag --size-mb 5 --pages 4
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.parse_engine import build_page
+from services.loop_monitor import LoopLagMonitor
+from services.web_scraper import ParseExecutor
+
+
+async def run(mode: str, html: str, pages: int, workers: int) -> None:
+    executor = ParseExecutor(mode=mode, max_workers=workers)
+    await executor.start()
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.1)
+    monitor.reset()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(executor.parse(html, "https://guidelines.example.org/") for _ in range(pages)))
+    elapsed = time.perf_counter() - start
+    # Let the monitor record the sample that was delayed by the last parse
+    await asyncio.sleep(0.05)
+
+    await monitor.stop()
+    await executor.shutdown()
+    lag = monitor.stats()
+    print(
+        f"{mode:<8} backend={executor.engine.backend:<11} {elapsed:6.2f} s  "
+        f"loop lag p50={lag['p50_ms']:8.1f} ms  p99={lag['p99_ms']:8.1f} ms  max={lag['max_ms']:8.1f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=float, default=5.0)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    html = build_page(args.size_mb)
+    print(f"{args.pages} pages of {args.size_mb:.0f} MB")
+    for mode in ("inline", "process"):
+        await run(mode, html, args.pages, args.workers)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
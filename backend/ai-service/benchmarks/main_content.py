@@ -0,0 +1,116 @@
+"""Report tokens per page sent to the LLM with and without main-content extraction.
+
+Run from backend/ai-service:
+    python -m benchmarks.main_content
+    python -m benchmarks.main_content --html saved/page1.html saved/page2.html
+
+Tokens are counted with tiktoken's cl100k_base encoding when it is
+installed and loadable, otherwise estimated as four characters per token.
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+from services.web_scraper import HTMLParseEngine, MainContentExtractor
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - depends on environment
+    tiktoken = None
+
+PARAGRAPH = (
+    "<p>{topic} is assessed with a focused history, examination and targeted tests. "
+    "Treatment depends on severity, comorbidities and patient preference, and follow-up "
+    "is scheduled to review response, adverse effects and adherence.</p>"
+)
+
+BOILERPLATE = """
+<div id="cookie-banner">We use cookies to personalise content and analyse traffic.
+Accept all cookies or manage your preferences in the privacy centre.</div>
+<div class="sidebar"><h3>Most read</h3><ul>{links}</ul></div>
+<div class="newsletter-signup">Subscribe to our weekly clinical digest for the latest
+guidance, case reports and continuing education opportunities.</div>
+"""
+
+TAIL = """
+<div class="related-articles"><h3>Related articles</h3><ul>{links}</ul></div>
+<ol class="references">{references}</ol>
+<div class="share-tools">Share this article on Twitter, Facebook, LinkedIn or by email with a colleague.</div>
+"""
+
+
+def build_page(topic: str, paragraphs: int, sidebar_links: int) -> str:
+    """Build a clinical article wrapped in typical publisher boilerplate."""
+    links = "".join(f'<li><a href="/article/{i}">Clinical update number {i} for busy clinicians</a></li>'
+                    for i in range(sidebar_links))
+    references = "".join(f"<li>Author {i} et al. Trial of {topic.lower()} therapy. J Med. 20{i:02d};{i}:1-9.</li>"
+                         for i in range(sidebar_links))
+    body = "".join(
+        (f"<h2>{topic}: part {i // 3 + 1}</h2>" if i % 3 == 0 else "") + PARAGRAPH.format(topic=topic)
+        for i in range(paragraphs)
+    )
+    return (
+        f"<html><head><title>{topic}</title></head><body>"
+        f"<nav><a href='/'>Home</a></nav>{BOILERPLATE.format(links=links)}"
+        f"<article class='article-content'><h1>{topic}</h1>{body}"
+        f"<ul><li>Key point: review {topic.lower()} therapy at every visit</li></ul></article>"
+        f"{TAIL.format(links=links, references=references)}</body></html>"
+    )
+
+
+SYNTHETIC_PAGES = {
+    "short news item": build_page("Measles outbreak", paragraphs=3, sidebar_links=15),
+    "guideline summary": build_page("Hypertension", paragraphs=12, sidebar_links=20),
+    "long review": build_page("Heart failure", paragraphs=40, sidebar_links=40),
+}
+
+
+def load_encoding():
+    """Return the cl100k_base encoding, or None when it cannot be loaded (e.g. offline)."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str, encoding) -> int:
+    if encoding is None:
+        return len(text) // 4
+    return len(encoding.encode(text))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--html", nargs="*", default=[], help="Saved HTML pages to measure instead")
+    args = parser.parse_args()
+
+    pages = {Path(path).name: Path(path).read_bytes() for path in args.html} or SYNTHETIC_PAGES
+    engine = HTMLParseEngine()
+    encoding = load_encoding()
+    extractors = {"main": MainContentExtractor(), "main, prose only": MainContentExtractor(keep_structure=False)}
+    print(f"Backend: {engine.backend}, tokenizer: {'cl100k_base' if encoding else '~4 chars/token'}")
+    print(f"{'page':<20} {'full':>8} " + " ".join(f"{label:>24}" for label in extractors) + f" {'extract ms':>11}")
+
+    totals = {"full": 0, **{label: 0 for label in extractors}}
+    for name, html in pages.items():
+        full = count_tokens(engine.parse(html).text, encoding)
+        totals["full"] += full
+        cells = []
+        started = time.perf_counter()
+        for label, extractor in extractors.items():
+            tokens = count_tokens(engine.parse(html, extractor=extractor).text, encoding)
+            totals[label] += tokens
+            cells.append(f"{tokens:>8} ({1 - tokens / full:6.1%} less)")
+        elapsed_ms = 1000 * (time.perf_counter() - started) / len(extractors)
+        print(f"{name[:20]:<20} {full:>8} " + " ".join(cells) + f" {elapsed_ms:>11.2f}")
+
+    print(f"{'total':<20} {totals['full']:>8} " + " ".join(
+        f"{totals[label]:>8} ({1 - totals[label] / totals['full']:6.1%} less)" for label in extractors
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark the single-pass parse engine against the legacy three-parse path.
+
+Run from backend/ai-service:
+    python -m benchmarks.parse_engine --size-mb 5 --iterations 3
+"""
+
+import argparse
+import time
+
+from bs4 import BeautifulSoup
+
+from services.web_scraper import NOISE_TAGS, HTMLParseEngine
+
+SECTION = """
+<section>
+  <h2>Section {i}: Management of hypertension</h2>
+  <p>First-line therapy includes thiazide diuretics, ACE inhibitors, ARBs and
+  calcium channel blockers. Target blood pressure is below 130/80 mmHg for most
+  adults with confirmed hypertension and cardiovascular risk.</p>
+  <ul><li>Recommendation {i}.1</li><li>Recommendation {i}.2</li></ul>
+  <a href="/guidelines/section-{i}">Read more</a>
+  <a href="https://reference.example.org/drug/{i}">Drug monograph</a>
+  <script>window.track({i});</script>
+</section>
+"""
+
+
+def build_page(size_mb: float) -> str:
+    """Build a synthetic clinical guideline page of roughly ``size_mb`` megabytes."""
+    head = (
+        "<html><head><title>Clinical Guideline</title><style>p{margin:0}</style></head>"
+        "<body><nav><a href='/'>Home</a></nav><header><h1>Site</h1></header>"
+    )
+    target = int(size_mb * 1024 * 1024)
+    parts = [head]
+    length = len(head)
+    i = 0
+    while length < target:
+        section = SECTION.format(i=i)
+        parts.append(section)
+        length += len(section)
+        i += 1
+    parts.append("<footer>Footer</footer></body></html>")
+    return "".join(parts)
+
+
+def clean_soup(html: str) -> BeautifulSoup:
+    """One html.parser tree with noise tags decomposed, as the scraper used to build."""
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(list(NOISE_TAGS)):
+        tag.decompose()
+    return soup
+
+
+def legacy_parse(html: str, url: str) -> dict:
+    """Reproduce the previous fetch_and_parse: three independent html.parser trees."""
+    soup = clean_soup(html)
+    text = " ".join(clean_soup(html).get_text(" ").split())
+    links_soup = clean_soup(html)
+    links = list(dict.fromkeys(a["href"] for a in links_soup.find_all("a", href=True)))
+    title = soup.find("title")
+    return {"title": title.get_text(strip=True) if title else "Untitled", "text": text, "links": links}
+
+
+def measure(label: str, func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    pages_per_sec = iterations / elapsed
+    print(f"{label:<24} {elapsed / iterations:8.3f} s/page {pages_per_sec:8.2f} pages/s")
+    return pages_per_sec
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=float, default=5.0)
+    parser.add_argument("--iterations", type=int, default=3)
+    args = parser.parse_args()
+
+    html = build_page(args.size_mb)
+    url = "https://guidelines.example.org/hypertension"
+    print(f"Page size: {len(html) / 1024 / 1024:.1f} MB, iterations: {args.iterations}")
+
+    baseline = measure("legacy (3x html.parser)", lambda: legacy_parse(html, url), args.iterations)
+    for backend in HTMLParseEngine.available_backends():
+        engine = HTMLParseEngine(backend)
+        rate = measure(f"engine ({backend})", lambda: engine.parse(html, url), args.iterations)
+        print(f"{'':<24} speedup x{rate / baseline:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Compare tail latency of direct provider calls with the hedging ProviderRouter.
+
+Two fake providers answer with a typical latency, but a fraction of calls
+straggle (e.g. provider queueing). Run from backend/ai-service:
+    python -m benchmarks.provider_router --calls 400 --straggler-rate 0.05
+
+Hedging trades a few percent of duplicate calls for a much shorter tail.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from services.provider_router import ProviderRouter
+
+
+class SimulatedProvider:
+    def __init__(self, name: str, latency: float, straggler_rate: float, straggler_factor: float, rng: random.Random):
+        self.name = name
+        self.latency = latency
+        self.straggler_rate = straggler_rate
+        self.straggler_factor = straggler_factor
+        self.rng = rng
+        self.calls = 0
+
+    async def generate_text(self, prompt: str) -> str:
+        self.calls += 1
+        delay = self.latency * self.rng.uniform(0.7, 1.3)
+        if self.rng.random() < self.straggler_rate:
+            delay *= self.straggler_factor
+        await asyncio.sleep(delay)
+        return f"{self.name}: {prompt}"
+
+
+def percentile(samples, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+
+async def run(label: str, call, calls: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await call(f"prompt {i}")
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    print(
+        f"{label:<10} p50 {percentile(latencies, 0.5):7.1f} ms   "
+        f"p95 {percentile(latencies, 0.95):7.1f} ms   p99 {percentile(latencies, 0.99):7.1f} ms"
+    )
+
+
+async def main_async(args) -> None:
+    rng = random.Random(args.seed)
+
+    def providers():
+        return {
+            name: SimulatedProvider(name, args.latency_ms / 1000, args.straggler_rate, args.straggler_factor, rng)
+            for name in ("openai", "gemini")
+        }
+
+    direct = providers()
+    await run("direct", direct["openai"].generate_text, args.calls, args.concurrency)
+
+    routed = providers()
+    router = ProviderRouter(routed, default_hedge_delay=args.latency_ms * 2 / 1000, min_samples=20)
+    await run("hedged", lambda prompt: router.call("generate_text", prompt, preferred="openai"), args.calls, args.concurrency)
+
+    stats = router.stats()
+    extra = sum(p.calls for p in routed.values()) / args.calls - 1
+    print(f"hedges {stats['hedges']} ({extra:.1%} extra provider calls), hedge wins {stats['hedge_wins']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--straggler-rate", type=float, default=0.05)
+    parser.add_argument("--straggler-factor", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
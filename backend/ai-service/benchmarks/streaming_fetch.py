@@ -0,0 +1,66 @@
+"""Measure peak memory of buffered vs streaming fetch_html.
+
+Serves a chunked body (no content-length) from an in-process transport and
+records the tracemalloc peak for each mode. Run from backend/ai-service:
+    python -m benchmarks.streaming_fetch --body-mb 20 --limit-mb 5
+"""
+
+import argparse
+import asyncio
+import tracemalloc
+
+import httpx
+
+from services.web_scraper import AsyncWebScraper
+
+CHUNK = b"<p>" + b"Metformin lowers hepatic glucose production. " * 1400 + b"</p>\n"
+
+
+def build_client(body_bytes: int) -> httpx.AsyncClient:
+    async def body():
+        sent = 0
+        while sent < body_bytes:
+            yield CHUNK
+            sent += len(CHUNK)
+
+    def handler(request):
+        return httpx.Response(200, headers={"content-type": "text/html"}, content=body())
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+async def peak_memory(stream_body: bool, body_bytes: int, limit_bytes: int) -> tuple[float, str]:
+    client = build_client(body_bytes)
+    tracemalloc.start()
+    outcome = "ok"
+    try:
+        async with AsyncWebScraper(
+            client=client, stream_body=stream_body, max_response_size=limit_bytes
+        ) as scraper:
+            await scraper.fetch_html("https://guidelines.example.org/huge")
+    except ValueError:
+        outcome = "rejected"
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await client.aclose()
+    return peak / 1024 / 1024, outcome
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--body-mb", type=float, default=20.0)
+    parser.add_argument("--limit-mb", type=float, default=5.0)
+    args = parser.parse_args()
+
+    body_bytes = int(args.body_mb * 1024 * 1024)
+    for limit_mb in (args.body_mb * 2, args.limit_mb):
+        limit_bytes = int(limit_mb * 1024 * 1024)
+        print(f"body {args.body_mb:.0f} MB chunked, budget {limit_mb:.0f} MB")
+        for stream_body in (False, True):
+            peak, outcome = await peak_memory(stream_body, body_bytes, limit_bytes)
+            mode = "streaming" if stream_body else "buffered"
+            print(f"  {mode:<10} peak {peak:8.1f} MB  ({outcome})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""Compare the legacy per-call ``asyncio.run`` wrapper with the shared-loop WebScraper.
+
+Serves pages from a local keep-alive HTTP server with a fixed delay per
+request. Run from backend/ai-service:
+    python -m benchmarks.sync_scraper --pages 200 --delay-ms 20
+
+Over plain local HTTP only loop, client and TCP setup are saved; against
+real HTTPS hosts the per-call wrapper also pays a TLS handshake per URL.
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from services.web_scraper import AsyncWebScraper, WebScraper
+
+BODY = (
+    "<html><head><title>Guideline</title></head><body>"
+    + "<p>ACE inhibitors reduce mortality in heart failure with reduced ejection fraction.</p>" * 50
+    + "</body></html>"
+).encode()
+
+
+def start_server(delay: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(BODY)))
+            self.end_headers()
+            self.wfile.write(BODY)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def legacy_fetch_and_parse(url: str) -> dict:
+    """Reproduce the previous wrapper: a new loop, scraper and client per call."""
+    async def _async_fetch():
+        async with AsyncWebScraper() as scraper:
+            return await scraper.fetch_and_parse(url)
+
+    return asyncio.run(_async_fetch())
+
+
+async def async_batch(urls, max_concurrent: int) -> list:
+    async with AsyncWebScraper() as scraper:
+        return await scraper.fetch_and_parse_batch(urls, max_concurrent)
+
+
+def measure(label: str, func, pages: int) -> None:
+    started = time.perf_counter()
+    results = func()
+    elapsed = time.perf_counter() - started
+    assert len(results) == pages, f"{label}: {len(results)} of {pages} pages"
+    print(f"{label:<34} {elapsed:7.2f} s {pages / elapsed:9.1f} pages/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--delay-ms", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    server = start_server(args.delay_ms / 1000)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/page/{i}" for i in range(args.pages)]
+    scraper = WebScraper()
+    print(f"{args.pages} pages, {args.delay_ms:.0f} ms server delay, concurrency {args.concurrency}")
+
+    measure("legacy sync (asyncio.run per URL)", lambda: [legacy_fetch_and_parse(url) for url in urls], args.pages)
+    measure("sync, shared loop, per URL", lambda: [scraper.fetch_and_parse(url) for url in urls], args.pages)
+    measure("sync fetch_and_parse_batch", lambda: scraper.fetch_and_parse_batch(urls, args.concurrency), args.pages)
+    measure("async fetch_and_parse_batch", lambda: asyncio.run(async_batch(urls, args.concurrency)), args.pages)
+
+    WebScraper.close_shared()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,100 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, HttpUrl
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field, HttpUrl
+from typing import Dict, List, Literal, Optional
+import asyncio
+import hashlib
+import json
 import os
+import tempfile
+import time
 from dotenv import load_dotenv
 
 from services.openai_service import OpenAIService
 from services.gemini_service import GeminiService
 from services.rag_engine import RAGEngine
-from services.web_scraper import AsyncWebScraper
+from services.adaptive_limiter import AdaptiveLimiter
+from services.crawler import CrawlConfig, CrawlManager, CrawlStats
+from services.flashcard_mapreduce import ChunkedFlashcardGenerator
+from services.fingerprint import ContentFingerprint, FingerprintIndex, FingerprintMatch
+from services.http_cache import HTTPResponseCache
+from services.http_pool import HTTPConnectionPool
+from services.job_queue import JobQueue
+from services.llm_cache import LLMResponseCache
+from services.loop_monitor import LoopLagMonitor
+from services.pdf_ingest import PDFExtractor, count_pages, index_pdf_pages
+from services.politeness import HostScheduler
+from services.provider_router import ProviderRouter, RoutedService
+from services.semantic_cache import SemanticAnswerCache
+from services.single_flight import SingleFlight
+from services.streaming import SSE_HEADERS, StreamMetrics, format_sse, sse_events, start_stream
+from services.sitemap import SitemapStateStore, SitemapSyncStats
+from services.web_scraper import AsyncWebScraper, MainContentExtractor, ParseExecutor
 
 load_dotenv()
 
-app = FastAPI(title="PBL AI Service", version="1.0.0")
+# Shared outbound connection pool for every scraping endpoint
+http_pool = HTTPConnectionPool.from_env()
+# Conditional-GET page cache shared by the same endpoints
+http_cache = HTTPResponseCache.from_env()
+# Per-host pacing shared by every scraper so concurrent requests stay polite
+host_scheduler = HostScheduler.from_env()
+# Worker processes that parse pages off the event loop
+parse_executor = ParseExecutor.from_env()
+# Keeps only a page's main content so prompts and RAG chunks skip boilerplate
+content_extractor = (
+    MainContentExtractor.from_env() if os.getenv("SCRAPER_MAIN_CONTENT", "false").lower() == "true" else None
+)
+loop_monitor = LoopLagMonitor()
+# Worker processes extracting uploaded PDFs page range by page range
+pdf_extractor = PDFExtractor.from_env()
+# Fingerprints of indexed content, checked before embedding or LLM calls
+fingerprint_index = FingerprintIndex.from_env()
+# Last ingested lastmod per sitemap URL, for incremental re-crawls
+sitemap_state = SitemapStateStore.from_env()
+# Background site crawls and sitemap syncs started through the API
+crawl_manager = CrawlManager()
+# Scrape-and-generate/index runs submitted as background jobs, persisted in SQLite
+job_queue = JobQueue.from_env()
+# Provider responses for repeated identical requests (in-process LRU + Redis)
+llm_cache = LLMResponseCache.from_env()
+# Identical provider calls in flight at the same time share one request
+llm_flights = SingleFlight()
+# Per-provider adaptive concurrency and tokens-per-minute limits, shared by every caller of that provider
+llm_limiters = {name: AdaptiveLimiter.from_env(name) for name in ("openai", "gemini")}
+# Long content is split and its chunks' flashcards generated concurrently
+flashcard_generator = ChunkedFlashcardGenerator.from_env()
+# Time-to-first-token of answers and summaries streamed over SSE
+stream_metrics = StreamMetrics()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await http_pool.start()
+    await parse_executor.start()
+    pdf_extractor.start()
+    loop_monitor.start()
+    await job_queue.start()
+    try:
+        yield
+    finally:
+        await job_queue.shutdown()
+        await crawl_manager.shutdown()
+        await loop_monitor.stop()
+        await parse_executor.shutdown()
+        await pdf_extractor.shutdown()
+        await http_pool.aclose()
+        http_cache.close()
+        fingerprint_index.close()
+        sitemap_state.close()
+        job_queue.store.close()
+        await llm_cache.aclose()
+
+
+app = FastAPI(title="PBL AI Service", version="1.0.0", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -24,15 +106,94 @@ app.add_middleware(
 )
 
 # Initialize services
-openai_service = OpenAIService()
-gemini_service = GeminiService()
-rag_engine = RAGEngine()
+openai_service = OpenAIService(cache=llm_cache, single_flight=llm_flights, limiter=llm_limiters["openai"])
+gemini_service = GeminiService(cache=llm_cache, single_flight=llm_flights, limiter=llm_limiters["gemini"])
+# Requested provider first, hedging to and failing over to the other configured one
+llm_router = ProviderRouter.from_env({
+    name: service
+    for name, service, key in (
+        ("openai", openai_service, "OPENAI_API_KEY"),
+        ("gemini", gemini_service, "GEMINI_API_KEY"),
+    )
+    if os.getenv(key)
+} or {"openai": openai_service, "gemini": gemini_service})
+# RAG answers reused for semantically similar questions until the indexed notes change
+answer_cache = SemanticAnswerCache.from_env() if os.getenv("SEMANTIC_CACHE", "true").lower() == "true" else None
+rag_engine = RAGEngine(limiter=llm_limiters["openai"], answer_cache=answer_cache)
+
+
+def get_scraper() -> AsyncWebScraper:
+    """Create a scraper that borrows the app-wide pooled HTTP client, page cache and scheduler."""
+    return AsyncWebScraper(
+        client=http_pool.client,
+        stream_body=True,
+        cache=http_cache,
+        scheduler=host_scheduler,
+        parse_executor=parse_executor,
+        content_extractor=content_extractor,
+    )
+
+
+async def find_duplicate(content: Dict) -> Optional[FingerprintMatch]:
+    """Look up already-processed content matching a scraped page's fingerprint"""
+    fingerprint = ContentFingerprint.from_dict(content["fingerprint"])
+    return await asyncio.to_thread(fingerprint_index.lookup, fingerprint, content["url"])
+
+
+async def index_page(content: Dict, duplicate: Optional[FingerprintMatch]) -> int:
+    """Index a scraped page to RAG unless a duplicate is already indexed
+
+    A page indexed before under the same URL with different content has
+    its old chunks replaced.
+    """
+    if duplicate is not None:
+        fingerprint_index.record_skip(chunks=duplicate.chunks)
+        return 0
+    if await asyncio.to_thread(fingerprint_index.content_hash_for, content["url"]) is not None:
+        await rag_engine.remove_note(content["id"])
+    chunks = await rag_engine.index_notes([{
+        "id": content["id"],
+        "title": content["title"],
+        "content": content["text"]
+    }])
+    await asyncio.to_thread(
+        fingerprint_index.add,
+        ContentFingerprint.from_dict(content["fingerprint"]),
+        content["url"],
+        content["id"],
+        chunks,
+    )
+    return chunks
+
+
+async def generate_page_flashcards(
+    content: Dict,
+    duplicate: Optional[FingerprintMatch],
+    service,
+    provider: str,
+    count: int,
+) -> List[Dict]:
+    """Generate flashcards for a page, reusing those of identical or near-identical content
+
+    Cards are stored under the provider that actually generated them, which
+    after a hedge or failover is not the requested one.
+    """
+    content_hash = duplicate.content_hash if duplicate else content["fingerprint"]["content_hash"]
+    flashcards = await asyncio.to_thread(fingerprint_index.get_artifact, content_hash, f"flashcards:{provider}:{count}")
+    if flashcards is not None:
+        fingerprint_index.record_skip(llm_calls=1)
+        return flashcards
+    flashcards = await flashcard_generator.generate(service, content["text"], count)
+    key = f"flashcards:{service.provider or provider}:{count}"
+    await asyncio.to_thread(fingerprint_index.put_artifact, content_hash, key, flashcards)
+    return flashcards
 
 
 class GenerateFlashcardsRequest(BaseModel):
     content: str
     count: int = 10
     provider: str = "openai"
+    mode: Literal["auto", "single", "chunked"] = "auto"
 
 
 class FlashcardResponse(BaseModel):
@@ -46,6 +207,17 @@ class QuestionRequest(BaseModel):
     question: str
     context: Optional[str] = None
     use_rag: bool = False
+    use_cache: bool = True
+
+
+class StreamQuestionRequest(QuestionRequest):
+    provider: str = "openai"
+
+
+class SummarizeRequest(BaseModel):
+    content: str
+    max_length: int = 500
+    provider: str = "openai"
 
 
 class ScrapeRequest(BaseModel):
@@ -63,7 +235,24 @@ class ScrapeAndGenerateRequest(BaseModel):
 
 class BatchScrapeRequest(BaseModel):
     urls: List[HttpUrl]
-    max_concurrent: int = 5
+    max_concurrent: int = Field(default=5, ge=1, le=100)
+
+
+class CrawlRequest(BaseModel):
+    url: HttpUrl
+    max_depth: int = Field(default=2, ge=0, le=10)
+    max_pages: int = Field(default=100, ge=1, le=100000)
+    same_domain: bool = True
+    path_prefix: Optional[str] = None
+    max_concurrent: int = Field(default=5, ge=1, le=100)
+    index_to_rag: bool = True
+
+
+class SitemapSyncRequest(BaseModel):
+    url: HttpUrl
+    max_concurrent: int = Field(default=5, ge=1, le=100)
+    recheck_undated: bool = False
+    index_to_rag: bool = True
 
 
 @app.get("/health")
@@ -74,31 +263,46 @@ async def health_check():
         "providers": {
             "openai": bool(os.getenv("OPENAI_API_KEY")),
             "gemini": bool(os.getenv("GEMINI_API_KEY"))
-        }
+        },
+        "http_pool": http_pool.stats(),
+        "http_cache": http_cache.stats(),
+        "host_scheduler": host_scheduler.stats(),
+        "parse_executor": parse_executor.stats(),
+        "pdf_extractor": pdf_extractor.stats(),
+        "fingerprint_index": await asyncio.to_thread(fingerprint_index.stats),
+        "sitemap_state": await asyncio.to_thread(sitemap_state.stats),
+        # Counts stored jobs in SQLite, so off the event loop
+        "jobs": await asyncio.to_thread(job_queue.stats),
+        "llm_cache": llm_cache.stats(),
+        "llm_single_flight": llm_flights.stats(),
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+        "llm_limiters": {name: limiter.stats() for name, limiter in llm_limiters.items()},
+        "llm_router": llm_router.stats(),
+        "token_budget": openai_service.budget.stats(),
+        "gemini": gemini_service.stats(),
+        "flashcard_generator": flashcard_generator.stats(),
+        "streaming": stream_metrics.stats(),
+        "event_loop_lag": loop_monitor.stats(),
     }
 
 
 @app.post("/api/generate-flashcards")
 async def generate_flashcards(request: GenerateFlashcardsRequest):
-    """Generate flashcards from content using AI"""
+    """Generate flashcards from content using AI (long content in parallel chunks)"""
+    service = get_routed_service(request.provider)
+
     try:
-        if request.provider == "openai":
-            flashcards = await openai_service.generate_flashcards(
-                request.content,
-                request.count
-            )
-        elif request.provider == "gemini":
-            flashcards = await gemini_service.generate_flashcards(
-                request.content,
-                request.count
-            )
-        else:
-            raise HTTPException(status_code=400, message="Invalid provider")
+        flashcards = await flashcard_generator.generate(
+            service,
+            request.content,
+            request.count,
+            request.mode
+        )
 
         return {
             "flashcards": flashcards,
             "count": len(flashcards),
-            "provider": request.provider
+            "provider": service.provider or request.provider
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -107,22 +311,24 @@ async def generate_flashcards(request: GenerateFlashcardsRequest):
 @app.post("/api/answer-question")
 async def answer_question(request: QuestionRequest):
     """Answer a question with optional RAG context"""
+    service = None if request.use_rag else get_routed_service("openai")
     try:
         if request.use_rag:
-            answer = await rag_engine.answer_with_context(request.question)
+            answer = await rag_engine.answer_with_context(request.question, use_cache=request.use_cache)
             return {
                 "answer": answer["answer"],
                 "sources": answer.get("sources", []),
-                "method": "rag"
+                "method": "rag",
+                "cache": answer.get("cache")
             }
         else:
             if request.context:
-                answer = await openai_service.answer_with_context(
+                answer = await service.answer_with_context(
                     request.question,
                     request.context
                 )
             else:
-                answer = await openai_service.generate_text(request.question)
+                answer = await service.generate_text(request.question)
             
             return {
                 "answer": answer,
@@ -135,18 +341,118 @@ async def answer_question(request: QuestionRequest):
 @app.post("/api/summarize")
 async def summarize_content(content: str, max_length: int = 500):
     """Summarize long content"""
+    service = get_routed_service("openai")
     try:
-        summary = await openai_service.summarize(content, max_length)
+        summary = await service.summarize(content, max_length)
         return {"summary": summary}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def get_llm_service(provider: str):
+    """Return the service of an LLM provider name"""
+    if provider == "openai":
+        return openai_service
+    if provider == "gemini":
+        return gemini_service
+    raise HTTPException(status_code=400, detail="Invalid provider")
+
+
+def provider_error(provider: str) -> Optional[str]:
+    """Why requests cannot be routed to an LLM provider name, or None if they can
+
+    A known provider without an API key is rejected rather than silently
+    served by another one.
+    """
+    if provider not in ("openai", "gemini"):
+        return "Invalid provider"
+    if provider not in llm_router.providers:
+        return f"Provider not configured: {provider}"
+    return None
+
+
+def get_routed_service(provider: str):
+    """Return a router-backed service preferring an LLM provider name"""
+    if error := provider_error(provider):
+        raise HTTPException(status_code=400, detail=error)
+    return llm_router.service(provider)
+
+
+async def sse_response(tokens, method: str, leading=(), started: Optional[float] = None) -> StreamingResponse:
+    """Stream provider tokens as server-sent events once the first token arrives"""
+    started = time.perf_counter() if started is None else started
+    try:
+        tokens = await start_stream(tokens)
+    except Exception as e:
+        stream_metrics.record(None, time.perf_counter() - started, error=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    return StreamingResponse(
+        sse_events(tokens, leading, {"method": method}, stream_metrics, started),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@app.post("/api/answer-question/stream")
+async def answer_question_stream(request: StreamQuestionRequest):
+    """Answer a question with optional RAG context, streamed as server-sent events"""
+    started = time.perf_counter()
+    if request.use_rag:
+        try:
+            sources, tokens = await rag_engine.stream_answer_with_context(request.question)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        return await sse_response(tokens, "rag", [("sources", sources)], started)
+
+    service = get_llm_service(request.provider)
+    if request.context:
+        tokens = service.stream_answer_with_context(request.question, request.context)
+    else:
+        tokens = service.stream_text(request.question)
+    return await sse_response(tokens, "direct", started=started)
+
+
+@app.post("/api/summarize/stream")
+async def summarize_content_stream(request: SummarizeRequest):
+    """Summarize long content, streamed as server-sent events"""
+    started = time.perf_counter()
+    service = get_llm_service(request.provider)
+    tokens = service.stream_summarize(request.content, request.max_length)
+    return await sse_response(tokens, "summary", started=started)
+
+
+@app.post("/api/generate-flashcards/stream")
+async def generate_flashcards_stream(request: GenerateFlashcardsRequest):
+    """Generate flashcards, streaming each card as NDJSON as soon as it is complete"""
+    service = get_llm_service(request.provider)
+    try:
+        cards = await start_stream(service.stream_flashcards(request.content, request.count))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def stream_cards():
+        count = 0
+        try:
+            async for card in cards:
+                count += 1
+                yield json.dumps({"status": "card", "card": card}) + "\n"
+            yield json.dumps({
+                "status": "complete",
+                "count": count,
+                "requested": request.count,
+                "provider": request.provider,
+            }) + "\n"
+        except Exception as e:
+            yield json.dumps({"status": "error", "error": str(e), "count": count}) + "\n"
+
+    return StreamingResponse(stream_cards(), media_type="application/x-ndjson")
+
+
 @app.post("/api/scrape")
 async def scrape_url(request: ScrapeRequest):
     """Scrape a URL and return structured content"""
     try:
-        async with AsyncWebScraper() as scraper:
+        async with get_scraper() as scraper:
             content = await scraper.fetch_and_parse(str(request.url))
             
             return {
@@ -163,43 +469,108 @@ async def scrape_url(request: ScrapeRequest):
         raise HTTPException(status_code=500, detail=f"Scraping failed: {str(e)}")
 
 
+async def scrape_and_index_pipeline(request: ScrapeRequest, progress=lambda **fields: None) -> Dict:
+    """Scrape URL and optionally index to RAG / generate flashcards, reporting progress by stage"""
+    if request.generate_flashcards and (error := provider_error("openai")):
+        raise ValueError(error)
+    async with get_scraper() as scraper:
+        # Scrape content
+        progress(stage="scraping")
+        content = await scraper.fetch_and_parse(str(request.url))
+        
+        result = {
+            "status": "success",
+            "url": content["url"],
+            "title": content["title"],
+            "text_length": content["length"],
+            "links_found": len(content["links"]),
+            "fingerprint": content["fingerprint"],
+        }
+        
+        # Skip work already done for the same (or near-identical) content
+        duplicate = None
+        if request.index_to_rag or request.generate_flashcards:
+            duplicate = await find_duplicate(content)
+            result["duplicate_of"] = duplicate.to_dict() if duplicate else None
+        
+        # Index to RAG if requested
+        if request.index_to_rag:
+            progress(stage="indexing", title=content["title"])
+            result["chunks_indexed"] = await index_page(content, duplicate)
+        
+        # Generate flashcards if requested
+        if request.generate_flashcards:
+            progress(stage="generating", title=content["title"])
+            flashcards = await generate_page_flashcards(
+                content, duplicate, llm_router.service("openai"), "openai", request.flashcard_count
+            )
+            result["flashcards"] = flashcards
+            result["flashcard_count"] = len(flashcards)
+        
+        return result
+
+
+async def scrape_and_generate_pipeline(
+    request: ScrapeAndGenerateRequest,
+    service: RoutedService,
+    progress=lambda **fields: None,
+) -> Dict:
+    """Scrape URL, index to RAG, and generate flashcards with ``service``, reporting progress by stage"""
+    async with get_scraper() as scraper:
+        # Scrape content
+        progress(stage="scraping")
+        content = await scraper.fetch_and_parse(str(request.url))
+        
+        # Index to RAG, skipping content that is already indexed
+        progress(stage="indexing", title=content["title"])
+        duplicate = await find_duplicate(content)
+        chunks = await index_page(content, duplicate)
+        
+        # Generate flashcards
+        progress(stage="generating", title=content["title"], chunks_indexed=chunks)
+        flashcards = await generate_page_flashcards(
+            content, duplicate, service, request.provider, request.flashcard_count
+        )
+        
+        return {
+            "status": "success",
+            "url": content["url"],
+            "title": content["title"],
+            "text_length": content["length"],
+            "links_found": len(content["links"]),
+            "chunks_indexed": chunks,
+            "duplicate_of": duplicate.to_dict() if duplicate else None,
+            "flashcards": flashcards,
+            "flashcard_count": len(flashcards),
+            # Hedging or failover may have served the request with another provider
+            "provider": service.provider or request.provider,
+        }
+
+
+job_queue.register(
+    "scrape-and-index",
+    lambda params, progress: scrape_and_index_pipeline(ScrapeRequest(**params), progress),
+)
+
+
+async def run_scrape_and_generate_job(params: Dict, progress) -> Dict:
+    """Job handler: re-check the provider, which may have lost its key since the job was queued"""
+    request = ScrapeAndGenerateRequest(**params)
+    if error := provider_error(request.provider):
+        raise ValueError(error)
+    return await scrape_and_generate_pipeline(request, llm_router.service(request.provider), progress)
+
+
+job_queue.register("scrape-and-generate", run_scrape_and_generate_job)
+
+
 @app.post("/api/scrape-and-index")
 async def scrape_and_index(request: ScrapeRequest):
     """Scrape URL and optionally index to RAG / generate flashcards"""
+    if request.generate_flashcards and (error := provider_error("openai")):
+        raise HTTPException(status_code=400, detail=error)
     try:
-        async with AsyncWebScraper() as scraper:
-            # Scrape content
-            content = await scraper.fetch_and_parse(str(request.url))
-            
-            result = {
-                "status": "success",
-                "url": content["url"],
-                "title": content["title"],
-                "text_length": content["length"],
-                "links_found": len(content["links"]),
-            }
-            
-            # Index to RAG if requested
-            if request.index_to_rag:
-                notes = [{
-                    "id": content["id"],
-                    "title": content["title"],
-                    "content": content["text"]
-                }]
-                chunks = await rag_engine.index_notes(notes)
-                result["chunks_indexed"] = chunks
-            
-            # Generate flashcards if requested
-            if request.generate_flashcards:
-                flashcards = await openai_service.generate_flashcards(
-                    content["text"],
-                    request.flashcard_count
-                )
-                result["flashcards"] = flashcards
-                result["flashcard_count"] = len(flashcards)
-            
-            return result
-            
+        return await scrape_and_index_pipeline(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Operation failed: {str(e)}")
 
@@ -207,74 +578,237 @@ async def scrape_and_index(request: ScrapeRequest):
 @app.post("/api/scrape-and-generate")
 async def scrape_and_generate(request: ScrapeAndGenerateRequest):
     """Scrape URL, index to RAG, and generate flashcards"""
+    service = get_routed_service(request.provider)
     try:
-        async with AsyncWebScraper() as scraper:
-            # Scrape content
-            content = await scraper.fetch_and_parse(str(request.url))
-            
-            # Index to RAG
-            notes = [{
-                "id": content["id"],
-                "title": content["title"],
-                "content": content["text"]
-            }]
-            chunks = await rag_engine.index_notes(notes)
-            
-            # Generate flashcards
-            if request.provider == "openai":
-                flashcards = await openai_service.generate_flashcards(
-                    content["text"],
-                    request.flashcard_count
-                )
-            elif request.provider == "gemini":
-                flashcards = await gemini_service.generate_flashcards(
-                    content["text"],
-                    request.flashcard_count
-                )
-            else:
-                raise HTTPException(status_code=400, detail="Invalid provider")
-            
-            return {
-                "status": "success",
-                "url": content["url"],
-                "title": content["title"],
-                "text_length": content["length"],
-                "links_found": len(content["links"]),
-                "chunks_indexed": chunks,
-                "flashcards": flashcards,
-                "flashcard_count": len(flashcards),
-                "provider": request.provider,
-            }
-            
+        return await scrape_and_generate_pipeline(request, service)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Operation failed: {str(e)}")
 
 
+@app.post("/api/jobs/scrape-and-index", status_code=202)
+async def submit_scrape_and_index(request: ScrapeRequest):
+    """Queue a scrape-and-index run, returning its job without waiting for the pipeline"""
+    if request.generate_flashcards and (error := provider_error("openai")):
+        raise HTTPException(status_code=400, detail=error)
+    job = await job_queue.submit("scrape-and-index", request.model_dump(mode="json"))
+    return job.to_dict()
+
+
+@app.post("/api/jobs/scrape-and-generate", status_code=202)
+async def submit_scrape_and_generate(request: ScrapeAndGenerateRequest):
+    """Queue a scrape-and-generate run, returning its job without waiting for the pipeline"""
+    if error := provider_error(request.provider):
+        raise HTTPException(status_code=400, detail=error)
+    job = await job_queue.submit("scrape-and-generate", request.model_dump(mode="json"))
+    return job.to_dict()
+
+
+@app.get("/api/jobs")
+async def list_jobs(limit: int = 50):
+    """List recent jobs, newest first"""
+    return [job.to_dict() for job in await job_queue.list(limit)]
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Report a job's state, progress and (once completed) result"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Stream a job's progress as server-sent events, ending with its final state"""
+    if await job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        async for job in job_queue.watch(job_id):
+            yield format_sse(job.to_dict(), event=job.state if job.finished else "progress")
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@app.delete("/api/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    if await job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"job_id": job_id, "cancelled": await job_queue.cancel(job_id)}
+
+
 @app.post("/api/scrape-batch")
 async def scrape_batch(request: BatchScrapeRequest):
-    """Scrape multiple URLs concurrently"""
-    try:
-        urls = [str(url) for url in request.urls]
-        
-        async with AsyncWebScraper() as scraper:
-            results = await scraper.fetch_and_parse_batch(urls[:request.max_concurrent])
-            
-            return {
-                "status": "success",
-                "total_urls": len(urls),
-                "processed": len(results),
-                "results": [
-                    {
+    """Scrape every URL with at most max_concurrent in flight, streaming NDJSON results"""
+    urls = [str(url) for url in request.urls]
+
+    async def stream_results():
+        processed = 0
+        failed = 0
+        async with get_scraper() as scraper:
+            async for r in scraper.iter_fetch_and_parse(
+                urls, request.max_concurrent, include_errors=True
+            ):
+                if "error" in r:
+                    failed += 1
+                    line = {"status": "error", "url": r["url"], "error": r["error"]}
+                else:
+                    processed += 1
+                    line = {
+                        "status": "success",
                         "url": r["url"],
                         "title": r["title"],
                         "text_length": r["length"],
                         "links_found": len(r["links"]),
                     }
-                    for r in results
-                ]
-            }
+                yield json.dumps(line) + "\n"
+        yield json.dumps({
+            "status": "complete",
+            "total_urls": len(urls),
+            "processed": processed,
+            "failed": failed,
+        }) + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+
+async def index_crawled_page(page: Dict, stats: CrawlStats) -> None:
+    """Index a page fetched by a background crawl, skipping duplicate content"""
+    if not page["text"]:
+        return
+    duplicate = await find_duplicate(page)
+    if duplicate is not None:
+        stats.pages_duplicate += 1
+    else:
+        stats.pages_indexed += 1
+    stats.chunks_indexed += await index_page(page, duplicate)
+
+
+@app.post("/api/crawl", status_code=202)
+async def start_crawl(request: CrawlRequest):
+    """Start a background breadth-first crawl, indexing each page to RAG as it is fetched"""
+    config = CrawlConfig(
+        max_depth=request.max_depth,
+        max_pages=request.max_pages,
+        same_domain=request.same_domain,
+        path_prefix=request.path_prefix,
+        max_concurrent=request.max_concurrent,
+    )
+
+    async def run(stats: CrawlStats) -> None:
+        async with get_scraper() as scraper:
+            async for page in scraper.crawl(str(request.url), config, stats):
+                if request.index_to_rag:
+                    await index_crawled_page(page, stats)
+
+    stats = crawl_manager.start(str(request.url), run)
+    return stats.to_dict()
+
+
+@app.post("/api/sitemap-sync", status_code=202)
+async def start_sitemap_sync(request: SitemapSyncRequest):
+    """Start a background sync fetching only sitemap URLs that are new or changed since the last sync"""
+    sitemap_url = str(request.url)
+
+    async def run(stats: SitemapSyncStats) -> None:
+        async with get_scraper() as scraper:
+            async for page in scraper.sync_sitemap(
+                sitemap_url,
+                sitemap_state,
+                request.max_concurrent,
+                request.recheck_undated,
+                stats,
+            ):
+                if request.index_to_rag:
+                    await index_crawled_page(page, stats)
+
+    stats = crawl_manager.start(sitemap_url, run, SitemapSyncStats(start_url=sitemap_url))
+    return stats.to_dict()
+
+
+@app.get("/api/crawl")
+async def list_crawls():
+    """List recent crawls and their progress"""
+    return [stats.to_dict() for stats in crawl_manager.list()]
+
+
+@app.get("/api/crawl/{crawl_id}")
+async def get_crawl(crawl_id: str):
+    """Report progress of a crawl"""
+    stats = crawl_manager.get(crawl_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Crawl not found")
+    return stats.to_dict()
+
+
+@app.delete("/api/crawl/{crawl_id}")
+async def cancel_crawl(crawl_id: str):
+    """Cancel a running crawl"""
+    if crawl_manager.get(crawl_id) is None:
+        raise HTTPException(status_code=404, detail="Crawl not found")
+    return {"crawl_id": crawl_id, "cancelled": crawl_manager.cancel(crawl_id)}
+
+
+def spool_upload(upload, path: str) -> str:
+    """Copy an upload to disk in 1 MB chunks, returning its SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "wb") as out:
+        while chunk := upload.read(1024 * 1024):
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest()
+
+
+@app.post("/api/ingest-pdf")
+async def ingest_pdf(file: UploadFile = File(...), title: Optional[str] = Form(None)):
+    """Upload a PDF and index it to RAG page by page, streaming NDJSON progress"""
+    if file.content_type != "application/pdf" and not (file.filename or "").lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF uploads are supported")
+
+    # Worker processes read page ranges straight from this file
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    try:
+        digest = await asyncio.to_thread(spool_upload, file.file, path)
+        total_pages = await asyncio.to_thread(count_pages, path)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Batch scraping failed: {str(e)}")
+        os.unlink(path)
+        raise HTTPException(status_code=400, detail=f"Invalid PDF: {str(e)}")
+
+    document_id = f"pdf-{digest[:16]}"
+    document_title = title or file.filename or "Untitled PDF"
+
+    async def stream_progress():
+        progress = {"pages_done": 0, "pages_indexed": 0, "chunks_indexed": 0}
+        try:
+            # The note id comes from the file's hash, so a re-upload replaces the earlier chunks
+            await rag_engine.remove_note(document_id)
+            async for progress in index_pdf_pages(
+                pdf_extractor.iter_pages(path),
+                rag_engine.index_notes,
+                document_id,
+                document_title,
+            ):
+                yield json.dumps({"status": "progress", "total_pages": total_pages, **progress}) + "\n"
+            yield json.dumps({
+                "status": "complete",
+                "document_id": document_id,
+                "title": document_title,
+                "total_pages": total_pages,
+                **progress,
+            }) + "\n"
+        except Exception as e:
+            yield json.dumps({"status": "error", "error": str(e), **progress}) + "\n"
+
+    # Runs after the response even if the client disconnects before the body is read
+    return StreamingResponse(
+        stream_progress(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(os.unlink, path),
+    )
 
 
 if __name__ == "__main__":
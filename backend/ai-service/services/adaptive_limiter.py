@@ -0,0 +1,247 @@
+"""Adaptive (AIMD) concurrency limiting for LLM provider calls.
+
+Providers signal overload with 429s and timeouts long before a fixed
+concurrency limit would notice. Each provider gets one limiter, shared by
+every component calling it, that probes for the highest sustainable
+concurrency the way TCP congestion control does:
+
+- every successful call raises the limit by ``increase / limit``, i.e.
+  about ``increase`` per round of ``limit`` calls (additive increase)
+- a 429 or timeout multiplies it by ``decrease``, at most once per
+  ``decrease_interval`` so one burst of rejections counts once
+  (multiplicative decrease)
+
+An optional tokens-per-minute budget is enforced with a token bucket:
+callers reserve their estimated prompt + completion tokens, and the
+unused part is refunded once the actual usage is known. Calls over the
+limit queue and fail with ``QueueTimeout`` if no slot frees up in time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Exception class names that mean "back off", across the OpenAI, Google and httpx clients
+OVERLOAD_ERRORS = {
+    "RateLimitError",
+    "APITimeoutError",
+    "ResourceExhausted",
+    "DeadlineExceeded",
+    "TooManyRequests",
+    "ServiceUnavailable",
+    "TimeoutException",
+    "TimeoutError",
+}
+
+
+class QueueTimeout(TimeoutError):
+    """No provider slot (or token budget) became available before the queue deadline."""
+
+
+def is_overload(error: BaseException) -> bool:
+    """Whether a provider error signals overload (rate limit or timeout)."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    if getattr(error, "status_code", None) == 429 or getattr(error, "code", None) == 429:
+        return True
+    return any(cls.__name__ in OVERLOAD_ERRORS for cls in type(error).__mro__)
+
+
+class _Permit:
+    """Handle of one admitted call, used to report actual token usage."""
+
+    def __init__(self, reserved: int) -> None:
+        self.reserved = reserved
+        self.used: Optional[int] = None
+
+    def record_usage(self, tokens: Optional[int]) -> None:
+        if tokens is not None:
+            self.used = tokens
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit plus tokens-per-minute budget for one provider."""
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        decrease_interval: float = 1.0,
+        tokens_per_minute: Optional[int] = None,
+        queue_timeout: float = 30.0,
+    ) -> None:
+        """Initialize the limiter.
+
+        Args:
+            name: Provider name, for logs and stats
+            initial_limit: Concurrent calls allowed at start
+            min_limit: Lowest the limit is ever cut to
+            max_limit: Highest the limit is ever raised to
+            increase: Limit added per round of ``limit`` successful calls
+            decrease: Factor applied to the limit on overload
+            decrease_interval: Minimum seconds between two decreases
+            tokens_per_minute: Provider TPM quota; unlimited when None
+            queue_timeout: Seconds a call may wait for a slot
+        """
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min_limit <= max_limit")
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.increase = increase
+        self.decrease = decrease
+        self.decrease_interval = decrease_interval
+        self.tokens_per_minute = tokens_per_minute
+        self.queue_timeout = queue_timeout
+        self._tokens = float(tokens_per_minute or 0)
+        self._refilled_at = time.monotonic()
+        self._last_decrease = float("-inf")
+        self._condition = asyncio.Condition()
+        self.in_flight = 0
+        self.waiting = 0
+        self.calls = 0
+        self.successes = 0
+        self.overloads = 0
+        self.queue_timeouts = 0
+
+    @classmethod
+    def from_env(cls, name: str, max_limit: Optional[int] = None) -> "AdaptiveLimiter":
+        """Build a limiter from ``<NAME>_*`` and ``LLM_QUEUE_TIMEOUT`` environment variables.
+
+        ``max_limit`` overrides ``<NAME>_MAX_CONCURRENT`` when given.
+        """
+        prefix = name.upper()
+        tpm = os.getenv(f"{prefix}_TPM")
+        return cls(
+            name,
+            initial_limit=int(os.getenv(f"{prefix}_INITIAL_CONCURRENCY", "4")),
+            min_limit=int(os.getenv(f"{prefix}_MIN_CONCURRENCY", "1")),
+            max_limit=max_limit or int(os.getenv(f"{prefix}_MAX_CONCURRENT", "32")),
+            tokens_per_minute=int(tpm) if tpm else None,
+            queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT", "30")),
+        )
+
+    def _refill(self) -> None:
+        if self.tokens_per_minute is None:
+            return
+        now = time.monotonic()
+        self._tokens = min(
+            float(self.tokens_per_minute),
+            self._tokens + (now - self._refilled_at) * self.tokens_per_minute / 60,
+        )
+        self._refilled_at = now
+
+    def _tokens_needed(self, tokens: int) -> float:
+        # A call larger than the whole bucket waits for a full bucket rather than forever
+        return min(tokens, self.tokens_per_minute) if self.tokens_per_minute else 0
+
+    def _token_wait(self, tokens: int) -> float:
+        """Seconds until the bucket holds enough tokens for a call."""
+        if self.tokens_per_minute is None:
+            return 0.0
+        return max(0.0, (self._tokens_needed(tokens) - self._tokens) * 60 / self.tokens_per_minute)
+
+    def _has_slot(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    @asynccontextmanager
+    async def acquire(self, tokens: int = 0):
+        """Hold a call slot, reserving ``tokens`` of the TPM budget.
+
+        Yields a permit whose ``record_usage`` refunds unused tokens.
+        Overload errors raised inside the block cut the limit; a clean
+        exit raises it.
+
+        Raises:
+            QueueTimeout: If no slot frees up within ``queue_timeout``
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.queue_timeout
+        async with self._condition:
+            self.waiting += 1
+            try:
+                while True:
+                    self._refill()
+                    token_wait = self._token_wait(tokens)
+                    if self._has_slot() and token_wait == 0:
+                        break
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        self.queue_timeouts += 1
+                        raise QueueTimeout(f"No {self.name} capacity within {self.queue_timeout:g}s")
+                    # Slots free up on notify; tokens accrue with time, so also wake when they will suffice
+                    timeout = min(remaining, token_wait) if self._has_slot() else remaining
+                    try:
+                        await asyncio.wait_for(self._condition.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+            self.calls += 1
+            if self.tokens_per_minute is not None:
+                self._tokens -= self._tokens_needed(tokens)
+
+        permit = _Permit(tokens)
+        error: Optional[BaseException] = None
+        try:
+            yield permit
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            async with self._condition:
+                self.in_flight -= 1
+                if permit.used is not None and self.tokens_per_minute is not None:
+                    self._tokens += self._tokens_needed(permit.reserved) - min(permit.used, self.tokens_per_minute)
+                if error is None:
+                    self._on_success()
+                elif isinstance(error, Exception) and is_overload(error):
+                    self._on_overload(error)
+                self._condition.notify_all()
+
+    def _on_success(self) -> None:
+        self.successes += 1
+        self.limit = min(float(self.max_limit), self.limit + self.increase / self.limit)
+
+    def _on_overload(self, error: BaseException) -> None:
+        self.overloads += 1
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_interval:
+            return
+        self._last_decrease = now
+        previous = self.limit
+        self.limit = max(float(self.min_limit), self.limit * self.decrease)
+        logger.warning(
+            "Provider overloaded; reducing concurrency",
+            extra={"provider": self.name, "limit": round(self.limit, 2), "previous": round(previous, 2), "error": str(error)},
+        )
+
+    def stats(self) -> Dict:
+        self._refill()
+        return {
+            "limit": round(self.limit, 2),
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "calls": self.calls,
+            "overloads": self.overloads,
+            "queue_timeouts": self.queue_timeouts,
+            "tokens_per_minute": self.tokens_per_minute,
+            "tokens_available": int(self._tokens) if self.tokens_per_minute is not None else None,
+        }
+
+
+__all__ = ["AdaptiveLimiter", "QueueTimeout", "is_overload"]
@@ -0,0 +1,317 @@
+"""Recursive site crawling on top of AsyncWebScraper.
+
+Follows the links ``extract_links`` discovers, breadth-first, so a whole
+textbook site or wiki can be ingested with one call. Pages are yielded as
+they are fetched, which lets callers stream them straight into RAG
+indexing instead of waiting for the crawl to finish.
+
+Features:
+- URL canonicalization (case, default ports, dot segments, fragments,
+  tracking parameters, query ordering)
+- Same-domain and path-prefix filters, depth and page limits
+- Bloom-filter visited set: ~1.8 MB per million URLs at 0.1% false positives
+- In-process registry for starting, monitoring and cancelling crawls
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import math
+import posixpath
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+if TYPE_CHECKING:
+    from services.web_scraper import AsyncWebScraper
+
+logger = logging.getLogger(__name__)
+
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid", "_ga")
+SKIPPED_EXTENSIONS = (
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico",
+    ".zip", ".gz", ".tar", ".mp3", ".mp4", ".avi", ".mov",
+    ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".css", ".js",
+)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url: str) -> Optional[str]:
+    """Normalize a URL so equivalent spellings compare equal.
+
+    Returns:
+        Canonical URL, or None for non-HTTP(S) URLs
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower().rstrip(".")
+    netloc = host if port in (None, DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+
+    path = parts.path or "/"
+    normalized = posixpath.normpath(path)
+    if normalized == ".":
+        normalized = "/"
+    if path.endswith("/") and not normalized.endswith("/"):
+        normalized += "/"
+    if normalized.startswith("//"):
+        normalized = "/" + normalized.lstrip("/")
+
+    query = urlencode(sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    ))
+
+    return urlunsplit((scheme, netloc, normalized, query, ""))
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set with no false negatives.
+
+    Sized from the expected number of items and target false-positive rate;
+    a false positive only means a URL is (rarely) skipped as already seen.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def add(self, item: str) -> bool:
+        """Add an item; returns False if it was (probably) already present."""
+        added = False
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self._bits[byte] & (1 << bit):
+                self._bits[byte] |= 1 << bit
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self._bits[position // 8] & (1 << (position % 8))
+            for position in self._positions(item)
+        )
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+
+@dataclass
+class CrawlConfig:
+    """Limits and filters for one crawl."""
+
+    max_depth: int = 2
+    max_pages: int = 100
+    same_domain: bool = True
+    path_prefix: Optional[str] = None
+    max_concurrent: int = 5
+    visited_capacity: int = 1_000_000
+
+
+@dataclass
+class CrawlStats:
+    """Live progress of a crawl; updated as pages are fetched."""
+
+    start_url: str
+    crawl_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    state: str = "pending"
+    depth: int = 0
+    pages_fetched: int = 0
+    pages_failed: int = 0
+    pages_indexed: int = 0
+    pages_duplicate: int = 0
+    chunks_indexed: int = 0
+    urls_seen: int = 0
+    frontier_size: int = 0
+    error: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class SiteCrawler:
+    """Breadth-first crawler that fetches each level with bounded concurrency."""
+
+    def __init__(self, scraper: "AsyncWebScraper", config: Optional[CrawlConfig] = None) -> None:
+        self.scraper = scraper
+        self.config = config or CrawlConfig()
+        self.visited = BloomFilter(capacity=self.config.visited_capacity)
+        self.stats: Optional[CrawlStats] = None
+
+    def _allowed(self, url: str, root: str) -> bool:
+        parts = urlsplit(url)
+        if self.config.same_domain and parts.netloc != urlsplit(root).netloc:
+            return False
+        if self.config.path_prefix and not parts.path.startswith(self.config.path_prefix):
+            return False
+        return not parts.path.lower().endswith(SKIPPED_EXTENSIONS)
+
+    async def crawl(self, start_url: str, stats: Optional[CrawlStats] = None) -> AsyncIterator[Dict]:
+        """Crawl from ``start_url``, yielding each parsed page as it is fetched.
+
+        Args:
+            start_url: Seed URL (depth 0)
+            stats: Progress object to update; created if omitted
+
+        Yields:
+            Parsed content dictionaries from ``fetch_and_parse`` plus ``depth``
+        """
+        root = canonicalize_url(start_url)
+        if root is None:
+            raise ValueError(f"Cannot crawl non-HTTP URL: {start_url}")
+
+        self.stats = stats or CrawlStats(start_url=root)
+        self.stats.state = "running"
+        self.visited.add(root)
+        self.stats.urls_seen = len(self.visited)
+        frontier: List[str] = [root]
+        budget = self.config.max_pages - 1
+
+        for depth in range(self.config.max_depth + 1):
+            if not frontier:
+                break
+            self.stats.depth = depth
+            next_frontier: List[str] = []
+            self.stats.frontier_size = len(frontier)
+
+            async for page in self.scraper.iter_fetch_and_parse(
+                frontier, self.config.max_concurrent, include_errors=True
+            ):
+                self.stats.frontier_size -= 1
+                if "error" in page:
+                    self.stats.pages_failed += 1
+                    continue
+
+                self.stats.pages_fetched += 1
+                page["depth"] = depth
+                if depth < self.config.max_depth:
+                    for link in page["links"]:
+                        if budget <= 0:
+                            break
+                        canonical = canonicalize_url(link)
+                        if canonical is None or not self._allowed(canonical, root):
+                            continue
+                        if self.visited.add(canonical):
+                            next_frontier.append(canonical)
+                            budget -= 1
+                self.stats.urls_seen = len(self.visited)
+                yield page
+
+            frontier = next_frontier
+
+        self.stats.frontier_size = 0
+
+
+class CrawlManager:
+    """Registry of background crawls for the API."""
+
+    def __init__(self, max_history: int = 100) -> None:
+        self.max_history = max_history
+        self._crawls: Dict[str, CrawlStats] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def start(
+        self,
+        start_url: str,
+        run: Callable[[CrawlStats], Awaitable[None]],
+        stats: Optional[CrawlStats] = None,
+    ) -> CrawlStats:
+        """Launch ``run(stats)`` in the background and track its progress.
+
+        Args:
+            start_url: URL the crawl starts from
+            run: Coroutine function doing the work and updating ``stats``
+            stats: Progress object (e.g. a subclass with extra counters)
+        """
+        stats = stats or CrawlStats(start_url=start_url)
+        stats.started_at = datetime.now(timezone.utc).isoformat()
+        self._crawls[stats.crawl_id] = stats
+        task = asyncio.create_task(self._run(stats, run))
+        task.add_done_callback(lambda _: self._finish(stats))
+        self._tasks[stats.crawl_id] = task
+        self._trim()
+        return stats
+
+    async def _run(self, stats: CrawlStats, run: Callable[[CrawlStats], Awaitable[None]]) -> None:
+        try:
+            await run(stats)
+            stats.state = "completed"
+        except asyncio.CancelledError:
+            stats.state = "cancelled"
+        except Exception as e:
+            logger.error("Crawl failed", extra={"crawl_id": stats.crawl_id, "error": str(e)})
+            stats.state = "failed"
+            stats.error = str(e)
+
+    def _finish(self, stats: CrawlStats) -> None:
+        # Also runs for tasks cancelled before they ever started
+        if stats.state in ("pending", "running"):
+            stats.state = "cancelled"
+        stats.finished_at = datetime.now(timezone.utc).isoformat()
+        self._tasks.pop(stats.crawl_id, None)
+
+    def get(self, crawl_id: str) -> Optional[CrawlStats]:
+        return self._crawls.get(crawl_id)
+
+    def list(self) -> List[CrawlStats]:
+        return list(self._crawls.values())
+
+    def cancel(self, crawl_id: str) -> bool:
+        task = self._tasks.get(crawl_id)
+        if task is None:
+            return False
+        task.cancel()
+        return True
+
+    async def shutdown(self) -> None:
+        """Cancel running crawls and wait for them to stop."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _trim(self) -> None:
+        finished = [cid for cid, stats in self._crawls.items() if cid not in self._tasks]
+        for crawl_id in finished[: max(0, len(self._crawls) - self.max_history)]:
+            del self._crawls[crawl_id]
+
+
+__all__ = [
+    "BloomFilter",
+    "CrawlConfig",
+    "CrawlManager",
+    "CrawlStats",
+    "SiteCrawler",
+    "canonicalize_url",
+]
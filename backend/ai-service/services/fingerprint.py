@@ -0,0 +1,319 @@
+"""Content fingerprints for deduplicating scraped pages.
+
+Every parsed page gets an exact hash of its normalized text plus a 64-bit
+SimHash over word shingles. Mirrors, query-string variants and syndicated
+copies of an article share the exact hash or land within a few bits of
+each other, so the persistent ``FingerprintIndex`` can tell the API to skip
+re-chunking, re-embedding and re-generating content it has already seen.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+SIMHASH_BITS = 64
+# The SimHash is split into this many 16-bit bands; two hashes within
+# BANDS - 1 bits of each other always share at least one band exactly.
+BANDS = 4
+BAND_BITS = SIMHASH_BITS // BANDS
+SHINGLE_SIZE = 3
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace so formatting noise does not change hashes."""
+    return " ".join(text.lower().split())
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+_MASK64 = (1 << 64) - 1
+_MIX1 = 0x9E3779B97F4A7C15
+_MIX2 = 0xC2B2AE3D27D4EB4F
+
+
+def _shingle_hashes(text: str) -> set:
+    """Hash word 3-gram shingles by combining per-word hashes.
+
+    Each distinct word is hashed once; shingle hashes are cheap arithmetic
+    on those, which keeps multi-megabyte pages fast to fingerprint.
+    """
+    words = _WORD_RE.findall(text.lower())
+    vocabulary = {word: _hash64(word) for word in set(words)}
+    hashes = [vocabulary[word] for word in words]
+    if len(hashes) < SHINGLE_SIZE:
+        return set(hashes)
+    return {
+        ((a * _MIX1) ^ (b * _MIX2) ^ c) & _MASK64
+        for a, b, c in zip(hashes, hashes[1:], hashes[2:])
+    }
+
+
+def simhash(text: str) -> int:
+    """Return the 64-bit SimHash of ``text`` over word 3-gram shingles."""
+    hashes = _shingle_hashes(text)
+    if not hashes:
+        return 0
+
+    # Tally bit votes a byte at a time so the per-shingle work stays in C
+    packed = b"".join(h.to_bytes(8, "little") for h in hashes)
+    votes = [0] * SIMHASH_BITS
+    for byte in range(SIMHASH_BITS // 8):
+        for value, count in Counter(packed[byte::8]).items():
+            for bit in range(8):
+                if value >> bit & 1:
+                    votes[byte * 8 + bit] += count
+
+    half = len(hashes) / 2
+    return sum(1 << i for i, vote in enumerate(votes) if vote > half)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+@dataclass
+class ContentFingerprint:
+    """Exact and near-duplicate signatures of a page's text."""
+
+    content_hash: str
+    simhash: int
+
+    @classmethod
+    def from_text(cls, text: str) -> "ContentFingerprint":
+        return cls(
+            content_hash=hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest(),
+            simhash=simhash(text),
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ContentFingerprint":
+        return cls(content_hash=data["content_hash"], simhash=int(data["simhash"], 16))
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"content_hash": self.content_hash, "simhash": f"{self.simhash:016x}"}
+
+    def bands(self) -> Iterable[int]:
+        mask = (1 << BAND_BITS) - 1
+        return ((self.simhash >> (i * BAND_BITS)) & mask for i in range(BANDS))
+
+
+@dataclass
+class FingerprintMatch:
+    """An indexed page that duplicates the looked-up content."""
+
+    kind: str  # "exact" or "near"
+    content_hash: str
+    url: str
+    note_id: str
+    chunks: int
+    distance: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class FingerprintIndex:
+    """SQLite-backed index of fingerprints for already-processed content.
+
+    Near-duplicate lookups use banded SimHash: candidates are fetched by
+    exact band match and then checked by Hamming distance, so lookups stay
+    indexed queries however many pages are stored. Also stores per-content
+    artifacts (e.g. generated flashcards) so LLM output can be reused for
+    duplicates. Thread-safe; call it through ``asyncio.to_thread``.
+    """
+
+    def __init__(self, path: str = "./data/fingerprints.sqlite3", max_distance: int = 3) -> None:
+        """Open (or create) the index file.
+
+        Args:
+            path: SQLite database file
+            max_distance: Largest SimHash Hamming distance treated as a duplicate
+        """
+        if not 0 <= max_distance < BANDS:
+            raise ValueError(f"max_distance must be between 0 and {BANDS - 1}")
+        self.path = path
+        self.max_distance = max_distance
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                content_hash TEXT PRIMARY KEY,
+                simhash TEXT NOT NULL,
+                url TEXT NOT NULL,
+                note_id TEXT NOT NULL,
+                chunks INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS simhash_bands (
+                band INTEGER NOT NULL,
+                value INTEGER NOT NULL,
+                content_hash TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_simhash_bands ON simhash_bands (band, value);
+            CREATE TABLE IF NOT EXISTS artifacts (
+                content_hash TEXT NOT NULL,
+                key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (content_hash, key)
+            );
+            """
+        )
+        self._db.commit()
+
+        self.lookups = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+        self.skipped_chunks = 0
+        self.skipped_llm_calls = 0
+
+    @classmethod
+    def from_env(cls) -> "FingerprintIndex":
+        """Build an index from ``SCRAPER_FINGERPRINT_*`` environment variables."""
+        return cls(
+            path=os.getenv("SCRAPER_FINGERPRINT_PATH", "./data/fingerprints.sqlite3"),
+            max_distance=int(os.getenv("SCRAPER_FINGERPRINT_MAX_DISTANCE", "3")),
+        )
+
+    def lookup(self, fingerprint: ContentFingerprint, url: Optional[str] = None) -> Optional[FingerprintMatch]:
+        """Return the closest indexed duplicate of ``fingerprint``, if any.
+
+        Near-identical content recorded for ``url`` itself is not a
+        duplicate but an edited version of the page (e.g. a corrected
+        dosage), so only other URLs' content can be a near match.
+        """
+        with self._lock:
+            self.lookups += 1
+            row = self._db.execute(
+                "SELECT url, note_id, chunks FROM fingerprints WHERE content_hash = ?",
+                (fingerprint.content_hash,),
+            ).fetchone()
+            if row is not None:
+                self.exact_duplicates += 1
+                return FingerprintMatch("exact", fingerprint.content_hash, row[0], row[1], row[2], 0)
+
+            best: Optional[FingerprintMatch] = None
+            for band, value in enumerate(fingerprint.bands()):
+                candidates = self._db.execute(
+                    "SELECT f.content_hash, f.simhash, f.url, f.note_id, f.chunks "
+                    "FROM simhash_bands b JOIN fingerprints f ON f.content_hash = b.content_hash "
+                    "WHERE b.band = ? AND b.value = ?",
+                    (band, value),
+                ).fetchall()
+                for content_hash, stored, match_url, note_id, chunks in candidates:
+                    if match_url == url:
+                        continue
+                    distance = hamming_distance(fingerprint.simhash, int(stored, 16))
+                    if distance <= self.max_distance and (best is None or distance < best.distance):
+                        best = FingerprintMatch("near", content_hash, match_url, note_id, chunks, distance)
+            if best is not None:
+                self.near_duplicates += 1
+            return best
+
+    def content_hash_for(self, url: str) -> Optional[str]:
+        """Return the content hash last recorded for ``url``, if any."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT content_hash FROM fingerprints WHERE url = ? ORDER BY created_at DESC LIMIT 1", (url,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def add(self, fingerprint: ContentFingerprint, url: str, note_id: str, chunks: int = 0) -> None:
+        """Record processed content and how many chunks it produced.
+
+        Earlier versions recorded for the same URL are replaced.
+        """
+        with self._lock:
+            stale = [
+                row[0]
+                for row in self._db.execute(
+                    "SELECT content_hash FROM fingerprints WHERE url = ? AND content_hash != ?",
+                    (url, fingerprint.content_hash),
+                )
+            ]
+            for content_hash in stale:
+                self._db.execute("DELETE FROM simhash_bands WHERE content_hash = ?", (content_hash,))
+                self._db.execute("DELETE FROM fingerprints WHERE content_hash = ?", (content_hash,))
+            exists = self._db.execute(
+                "SELECT 1 FROM fingerprints WHERE content_hash = ?", (fingerprint.content_hash,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO fingerprints (content_hash, simhash, url, note_id, chunks, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (fingerprint.content_hash, f"{fingerprint.simhash:016x}", url, note_id, chunks, time.time()),
+            )
+            if not exists:
+                self._db.executemany(
+                    "INSERT INTO simhash_bands (band, value, content_hash) VALUES (?, ?, ?)",
+                    [(band, value, fingerprint.content_hash) for band, value in enumerate(fingerprint.bands())],
+                )
+            self._db.commit()
+
+    def get_artifact(self, content_hash: str, key: str) -> Optional[Any]:
+        """Return a stored artifact (e.g. generated flashcards) for content."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload FROM artifacts WHERE content_hash = ? AND key = ?", (content_hash, key)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_artifact(self, content_hash: str, key: str, value: Any) -> None:
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO artifacts (content_hash, key, payload) VALUES (?, ?, ?)",
+                (content_hash, key, json.dumps(value)),
+            )
+            self._db.commit()
+
+    def record_skip(self, chunks: int = 0, llm_calls: int = 0) -> None:
+        """Count embedding chunks and LLM calls avoided thanks to a duplicate hit."""
+        with self._lock:
+            self.skipped_chunks += chunks
+            self.skipped_llm_calls += llm_calls
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> Dict:
+        """Return lookup counters and the work skipped so far."""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+        duplicates = self.exact_duplicates + self.near_duplicates
+        return {
+            "entries": entries,
+            "lookups": self.lookups,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "duplicate_rate": duplicates / self.lookups if self.lookups else 0.0,
+            "skipped_chunks": self.skipped_chunks,
+            "skipped_llm_calls": self.skipped_llm_calls,
+        }
+
+
+__all__ = [
+    "ContentFingerprint",
+    "FingerprintIndex",
+    "FingerprintMatch",
+    "hamming_distance",
+    "normalize_text",
+    "simhash",
+]
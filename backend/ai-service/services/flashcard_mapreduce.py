@@ -0,0 +1,234 @@
+"""Map-reduce flashcard generation for long content.
+
+A long page in one prompt either overflows the context window or comes
+back as one slow completion whose latency grows with the whole document.
+Instead the content is split on its structure (Markdown headings, then
+paragraphs, lines and sentences) into balanced chunks, cards are generated
+for the chunks concurrently, and the results are merged: near-duplicate
+questions are dropped and the list is trimmed to the requested count
+round-robin across chunks, so every part of the document stays covered.
+Wall-clock time then follows the slowest chunk, not the document length.
+
+Works with any service exposing ``generate_flashcards(content, count)``
+(OpenAIService, GeminiService); per-chunk calls go through their response
+cache and single-flight like any other call.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import re
+from typing import Dict, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+MODES = ("auto", "single", "chunked")
+
+_WORD_RE = re.compile(r"\w+")
+
+# Structural boundaries, coarsest first; a piece still too long moves to the next one
+_SPLITTERS = (
+    lambda text: re.split(r"\n(?=#{1,6}\s)", text),
+    lambda text: re.split(r"\n\s*\n", text),
+    lambda text: text.split("\n"),
+    lambda text: re.split(r"(?<=[.!?])\s+", text),
+)
+
+
+def _pieces(text: str, max_chars: int, level: int = 0) -> List[str]:
+    if len(text) <= max_chars:
+        return [text]
+    if level == len(_SPLITTERS):
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+    parts = [part.strip() for part in _SPLITTERS[level](text) if part.strip()]
+    if len(parts) <= 1:
+        return _pieces(text, max_chars, level + 1)
+    pieces = []
+    for part in parts:
+        pieces.extend(_pieces(part, max_chars, level + 1))
+    return pieces
+
+
+def split_content(content: str, max_chars: int = 6000) -> List[str]:
+    """Split content on structure into chunks of at most ``max_chars``.
+
+    Chunks are packed towards an even size (total length divided by the
+    number of chunks needed), so no single chunk dominates latency.
+    """
+    content = content.strip()
+    if not content:
+        return []
+    if len(content) <= max_chars:
+        return [content]
+
+    pieces = _pieces(content, max_chars)
+    target = len(content) / math.ceil(len(content) / max_chars)
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for piece in pieces:
+        if current and (size + len(piece) > max_chars or size >= target):
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(piece)
+        size += len(piece) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def allocate_counts(chunks: List[str], count: int, oversample: float = 1.5) -> List[int]:
+    """Cards to request per chunk: proportional to length, oversampled for deduplication."""
+    total = sum(len(chunk) for chunk in chunks) or 1
+    return [max(1, math.ceil(count * oversample * len(chunk) / total)) for chunk in chunks]
+
+
+def _question_words(card: Dict) -> Set[str]:
+    return set(_WORD_RE.findall(str(card.get("question", "")).lower()))
+
+
+def merge_flashcards(card_lists: List[List[Dict]], count: int, similarity: float = 0.8) -> Tuple[List[Dict], int]:
+    """Deduplicate per-chunk cards and trim to ``count`` round-robin across chunks.
+
+    A card is a duplicate when its question's word set has Jaccard
+    similarity of at least ``similarity`` with a kept question.
+
+    Returns:
+        (merged cards, number of duplicates dropped)
+    """
+    kept_words: List[Set[str]] = []
+    unique_lists: List[List[Dict]] = []
+    duplicates = 0
+    for cards in card_lists:
+        unique = []
+        for card in cards:
+            if not isinstance(card, dict) or not card.get("question"):
+                continue
+            words = _question_words(card)
+            if any(len(words & other) / (len(words | other) or 1) >= similarity for other in kept_words):
+                duplicates += 1
+                continue
+            kept_words.append(words)
+            unique.append(card)
+        unique_lists.append(unique)
+
+    merged: List[Dict] = []
+    for rank in range(max((len(cards) for cards in unique_lists), default=0)):
+        for cards in unique_lists:
+            if rank < len(cards) and len(merged) < count:
+                merged.append(cards[rank])
+    return merged, duplicates
+
+
+class ChunkedFlashcardGenerator:
+    """Generate flashcards per chunk concurrently and merge the results.
+
+    Modes:
+    - ``single``: one prompt with the whole content (previous behaviour)
+    - ``chunked``: always split, even short content (one chunk if it fits)
+    - ``auto``: split only content longer than ``max_chunk_chars``
+    """
+
+    def __init__(
+        self,
+        max_chunk_chars: int = 6000,
+        max_concurrent: int = 4,
+        oversample: float = 1.5,
+    ) -> None:
+        """Initialize generator settings.
+
+        Args:
+            max_chunk_chars: Longest chunk sent in one prompt
+            max_concurrent: Chunks generated at the same time per document
+            oversample: Extra cards requested per chunk to absorb duplicates
+        """
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        self.max_chunk_chars = max_chunk_chars
+        self.max_concurrent = max_concurrent
+        self.oversample = oversample
+        self.documents = 0
+        self.chunks = 0
+        self.failed_chunks = 0
+        self.duplicates_removed = 0
+
+    @classmethod
+    def from_env(cls) -> "ChunkedFlashcardGenerator":
+        """Build a generator from ``FLASHCARD_*`` environment variables."""
+        return cls(
+            max_chunk_chars=int(os.getenv("FLASHCARD_CHUNK_CHARS", "6000")),
+            max_concurrent=int(os.getenv("FLASHCARD_MAX_CONCURRENT_CHUNKS", "4")),
+            oversample=float(os.getenv("FLASHCARD_OVERSAMPLE", "1.5")),
+        )
+
+    async def generate(self, service, content: str, count: int = 10, mode: str = "auto") -> List[Dict]:
+        """Generate ``count`` flashcards for ``content`` with ``service``.
+
+        Chunks that fail are logged and skipped; the call only fails when
+        every chunk does.
+
+        Raises:
+            ValueError: On unknown mode
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown flashcard generation mode: {mode}")
+        if mode == "single" or (mode == "auto" and len(content) <= self.max_chunk_chars):
+            return await service.generate_flashcards(content, count)
+
+        chunks = split_content(content, self.max_chunk_chars)
+        if len(chunks) <= 1:
+            return await service.generate_flashcards(chunks[0] if chunks else content, count)
+
+        semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        async def generate_chunk(chunk: str, chunk_count: int) -> List[Dict]:
+            async with semaphore:
+                return await service.generate_flashcards(chunk, chunk_count)
+
+        counts = allocate_counts(chunks, count, self.oversample)
+        results = await asyncio.gather(
+            *(generate_chunk(chunk, chunk_count) for chunk, chunk_count in zip(chunks, counts)),
+            return_exceptions=True,
+        )
+        card_lists = []
+        errors = []
+        for index, result in enumerate(results):
+            if isinstance(result, BaseException):
+                errors.append(result)
+                logger.warning(
+                    "Flashcard generation failed for chunk",
+                    extra={"chunk": index, "chunks": len(chunks), "error": str(result)},
+                )
+            else:
+                card_lists.append(result)
+
+        self.documents += 1
+        self.chunks += len(chunks)
+        self.failed_chunks += len(errors)
+        if not card_lists:
+            raise errors[0]
+
+        flashcards, duplicates = merge_flashcards(card_lists, count)
+        self.duplicates_removed += duplicates
+        return flashcards
+
+    def stats(self) -> Dict:
+        return {
+            "documents": self.documents,
+            "chunks": self.chunks,
+            "failed_chunks": self.failed_chunks,
+            "duplicates_removed": self.duplicates_removed,
+            "max_chunk_chars": self.max_chunk_chars,
+            "max_concurrent": self.max_concurrent,
+        }
+
+
+__all__ = [
+    "ChunkedFlashcardGenerator",
+    "allocate_counts",
+    "merge_flashcards",
+    "split_content",
+]
@@ -0,0 +1,186 @@
+"""Tolerant parsing of flashcard completions, topping up missing cards.
+
+A completion is parsed card by card rather than as one JSON document:
+whole-document parsing is tried first (JSON-mode responses, wrapped in an
+object or not), then the text is scanned for card objects, each repaired
+and validated on its own. One malformed or truncated card therefore costs
+only itself, not the whole multi-second generation.
+
+When fewer valid cards than requested come back, only the missing number
+is requested again (``complete_flashcards``), with the questions already
+generated excluded, instead of regenerating the whole batch.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from typing import Annotated, Any, Awaitable, Callable, Dict, List, Literal, Optional, Sequence
+
+from pydantic import BeforeValidator, StringConstraints, TypeAdapter, ValidationError
+from typing_extensions import NotRequired, TypedDict
+
+from services.flashcard_stream import JSONObjectStream, loads_lenient
+
+logger = logging.getLogger(__name__)
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+# Opening of a JSON-mode object wrapping the card array, e.g. {"flashcards": [
+_WRAPPER = re.compile(r'\{\s*"(\w+)"\s*:\s*\[')
+
+
+def _tags(value: Any) -> Any:
+    if isinstance(value, str):
+        return [tag.strip() for tag in value.split(",") if tag.strip()]
+    if isinstance(value, list):
+        return [str(tag) for tag in value]
+    return value
+
+
+def _difficulty(value: Any) -> Any:
+    value = str(value).strip().lower()
+    return value if value in DIFFICULTIES else "medium"
+
+
+NonBlank = Annotated[str, StringConstraints(pattern=r"\S")]
+
+
+class Flashcard(TypedDict):
+    question: NonBlank
+    answer: NonBlank
+    tags: NotRequired[Annotated[List[str], BeforeValidator(_tags)]]
+    difficulty: NotRequired[Annotated[Literal["easy", "medium", "hard"], BeforeValidator(_difficulty)]]
+
+
+# Built once: validation schemas are compiled when the adapter is created
+FLASHCARD_ADAPTER = TypeAdapter(Flashcard)
+
+
+def validate_flashcard(card: Any) -> Optional[Dict]:
+    """Return ``card`` validated and normalized, or None if it is not a usable flashcard.
+
+    Fields the provider left out stay absent; unknown fields are dropped.
+    """
+    try:
+        return FLASHCARD_ADAPTER.validate_python(card)
+    except ValidationError:
+        return None
+
+
+@dataclass
+class ParsedFlashcards:
+    """Valid cards of one completion and what was lost."""
+
+    cards: List[Dict]
+    invalid: int = 0
+    truncated: bool = False
+
+
+def _card_list(data: Any) -> Optional[List]:
+    """The card array of a parsed document: the document itself or its first list value."""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict) and not {"question", "answer"} & data.keys():
+        return next((value for value in data.values() if isinstance(value, list)), None)
+    return None
+
+
+def parse_flashcards(text: str) -> ParsedFlashcards:
+    """Parse every valid flashcard out of a completion."""
+    try:
+        objects = _card_list(loads_lenient(text.strip()))
+    except json.JSONDecodeError:
+        objects = None
+    skipped, truncated = 0, False
+    if objects is None:
+        wrapper = _WRAPPER.search(text)
+        if wrapper and wrapper.group(1) not in Flashcard.__annotations__:
+            text = text[wrapper.end():]
+        parser = JSONObjectStream()
+        objects = parser.feed(text)
+        skipped, truncated = parser.skipped, parser.pending
+
+    cards = []
+    for obj in objects:
+        card = validate_flashcard(obj)
+        if card is None:
+            skipped += 1
+        else:
+            cards.append(card)
+    return ParsedFlashcards(cards=cards, invalid=skipped, truncated=truncated)
+
+
+def _question_key(card: Dict) -> str:
+    return " ".join(card["question"].lower().split())
+
+
+async def complete_flashcards(
+    request: Callable[[int, Sequence[str]], Awaitable[str]],
+    count: int,
+    attempts: Optional[int] = None,
+) -> List[Dict]:
+    """Collect ``count`` valid flashcards, re-requesting only the missing ones.
+
+    Args:
+        request: ``request(missing, exclude)`` returns a completion with
+            ``missing`` cards whose questions differ from ``exclude``
+        count: Cards wanted
+        attempts: Completions requested at most (``FLASHCARD_ATTEMPTS``, default 2)
+
+    Returns:
+        Up to ``count`` cards; fewer if later attempts still come up short
+
+    Raises:
+        ValueError: If no valid flashcard was produced at all
+        Whatever ``request`` raised on the first attempt
+    """
+    attempts = attempts or int(os.getenv("FLASHCARD_ATTEMPTS", "2"))
+    cards: List[Dict] = []
+    seen = set()
+    for attempt in range(attempts):
+        missing = count - len(cards)
+        try:
+            text = await request(missing, [card["question"] for card in cards])
+        except Exception as e:
+            if not cards:
+                raise
+            logger.warning(
+                "Flashcard top-up request failed; returning partial set",
+                extra={"cards": len(cards), "requested": count, "error": str(e)},
+            )
+            break
+        parsed = parse_flashcards(text)
+        for card in parsed.cards:
+            key = _question_key(card)
+            if key not in seen and len(cards) < count:
+                seen.add(key)
+                cards.append(card)
+        if len(cards) >= count:
+            break
+        logger.warning(
+            "Flashcard completion short of requested count",
+            extra={
+                "attempt": attempt + 1,
+                "cards": len(cards),
+                "requested": count,
+                "invalid": parsed.invalid,
+                "truncated": parsed.truncated,
+            },
+        )
+    if not cards:
+        raise ValueError("No valid flashcards in the response")
+    return cards
+
+
+__all__ = [
+    "FLASHCARD_ADAPTER",
+    "Flashcard",
+    "ParsedFlashcards",
+    "complete_flashcards",
+    "parse_flashcards",
+    "validate_flashcard",
+]
@@ -0,0 +1,186 @@
+"""Incremental parsing of flashcards from a streamed LLM completion.
+
+Providers are asked for a JSON array of cards. Instead of waiting for the
+whole array and parsing it in one go, where a single malformed or
+truncated tail loses every card, the text is scanned as it arrives and
+each top-level object is parsed the moment its closing brace streams in.
+Anything outside objects (the array brackets, commas, Markdown fences,
+stray prose) is ignored. An object that fails to parse is retried after
+``repair_json`` fixes common LLM defects, and costs only itself if it
+still fails.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_STRING_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+
+def repair_json(text: str) -> str:
+    """Fix common defects of LLM-written JSON.
+
+    Removes trailing commas before ``}`` or ``]`` and escapes raw
+    newlines and tabs inside strings; string contents are otherwise
+    left alone.
+    """
+    out: List[str] = []
+    in_string = False
+    escape = False
+    for char in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            elif char in _STRING_ESCAPES:
+                char = _STRING_ESCAPES[char]
+        elif char == '"':
+            in_string = True
+        elif char in "}]":
+            end = len(out) - 1
+            while end >= 0 and out[end].isspace():
+                end -= 1
+            if end >= 0 and out[end] == ",":
+                del out[end]
+        out.append(char)
+    return "".join(out)
+
+
+def loads_lenient(raw: str) -> Any:
+    """``json.loads``, retried once on ``repair_json(raw)``.
+
+    Raises:
+        json.JSONDecodeError: If even the repaired text is invalid
+    """
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError:
+        return json.loads(repair_json(raw))
+
+
+class JSONObjectStream:
+    """Extract top-level JSON objects from text fed in arbitrary pieces."""
+
+    def __init__(self) -> None:
+        self._parts: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.parsed = 0
+        self.skipped = 0
+
+    @property
+    def pending(self) -> bool:
+        """Whether an object has started but not closed (e.g. truncated output)."""
+        return self._depth > 0
+
+    def feed(self, text: str) -> List[Any]:
+        """Consume ``text`` and return every object it completes."""
+        objects = []
+        start = 0
+        for index, char in enumerate(text):
+            if self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+                    start = index
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(text[start:index + 1])
+                    raw = "".join(self._parts)
+                    self._parts = []
+                    try:
+                        objects.append(loads_lenient(raw))
+                        self.parsed += 1
+                    except json.JSONDecodeError:
+                        self.skipped += 1
+                        logger.debug("Skipping malformed JSON object", extra={"length": len(raw)})
+        if self._depth > 0:
+            self._parts.append(text[start:])
+        return objects
+
+
+def is_flashcard(card: Any) -> bool:
+    """Whether a parsed object has a non-empty question and answer."""
+    return (
+        isinstance(card, dict)
+        and isinstance(card.get("question"), str) and bool(card["question"].strip())
+        and isinstance(card.get("answer"), str) and bool(card["answer"].strip())
+    )
+
+
+class FlashcardStream:
+    """Async iterator over the flashcards of a streamed completion.
+
+    Each card is yielded as soon as its JSON object completes. Cards
+    completed before the text ends (or the provider fails) are kept; after
+    iteration ``incomplete`` tells whether anything was dropped: an
+    unfinished trailing object, malformed/invalid cards, or fewer cards
+    than ``count``.
+
+    ``validate`` returns a card normalized, or None to drop it; services
+    pass ``flashcard_parsing.validate_flashcard`` so streamed cards match
+    those of ``generate_flashcards``. By default cards passing
+    ``is_flashcard`` are kept as they are.
+    """
+
+    def __init__(
+        self,
+        chunks: AsyncIterator[str],
+        validate: Optional[Callable[[Any], Optional[Dict]]] = None,
+        count: Optional[int] = None,
+    ) -> None:
+        self._chunks = chunks
+        self._parser = JSONObjectStream()
+        self._validate = validate or (lambda card: card if is_flashcard(card) else None)
+        self.count = count
+        self.cards = 0
+        self.invalid = 0
+
+    @property
+    def incomplete(self) -> bool:
+        short = self.count is not None and self.cards < self.count
+        return self._parser.pending or self._parser.skipped > 0 or self.invalid > 0 or short
+
+    async def __aiter__(self) -> AsyncIterator[Dict]:
+        async for chunk in self._chunks:
+            for obj in self._parser.feed(chunk):
+                card = self._validate(obj)
+                if card is not None:
+                    self.cards += 1
+                    yield card
+                else:
+                    self.invalid += 1
+        if self.incomplete:
+            logger.warning(
+                "Flashcard stream incomplete",
+                extra={
+                    "cards": self.cards,
+                    "requested": self.count,
+                    "malformed": self._parser.skipped,
+                    "invalid": self.invalid,
+                    "truncated": self._parser.pending,
+                },
+            )
+
+
+__all__ = ["FlashcardStream", "JSONObjectStream", "is_flashcard", "loads_lenient", "repair_json"]
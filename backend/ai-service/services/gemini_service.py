@@ -1,20 +1,65 @@
 import os
-import json
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict, Optional, Sequence
 import google.generativeai as genai
 
+from services.adaptive_limiter import AdaptiveLimiter
+from services.flashcard_parsing import complete_flashcards, validate_flashcard
+from services.flashcard_stream import FlashcardStream
+from services.llm_cache import INCOMPLETE, LLMResponseCache, cached_response, cached_stream
+from services.single_flight import SingleFlight
+from services.token_budget import ANSWER_TOKENS, TEXT_TOKENS, TokenBudget
+
+# Bump whenever a prompt below changes, so cached responses to the old prompt are not reused
+PROMPT_VERSION = 2
+
+# Models accepting response_mime_type="application/json"
+JSON_MODE_MODELS = ("gemini-1.5", "gemini-2")
+
 
 class GeminiService:
-    def __init__(self):
+    """Gemini calls through the SDK's async API, so they never block the event loop.
+
+    One model instance is reused for every call, and calls go through an
+    adaptive limiter that caps concurrency below ``max_concurrent``
+    (``GEMINI_MAX_CONCURRENT``) and backs off on quota errors; further
+    calls wait for a slot instead of piling onto the provider.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[LLMResponseCache] = None,
+        single_flight: Optional[SingleFlight] = None,
+        max_concurrent: Optional[int] = None,
+        limiter: Optional[AdaptiveLimiter] = None,
+    ):
         api_key = os.getenv("GEMINI_API_KEY")
         if api_key:
             genai.configure(api_key=api_key)
         self.model_name = os.getenv("GEMINI_MODEL", "gemini-pro")
+        self.model = genai.GenerativeModel(self.model_name)
+        # Sizes limiter reservations: prompt plus the output each call is expected to produce
+        self.budget = TokenBudget(self.model_name)
+        self.cache = cache
+        self.single_flight = single_flight
+        self.limiter = limiter or AdaptiveLimiter.from_env("gemini", max_limit=max_concurrent)
 
-    async def generate_flashcards(self, content: str, count: int = 10) -> List[Dict]:
-        """Generate flashcards using Google Gemini"""
-        model = genai.GenerativeModel(self.model_name)
+    def cache_scope(self) -> str:
+        """Provider, model and prompt version that cached responses depend on"""
+        return f"gemini:{self.model_name}:v{PROMPT_VERSION}"
 
+    @staticmethod
+    def _usage(response) -> Optional[int]:
+        """Total tokens a response reports using, if any"""
+        return getattr(getattr(response, "usage_metadata", None), "total_token_count", None)
+
+    async def _generate(self, prompt: str, output_tokens: int, **options) -> str:
+        """Return the text of a generation, reserving ``output_tokens`` for the reply"""
+        async with self.limiter.acquire(self.budget.count(prompt) + output_tokens) as permit:
+            response = await self.model.generate_content_async(prompt, **options)
+            permit.record_usage(self._usage(response))
+        return response.text
+
+    def _flashcard_prompt(self, content: str, count: int, exclude: Sequence[str] = ()) -> str:
         prompt = f"""
         Generate {count} high-quality medical flashcards from the following content.
         
@@ -31,28 +76,131 @@ class GeminiService:
           }}
         ]
         """
+        if exclude:
+            prompt += "\n        Do not repeat any of these existing questions:\n" + "\n".join(f"        - {q}" for q in exclude)
+        return prompt
+
+    @cached_response
+    async def generate_flashcards(self, content: str, count: int = 10) -> List[Dict]:
+        """Generate flashcards using Google Gemini, re-requesting only cards missing from the reply"""
+        options = {}
+        if self.model_name.startswith(JSON_MODE_MODELS):
+            options["generation_config"] = {"response_mime_type": "application/json"}
+
+        async def request(missing: int, exclude: Sequence[str]) -> str:
+            prompt = self._flashcard_prompt(content, missing, exclude)
+            return await self._generate(prompt, self.budget.flashcard_tokens(missing), **options)
 
         try:
-            response = model.generate_content(prompt)
-            content = response.text
-            
-            # Extract JSON from response
-            start = content.find('[')
-            end = content.rfind(']') + 1
-            if start != -1 and end > start:
-                content = content[start:end]
-            
-            flashcards = json.loads(content)
-            return flashcards
+            return await complete_flashcards(request, count)
         except Exception as e:
             raise Exception(f"Gemini API error: {str(e)}")
 
+    @cached_response
     async def generate_text(self, prompt: str) -> str:
         """Generate text using Gemini"""
-        model = genai.GenerativeModel(self.model_name)
+        try:
+            return await self._generate(prompt, self.budget.completion_tokens(TEXT_TOKENS))
+        except Exception as e:
+            raise Exception(f"Gemini API error: {str(e)}")
+
+    async def _stream(self, prompt: str, output_tokens: int) -> AsyncIterator[str]:
+        """Yield text chunks of a streamed generation (holding a slot until it ends)
+
+        Usage comes from the last chunk reporting it; a stream that ends
+        before is charged for its prompt and the text produced so far.
+        """
+        prompt_tokens = self.budget.count(prompt)
+        async with self.limiter.acquire(prompt_tokens + output_tokens) as permit:
+            response = await self.model.generate_content_async(prompt, stream=True)
+            streamed = []
+            usage = None
+            try:
+                async for chunk in response:
+                    usage = self._usage(chunk) or usage
+                    # Chunks without parts (e.g. only a finish reason) have no text
+                    if chunk.parts and chunk.text:
+                        streamed.append(chunk.text)
+                        yield chunk.text
+            finally:
+                permit.record_usage(usage or prompt_tokens + self.budget.count("".join(streamed)))
+
+    @cached_stream("generate_text")
+    async def stream_text(self, prompt: str) -> AsyncIterator[str]:
+        """Stream text generated by Gemini"""
+        try:
+            async for token in self._stream(prompt, self.budget.completion_tokens(TEXT_TOKENS)):
+                yield token
+        except Exception as e:
+            raise Exception(f"Gemini API error: {str(e)}")
+
+    @cached_stream("generate_flashcards", items=True)
+    async def stream_flashcards(self, content: str, count: int = 10) -> AsyncIterator[Dict]:
+        """Stream flashcards using Gemini, each as soon as its JSON object completes"""
+        tokens = self._stream(self._flashcard_prompt(content, count), self.budget.flashcard_tokens(count))
+        cards = FlashcardStream(tokens, validate_flashcard, count)
+        try:
+            async for card in cards:
+                yield card
+        except Exception as e:
+            raise Exception(f"Gemini API error: {str(e)}")
+        if cards.incomplete:
+            yield INCOMPLETE
+
+    def _answer_prompt(self, question: str, context: str) -> str:
+        return f"""
+        You are a helpful medical education assistant.
+
+        Context:
+        {context}
+        
+        Question: {question}
+        
+        Answer the question based on the context provided. If the answer cannot be found in the context, say so.
+        """
+
+    @cached_response
+    async def answer_with_context(self, question: str, context: str) -> str:
+        """Answer a question using provided context"""
+        try:
+            return await self._generate(self._answer_prompt(question, context), self.budget.completion_tokens(ANSWER_TOKENS))
+        except Exception as e:
+            raise Exception(f"Gemini API error: {str(e)}")
+
+    @cached_stream("answer_with_context")
+    async def stream_answer_with_context(self, question: str, context: str) -> AsyncIterator[str]:
+        """Stream the answer to a question using provided context"""
+        try:
+            async for token in self._stream(self._answer_prompt(question, context), self.budget.completion_tokens(ANSWER_TOKENS)):
+                yield token
+        except Exception as e:
+            raise Exception(f"Gemini API error: {str(e)}")
+
+    def _summary_prompt(self, content: str, max_length: int) -> str:
+        return f"""
+        Summarize the following content in approximately {max_length} characters.
+        Focus on the key points and main ideas.
         
+        Content:
+        {content}
+        """
+
+    @cached_response
+    async def summarize(self, content: str, max_length: int = 500) -> str:
+        """Summarize long content"""
+        try:
+            return await self._generate(self._summary_prompt(content, max_length), self.budget.summary_tokens(max_length))
+        except Exception as e:
+            raise Exception(f"Gemini API error: {str(e)}")
+
+    @cached_stream("summarize")
+    async def stream_summarize(self, content: str, max_length: int = 500) -> AsyncIterator[str]:
+        """Stream a summary of long content"""
         try:
-            response = model.generate_content(prompt)
-            return response.text
+            async for token in self._stream(self._summary_prompt(content, max_length), self.budget.summary_tokens(max_length)):
+                yield token
         except Exception as e:
             raise Exception(f"Gemini API error: {str(e)}")
+
+    def stats(self) -> Dict:
+        return {"model": self.model_name, **self.limiter.stats()}
@@ -0,0 +1,308 @@
+"""Disk-backed conditional-GET cache for scraped pages.
+
+Stores each page body (zlib-compressed) with its ETag, Last-Modified and
+freshness lifetime in a SQLite file, so repeat scrapes of the same URL can
+be served without a network round trip while fresh, and revalidated with
+``If-None-Match``/``If-Modified-Since`` once stale. Entries are evicted in
+least-recently-used order when the stored size exceeds ``max_bytes``.
+
+Entries are keyed by URL alone, so responses that vary on request headers
+(``Vary``) are not stored; ``Accept-Encoding`` is the exception, since
+bodies are stored decoded.
+"""
+
+from __future__ import annotations
+
+import codecs
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+def parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    """Parse a Cache-Control header into a directive -> value mapping."""
+    directives: Dict[str, Optional[str]] = {}
+    for part in value.split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else None
+    return directives
+
+
+def freshness_lifetime(headers: Mapping[str, str], now: Optional[float] = None) -> float:
+    """Return seconds a response stays fresh, from max-age or Expires."""
+    now = time.time() if now is None else now
+    directives = parse_cache_control(headers.get("cache-control", ""))
+    if "no-cache" in directives:
+        return 0.0
+    if directives.get("max-age") is not None:
+        try:
+            return max(0.0, float(directives["max-age"]))
+        except ValueError:
+            return 0.0
+    if expires := headers.get("expires"):
+        try:
+            return max(0.0, parsedate_to_datetime(expires).timestamp() - now)
+        except (TypeError, ValueError):
+            return 0.0
+    return 0.0
+
+
+def _utf8(body: Union[str, bytes], encoding: str) -> bytes:
+    if isinstance(body, str):
+        return body.encode("utf-8")
+    try:
+        if codecs.lookup(encoding).name == "utf-8":
+            return body
+        return body.decode(encoding, errors="replace").encode("utf-8")
+    except LookupError:
+        return body
+
+
+# Vary values that do not change the decoded body the cache stores
+_IGNORED_VARY = {"accept-encoding"}
+
+
+def varies(headers: Mapping[str, str]) -> bool:
+    """Whether a response's ``Vary`` names request headers other than Accept-Encoding."""
+    names = {name.strip().lower() for name in headers.get("vary", "").split(",") if name.strip()}
+    return bool(names - _IGNORED_VARY)
+
+
+@dataclass
+class CachedResponse:
+    """A stored page and the validators needed to revalidate it.
+
+    ``body`` is always text decoded from UTF-8, so ``encoding`` is "utf-8"
+    whatever charset the page was served in.
+    """
+
+    url: str
+    body: str
+    status_code: int
+    content_type: str
+    encoding: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires_at: float
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (time.time() if now is None else now) < self.expires_at
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HTTPResponseCache:
+    """SQLite-backed response cache with size-based LRU eviction.
+
+    Thread-safe; the scraper calls it through ``asyncio.to_thread`` so disk
+    I/O never runs on the event loop.
+    """
+
+    def __init__(self, path: str = "./data/http_cache.sqlite3", max_bytes: int = 512 * 1024 * 1024) -> None:
+        """Open (or create) the cache file.
+
+        Args:
+            path: SQLite database file
+            max_bytes: Maximum total size of stored (compressed) bodies
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                status_code INTEGER NOT NULL,
+                content_type TEXT NOT NULL,
+                encoding TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_responses_lru ON responses (last_access)")
+        # Older entries recorded the page's original charset next to a body already transcoded to UTF-8
+        self._db.execute("UPDATE responses SET encoding = 'utf-8' WHERE encoding != 'utf-8'")
+        self._db.commit()
+        self.total_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "HTTPResponseCache":
+        """Build a cache from ``SCRAPER_CACHE_*`` environment variables."""
+        return cls(
+            path=os.getenv("SCRAPER_CACHE_PATH", "./data/http_cache.sqlite3"),
+            max_bytes=int(float(os.getenv("SCRAPER_CACHE_MAX_MB", "512")) * 1024 * 1024),
+        )
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """Return the stored entry for ``url`` and mark it recently used."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, status_code, content_type, encoding, etag, last_modified, expires_at "
+                "FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+
+        body, status_code, content_type, encoding, etag, last_modified, expires_at = row
+        return CachedResponse(
+            url=url,
+            body=zlib.decompress(body).decode("utf-8", errors="replace"),
+            status_code=status_code,
+            content_type=content_type,
+            encoding=encoding,
+            etag=etag,
+            last_modified=last_modified,
+            expires_at=expires_at,
+        )
+
+    def put(
+        self,
+        url: str,
+        body: Union[str, bytes],
+        headers: Mapping[str, str],
+        status_code: int = 200,
+        encoding: str = "utf-8",
+    ) -> bool:
+        """Store a response if its headers allow it.
+
+        Responses marked ``no-store``, those varying on request headers, and
+        those that are neither fresh nor revalidatable, are skipped. Bodies
+        are stored as UTF-8 (and their encoding recorded as such); raw bytes
+        in ``encoding`` are transcoded unless they already are UTF-8.
+
+        Returns:
+            True when the response was stored
+        """
+        directives = parse_cache_control(headers.get("cache-control", ""))
+        if "no-store" in directives or varies(headers):
+            return False
+
+        now = time.time()
+        lifetime = freshness_lifetime(headers, now)
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        if lifetime <= 0 and not etag and not last_modified:
+            return False
+
+        compressed = zlib.compress(_utf8(body, encoding))
+        if len(compressed) > self.max_bytes:
+            return False
+
+        with self._lock:
+            previous = self._db.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(url, body, status_code, content_type, encoding, etag, last_modified, expires_at, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    compressed,
+                    status_code,
+                    headers.get("content-type", ""),
+                    "utf-8",
+                    etag,
+                    last_modified,
+                    now + lifetime,
+                    len(compressed),
+                    now,
+                ),
+            )
+            self.total_bytes += len(compressed) - (previous[0] if previous else 0)
+            self._evict()
+            self._db.commit()
+            self.stores += 1
+        return True
+
+    def refresh(self, url: str, headers: Mapping[str, str]) -> None:
+        """Extend freshness after a 304, picking up any updated validators."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET expires_at = ?, last_access = ?, "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (now + freshness_lifetime(headers, now), now, headers.get("etag"), headers.get("last-modified"), url),
+            )
+            self._db.commit()
+
+    def record(self, outcome: str) -> None:
+        """Count a lookup outcome: "hit", "revalidated" or "miss"."""
+        if outcome == "hit":
+            self.hits += 1
+        elif outcome == "revalidated":
+            self.revalidations += 1
+        else:
+            self.misses += 1
+
+    def _evict(self) -> None:
+        """Drop least-recently-used entries until under ``max_bytes``. Caller holds the lock."""
+        while self.total_bytes > self.max_bytes:
+            row = self._db.execute(
+                "SELECT url, size FROM responses ORDER BY last_access ASC LIMIT 1"
+            ).fetchone()
+            if row is None:
+                self.total_bytes = 0
+                return
+            self._db.execute("DELETE FROM responses WHERE url = ?", (row[0],))
+            self.total_bytes -= row[1]
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove every stored entry."""
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            self.total_bytes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and current size."""
+        lookups = self.hits + self.revalidations + self.misses
+        return {
+            "hits": self.hits,
+            "revalidations": self.revalidations,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.revalidations) / lookups if lookups else 0.0,
+            "total_bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+__all__ = ["HTTPResponseCache", "CachedResponse", "parse_cache_control", "freshness_lifetime", "varies"]
@@ -0,0 +1,457 @@
+"""Shared HTTP connection pool for outbound scraping traffic.
+
+A single pooled ``httpx.AsyncClient`` is created for the lifetime of the
+FastAPI app and borrowed by every ``AsyncWebScraper``, so repeat scrapes of
+the same hosts reuse warm keep-alive (and HTTP/2) connections instead of
+paying DNS, TCP and TLS setup on every request.
+
+Features:
+- HTTP/2 when ``h2`` is installed, HTTP/1.1 otherwise
+- Global and per-host connection limits with configurable keep-alive
+- TTL-based DNS cache in front of the socket backend
+- TLS verification, client certificates and connect retries configured as
+  for ``httpx.AsyncHTTPTransport``
+- HTTP_PROXY / HTTPS_PROXY / ALL_PROXY / NO_PROXY honoured like httpx's own
+  ``trust_env`` handling
+"""
+
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import logging
+import os
+import socket
+import ssl
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union
+
+import httpcore
+import httpx
+from httpx._utils import get_environment_proxies
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/119.0 Safari/537.36"
+)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class CachingDNSBackend(httpcore.AsyncNetworkBackend):
+    """Network backend that caches hostname resolution for ``ttl`` seconds.
+
+    TLS still verifies against the original hostname: httpcore passes the
+    request origin as ``server_hostname`` when upgrading the socket.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        backend: Optional[httpcore.AsyncNetworkBackend] = None,
+    ) -> None:
+        self.ttl = ttl
+        self._backend = backend or httpcore.AnyIOBackend()
+        self._cache: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def resolve(self, host: str, port: int) -> List[str]:
+        """Return cached addresses for ``host``, resolving on miss or expiry."""
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+
+        key = (host, port)
+        cached = self._cache.get(key)
+        now = time.monotonic()
+        if cached and cached[0] > now:
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._cache[key] = (now + self.ttl, addresses)
+        return addresses
+
+    def invalidate(self, host: str, port: int) -> None:
+        """Drop a cached entry, e.g. after every address failed to connect."""
+        self._cache.pop((host, port), None)
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options=None,
+    ) -> httpcore.AsyncNetworkStream:
+        try:
+            addresses = await self.resolve(host, port)
+        except OSError as exc:
+            raise httpcore.ConnectError(str(exc)) from exc
+
+        last_error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address,
+                    port,
+                    timeout=timeout,
+                    local_address=local_address,
+                    socket_options=socket_options,
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as exc:
+                last_error = exc
+
+        self.invalidate(host, port)
+        raise last_error or httpcore.ConnectError(f"No addresses for {host}")
+
+    async def connect_unix_socket(
+        self,
+        path: str,
+        timeout: Optional[float] = None,
+        socket_options=None,
+    ) -> httpcore.AsyncNetworkStream:
+        return await self._backend.connect_unix_socket(
+            path, timeout=timeout, socket_options=socket_options
+        )
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+def _map_httpcore_error(exc: Exception) -> Optional[httpx.TransportError]:
+    """The httpx exception matching an httpcore one (httpx mirrors httpcore's names)."""
+    for cls in type(exc).__mro__:
+        if not cls.__module__.startswith("httpcore"):
+            continue
+        mapped = getattr(httpx, cls.__name__, None)
+        if isinstance(mapped, type) and issubclass(mapped, httpx.TransportError):
+            return mapped(str(exc))
+    return None
+
+
+class _PoolResponseStream(httpx.AsyncByteStream):
+    """httpx view of an httpcore response body."""
+
+    def __init__(self, stream) -> None:
+        self._stream = stream
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        except Exception as exc:
+            mapped = _map_httpcore_error(exc)
+            if mapped is None:
+                raise
+            raise mapped from exc
+
+    async def aclose(self) -> None:
+        if hasattr(self._stream, "aclose"):
+            await self._stream.aclose()
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """Transport owning an ``httpcore.AsyncConnectionPool`` with a custom network backend.
+
+    ``httpx.AsyncHTTPTransport`` does not accept a network backend, so this
+    is the minimal equivalent of it for plain (non-proxied) HTTP. Proxied
+    URLs are routed to ``httpx.AsyncHTTPTransport`` mounts instead; see
+    ``HTTPConnectionPool._proxy_mounts``.
+    """
+
+    def __init__(
+        self,
+        network_backend: httpcore.AsyncNetworkBackend,
+        ssl_context: ssl.SSLContext,
+        limits: httpx.Limits,
+        http2: bool = False,
+        retries: int = 0,
+    ) -> None:
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=ssl_context,
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=True,
+            http2=http2,
+            retries=retries,
+            network_backend=network_backend,
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        try:
+            response = await self._pool.handle_async_request(core_request)
+        except Exception as exc:
+            mapped = _map_httpcore_error(exc)
+            if mapped is None:
+                raise
+            raise mapped from exc
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_PoolResponseStream(response.stream),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._pool.aclose()
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response stream that frees a per-host slot once the body is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release) -> None:
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+class HostLimitedTransport(httpx.AsyncBaseTransport):
+    """Transport wrapper capping concurrent requests per host.
+
+    A slot is held from sending the request until its response body is
+    closed, so streamed responses count against the limit too. A host's
+    semaphore only exists while requests to it are waiting or in flight.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_per_host: int) -> None:
+        self._transport = transport
+        self.max_per_host = max_per_host
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        # Requests holding or waiting for each host's semaphore
+        self._users: Dict[str, int] = {}
+
+    def _leave(self, host: str) -> None:
+        self._users[host] -= 1
+        if not self._users[host]:
+            del self._users[host]
+            del self._semaphores[host]
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.netloc.decode("ascii")
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.max_per_host)
+        self._users[host] = self._users.get(host, 0) + 1
+
+        try:
+            await semaphore.acquire()
+        except BaseException:
+            self._leave(host)
+            raise
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                semaphore.release()
+                self._leave(host)
+
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        if response.is_closed:
+            # Fully buffered responses (e.g. from mock transports) hold no connection
+            release()
+        else:
+            response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class HTTPConnectionPool:
+    """App-lifetime owner of the shared scraping ``httpx.AsyncClient``."""
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        max_redirects: int = 5,
+        user_agent: str = DEFAULT_USER_AGENT,
+        http2: bool = True,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        max_connections_per_host: int = 10,
+        dns_cache_ttl: float = 300.0,
+        verify: Union[bool, str, ssl.SSLContext] = True,
+        cert: Optional[Union[str, Tuple[str, str]]] = None,
+        trust_env: bool = True,
+        retries: int = 0,
+    ) -> None:
+        """Initialize pool settings; the client is created by ``start``.
+
+        Args:
+            timeout: Request timeout in seconds
+            max_redirects: Maximum number of redirects to follow
+            user_agent: User agent string for requests
+            http2: Negotiate HTTP/2 when the ``h2`` package is installed
+            max_connections: Maximum open connections across all hosts
+            max_keepalive_connections: Maximum idle connections kept alive
+            keepalive_expiry: Seconds an idle connection is kept
+            max_connections_per_host: Maximum concurrent requests per host
+            dns_cache_ttl: Seconds a DNS resolution is reused
+            verify: TLS verification: True, False, a CA bundle path or an SSL context
+            cert: Client certificate file, or (certificate, key) pair
+            trust_env: Honour SSL_CERT_FILE / SSL_CERT_DIR and the proxy
+                variables (HTTP_PROXY, HTTPS_PROXY, ALL_PROXY, NO_PROXY) from the environment
+            retries: Times a failed connection attempt is retried
+        """
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self.user_agent = user_agent
+        self.http2 = http2 and _http2_available()
+        if http2 and not self.http2:
+            logger.warning("HTTP/2 requested but 'h2' is not installed; using HTTP/1.1")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.max_connections_per_host = max_connections_per_host
+        self.dns = CachingDNSBackend(ttl=dns_cache_ttl)
+        self.verify = verify
+        self.cert = cert
+        self.trust_env = trust_env
+        self.retries = retries
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    def from_env(cls) -> "HTTPConnectionPool":
+        """Build a pool from ``SCRAPER_*`` environment variables."""
+        return cls(
+            timeout=float(os.getenv("SCRAPER_TIMEOUT", "10")),
+            max_redirects=int(os.getenv("SCRAPER_MAX_REDIRECTS", "5")),
+            http2=os.getenv("SCRAPER_HTTP2", "true").lower() == "true",
+            max_connections=int(os.getenv("SCRAPER_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("SCRAPER_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("SCRAPER_KEEPALIVE_EXPIRY", "30")),
+            max_connections_per_host=int(os.getenv("SCRAPER_MAX_CONNECTIONS_PER_HOST", "10")),
+            dns_cache_ttl=float(os.getenv("SCRAPER_DNS_CACHE_TTL", "300")),
+            verify=os.getenv("SCRAPER_CA_BUNDLE") or os.getenv("SCRAPER_VERIFY_TLS", "true").lower() == "true",
+            retries=int(os.getenv("SCRAPER_CONNECT_RETRIES", "0")),
+        )
+
+    def _ssl_context(self) -> ssl.SSLContext:
+        return httpx.create_ssl_context(
+            verify=self.verify, cert=self.cert, trust_env=self.trust_env, http2=self.http2
+        )
+
+    def _build_transport(self) -> httpx.AsyncBaseTransport:
+        transport = PooledTransport(
+            network_backend=self.dns,
+            ssl_context=self._ssl_context(),
+            limits=self.limits,
+            http2=self.http2,
+            retries=self.retries,
+        )
+        return HostLimitedTransport(transport, self.max_connections_per_host)
+
+    def _proxy_mounts(self) -> Dict[str, Optional[httpx.AsyncBaseTransport]]:
+        """Proxy transports for the environment's proxy settings.
+
+        httpx ignores environment proxies once a custom transport is passed,
+        so they are mounted here with the same URL patterns httpx would use.
+        NO_PROXY patterns map to None, which sends them to the pooled transport.
+        """
+        if not self.trust_env:
+            return {}
+        mounts: Dict[str, Optional[httpx.AsyncBaseTransport]] = {}
+        for pattern, proxy_url in get_environment_proxies().items():
+            if proxy_url is None:
+                mounts[pattern] = None
+                continue
+            transport = httpx.AsyncHTTPTransport(
+                verify=self._ssl_context(),
+                http2=self.http2,
+                limits=self.limits,
+                proxy=httpx.Proxy(proxy_url),
+                retries=self.retries,
+            )
+            mounts[pattern] = HostLimitedTransport(transport, self.max_connections_per_host)
+        return mounts
+
+    async def start(self) -> httpx.AsyncClient:
+        """Create the shared client if it does not exist yet."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                headers={"User-Agent": self.user_agent},
+                follow_redirects=True,
+                max_redirects=self.max_redirects,
+                transport=self._build_transport(),
+                mounts=self._proxy_mounts(),
+            )
+            logger.info(
+                "HTTP connection pool started",
+                extra={"http2": self.http2, "max_connections": self.limits.max_connections},
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the shared client and every pooled connection."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared client; raises if the pool has not been started."""
+        if self._client is None:
+            raise RuntimeError("HTTP connection pool not started")
+        return self._client
+
+    def stats(self) -> Dict:
+        """Return pool configuration and DNS cache counters."""
+        return {
+            "started": self._client is not None,
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_connections_per_host": self.max_connections_per_host,
+            "dns_cache_hits": self.dns.hits,
+            "dns_cache_misses": self.dns.misses,
+        }
+
+
+__all__ = ["HTTPConnectionPool", "CachingDNSBackend", "HostLimitedTransport", "PooledTransport"]
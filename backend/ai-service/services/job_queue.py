@@ -0,0 +1,400 @@
+"""Persistent background jobs for long-running pipelines.
+
+Scrape, embed and generate pipelines take tens of seconds, longer than a
+client should hold a request open (and long enough for gateway timeouts to
+retry, duplicating the work). Instead, a request submits a job and gets
+its ID back straight away; a bounded pool of workers runs the jobs, and
+clients poll, stream progress or cancel by ID.
+
+Job state, parameters and results live in SQLite so they survive a
+restart: jobs that were queued or running when the service stopped are
+queued again on start. Submitting the same kind and parameters while an
+identical job is still queued or running returns that job instead of
+starting a second one. Live progress is kept in memory only.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATES = ("queued", "running")
+FINISHED_STATES = ("completed", "failed", "cancelled")
+
+# Called by a handler with progress fields to merge into the job's progress
+ProgressCallback = Callable[..., None]
+JobHandler = Callable[[Dict[str, Any], ProgressCallback], Awaitable[Dict[str, Any]]]
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass
+class Job:
+    """One submitted pipeline run and its outcome."""
+
+    kind: str
+    params: Dict[str, Any]
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    state: str = "queued"
+    progress: Dict[str, Any] = field(default_factory=dict)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: str = field(default_factory=_now)
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class JobStore:
+    """SQLite table of jobs.
+
+    Thread-safe; the queue calls it through ``asyncio.to_thread``.
+    """
+
+    COLUMNS = ("job_id", "kind", "state", "params", "progress", "result", "error",
+               "created_at", "started_at", "finished_at")
+
+    def __init__(self, path: str = "./data/jobs.sqlite3") -> None:
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                state TEXT NOT NULL,
+                params TEXT NOT NULL,
+                progress TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                started_at TEXT,
+                finished_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, created_at);
+            """
+        )
+        # Rows written before timestamps became timezone-aware hold naive UTC strings;
+        # give them the same "+00:00" suffix so ordering and prune cutoffs compare like with like
+        for column in ("created_at", "started_at", "finished_at"):
+            self._db.execute(
+                f"UPDATE jobs SET {column} = {column} || '+00:00' "
+                f"WHERE {column} IS NOT NULL AND {column} NOT LIKE '%+00:00'"
+            )
+        self._db.commit()
+
+    def save(self, job: Job) -> None:
+        row = (
+            job.job_id, job.kind, job.state,
+            json.dumps(job.params), json.dumps(job.progress),
+            json.dumps(job.result) if job.result is not None else None, job.error,
+            job.created_at, job.started_at, job.finished_at,
+        )
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(self.COLUMNS)}) VALUES ({', '.join('?' * len(row))})",
+                row,
+            )
+            self._db.commit()
+
+    @staticmethod
+    def _job(row) -> Job:
+        job_id, kind, state, params, progress, result, error, created_at, started_at, finished_at = row
+        return Job(
+            kind=kind,
+            params=json.loads(params),
+            job_id=job_id,
+            state=state,
+            progress=json.loads(progress),
+            result=json.loads(result) if result is not None else None,
+            error=error,
+            created_at=created_at,
+            started_at=started_at,
+            finished_at=finished_at,
+        )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._db.execute(
+                f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        return self._job(row) if row else None
+
+    def list(self, states=None, limit: Optional[int] = None, oldest_first: bool = False) -> List[Job]:
+        query = f"SELECT {', '.join(self.COLUMNS)} FROM jobs"
+        args: List[Any] = []
+        if states:
+            query += f" WHERE state IN ({', '.join('?' * len(states))})"
+            args.extend(states)
+        query += " ORDER BY created_at " + ("ASC" if oldest_first else "DESC")
+        if limit is not None:
+            query += " LIMIT ?"
+            args.append(limit)
+        with self._lock:
+            rows = self._db.execute(query, args).fetchall()
+        return [self._job(row) for row in rows]
+
+    def prune(self, older_than: float) -> int:
+        """Delete finished jobs created more than ``older_than`` seconds ago."""
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=older_than)).isoformat()
+        with self._lock:
+            deleted = self._db.execute(
+                f"DELETE FROM jobs WHERE state IN ({', '.join('?' * len(FINISHED_STATES))}) AND created_at < ?",
+                (*FINISHED_STATES, cutoff),
+            ).rowcount
+            self._db.commit()
+        return deleted
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._db.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+
+
+class JobQueue:
+    """Bounded worker pool running persisted jobs by kind."""
+
+    def __init__(
+        self,
+        store: JobStore,
+        workers: int = 2,
+        retention: float = 7 * 86400,
+        heartbeat: float = 15.0,
+    ) -> None:
+        """Initialize the queue.
+
+        Args:
+            store: Where jobs are persisted
+            workers: Jobs run at the same time
+            retention: Seconds finished jobs are kept
+            heartbeat: Seconds between repeated progress events while nothing changes
+        """
+        self.store = store
+        self.workers = workers
+        self.retention = retention
+        self.heartbeat = heartbeat
+        self._handlers: Dict[str, JobHandler] = {}
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        # Queued and running jobs; finished ones are read back from the store
+        self._jobs: Dict[str, Job] = {}
+        # Finished jobs whose final state is still being written to the store
+        self._finishing: Dict[str, Job] = {}
+        self._versions: Dict[str, int] = {}
+        self._changed: Dict[str, asyncio.Event] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._workers: List[asyncio.Task] = []
+        self.submitted = 0
+        self.coalesced = 0
+
+    @classmethod
+    def from_env(cls) -> "JobQueue":
+        """Build a queue from ``JOB_*`` environment variables."""
+        return cls(
+            JobStore(path=os.getenv("JOB_DB_PATH", "./data/jobs.sqlite3")),
+            workers=int(os.getenv("JOB_WORKERS", "2")),
+            retention=float(os.getenv("JOB_RETENTION", str(7 * 86400))),
+        )
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        """Run jobs of ``kind`` with ``handler(params, progress)``, which returns the job result."""
+        self._handlers[kind] = handler
+
+    async def start(self) -> None:
+        """Prune old jobs, re-queue interrupted ones and start the workers."""
+        pruned = await asyncio.to_thread(self.store.prune, self.retention)
+        interrupted = await asyncio.to_thread(self.store.list, ACTIVE_STATES, None, True)
+        for job in interrupted:
+            job.state = "queued"
+            job.started_at = None
+            await self._enqueue(job)
+        if pruned or interrupted:
+            logger.info("Job queue restored", extra={"requeued": len(interrupted), "pruned": pruned})
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def shutdown(self) -> None:
+        """Stop the workers; running jobs are left queued to resume after restart."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _enqueue(self, job: Job) -> None:
+        self._jobs[job.job_id] = job
+        await self._save(job)
+        self._queue.put_nowait(job.job_id)
+
+    async def submit(self, kind: str, params: Dict[str, Any]) -> Job:
+        """Queue a job, or return the identical job already queued or running.
+
+        Raises:
+            ValueError: If no handler is registered for ``kind``
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        for job in self._jobs.values():
+            if job.finished_at is None and job.kind == kind and job.params == params:
+                self.coalesced += 1
+                return job
+        job = Job(kind=kind, params=params)
+        self.submitted += 1
+        await self._enqueue(job)
+        return job
+
+    def _live(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id) or self._finishing.get(job_id)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        job = self._live(job_id)
+        if job is not None:
+            return job
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def list(self, limit: int = 50) -> List[Job]:
+        jobs = await asyncio.to_thread(self.store.list, None, limit)
+        # Prefer live objects, whose progress is newer than the stored copy
+        return [self._live(job.job_id) or job for job in jobs]
+
+    async def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; False if it already finished."""
+        job = self._jobs.get(job_id)
+        if job is None or job.finished_at is not None:
+            return False
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+            return True
+        # Still queued: the worker skips it when it comes up
+        await self._finish(job, "cancelled")
+        return True
+
+    async def watch(self, job_id: str) -> AsyncIterator[Job]:
+        """Yield the job now and after every change until it finishes.
+
+        While nothing changes the current state is repeated every
+        ``heartbeat`` seconds, keeping idle connections alive.
+        """
+        job = await self.get(job_id)
+        while job is not None:
+            version = self._versions.get(job_id)
+            yield job
+            if job.finished:
+                return
+            if self._versions.get(job_id) == version:
+                changed = self._changed.setdefault(job_id, asyncio.Event())
+                try:
+                    await asyncio.wait_for(changed.wait(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    pass
+            job = await self.get(job_id)
+
+    def _touch(self, job: Job) -> None:
+        self._versions[job.job_id] = self._versions.get(job.job_id, 0) + 1
+        changed = self._changed.pop(job.job_id, None)
+        if changed is not None:
+            changed.set()
+
+    async def _save(self, job: Job) -> None:
+        await asyncio.to_thread(self.store.save, job)
+        self._touch(job)
+
+    def _progress(self, job: Job, fields: Dict[str, Any]) -> None:
+        job.progress.update(fields)
+        self._touch(job)
+
+    async def _finish(self, job: Job, state: str, result=None, error: Optional[str] = None) -> None:
+        job.state = state
+        job.result = result
+        job.error = error
+        job.finished_at = _now()
+        # Out of the live jobs before the save, so submit and cancel never pick up a finished job
+        self._jobs.pop(job.job_id, None)
+        self._finishing[job.job_id] = job
+        try:
+            await asyncio.to_thread(self.store.save, job)
+        finally:
+            self._finishing.pop(job.job_id, None)
+        # Wake watchers only now, so they read the stored final state
+        self._versions.pop(job.job_id, None)
+        changed = self._changed.pop(job.job_id, None)
+        if changed is not None:
+            changed.set()
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.state != "queued":
+                continue
+            await self._run(job)
+
+    async def _run(self, job: Job) -> None:
+        job.state = "running"
+        job.started_at = _now()
+        # A re-queued job starts over, so progress from an interrupted run no longer applies
+        job.progress = {}
+        await self._save(job)
+        if job.finished:
+            # Cancelled while its running state was being saved; make sure the final state is stored last
+            await asyncio.to_thread(self.store.save, job)
+            return
+        task = asyncio.create_task(
+            self._handlers[job.kind](job.params, lambda **fields: self._progress(job, fields))
+        )
+        self._running[job.job_id] = task
+        try:
+            await asyncio.wait([task])
+        except asyncio.CancelledError:
+            # Shutting down: stop the job but keep it queued so it runs again after restart
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            job.state = "queued"
+            job.started_at = None
+            await asyncio.to_thread(self.store.save, job)
+            raise
+        finally:
+            self._running.pop(job.job_id, None)
+
+        if task.cancelled():
+            await self._finish(job, "cancelled")
+        elif task.exception() is not None:
+            logger.error("Job failed", extra={"job_id": job.job_id, "kind": job.kind, "error": str(task.exception())})
+            await self._finish(job, "failed", error=str(task.exception()))
+        else:
+            await self._finish(job, "completed", result=task.result())
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "queued": sum(job.state == "queued" for job in self._jobs.values()),
+            "running": len(self._running),
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "stored": self.store.counts(),
+        }
+
+
+__all__ = ["Job", "JobQueue", "JobStore"]
@@ -0,0 +1,325 @@
+"""Two-tier cache for LLM responses.
+
+Identical requests (same provider, model, prompt template version, content
+and parameters) are answered from cache instead of calling the provider
+again. Lookups hit an in-process LRU first, then Redis, which is shared by
+every worker and survives restarts; a Redis hit is copied into the LRU.
+Redis is optional: when it is not configured or unreachable the cache keeps
+working in memory only. Misses can additionally be coalesced through
+``services.single_flight`` so identical concurrent requests make one call.
+Streaming variants share the entry of their non-streaming method: a hit is
+replayed as a single chunk and a completed stream fills the cache.
+"""
+
+from __future__ import annotations
+
+import copy
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from services.single_flight import SingleFlight
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # pragma: no cover - depends on environment
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds Redis is bypassed after an error, so an outage costs one timeout, not one per call
+REDIS_RETRY_INTERVAL = 30.0
+
+_MISS = object()
+
+# Yielded last by a streaming method whose output must not be cached (e.g. truncated)
+INCOMPLETE = object()
+
+
+def request_key(scope: str, operation: str, params: Dict[str, Any]) -> str:
+    """Hash a provider request into a hex digest.
+
+    Args:
+        scope: Provider, model and prompt template version (see ``cache_scope``)
+        operation: Service method name
+        params: Content and every parameter that changes the prompt
+    """
+    payload = json.dumps(
+        {"scope": scope, "operation": operation, "params": params},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _redis_url_from_env() -> Optional[str]:
+    url = os.getenv("LLM_CACHE_REDIS_URL") or os.getenv("REDIS_URL")
+    if url:
+        return url
+    if host := os.getenv("REDIS_HOST"):
+        password = os.getenv("REDIS_PASSWORD")
+        auth = f":{password}@" if password else ""
+        return f"redis://{auth}{host}:{os.getenv('REDIS_PORT', '6379')}/0"
+    return None
+
+
+class LLMResponseCache:
+    """In-process LRU in front of an optional Redis tier.
+
+    Values must be JSON-serializable; every hit returns a fresh copy, so
+    callers may mutate what they get back. Meant to be used from a single
+    event loop.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 24 * 3600,
+        redis_url: Optional[str] = None,
+        redis_client: Any = None,
+        namespace: str = "llm",
+    ) -> None:
+        """Initialize cache settings; the Redis connection opens lazily.
+
+        Args:
+            max_entries: Maximum entries kept in process
+            max_bytes: Maximum serialized bytes kept in process
+            ttl: Seconds an entry lives in both tiers
+            redis_url: Redis URL for the shared tier; memory only when None
+            redis_client: Existing ``redis.asyncio`` client to use instead
+            namespace: Prefix for Redis keys
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.namespace = namespace
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._bytes = 0
+        self._redis = redis_client
+        if self._redis is None and redis_url:
+            if aioredis is None:
+                logger.warning("LLM cache Redis URL set but 'redis' is not installed; using memory only")
+            else:
+                self._redis = aioredis.Redis.from_url(
+                    redis_url, socket_timeout=0.5, socket_connect_timeout=0.5
+                )
+        self._redis_down_until = 0.0
+        self.memory_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.redis_errors = 0
+
+    @classmethod
+    def from_env(cls) -> "LLMResponseCache":
+        """Build a cache from ``LLM_CACHE_*`` (and ``REDIS_*``) environment variables."""
+        redis_enabled = os.getenv("LLM_CACHE_REDIS", "true").lower() == "true"
+        return cls(
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")),
+            max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "64")) * 1024 * 1024),
+            ttl=float(os.getenv("LLM_CACHE_TTL", str(24 * 3600))),
+            redis_url=_redis_url_from_env() if redis_enabled else None,
+        )
+
+    def make_key(self, scope: str, operation: str, params: Dict[str, Any]) -> str:
+        """Return the cache key of a request (see ``request_key``)."""
+        return f"{self.namespace}:{request_key(scope, operation, params)}"
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value for ``key`` or ``default``."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, data = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return json.loads(data)
+            self._discard(key)
+
+        if self._redis_available():
+            try:
+                data = await self._redis.get(key)
+            except Exception as e:
+                self._redis_failed(e)
+            else:
+                if data is not None:
+                    data = data.decode("utf-8") if isinstance(data, bytes) else data
+                    self._store(key, data, self.ttl)
+                    self.redis_hits += 1
+                    return json.loads(data)
+
+        self.misses += 1
+        return default
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store ``value`` in both tiers for ``ttl`` seconds (default: the cache TTL)."""
+        ttl = self.ttl if ttl is None else ttl
+        data = json.dumps(value, ensure_ascii=False)
+        self._store(key, data, ttl)
+        if self._redis_available():
+            try:
+                await self._redis.set(key, data, ex=max(1, int(ttl)))
+            except Exception as e:
+                self._redis_failed(e)
+
+    def _store(self, key: str, data: str, ttl: float) -> None:
+        size = len(data)
+        if size > self.max_bytes:
+            return
+        self._discard(key)
+        self._entries[key] = (time.time() + ttl, data)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def _redis_available(self) -> bool:
+        return self._redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, error: Exception) -> None:
+        self.redis_errors += 1
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_INTERVAL
+        logger.warning(
+            "LLM cache Redis tier unavailable; using memory only",
+            extra={"error": str(error), "retry_in": REDIS_RETRY_INTERVAL},
+        )
+
+    def clear(self) -> None:
+        """Drop every in-process entry (Redis entries expire by TTL)."""
+        self._entries.clear()
+        self._bytes = 0
+
+    async def aclose(self) -> None:
+        """Close the Redis connection pool."""
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    def stats(self) -> Dict:
+        hits = self.memory_hits + self.redis_hits
+        lookups = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_mb": round(self._bytes / 1024 / 1024, 2),
+            "memory_hits": self.memory_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "redis_enabled": self._redis is not None,
+            "redis_errors": self.redis_errors,
+        }
+
+
+def cached_response(method):
+    """Serve an LLM service coroutine method from the service's ``cache``.
+
+    The key covers ``self.cache_scope()`` (provider, model, prompt template
+    version), the method name and every bound argument, defaults included.
+    On a miss, identical concurrent calls share one provider call through
+    the service's ``single_flight`` when it has one. Services with neither
+    call the provider directly.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        cache: Optional[LLMResponseCache] = getattr(self, "cache", None)
+        flights: Optional[SingleFlight] = getattr(self, "single_flight", None)
+        if cache is None and flights is None:
+            return await method(self, *args, **kwargs)
+
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        params = dict(bound.arguments)
+        params.pop("self")
+        digest = request_key(self.cache_scope(), method.__name__, params)
+
+        if cache is not None:
+            key = f"{cache.namespace}:{digest}"
+            value = await cache.get(key, _MISS)
+            if value is not _MISS:
+                return value
+
+        async def call():
+            value = await method(self, *args, **kwargs)
+            if cache is not None:
+                await cache.set(key, value)
+            return value
+
+        if flights is None:
+            return await call()
+        # Waiters share one result object; hand each its own copy, as cache hits do
+        return copy.deepcopy(await flights.do(digest, call))
+
+    return wrapper
+
+
+def cached_stream(operation: str, items: bool = False):
+    """Serve a streaming (async generator) service method from the service's ``cache``.
+
+    Entries are shared with the non-streaming method ``operation``, whose
+    parameters the streaming method must mirror. Text streams (the
+    default) are cached as their joined text and a hit is yielded as one
+    chunk; with ``items`` the streamed objects are the elements of the
+    list ``operation`` returns, and a hit yields them one by one. Only a
+    stream that runs to completion without yielding ``INCOMPLETE`` is
+    stored. Streams are not coalesced through ``single_flight``.
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            cache: Optional[LLMResponseCache] = getattr(self, "cache", None)
+            if cache is None:
+                async for chunk in method(self, *args, **kwargs):
+                    if chunk is not INCOMPLETE:
+                        yield chunk
+                return
+
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            params = dict(bound.arguments)
+            params.pop("self")
+            key = cache.make_key(self.cache_scope(), operation, params)
+            value = await cache.get(key, _MISS)
+            if items and isinstance(value, list):
+                for item in value:
+                    yield item
+                return
+            if not items and isinstance(value, str):
+                yield value
+                return
+
+            chunks = []
+            complete = True
+            async for chunk in method(self, *args, **kwargs):
+                if chunk is INCOMPLETE:
+                    complete = False
+                    continue
+                chunks.append(chunk)
+                yield chunk
+            # Only reached when the consumer read the whole stream
+            if complete:
+                await cache.set(key, chunks if items else "".join(chunks))
+
+        return wrapper
+
+    return decorator
+
+
+__all__ = ["INCOMPLETE", "LLMResponseCache", "cached_response", "cached_stream", "request_key"]
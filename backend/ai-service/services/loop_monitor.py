@@ -0,0 +1,74 @@
+"""Event-loop lag monitoring.
+
+A background task sleeps for a fixed interval and records how late it
+wakes up. Any CPU-bound work running on the loop (e.g. inline HTML parsing)
+shows up directly as lag, so the numbers quantify how much one request
+stalls every other request on the same worker.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+
+class LoopLagMonitor:
+    """Sample event-loop scheduling lag in the background."""
+
+    def __init__(self, interval: float = 0.05, window: int = 1200) -> None:
+        """Initialize the monitor.
+
+        Args:
+            interval: Seconds between samples
+            window: Number of recent samples kept for percentiles
+        """
+        self.interval = interval
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+        self.max_lag = 0.0
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - expected)
+            self._samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def reset(self) -> None:
+        self._samples.clear()
+        self.max_lag = 0.0
+
+    def stats(self) -> Dict:
+        """Return lag percentiles in milliseconds over the recent window."""
+        samples = sorted(self._samples)
+        if not samples:
+            return {"samples": 0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": round(self.max_lag * 1000, 2)}
+
+        def percentile(p: float) -> float:
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 2)
+
+        return {
+            "samples": len(samples),
+            "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(self.max_lag * 1000, 2),
+        }
+
+
+__all__ = ["LoopLagMonitor"]
@@ -0,0 +1,106 @@
+"""A long-lived asyncio event loop on a background thread.
+
+Synchronous callers (batch scripts, the legacy ``WebScraper``) submit
+coroutines to one loop that outlives each call, so clients, connection
+pools and TLS sessions created on it are reused instead of being rebuilt by
+``asyncio.run`` every time.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+from typing import Any, Coroutine, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundLoop:
+    """Run an event loop forever on a daemon thread and submit work to it."""
+
+    def __init__(self, name: str = "background-loop") -> None:
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    @property
+    def is_running(self) -> bool:
+        # A forked child inherits the loop object but not the thread running it
+        return self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+
+    def start(self) -> asyncio.AbstractEventLoop:
+        """Start the loop thread if needed and return its loop."""
+        with self._lock:
+            if self.is_running:
+                return self._loop
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run() -> None:
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+            self._loop = loop
+            self._pid = os.getpid()
+            self._thread.start()
+            ready.wait()
+            logger.info("Background event loop started", extra={"thread": self.name})
+            return loop
+
+    def run(self, coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+        """Run ``coro`` on the loop and block until it finishes.
+
+        Raises:
+            RuntimeError: When called from the loop's own thread (it would deadlock)
+            concurrent.futures.TimeoutError: When ``timeout`` elapses; the coroutine is cancelled
+        """
+        loop = self.start()
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("BackgroundLoop.run called from its own loop thread")
+        self.calls += 1
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Cancel outstanding tasks, stop the loop and join its thread."""
+        with self._lock:
+            if not self.is_running:
+                self._thread = None
+                self._loop = None
+                return
+            loop, thread = self._loop, self._thread
+
+            async def cancel_tasks() -> None:
+                tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+            try:
+                asyncio.run_coroutine_threadsafe(cancel_tasks(), loop).result(timeout)
+            except Exception as e:
+                logger.warning("Error cancelling background tasks", extra={"error": str(e)})
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            if not thread.is_alive():
+                loop.close()
+            self._thread = None
+            self._loop = None
+
+    def stats(self) -> Dict:
+        return {"running": self.is_running, "calls": self.calls}
+
+
+__all__ = ["BackgroundLoop"]
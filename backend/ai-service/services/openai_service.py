@@ -1,76 +1,176 @@
 import os
-import json
-from typing import List, Dict
+from typing import AsyncIterator, Callable, List, Dict, Optional, Sequence
 from openai import AsyncOpenAI
 
+from services.adaptive_limiter import AdaptiveLimiter
+from services.flashcard_parsing import complete_flashcards, validate_flashcard
+from services.flashcard_stream import FlashcardStream
+from services.llm_cache import INCOMPLETE, LLMResponseCache, cached_response, cached_stream
+from services.single_flight import SingleFlight
+from services.token_budget import ANSWER_TOKENS, TEXT_TOKENS, TokenBudget
+
+# Bump whenever a prompt or completion limit below changes, so cached responses to the old one are not reused
+PROMPT_VERSION = 3
+
+# Models accepting response_format={"type": "json_object"}
+JSON_MODE_MODELS = ("gpt-4-turbo", "gpt-4-1106", "gpt-4-0125", "gpt-4o", "gpt-3.5-turbo-1106", "gpt-3.5-turbo-0125")
+
 
 class OpenAIService:
-    def __init__(self):
+    def __init__(
+        self,
+        cache: Optional[LLMResponseCache] = None,
+        single_flight: Optional[SingleFlight] = None,
+        limiter: Optional[AdaptiveLimiter] = None,
+    ):
         self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         self.model = os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview")
+        self.budget = TokenBudget(self.model)
+        self.cache = cache
+        self.single_flight = single_flight
+        # Shared with every other OpenAI caller (e.g. the RAG engine) so they back off together
+        self.limiter = limiter or AdaptiveLimiter.from_env("openai")
 
-    async def generate_text(self, prompt: str) -> str:
-        """Generate text from a prompt"""
-        try:
+    def cache_scope(self) -> str:
+        """Provider, model and prompt version that cached responses depend on"""
+        return f"openai:{self.model}:v{PROMPT_VERSION}"
+
+    def _fit(self, build: Callable[..., List[Dict]], max_tokens: int, content: str, *args) -> List[Dict]:
+        """Build messages with ``content`` truncated to fit the context window"""
+        overhead = self.budget.count_messages(build("", *args))
+        return build(self.budget.fit(content, max_tokens, overhead), *args)
+
+    async def _complete(self, messages: List[Dict], temperature: float, max_tokens: int, **options) -> str:
+        """Return the content of a chat completion, within the provider limiter"""
+        async with self.limiter.acquire(self.budget.count_messages(messages) + max_tokens) as permit:
             response = await self.client.chat.completions.create(
                 model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=2000
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **options
             )
-            return response.choices[0].message.content
+            permit.record_usage(getattr(getattr(response, "usage", None), "total_tokens", None))
+        return response.choices[0].message.content
+
+    async def _stream(self, messages: List[Dict], temperature: float, max_tokens: int) -> AsyncIterator[str]:
+        """Yield content deltas of a streamed chat completion (holding a limiter slot until it ends)
+
+        Usage comes from the stream's final chunk; a stream that ends before
+        it is charged for its prompt and the text produced so far.
+        """
+        prompt_tokens = self.budget.count_messages(messages)
+        async with self.limiter.acquire(prompt_tokens + max_tokens) as permit:
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            streamed = []
+            usage = None
+            try:
+                async for chunk in stream:
+                    usage = getattr(getattr(chunk, "usage", None), "total_tokens", None) or usage
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        streamed.append(chunk.choices[0].delta.content)
+                        yield chunk.choices[0].delta.content
+            finally:
+                await stream.close()
+                permit.record_usage(usage or prompt_tokens + self.budget.count("".join(streamed)))
+
+    @cached_response
+    async def generate_text(self, prompt: str) -> str:
+        """Generate text from a prompt"""
+        messages = [{"role": "user", "content": prompt}]
+        max_tokens = self.budget.completion_tokens(TEXT_TOKENS)
+        self.budget.check(messages, max_tokens)
+        try:
+            return await self._complete(messages, 0.7, max_tokens)
         except Exception as e:
             raise Exception(f"OpenAI API error: {str(e)}")
 
-    async def generate_flashcards(self, content: str, count: int = 10) -> List[Dict]:
-        """Generate flashcards from content"""
+    @cached_stream("generate_text")
+    async def stream_text(self, prompt: str) -> AsyncIterator[str]:
+        """Stream text generated from a prompt"""
+        messages = [{"role": "user", "content": prompt}]
+        max_tokens = self.budget.completion_tokens(TEXT_TOKENS)
+        self.budget.check(messages, max_tokens)
+        try:
+            async for token in self._stream(messages, 0.7, max_tokens):
+                yield token
+        except Exception as e:
+            raise Exception(f"OpenAI API error: {str(e)}")
+
+    def _flashcard_messages(self, content: str, count: int, exclude: Sequence[str] = (), wrapped: bool = False) -> List[Dict]:
+        card = """{
+            "question": "Clear, specific question",
+            "answer": "Concise, accurate answer",
+            "tags": ["relevant", "tags"],
+            "difficulty": "easy|medium|hard"
+          }"""
+        # JSON mode only returns objects, so the array is wrapped in one
+        if wrapped:
+            structure = f"""object with this exact structure:
+        {{"flashcards": [
+          {card}
+        ]}}"""
+        else:
+            structure = f"""array of flashcards with this exact structure:
+        [
+          {card}
+        ]"""
         prompt = f"""
         Generate {count} high-quality flashcards from the following content.
         
         Content:
         {content}
         
-        Return ONLY a valid JSON array of flashcards with this exact structure:
-        [
-          {{
-            "question": "Clear, specific question",
-            "answer": "Concise, accurate answer",
-            "tags": ["relevant", "tags"],
-            "difficulty": "easy|medium|hard"
-          }}
-        ]
+        Return ONLY a valid JSON {structure}
         
         Make questions test understanding, not just memorization.
         Keep answers concise but complete.
         """
+        if exclude:
+            prompt += "\n        Do not repeat any of these existing questions:\n" + "\n".join(f"        - {q}" for q in exclude)
+        return [
+            {"role": "system", "content": "You are a medical education expert that creates high-quality flashcards. Always return valid JSON."},
+            {"role": "user", "content": prompt}
+        ]
+
+    @cached_response
+    async def generate_flashcards(self, content: str, count: int = 10) -> List[Dict]:
+        """Generate flashcards from content, re-requesting only cards missing from the reply"""
+        json_mode = self.model.startswith(JSON_MODE_MODELS)
+        options = {"response_format": {"type": "json_object"}} if json_mode else {}
+
+        async def request(missing: int, exclude: Sequence[str]) -> str:
+            max_tokens = self.budget.flashcard_tokens(missing)
+            messages = self._fit(self._flashcard_messages, max_tokens, content, missing, exclude, json_mode)
+            return await self._complete(messages, 0.7, max_tokens, **options)
 
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a medical education expert that creates high-quality flashcards. Always return valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=3000
-            )
-            
-            content = response.choices[0].message.content
-            # Try to extract JSON if there's extra text
-            start = content.find('[')
-            end = content.rfind(']') + 1
-            if start != -1 and end > start:
-                content = content[start:end]
-            
-            flashcards = json.loads(content)
-            return flashcards
-        except json.JSONDecodeError as e:
-            raise Exception(f"Failed to parse flashcards JSON: {str(e)}")
+            return await complete_flashcards(request, count)
         except Exception as e:
             raise Exception(f"Failed to generate flashcards: {str(e)}")
 
-    async def answer_with_context(self, question: str, context: str) -> str:
-        """Answer a question using provided context"""
+    @cached_stream("generate_flashcards", items=True)
+    async def stream_flashcards(self, content: str, count: int = 10) -> AsyncIterator[Dict]:
+        """Stream flashcards from content, each as soon as its JSON object completes"""
+        max_tokens = self.budget.flashcard_tokens(count)
+        messages = self._fit(self._flashcard_messages, max_tokens, content, count)
+        cards = FlashcardStream(self._stream(messages, 0.7, max_tokens), validate_flashcard, count)
+        try:
+            async for card in cards:
+                yield card
+        except Exception as e:
+            raise Exception(f"Failed to generate flashcards: {str(e)}")
+        if cards.incomplete:
+            yield INCOMPLETE
+
+    def _answer_messages(self, context: str, question: str) -> List[Dict]:
         prompt = f"""
         Context:
         {context}
@@ -79,23 +179,33 @@ class OpenAIService:
         
         Answer the question based on the context provided. If the answer cannot be found in the context, say so.
         """
+        return [
+            {"role": "system", "content": "You are a helpful medical education assistant."},
+            {"role": "user", "content": prompt}
+        ]
 
+    @cached_response
+    async def answer_with_context(self, question: str, context: str) -> str:
+        """Answer a question using provided context"""
+        max_tokens = self.budget.completion_tokens(ANSWER_TOKENS)
+        messages = self._fit(self._answer_messages, max_tokens, context, question)
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful medical education assistant."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.5,
-                max_tokens=1000
-            )
-            return response.choices[0].message.content
+            return await self._complete(messages, 0.5, max_tokens)
         except Exception as e:
             raise Exception(f"Failed to answer question: {str(e)}")
 
-    async def summarize(self, content: str, max_length: int = 500) -> str:
-        """Summarize long content"""
+    @cached_stream("answer_with_context")
+    async def stream_answer_with_context(self, question: str, context: str) -> AsyncIterator[str]:
+        """Stream the answer to a question using provided context"""
+        max_tokens = self.budget.completion_tokens(ANSWER_TOKENS)
+        messages = self._fit(self._answer_messages, max_tokens, context, question)
+        try:
+            async for token in self._stream(messages, 0.5, max_tokens):
+                yield token
+        except Exception as e:
+            raise Exception(f"Failed to answer question: {str(e)}")
+
+    def _summary_messages(self, content: str, max_length: int) -> List[Dict]:
         prompt = f"""
         Summarize the following content in approximately {max_length} characters.
         Focus on the key points and main ideas.
@@ -103,14 +213,25 @@ class OpenAIService:
         Content:
         {content}
         """
+        return [{"role": "user", "content": prompt}]
+
+    @cached_response
+    async def summarize(self, content: str, max_length: int = 500) -> str:
+        """Summarize long content"""
+        max_tokens = self.budget.summary_tokens(max_length)
+        messages = self._fit(self._summary_messages, max_tokens, content, max_length)
+        try:
+            return await self._complete(messages, 0.5, max_tokens)
+        except Exception as e:
+            raise Exception(f"Failed to summarize: {str(e)}")
 
+    @cached_stream("summarize")
+    async def stream_summarize(self, content: str, max_length: int = 500) -> AsyncIterator[str]:
+        """Stream a summary of long content"""
+        max_tokens = self.budget.summary_tokens(max_length)
+        messages = self._fit(self._summary_messages, max_tokens, content, max_length)
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.5,
-                max_tokens=500
-            )
-            return response.choices[0].message.content
+            async for token in self._stream(messages, 0.5, max_tokens):
+                yield token
         except Exception as e:
             raise Exception(f"Failed to summarize: {str(e)}")
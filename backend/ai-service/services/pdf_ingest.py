@@ -0,0 +1,314 @@
+"""Memory-bounded PDF text extraction for RAG ingestion.
+
+Textbooks and guidelines run to hundreds of pages, so the document is never
+held in memory as a whole. Text is extracted page by page, in page ranges
+spread across a warm process pool. Each task opens its own reader, so
+PyPDF2's object cache lives only as long as one range. Results come back
+in page order through a bounded window of in-flight ranges, and pages are
+handed to ``RAGEngine.index_notes`` in small batches. Peak memory therefore
+depends on the window size, not on the length of the document; only the
+cross-reference table (tens of bytes per PDF object) grows with it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gc
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from PyPDF2 import PageObject, PdfReader
+
+logger = logging.getLogger(__name__)
+
+# Page attributes a /Page inherits from its ancestors in the page tree
+INHERITABLE_ATTRIBUTES = ("/Resources", "/MediaBox", "/CropBox", "/Rotate")
+
+
+@dataclass
+class PDFPage:
+    """Extracted text of one page (1-based ``number``)."""
+
+    number: int
+    text: str
+    error: Optional[str] = None
+
+
+def _open_reader(handle) -> PdfReader:
+    reader = PdfReader(handle)
+    if reader.is_encrypted and not reader.decrypt(""):
+        raise ValueError("PDF is password protected")
+    return reader
+
+
+def _page_tree(reader: PdfReader):
+    return reader.trailer["/Root"].get_object()["/Pages"].get_object()
+
+
+def count_pages(path: str) -> int:
+    """Return the number of pages without extracting any text."""
+    with open(path, "rb") as handle:
+        reader = _open_reader(handle)
+        try:
+            return int(_page_tree(reader)["/Count"])
+        except (KeyError, TypeError, ValueError):
+            return len(reader.pages)
+
+
+def _walk_page_tree(reader: PdfReader, node, start: int, stop: int, offset: int, inherit: Dict) -> Iterator[PageObject]:
+    """Yield pages ``[start, stop)`` of a subtree whose first page has index ``offset``.
+
+    Unlike ``reader.pages`` this never flattens the whole tree: subtrees
+    outside the range are skipped by their own ``/Count``. Every kid is
+    resolved: a node whose ``/Count`` equals its number of kids may still
+    hold ``/Pages`` kids (an empty one offsetting a two-page one).
+    """
+    inherit = {**inherit, **{key: node[key] for key in INHERITABLE_ATTRIBUTES if key in node}}
+
+    for kid in node["/Kids"]:
+        if offset >= stop:
+            return
+        child = kid.get_object()
+        if child.get("/Type") == "/Pages" or "/Kids" in child:
+            count = int(child["/Count"])
+            if offset + count > start:
+                yield from _walk_page_tree(reader, child, start, stop, offset, inherit)
+            offset += count
+            continue
+        if offset >= start:
+            page = PageObject(reader, kid)
+            page.update(child)
+            for key, value in inherit.items():
+                if key not in page:
+                    page[key] = value
+            yield page
+        offset += 1
+
+
+def extract_page_range(path: str, start: int, stop: int) -> List[PDFPage]:
+    """Extract pages ``[start, stop)`` (0-based) with a reader private to this range.
+
+    A page that fails to extract is returned empty with its error instead of
+    failing the whole range.
+    """
+    with open(path, "rb") as handle:
+        reader = _open_reader(handle)
+        try:
+            page_objects = list(_walk_page_tree(reader, _page_tree(reader), start, stop, 0, {}))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            # Malformed page tree: let PyPDF2 repair it by flattening
+            page_objects = [reader.pages[index] for index in range(start, min(stop, len(reader.pages)))]
+
+        pages = []
+        for number, page_object in enumerate(page_objects, start=start + 1):
+            try:
+                text = page_object.extract_text() or ""
+                pages.append(PDFPage(number=number, text=text.strip()))
+            except Exception as e:
+                pages.append(PDFPage(number=number, text="", error=str(e)))
+
+        del page_objects, reader
+    # PyPDF2 objects point back at their reader, so a finished range is only
+    # reclaimed by a full cyclic collection; run it now instead of letting
+    # several ranges' garbage pile up
+    gc.collect()
+    return pages
+
+
+def iter_pdf_pages(path: str, pages_per_reader: int = 20) -> Iterator[PDFPage]:
+    """Yield pages one at a time in a single process.
+
+    The reader is reopened every ``pages_per_reader`` pages so its cache
+    never covers more than one range.
+    """
+    total = count_pages(path)
+    for start in range(0, total, pages_per_reader):
+        yield from extract_page_range(path, start, start + pages_per_reader)
+
+
+class PDFExtractor:
+    """Extract PDF text across a process pool, one page range per task.
+
+    Modes:
+    - ``process``: ranges run in a ``ProcessPoolExecutor``
+    - ``inline``: ranges run on a worker thread (tests, tiny deployments)
+    """
+
+    MODES = ("process", "inline")
+
+    def __init__(
+        self,
+        mode: str = "process",
+        max_workers: int = 2,
+        pages_per_task: int = 20,
+        start_method: str = "spawn",
+    ) -> None:
+        """Initialize extractor settings; worker processes start in ``start``.
+
+        Args:
+            mode: "process" or "inline"
+            max_workers: Number of worker processes
+            pages_per_task: Pages extracted by one task (one reader)
+            start_method: multiprocessing start method for workers
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown extraction mode: {mode}")
+        if pages_per_task < 1:
+            raise ValueError("pages_per_task must be at least 1")
+        self.mode = mode
+        self.max_workers = max_workers
+        self.pages_per_task = pages_per_task
+        self.start_method = start_method
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.documents = 0
+        self.pages_extracted = 0
+        self.page_errors = 0
+        self.extract_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "PDFExtractor":
+        """Build an extractor from ``PDF_*`` environment variables."""
+        return cls(
+            mode=os.getenv("PDF_EXTRACT_MODE", "process"),
+            max_workers=int(os.getenv("PDF_EXTRACT_WORKERS", "2")),
+            pages_per_task=int(os.getenv("PDF_PAGES_PER_TASK", "20")),
+            start_method=os.getenv("PDF_EXTRACT_START_METHOD", "spawn"),
+        )
+
+    def start(self) -> None:
+        """Start worker processes."""
+        if self.mode != "process" or self._pool is not None:
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+        )
+
+    async def shutdown(self) -> None:
+        """Stop worker processes, waiting for them off the event loop."""
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+
+    def _submit(self, path: str, start: int) -> "asyncio.Future[List[PDFPage]]":
+        stop = start + self.pages_per_task
+        if self.mode == "inline" or self._pool is None:
+            return asyncio.ensure_future(asyncio.to_thread(extract_page_range, path, start, stop))
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self._pool, extract_page_range, path, start, stop)
+
+    async def iter_pages(self, path: str) -> AsyncIterator[PDFPage]:
+        """Extract a PDF in parallel, yielding pages in order.
+
+        At most two ranges per worker are in flight, so only a bounded
+        number of extracted pages is ever held in memory.
+
+        Raises:
+            ValueError: For encrypted or unreadable documents
+        """
+        try:
+            total = await asyncio.to_thread(count_pages, path)
+        except ValueError:
+            raise
+        except Exception as e:
+            raise ValueError(f"Unreadable PDF: {e}") from e
+
+        self.documents += 1
+        window = max(1, self.max_workers * 2)
+        starts = iter(range(0, total, self.pages_per_task))
+        pending: deque = deque()
+        started = time.perf_counter()
+
+        def fill() -> None:
+            while len(pending) < window:
+                start = next(starts, None)
+                if start is None:
+                    return
+                pending.append(self._submit(path, start))
+
+        fill()
+        try:
+            while pending:
+                pages = await pending.popleft()
+                fill()
+                for page in pages:
+                    self.pages_extracted += 1
+                    if page.error:
+                        self.page_errors += 1
+                        logger.warning(
+                            "Failed to extract PDF page",
+                            extra={"page": page.number, "error": page.error},
+                        )
+                    yield page
+        finally:
+            for future in pending:
+                future.cancel()
+            self.extract_seconds += time.perf_counter() - started
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "workers": self.max_workers if self._pool is not None else 0,
+            "documents": self.documents,
+            "pages_extracted": self.pages_extracted,
+            "page_errors": self.page_errors,
+            "pages_per_second": round(self.pages_extracted / self.extract_seconds, 1) if self.extract_seconds else 0.0,
+        }
+
+
+async def index_pdf_pages(
+    pages: AsyncIterator[PDFPage],
+    index_notes: Callable[[List[Dict]], Awaitable[int]],
+    document_id: str,
+    title: str,
+    batch_pages: int = 10,
+) -> AsyncIterator[Dict]:
+    """Feed extracted pages to ``index_notes`` in batches, yielding progress.
+
+    Each page becomes one note (``{document_id}:p{n}``, titled with its page
+    number) so retrieved chunks can be cited by page. Blank pages are skipped.
+
+    Yields:
+        Progress dictionaries after each indexed batch
+    """
+    batch: List[Dict] = []
+    pages_done = 0
+    pages_indexed = 0
+    chunks = 0
+
+    async def flush() -> int:
+        indexed = await index_notes(batch) if batch else 0
+        batch.clear()
+        return indexed
+
+    async for page in pages:
+        pages_done += 1
+        if page.text:
+            batch.append({
+                "id": f"{document_id}:p{page.number}",
+                "title": f"{title} (p. {page.number})",
+                "content": page.text,
+            })
+            pages_indexed += 1
+        if len(batch) >= batch_pages:
+            chunks += await flush()
+            yield {"pages_done": pages_done, "pages_indexed": pages_indexed, "chunks_indexed": chunks}
+
+    chunks += await flush()
+    yield {"pages_done": pages_done, "pages_indexed": pages_indexed, "chunks_indexed": chunks}
+
+
+__all__ = [
+    "PDFExtractor",
+    "PDFPage",
+    "count_pages",
+    "extract_page_range",
+    "index_pdf_pages",
+    "iter_pdf_pages",
+]
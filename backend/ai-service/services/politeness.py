@@ -0,0 +1,215 @@
+"""Per-host politeness scheduling for outbound scraping.
+
+Each host gets a token bucket (steady request rate plus a small burst), a
+cap on in-flight requests and a "blocked until" deadline set from
+``Retry-After`` whenever it answers 429. Requests to one host wait their
+turn without holding up any other host, so large batches spread across many
+sites keep high aggregate throughput while staying under every site's limit.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Dict, Optional
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(value: Optional[str], default: float = 60.0) -> float:
+    """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return default
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class HostBlockedError(Exception):
+    """Raised when a host stays blocked longer than the scheduler will wait."""
+
+    def __init__(self, host: str, retry_after: float) -> None:
+        super().__init__(f"Host {host} rate limited. Retry after {retry_after:.0f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+@dataclass
+class _HostState:
+    rate: float
+    tokens: float
+    semaphore: asyncio.Semaphore
+    updated: float = field(default_factory=time.monotonic)
+    blocked_until: float = 0.0
+    requests: int = 0
+    rate_limited: int = 0
+    # Requests waiting for or holding a slot
+    active: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class HostScheduler:
+    """Token-bucket pacing, in-flight caps and Retry-After backoff per host."""
+
+    def __init__(
+        self,
+        rate: float = 2.0,
+        burst: int = 4,
+        max_in_flight: int = 4,
+        max_delay: float = 120.0,
+        min_rate: float = 0.1,
+        recovery: float = 0.1,
+        idle_ttl: float = 300.0,
+    ) -> None:
+        """Initialize scheduler settings.
+
+        Args:
+            rate: Steady requests per second allowed per host
+            burst: Token bucket capacity per host
+            max_in_flight: Maximum concurrent requests per host
+            max_delay: Longest Retry-After the scheduler waits out; longer
+                blocks fail fast with HostBlockedError
+            min_rate: Floor for a host's rate after repeated 429s
+            recovery: Requests/sec regained per successful request, up to ``rate``
+            idle_ttl: Seconds after its last request an unblocked host's
+                state is dropped
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.max_delay = max_delay
+        self.min_rate = min_rate
+        self.recovery = recovery
+        self.idle_ttl = idle_ttl
+        self._hosts: Dict[str, _HostState] = {}
+        self._next_prune = time.monotonic() + idle_ttl
+        self.delayed_seconds = 0.0
+        self.requeued = 0
+        self.evicted = 0
+
+    @classmethod
+    def from_env(cls) -> "HostScheduler":
+        """Build a scheduler from ``SCRAPER_HOST_*`` environment variables."""
+        return cls(
+            rate=float(os.getenv("SCRAPER_HOST_RATE", "2")),
+            burst=int(os.getenv("SCRAPER_HOST_BURST", "4")),
+            max_in_flight=int(os.getenv("SCRAPER_HOST_MAX_IN_FLIGHT", "4")),
+            max_delay=float(os.getenv("SCRAPER_MAX_RETRY_AFTER", "120")),
+            idle_ttl=float(os.getenv("SCRAPER_HOST_IDLE_TTL", "300")),
+        )
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlsplit(url).netloc.lower()
+
+    def _prune(self, now: float) -> None:
+        """Drop hosts idle for ``idle_ttl``: nothing in flight and no block pending."""
+        idle = [
+            host
+            for host, state in self._hosts.items()
+            if not state.active and state.blocked_until <= now and now - state.last_used >= self.idle_ttl
+        ]
+        for host in idle:
+            del self._hosts[host]
+        self.evicted += len(idle)
+        self._next_prune = now + self.idle_ttl
+
+    def _state(self, host: str) -> _HostState:
+        now = time.monotonic()
+        if now >= self._next_prune:
+            self._prune(now)
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(
+                rate=self.rate,
+                tokens=float(self.burst),
+                semaphore=asyncio.Semaphore(self.max_in_flight),
+            )
+        return state
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """Wait for the host's turn, then hold one of its in-flight slots.
+
+        Raises:
+            HostBlockedError: If the host is blocked for longer than max_delay
+        """
+        host = self.host_of(url)
+        state = self._state(host)
+        state.active += 1
+        try:
+            async with state.semaphore:
+                await self._take_token(host, state)
+                state.requests += 1
+                yield
+        finally:
+            state.active -= 1
+            state.last_used = time.monotonic()
+
+    async def _take_token(self, host: str, state: _HostState) -> None:
+        while True:
+            now = time.monotonic()
+            if now < state.blocked_until:
+                delay = state.blocked_until - now
+                if delay > self.max_delay:
+                    raise HostBlockedError(host, delay)
+            else:
+                state.tokens = min(float(self.burst), state.tokens + (now - state.updated) * state.rate)
+                state.updated = now
+                if state.tokens >= 1:
+                    state.tokens -= 1
+                    return
+                delay = (1 - state.tokens) / state.rate
+            self.delayed_seconds += delay
+            await asyncio.sleep(delay)
+
+    def penalize(self, url: str, retry_after: float) -> None:
+        """Block a host for ``retry_after`` seconds and halve its request rate."""
+        state = self._state(self.host_of(url))
+        state.blocked_until = max(state.blocked_until, time.monotonic() + retry_after)
+        state.rate = max(self.min_rate, state.rate / 2)
+        state.tokens = 0.0
+        state.rate_limited += 1
+        self.requeued += 1
+        logger.warning(
+            "Host rate limited; delaying",
+            extra={"host": self.host_of(url), "retry_after": retry_after, "rate": state.rate},
+        )
+
+    def record_success(self, url: str) -> None:
+        """Recover a throttled host's rate additively after a successful request."""
+        state = self._state(self.host_of(url))
+        if state.rate < self.rate:
+            state.rate = min(self.rate, state.rate + self.recovery)
+
+    def stats(self) -> Dict:
+        """Return per-host counters and aggregate delay."""
+        return {
+            "hosts": {
+                host: {
+                    "requests": state.requests,
+                    "rate_limited": state.rate_limited,
+                    "rate": round(state.rate, 3),
+                    "blocked_for": round(max(0.0, state.blocked_until - time.monotonic()), 1),
+                }
+                for host, state in self._hosts.items()
+            },
+            "requeued": self.requeued,
+            "evicted_hosts": self.evicted,
+            "delayed_seconds": round(self.delayed_seconds, 3),
+        }
+
+
+__all__ = ["HostScheduler", "HostBlockedError", "parse_retry_after"]
@@ -0,0 +1,313 @@
+"""Latency-aware routing across LLM providers with hedging and failover.
+
+Every call goes to the caller's preferred provider first. If it has not
+answered by its rolling p95 latency for that operation, a hedged
+duplicate goes to the next provider and whichever answers first wins; the
+other call is cancelled. If a provider fails, the next one is tried
+straight away instead of returning a 500. After several consecutive
+failures a provider is put in cooldown and tried last until it expires.
+Only transport, overload and 5xx errors count as provider failures; other
+errors (bad input, a prompt over the context window) are the caller's and
+propagate at once, since another provider would fail the same way.
+
+Hedges are capped at a fraction of calls, so a provider-wide slowdown
+cannot double the traffic (and token spend).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from services.adaptive_limiter import is_overload
+
+logger = logging.getLogger(__name__)
+
+# Exception class names of connection failures and server-side errors, across the OpenAI, Google and httpx clients
+TRANSPORT_ERRORS = {
+    "APIConnectionError",
+    "InternalServerError",
+    "ServerError",
+    "ServiceUnavailable",
+    "TransportError",
+}
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """Whether an error means the provider is unhealthy, so another one may succeed.
+
+    Services re-raise client errors wrapped in a plain ``Exception``, so the
+    chain of causes is checked too.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if is_overload(error) or isinstance(error, ConnectionError):
+            return True
+        status = getattr(error, "status_code", None) or getattr(error, "code", None)
+        if isinstance(status, int) and status >= 500:
+            return True
+        if any(cls.__name__ in TRANSPORT_ERRORS for cls in type(error).__mro__):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _percentile(samples, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+@dataclass
+class _ProviderHealth:
+    outcomes: Deque[bool]
+    latencies: Dict[str, Deque[float]] = field(default_factory=dict)
+    consecutive_failures: int = 0
+    down_until: float = 0.0
+    calls: int = 0
+    errors: int = 0
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+
+class ProviderRouter:
+    """Route service calls across providers by health and latency."""
+
+    def __init__(
+        self,
+        providers: Dict[str, Any],
+        hedge: bool = True,
+        default_hedge_delay: float = 5.0,
+        min_hedge_delay: float = 0.2,
+        max_hedge_ratio: float = 0.2,
+        min_samples: int = 20,
+        window: int = 200,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+    ) -> None:
+        """Initialize the router.
+
+        Args:
+            providers: Provider name -> service, in default preference order
+            hedge: Whether to send hedged duplicates to a second provider
+            default_hedge_delay: Seconds before hedging until enough latencies are known
+            min_hedge_delay: Lower bound of the hedge delay
+            max_hedge_ratio: Maximum fraction of calls that may be hedged
+            min_samples: Latencies needed before p95 replaces the default delay
+            window: Recent latencies and outcomes kept per provider
+            failure_threshold: Consecutive failures that put a provider in cooldown
+            cooldown: Seconds a failing provider is tried last
+        """
+        if not providers:
+            raise ValueError("At least one provider is required")
+        self.providers = providers
+        self.hedge = hedge
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_samples = min_samples
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._health = {name: _ProviderHealth(outcomes=deque(maxlen=window)) for name in providers}
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+
+    @classmethod
+    def from_env(cls, providers: Dict[str, Any]) -> "ProviderRouter":
+        """Build a router from ``LLM_*`` environment variables."""
+        return cls(
+            providers,
+            hedge=os.getenv("LLM_HEDGE", "true").lower() == "true",
+            default_hedge_delay=float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "5")),
+            max_hedge_ratio=float(os.getenv("LLM_HEDGE_MAX_RATIO", "0.2")),
+            cooldown=float(os.getenv("LLM_FAILOVER_COOLDOWN", "30")),
+        )
+
+    def _latencies(self, name: str, operation: str) -> Deque[float]:
+        return self._health[name].latencies.setdefault(operation, deque(maxlen=self.window))
+
+    def healthy(self, name: str) -> bool:
+        return time.monotonic() >= self._health[name].down_until
+
+    def order(self, operation: str, preferred: Optional[str] = None) -> List[str]:
+        """Providers to try: healthy before cooling down, preferred first, then fastest p50."""
+        def key(name: str):
+            latencies = self._latencies(name, operation)
+            p50 = _percentile(latencies, 0.5) if latencies else float("inf")
+            return (not self.healthy(name), name != preferred, p50)
+
+        return sorted(self.providers, key=key)
+
+    def hedge_delay(self, name: str, operation: str) -> float:
+        """Seconds to wait for ``name`` before hedging: its rolling p95 for ``operation``."""
+        latencies = self._latencies(name, operation)
+        if len(latencies) < self.min_samples:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, _percentile(latencies, 0.95))
+
+    def _may_hedge(self) -> bool:
+        return self.hedge and self.hedges < self.max_hedge_ratio * self.calls
+
+    def _record(self, name: str, operation: str, elapsed: float, ok: bool) -> None:
+        health = self._health[name]
+        health.calls += 1
+        health.outcomes.append(ok)
+        if ok:
+            health.consecutive_failures = 0
+            self._latencies(name, operation).append(elapsed)
+            return
+        health.errors += 1
+        health.consecutive_failures += 1
+        if health.consecutive_failures >= self.failure_threshold:
+            health.down_until = time.monotonic() + self.cooldown
+            logger.warning(
+                "LLM provider in cooldown after consecutive failures",
+                extra={"provider": name, "failures": health.consecutive_failures, "cooldown": self.cooldown},
+            )
+
+    async def call(self, operation: str, *args, preferred: Optional[str] = None, **kwargs) -> Any:
+        """Run ``operation`` on the best provider, hedging and failing over as needed.
+
+        Raises:
+            The first error that is not a provider failure, or the last
+            provider error if every provider failed
+        """
+        _, result = await self.route(operation, *args, preferred=preferred, **kwargs)
+        return result
+
+    async def route(self, operation: str, *args, preferred: Optional[str] = None, **kwargs) -> Tuple[str, Any]:
+        """Like ``call``, but also return the name of the provider that answered.
+
+        The winner may differ from ``preferred`` after a hedge or failover.
+        """
+        remaining = self.order(operation, preferred)
+        self.calls += 1
+        pending: Dict[asyncio.Task, tuple] = {}
+        last_error: Optional[BaseException] = None
+
+        def launch() -> None:
+            name = remaining.pop(0)
+            task = asyncio.ensure_future(getattr(self.providers[name], operation)(*args, **kwargs))
+            # A loser that fails after being abandoned must not log "exception never retrieved"
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            pending[task] = (name, time.monotonic(), bool(pending) or last_error is not None)
+
+        launch()
+        try:
+            while pending:
+                timeout = None
+                if remaining and len(pending) == 1 and self._may_hedge():
+                    name, started, _ = next(iter(pending.values()))
+                    timeout = max(0.0, self.hedge_delay(name, operation) - (time.monotonic() - started))
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Concurrent calls may have used up the hedge budget while this one waited
+                    if self._may_hedge():
+                        self.hedges += 1
+                        launch()
+                    continue
+
+                for task in done:
+                    name, started, fallback = pending.pop(task)
+                    elapsed = time.monotonic() - started
+                    if task.exception() is None:
+                        self._record(name, operation, elapsed, ok=True)
+                        if fallback and pending:
+                            self.hedge_wins += 1
+                        return name, task.result()
+                    last_error = task.exception()
+                    if not is_provider_failure(last_error):
+                        raise last_error
+                    self._record(name, operation, elapsed, ok=False)
+                    logger.warning(
+                        "LLM provider call failed",
+                        extra={"provider": name, "operation": operation, "error": str(last_error)},
+                    )
+                if not pending and remaining:
+                    self.failovers += 1
+                    launch()
+            raise last_error
+        finally:
+            for task, (name, started, _) in pending.items():
+                task.cancel()
+                # The loser took at least this long; keeping it stops p95 drifting down on hedged calls
+                self._latencies(name, operation).append(time.monotonic() - started)
+
+    def service(self, preferred: Optional[str] = None) -> "RoutedService":
+        """Return a service-shaped view of the router preferring ``preferred``."""
+        return RoutedService(self, preferred)
+
+    def stats(self) -> Dict:
+        providers = {}
+        for name, health in self._health.items():
+            providers[name] = {
+                "healthy": self.healthy(name),
+                "calls": health.calls,
+                "errors": health.errors,
+                "error_rate": round(health.error_rate, 3),
+                "consecutive_failures": health.consecutive_failures,
+                "operations": {
+                    operation: {
+                        "samples": len(latencies),
+                        "p50_ms": round(_percentile(latencies, 0.5) * 1000, 1),
+                        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 1),
+                    }
+                    for operation, latencies in health.latencies.items()
+                    if latencies
+                },
+            }
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "failovers": self.failovers,
+            "providers": providers,
+        }
+
+
+class RoutedService:
+    """Provider-service interface backed by a router, for code that takes a service.
+
+    Providers that answered calls made through this view are recorded in
+    ``answered_by``, so a caller can report who actually served a request.
+    """
+
+    def __init__(self, router: ProviderRouter, preferred: Optional[str] = None) -> None:
+        self.router = router
+        self.preferred = preferred
+        self.answered_by: Dict[str, int] = {}
+
+    @property
+    def provider(self) -> Optional[str]:
+        """Provider that answered, comma-joined in first-answer order if several did; None before any call."""
+        return ",".join(self.answered_by) or None
+
+    async def _call(self, operation: str, *args) -> Any:
+        name, result = await self.router.route(operation, *args, preferred=self.preferred)
+        self.answered_by[name] = self.answered_by.get(name, 0) + 1
+        return result
+
+    async def generate_text(self, prompt: str) -> str:
+        return await self._call("generate_text", prompt)
+
+    async def generate_flashcards(self, content: str, count: int = 10) -> List[Dict]:
+        return await self._call("generate_flashcards", content, count)
+
+    async def answer_with_context(self, question: str, context: str) -> str:
+        return await self._call("answer_with_context", question, context)
+
+    async def summarize(self, content: str, max_length: int = 500) -> str:
+        return await self._call("summarize", content, max_length)
+
+
+__all__ = ["ProviderRouter", "RoutedService", "is_provider_failure"]
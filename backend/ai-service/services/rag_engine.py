@@ -1,10 +1,18 @@
+import asyncio
+import logging
 import os
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 from langchain_openai import OpenAIEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.vectorstores import Chroma
 from langchain_openai import ChatOpenAI
-from langchain.chains import RetrievalQA
+from langchain.chains.question_answering.stuff_prompt import PROMPT_SELECTOR
+
+from services.adaptive_limiter import AdaptiveLimiter
+from services.semantic_cache import SemanticAnswerCache
+from services.token_budget import ANSWER_TOKENS, TokenBudget
+
+logger = logging.getLogger(__name__)
 
 
 class RAGEngine:
@@ -13,11 +21,20 @@ class RAGEngine:
     Indexes notes and provides context-aware answers
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        limiter: Optional[AdaptiveLimiter] = None,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+    ):
         self.embeddings = None
         self.vectorstore = None
         self.llm = None
-        self.qa_chain = None
+        self.budget = TokenBudget(os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview"))
+        # Answers are OpenAI calls too, so they share the OpenAI service's limiter
+        self.limiter = limiter or AdaptiveLimiter.from_env("openai")
+        self.answer_cache = answer_cache
+        # Bumped whenever notes are indexed; cached answers are scoped to it
+        self.index_version = 0
         
         # Initialize only if OpenAI key is available
         if os.getenv("OPENAI_API_KEY"):
@@ -28,8 +45,9 @@ class RAGEngine:
         try:
             self.embeddings = OpenAIEmbeddings()
             self.llm = ChatOpenAI(
-                model_name=os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview"),
-                temperature=0.5
+                model_name=self.budget.model,
+                temperature=0.5,
+                max_tokens=self.budget.completion_tokens(ANSWER_TOKENS)
             )
             
             # Initialize empty vectorstore
@@ -50,7 +68,7 @@ class RAGEngine:
         Returns:
             Number of chunks indexed
         """
-        if not self.vectorstore:
+        if self.vectorstore is None:
             raise Exception("RAG engine not initialized")
 
         text_splitter = RecursiveCharacterTextSplitter(
@@ -75,56 +93,190 @@ class RAGEngine:
                 })
 
         if documents:
-            self.vectorstore.add_texts(
+            # Embedding requests and the disk write are blocking; keep them off the event loop
+            await asyncio.to_thread(
+                self.vectorstore.add_texts,
                 texts=[doc["page_content"] for doc in documents],
                 metadatas=[doc["metadata"] for doc in documents]
             )
-            self.vectorstore.persist()
+            await asyncio.to_thread(self.vectorstore.persist)
+            self.index_version += 1
+            if self.answer_cache is not None:
+                self.answer_cache.invalidate()
 
         return len(documents)
 
-    async def answer_with_context(self, question: str, k: int = 5) -> Dict:
+    async def remove_note(self, note_id: str) -> int:
+        """
+        Remove every indexed chunk of a note, e.g. before re-indexing a changed page
+        
+        Args:
+            note_id: The 'id' the note was indexed with
+        
+        Returns:
+            Number of chunks removed
+        """
+        if self.vectorstore is None:
+            raise Exception("RAG engine not initialized")
+
+        ids = (await asyncio.to_thread(self.vectorstore.get, where={"note_id": note_id}))["ids"]
+        if ids:
+            await asyncio.to_thread(self.vectorstore.delete, ids=ids)
+            self.index_version += 1
+            if self.answer_cache is not None:
+                self.answer_cache.invalidate()
+        return len(ids)
+
+    async def answer_with_context(self, question: str, k: int = 5, use_cache: bool = True) -> Dict:
         """
         Answer a question using RAG with context from indexed notes
         
+        With an answer cache, a previous answer to a semantically similar
+        question over the same index is returned instead, and the question
+        embedding computed for the lookup is reused for retrieval.
+        
         Args:
             question: User's question
             k: Number of relevant chunks to retrieve
+            use_cache: Whether to look up and store the answer in the answer cache
         
         Returns:
-            Dictionary with answer and source references
+            Dictionary with answer and source references, plus cache
+            metadata when an answer cache is configured
         """
         if not self.vectorstore:
             raise Exception("RAG engine not initialized")
 
-        # Create QA chain if not exists
-        if not self.qa_chain:
-            self.qa_chain = RetrievalQA.from_chain_type(
-                llm=self.llm,
-                chain_type="stuff",
-                retriever=self.vectorstore.as_retriever(search_kwargs={"k": k}),
-                return_source_documents=True
-            )
+        # Read before any await: an answer computed while notes are being indexed must not be stored
+        version = self.index_version
+        scope = f"v{version}:{self.budget.model}:k{k}"
+        embedding = await self._embed(question) if use_cache else None
+        if embedding is not None:
+            cached = self.answer_cache.lookup(embedding, scope)
+            if cached is not None:
+                answer, metadata = cached
+                return {**answer, "cache": metadata}
 
         try:
-            result = self.qa_chain({"query": question})
+            docs, messages = await self._retrieve(question, k, embedding)
+            async with self.limiter.acquire(self._reserve(messages)) as permit:
+                result = await self.llm.ainvoke(messages)
+                permit.record_usage((result.usage_metadata or {}).get("total_tokens"))
             
-            # Extract source information
-            sources = []
-            for doc in result.get("source_documents", []):
-                sources.append({
-                    "note_id": doc.metadata.get("note_id"),
-                    "title": doc.metadata.get("title"),
-                    "chunk": doc.page_content[:200] + "..."
-                })
+            answer = {
+                "answer": result.content,
+                "sources": self._sources(docs)
+            }
+        except Exception as e:
+            raise Exception(f"Failed to answer with RAG: {str(e)}")
 
-            return {
-                "answer": result["result"],
-                "sources": sources
+        if embedding is not None:
+            if version == self.index_version:
+                self.answer_cache.store(question, embedding, scope, answer)
+            answer["cache"] = {"hit": False}
+        return answer
+
+    async def _embed(self, question: str) -> Optional[List[float]]:
+        """Embed a question for the answer cache; None without a cache or if embedding fails"""
+        if self.answer_cache is None or self.embeddings is None:
+            return None
+        try:
+            return await self.embeddings.aembed_query(question)
+        except Exception as e:
+            logger.warning("Question embedding failed; skipping answer cache", extra={"error": str(e)})
+            return None
+
+    async def _retrieve(self, question: str, k: int, embedding: Optional[List[float]] = None) -> Tuple[List, List]:
+        """
+        Retrieve chunks for a question and build the "stuff" prompt
+        
+        Lowest-ranked chunks that would overflow the context window next to
+        the question and the answer are left out.
+        
+        Args:
+            question: User's question
+            k: Number of relevant chunks to retrieve
+            embedding: Question embedding, if already computed
+        
+        Returns:
+            Chunks used and prompt messages
+        """
+        if embedding is not None:
+            docs = await asyncio.to_thread(self.vectorstore.similarity_search_by_vector, embedding, k=k)
+        else:
+            docs = await asyncio.to_thread(self.vectorstore.similarity_search, question, k=k)
+        prompt = PROMPT_SELECTOR.get_prompt(self.llm)
+
+        def token_count(messages) -> int:
+            return self.budget.count_messages([{"content": message.content} for message in messages])
+
+        max_tokens = self.budget.completion_tokens(ANSWER_TOKENS)
+        available = self.budget.input_budget(max_tokens, token_count(prompt.format_messages(context="", question=question)))
+        kept = []
+        for doc in docs:
+            # Chunks are joined by a blank line
+            available -= self.budget.count(doc.page_content) + 1
+            if available < 0:
+                break
+            kept.append(doc)
+
+        messages = prompt.format_messages(
+            context="\n\n".join(doc.page_content for doc in kept),
+            question=question
+        )
+        if token_count(messages) + max_tokens > self.budget.context_window:
+            raise ValueError(f"Question exceeds the {self.budget.context_window}-token context window")
+        return kept, messages
+
+    def _reserve(self, messages) -> int:
+        """Tokens to reserve from the limiter's budget for answering ``messages``"""
+        prompt_tokens = self.budget.count_messages([{"content": message.content} for message in messages])
+        return prompt_tokens + self.budget.completion_tokens(ANSWER_TOKENS)
+
+    @staticmethod
+    def _sources(docs) -> List[Dict]:
+        """Source references of retrieved chunks"""
+        return [
+            {
+                "note_id": doc.metadata.get("note_id"),
+                "title": doc.metadata.get("title"),
+                "chunk": doc.page_content[:200] + "..."
             }
+            for doc in docs
+        ]
+
+    async def stream_answer_with_context(self, question: str, k: int = 5) -> Tuple[List[Dict], AsyncIterator[str]]:
+        """
+        Retrieve context for a question, then stream the answer
+        
+        Uses the same retrieval and prompt as ``answer_with_context``.
+        
+        Args:
+            question: User's question
+            k: Number of relevant chunks to retrieve
+        
+        Returns:
+            Source references and an iterator over answer tokens
+        """
+        if not self.vectorstore:
+            raise Exception("RAG engine not initialized")
+
+        try:
+            docs, messages = await self._retrieve(question, k)
         except Exception as e:
             raise Exception(f"Failed to answer with RAG: {str(e)}")
 
+        async def tokens() -> AsyncIterator[str]:
+            try:
+                async with self.limiter.acquire(self._reserve(messages)):
+                    async for chunk in self.llm.astream(messages):
+                        if chunk.content:
+                            yield chunk.content
+            except Exception as e:
+                raise Exception(f"Failed to answer with RAG: {str(e)}")
+
+        return self._sources(docs), tokens()
+
     async def search_similar(self, query: str, k: int = 5) -> List[Dict]:
         """Search for similar content in the knowledge base"""
         if not self.vectorstore:
@@ -0,0 +1,148 @@
+"""Semantic cache of RAG answers.
+
+Students ask the same question in many phrasings ("what is the mechanism
+of action of metformin" / "how does metformin work"). Exact-match caching
+(``services.llm_cache``) misses these, so answers are also stored under
+the question's embedding and reused for any later question whose cosine
+similarity is at least ``threshold``.
+
+Entries are scoped: a lookup only matches entries stored under the same
+scope string, which the RAG engine builds from its index version, model
+and retrieval depth. Indexing notes bumps the version, so answers computed
+from the old index are never served again (and are cleared to free
+memory). Entries are evicted least-recently-used beyond ``max_entries``
+and expire after ``ttl`` seconds.
+"""
+
+from __future__ import annotations
+
+import copy
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Entry:
+    question: str
+    vector: np.ndarray
+    scope: str
+    value: Dict[str, Any]
+    created_at: float
+
+
+def _normalize(embedding: Sequence[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticAnswerCache:
+    """Answers keyed by question embedding, matched above a similarity threshold.
+
+    Meant to be used from a single event loop; every hit returns a fresh
+    copy of the stored value.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 1000, ttl: float = 24 * 3600) -> None:
+        """Initialize the cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a cached answer to be reused
+            max_entries: Entries kept before the least recently used is evicted
+            ttl: Seconds an entry lives
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> "SemanticAnswerCache":
+        """Build a cache from ``SEMANTIC_CACHE_*`` environment variables."""
+        return cls(
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+            max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000")),
+            ttl=float(os.getenv("SEMANTIC_CACHE_TTL", str(24 * 3600))),
+        )
+
+    def _expire(self, now: float) -> None:
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at >= self.ttl]
+        for key in expired:
+            del self._entries[key]
+
+    def lookup(self, embedding: Sequence[float], scope: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Find the most similar cached question in ``scope``.
+
+        Returns:
+            ``(value, metadata)`` if its similarity reaches the threshold,
+            where metadata describes the match; None otherwise
+        """
+        now = time.time()
+        self._expire(now)
+        candidates: List[Tuple[int, _Entry]] = [
+            (key, entry) for key, entry in self._entries.items() if entry.scope == scope
+        ]
+        if candidates:
+            similarities = np.stack([entry.vector for _, entry in candidates]) @ _normalize(embedding)
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                key, entry = candidates[best]
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry.value), {
+                    "hit": True,
+                    "similarity": round(float(similarities[best]), 4),
+                    "matched_question": entry.question,
+                    "age_seconds": round(now - entry.created_at, 1),
+                }
+        self.misses += 1
+        return None
+
+    def store(self, question: str, embedding: Sequence[float], scope: str, value: Dict[str, Any]) -> None:
+        """Cache ``value`` as the answer to ``question`` in ``scope``."""
+        self._entries[self._next_id] = _Entry(
+            question=question,
+            vector=_normalize(embedding),
+            scope=scope,
+            value=copy.deepcopy(value),
+            created_at=time.time(),
+        )
+        self._next_id += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self) -> None:
+        """Drop every entry (e.g. after the indexed notes changed)."""
+        if self._entries:
+            self.invalidations += 1
+            logger.info("Semantic answer cache invalidated", extra={"entries": len(self._entries)})
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+__all__ = ["SemanticAnswerCache"]
@@ -0,0 +1,88 @@
+"""Coalescing of identical concurrent calls ("single flight").
+
+When several requests need the same expensive result at once (e.g. many
+students opening the same shared note), only the first starts the work;
+the others wait for it and receive the same result or exception. The work
+runs in its own task, so one waiter being cancelled never cancels it for
+the rest; it is cancelled only when every waiter has gone.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Flight:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class SingleFlight:
+    """Share one in-flight call among concurrent callers with the same key.
+
+    Only calls that overlap are coalesced; nothing is remembered once a
+    call finishes (pair with a cache for that). Meant to be used from a
+    single event loop.
+    """
+
+    def __init__(self) -> None:
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        """Return ``await factory()``, joining an in-flight call for ``key`` if there is one.
+
+        Every waiter receives the same result object.
+
+        Raises:
+            Whatever the shared call raised
+        """
+        self.calls += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(task=asyncio.ensure_future(factory()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _task: self._forget(key, flight))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Every caller was cancelled: stop the work and let new callers start afresh
+                self._forget(key, flight)
+                flight.task.cancel()
+                self.abandoned += 1
+                logger.debug("Abandoned in-flight call", extra={"key": str(key)})
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": len(self._flights),
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+            "dedup_rate": round(self.coalesced / self.calls, 3) if self.calls else 0.0,
+        }
+
+
+__all__ = ["SingleFlight"]
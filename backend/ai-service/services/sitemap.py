@@ -0,0 +1,333 @@
+"""Sitemap-driven incremental re-crawling.
+
+Streams ``sitemap.xml`` files (plain or gzipped) and sitemap indexes through
+an incremental XML parser, so even 50 MB sitemaps are processed in constant
+memory. Each ``<loc>``'s ``<lastmod>`` is compared with a per-URL SQLite
+state table and only new or changed URLs are scheduled for
+``fetch_and_parse``; child sitemaps whose own ``lastmod`` has not moved are
+skipped without being downloaded. A nightly refresh of a large source
+therefore costs one request per changed page instead of a full re-crawl.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, AsyncIterable, AsyncIterator, Dict, List, Optional, Set, Tuple
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+from services.crawler import CrawlStats
+
+if TYPE_CHECKING:
+    from services.web_scraper import AsyncWebScraper
+
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b"\x1f\x8b"
+# Sitemaps are capped at 50 MB uncompressed by the protocol
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+STATE_BATCH_SIZE = 500
+
+
+def normalize_lastmod(value: Optional[str]) -> Optional[str]:
+    """Convert a W3C datetime to a comparable UTC ISO string.
+
+    Date-only values become midnight UTC and naive times are taken as UTC,
+    so equivalent spellings of the same instant compare equal. Unparseable
+    values are returned stripped.
+    """
+    if not value or not value.strip():
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return value
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def _lastmod_changed(lastmod: Optional[str], stored: Optional[str]) -> bool:
+    # Any move (even backwards, e.g. a rollback) means the page changed
+    return lastmod is not None and lastmod != stored
+
+
+@dataclass
+class SitemapEntry:
+    """One ``<url>`` or ``<sitemap>`` element."""
+
+    loc: str
+    lastmod: Optional[str] = None
+    is_sitemap: bool = False
+
+
+async def parse_sitemap(chunks: AsyncIterable[bytes]) -> AsyncIterator[SitemapEntry]:
+    """Incrementally parse a sitemap or sitemap index from a byte stream.
+
+    Gzipped input is detected from its magic bytes and inflated on the fly.
+    Elements are discarded as soon as they are yielded, so memory stays flat.
+
+    Yields:
+        SitemapEntry for every ``<url>`` and ``<sitemap>`` with a ``<loc>``
+
+    Raises:
+        ValueError: On malformed XML
+    """
+    parser = XMLPullParser(events=("start", "end"))
+    inflater = None
+    root = None
+    first = True
+
+    def drain():
+        nonlocal root
+        for event, element in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = element
+                continue
+            name = element.tag.rpartition("}")[2]
+            if name not in ("url", "sitemap"):
+                continue
+            fields = {child.tag.rpartition("}")[2]: (child.text or "").strip() for child in element}
+            if fields.get("loc"):
+                yield SitemapEntry(
+                    loc=fields["loc"],
+                    lastmod=normalize_lastmod(fields.get("lastmod")),
+                    is_sitemap=name == "sitemap",
+                )
+            root.clear()
+
+    try:
+        async for chunk in chunks:
+            if first:
+                first = False
+                if chunk.startswith(GZIP_MAGIC):
+                    inflater = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+            parser.feed(inflater.decompress(chunk) if inflater else chunk)
+            for entry in drain():
+                yield entry
+        if inflater is not None:
+            parser.feed(inflater.flush())
+        parser.close()
+        for entry in drain():
+            yield entry
+    except ParseError as e:
+        raise ValueError(f"Malformed sitemap: {e}") from e
+
+
+class SitemapStateStore:
+    """SQLite table of the last ``lastmod`` ingested per URL and per sitemap.
+
+    Thread-safe; the sync calls it through ``asyncio.to_thread``.
+    """
+
+    def __init__(self, path: str = "./data/sitemap_state.sqlite3") -> None:
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sitemap_urls (
+                url TEXT PRIMARY KEY,
+                lastmod TEXT,
+                fetched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS sitemaps (
+                url TEXT PRIMARY KEY,
+                lastmod TEXT,
+                synced_at REAL NOT NULL
+            );
+            """
+        )
+        self._db.commit()
+
+    @classmethod
+    def from_env(cls) -> "SitemapStateStore":
+        """Build a store from the ``SCRAPER_SITEMAP_STATE_PATH`` environment variable."""
+        return cls(path=os.getenv("SCRAPER_SITEMAP_STATE_PATH", "./data/sitemap_state.sqlite3"))
+
+    def filter_changed(self, entries: List[SitemapEntry], recheck_undated: bool = False) -> List[SitemapEntry]:
+        """Return entries that are new, have a different lastmod, or are undated and rechecked."""
+        if not entries:
+            return []
+        with self._lock:
+            placeholders = ",".join("?" * len(entries))
+            stored = dict(self._db.execute(
+                f"SELECT url, lastmod FROM sitemap_urls WHERE url IN ({placeholders})",
+                [entry.loc for entry in entries],
+            ).fetchall())
+        return [
+            entry for entry in entries
+            if entry.loc not in stored
+            or _lastmod_changed(entry.lastmod, stored[entry.loc])
+            or (entry.lastmod is None and recheck_undated)
+        ]
+
+    def mark_url(self, url: str, lastmod: Optional[str]) -> None:
+        """Record that ``url`` was ingested at ``lastmod``."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sitemap_urls (url, lastmod, fetched_at) VALUES (?, ?, ?)",
+                (url, lastmod, time.time()),
+            )
+            self._db.commit()
+
+    def sitemap_changed(self, url: str, lastmod: Optional[str]) -> bool:
+        """Whether a child sitemap needs downloading (undated sitemaps always do)."""
+        if lastmod is None:
+            return True
+        with self._lock:
+            row = self._db.execute("SELECT lastmod FROM sitemaps WHERE url = ?", (url,)).fetchone()
+        return row is None or _lastmod_changed(lastmod, row[0])
+
+    def mark_sitemap(self, url: str, lastmod: Optional[str]) -> None:
+        """Record that every URL of a sitemap was ingested successfully."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sitemaps (url, lastmod, synced_at) VALUES (?, ?, ?)",
+                (url, lastmod, time.time()),
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            urls = self._db.execute("SELECT COUNT(*) FROM sitemap_urls").fetchone()[0]
+            sitemaps = self._db.execute("SELECT COUNT(*) FROM sitemaps").fetchone()[0]
+        return {"tracked_urls": urls, "tracked_sitemaps": sitemaps}
+
+
+@dataclass
+class SitemapSyncStats(CrawlStats):
+    """Crawl progress plus sitemap-specific counters."""
+
+    sitemaps_fetched: int = 0
+    sitemaps_skipped: int = 0
+    urls_listed: int = 0
+    urls_unchanged: int = 0
+
+
+class SitemapSync:
+    """Fetch only the URLs a sitemap reports as new or changed."""
+
+    def __init__(
+        self,
+        scraper: "AsyncWebScraper",
+        state: SitemapStateStore,
+        max_concurrent: int = 10,
+        recheck_undated: bool = False,
+    ) -> None:
+        """Initialize sync settings.
+
+        Args:
+            scraper: Scraper used for sitemaps and pages
+            state: Per-URL lastmod state table
+            max_concurrent: Maximum concurrent page fetches
+            recheck_undated: Refetch known URLs that have no lastmod (cheap
+                with the conditional-GET cache); otherwise only new ones are fetched
+        """
+        self.scraper = scraper
+        self.state = state
+        self.max_concurrent = max_concurrent
+        self.recheck_undated = recheck_undated
+        self.stats: Optional[SitemapSyncStats] = None
+
+    async def _read_sitemap(self, url: str) -> Tuple[List[SitemapEntry], List[SitemapEntry]]:
+        """Stream one sitemap, returning (changed page entries, child sitemaps)."""
+        changed: List[SitemapEntry] = []
+        children: List[SitemapEntry] = []
+        batch: List[SitemapEntry] = []
+
+        async def flush() -> None:
+            fresh = await asyncio.to_thread(self.state.filter_changed, batch, self.recheck_undated)
+            self.stats.urls_unchanged += len(batch) - len(fresh)
+            changed.extend(fresh)
+            batch.clear()
+
+        async for entry in parse_sitemap(self.scraper.iter_bytes(url, MAX_SITEMAP_BYTES)):
+            if entry.is_sitemap:
+                children.append(entry)
+                continue
+            self.stats.urls_listed += 1
+            batch.append(entry)
+            if len(batch) >= STATE_BATCH_SIZE:
+                await flush()
+        await flush()
+        return changed, children
+
+    async def sync(self, sitemap_url: str, stats: Optional[SitemapSyncStats] = None) -> AsyncIterator[Dict]:
+        """Walk a sitemap (index) and yield freshly parsed changed pages.
+
+        A page's lastmod is recorded only after the consumer has processed
+        it, and a child sitemap's only after all its pages succeeded, so
+        failures are retried on the next sync.
+
+        Yields:
+            Parsed content dictionaries from ``fetch_and_parse`` plus ``lastmod``
+        """
+        self.stats = stats or SitemapSyncStats(start_url=sitemap_url)
+        self.stats.state = "running"
+        queue = deque([SitemapEntry(loc=sitemap_url, is_sitemap=True)])
+        seen: Set[str] = {sitemap_url}
+
+        while queue:
+            sitemap = queue.popleft()
+            if not await asyncio.to_thread(self.state.sitemap_changed, sitemap.loc, sitemap.lastmod):
+                self.stats.sitemaps_skipped += 1
+                continue
+
+            try:
+                changed, children = await self._read_sitemap(sitemap.loc)
+            except Exception as e:
+                logger.error("Error reading sitemap", extra={"url": sitemap.loc, "error": str(e)})
+                if sitemap.loc == sitemap_url:
+                    raise
+                continue
+            self.stats.sitemaps_fetched += 1
+            for child in children:
+                if child.loc not in seen:
+                    seen.add(child.loc)
+                    queue.append(child)
+
+            lastmods = {entry.loc: entry.lastmod for entry in changed}
+            self.stats.frontier_size += len(changed)
+            failures = 0
+            async for page in self.scraper.iter_fetch_and_parse(
+                lastmods, self.max_concurrent, include_errors=True
+            ):
+                self.stats.frontier_size -= 1
+                if "error" in page:
+                    self.stats.pages_failed += 1
+                    failures += 1
+                    continue
+                self.stats.pages_fetched += 1
+                page["lastmod"] = lastmods[page["url"]]
+                yield page
+                await asyncio.to_thread(self.state.mark_url, page["url"], page["lastmod"])
+
+            if not failures and sitemap.lastmod is not None:
+                await asyncio.to_thread(self.state.mark_sitemap, sitemap.loc, sitemap.lastmod)
+
+
+__all__ = [
+    "SitemapEntry",
+    "SitemapStateStore",
+    "SitemapSync",
+    "SitemapSyncStats",
+    "normalize_lastmod",
+    "parse_sitemap",
+]
@@ -0,0 +1,145 @@
+"""Server-sent events for streamed LLM output.
+
+Provider token streams are forwarded to the client as SSE so the first
+words appear after time-to-first-token instead of after the whole
+completion. Each stream is a sequence of events:
+
+    event: sources  (RAG only) retrieved chunks, before any token
+    event: token    {"text": "..."} for every provider delta
+    event: done     final metadata
+    event: error    {"detail": "..."} if the provider fails mid-stream
+
+The first token is awaited before the HTTP response starts
+(``start_stream``), so a provider that fails outright still produces a
+normal error status instead of a 200 with an error event.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Disable proxy buffering (nginx), which would hold tokens back until the end
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_sse(data: Any, event: Optional[str] = None) -> str:
+    """Serialize one server-sent event with a JSON payload."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _close(tokens: AsyncIterator[str]) -> None:
+    aclose = getattr(tokens, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
+
+async def start_stream(tokens: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Wait for the first token of ``tokens`` and return a stream replaying it.
+
+    Raises:
+        Whatever the provider raised before producing any output
+    """
+    iterator = tokens.__aiter__()
+    try:
+        first = await iterator.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except BaseException:
+        await _close(iterator)
+        raise
+
+    async def replay() -> AsyncIterator[str]:
+        try:
+            if first is not None:
+                yield first
+            async for token in iterator:
+                yield token
+        finally:
+            await _close(iterator)
+
+    return replay()
+
+
+class StreamMetrics:
+    """Time-to-first-token and duration of recent streams."""
+
+    def __init__(self, window: int = 1000) -> None:
+        self._ttft: Deque[float] = deque(maxlen=window)
+        self._durations: Deque[float] = deque(maxlen=window)
+        self.streams = 0
+        self.errors = 0
+
+    def record(self, ttft: Optional[float], duration: float, error: bool = False) -> None:
+        self.streams += 1
+        self.errors += int(error)
+        if ttft is not None:
+            self._ttft.append(ttft)
+        self._durations.append(duration)
+
+    @staticmethod
+    def _percentile(samples: Iterable[float], p: float) -> float:
+        ordered = sorted(samples)
+        if not ordered:
+            return 0.0
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 2)
+
+    def stats(self) -> Dict:
+        """Return percentiles in milliseconds over the recent window."""
+        return {
+            "streams": self.streams,
+            "errors": self.errors,
+            "ttft_p50_ms": self._percentile(self._ttft, 0.50),
+            "ttft_p95_ms": self._percentile(self._ttft, 0.95),
+            "duration_p50_ms": self._percentile(self._durations, 0.50),
+        }
+
+
+async def sse_events(
+    tokens: AsyncIterator[str],
+    leading: Iterable[Tuple[str, Any]] = (),
+    done: Optional[Dict] = None,
+    metrics: Optional[StreamMetrics] = None,
+    started: Optional[float] = None,
+) -> AsyncIterator[str]:
+    """Turn a token stream into SSE text.
+
+    Args:
+        tokens: Provider deltas, usually from ``start_stream``
+        leading: (event, data) pairs sent before the first token
+        done: Payload of the final ``done`` event
+        metrics: Where to record time-to-first-token and duration
+        started: ``time.perf_counter()`` at request start (default: now)
+    """
+    started = time.perf_counter() if started is None else started
+    ttft = None
+    error = False
+    try:
+        for event, data in leading:
+            yield format_sse(data, event)
+        async for token in tokens:
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            yield format_sse({"text": token}, "token")
+    except Exception as e:
+        error = True
+        logger.warning("Token stream failed", extra={"error": str(e)})
+        yield format_sse({"detail": str(e)}, "error")
+    else:
+        yield format_sse(done or {}, "done")
+    finally:
+        await _close(tokens)
+        if metrics is not None:
+            metrics.record(ttft, time.perf_counter() - started, error)
+
+
+__all__ = ["SSE_HEADERS", "StreamMetrics", "format_sse", "sse_events", "start_stream"]
@@ -0,0 +1,196 @@
+"""Token accounting for prompt sizing and completion limits.
+
+Prompt tokens are counted locally with the model's tiktoken encoding
+(loaded once per model and cached), so an input that would overflow the
+context window is truncated, or rejected, before any network round trip.
+``max_tokens`` is derived from what was asked for (the flashcard count, the
+summary length) instead of a fixed ceiling per endpoint. When tiktoken or
+its encoding files are unavailable (e.g. offline), counts fall back to an
+estimate of four characters per token.
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import math
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - depends on environment
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+
+# Model name prefix -> (context window, max output tokens); the longest matching prefix wins
+MODEL_LIMITS: Dict[str, Tuple[int, int]] = {
+    "gpt-4o-mini": (128_000, 16_384),
+    "gpt-4o": (128_000, 16_384),
+    "gpt-4-turbo": (128_000, 4_096),
+    "gpt-4-0125": (128_000, 4_096),
+    "gpt-4-1106": (128_000, 4_096),
+    "gpt-4-32k": (32_768, 4_096),
+    "gpt-4": (8_192, 4_096),
+    "gpt-3.5-turbo": (16_385, 4_096),
+    "gemini-1.5": (1_048_576, 8_192),
+    "gemini-pro": (32_760, 8_192),
+}
+DEFAULT_LIMITS = (8_192, 4_096)
+
+# Completion sizing: one JSON flashcard (question, answer, tags, difficulty) plus array overhead
+TOKENS_PER_FLASHCARD = 150
+FLASHCARD_OVERHEAD_TOKENS = 100
+MIN_SUMMARY_TOKENS = 64
+ANSWER_TOKENS = 1000
+TEXT_TOKENS = 2000
+
+# Chat format overhead per message and for priming the reply
+TOKENS_PER_MESSAGE = 4
+REPLY_TOKENS = 3
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(model: str):
+    """Return the tiktoken encoding of ``model`` (cl100k_base if unknown), or None if unavailable."""
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(
+            "Tokenizer unavailable; estimating tokens from length",
+            extra={"model": model, "error": str(e)},
+        )
+        return None
+
+
+def model_limits(model: str) -> Tuple[int, int]:
+    """Return (context window, max output tokens) of ``model``."""
+    matches = [prefix for prefix in MODEL_LIMITS if model.startswith(prefix)]
+    return MODEL_LIMITS[max(matches, key=len)] if matches else DEFAULT_LIMITS
+
+
+class TokenBudget:
+    """Count, fit and size tokens for one model."""
+
+    def __init__(
+        self,
+        model: str,
+        context_window: Optional[int] = None,
+        max_output_tokens: Optional[int] = None,
+        margin: int = 64,
+    ) -> None:
+        """Initialize the budget.
+
+        Args:
+            model: Model name, used for its encoding and default limits
+            context_window: Override of the model's context window
+            max_output_tokens: Override of the model's completion limit
+            margin: Tokens kept free to absorb counting differences
+        """
+        default_window, default_output = model_limits(model)
+        self.model = model
+        self.context_window = context_window or default_window
+        self.max_output_tokens = max_output_tokens or default_output
+        self.margin = margin
+        self.truncations = 0
+
+    @property
+    def encoding(self):
+        return get_encoding(self.model)
+
+    def count(self, text: str) -> int:
+        """Number of tokens in ``text``."""
+        encoding = self.encoding
+        if encoding is None:
+            return math.ceil(len(text) / CHARS_PER_TOKEN)
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def count_messages(self, messages: List[Dict]) -> int:
+        """Number of prompt tokens of chat ``messages``."""
+        return sum(TOKENS_PER_MESSAGE + self.count(m.get("content") or "") for m in messages) + REPLY_TOKENS
+
+    def completion_tokens(self, requested: int) -> int:
+        """Clamp a completion size to what the model can produce."""
+        return max(1, min(requested, self.max_output_tokens))
+
+    def flashcard_tokens(self, count: int) -> int:
+        """``max_tokens`` for a JSON array of ``count`` flashcards."""
+        return self.completion_tokens(FLASHCARD_OVERHEAD_TOKENS + count * TOKENS_PER_FLASHCARD)
+
+    def summary_tokens(self, max_length: int) -> int:
+        """``max_tokens`` for a summary of about ``max_length`` characters, with slack."""
+        return self.completion_tokens(max(MIN_SUMMARY_TOKENS, math.ceil(max_length * 1.5 / CHARS_PER_TOKEN)))
+
+    def input_budget(self, max_tokens: int, overhead: int = 0) -> int:
+        """Tokens left for content after the completion, the prompt template and the margin."""
+        return max(0, self.context_window - max_tokens - overhead - self.margin)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut ``text`` to at most ``max_tokens`` tokens, at a whitespace boundary when possible."""
+        encoding = self.encoding
+        if encoding is None:
+            if len(text) <= max_tokens * CHARS_PER_TOKEN:
+                return text
+            cut = text[:max_tokens * CHARS_PER_TOKEN]
+        else:
+            tokens = encoding.encode(text, disallowed_special=())
+            if len(tokens) <= max_tokens:
+                return text
+            cut = encoding.decode(tokens[:max_tokens])
+        # Back off to whitespace rather than end on a partial word
+        if not text[len(cut):len(cut) + 1].isspace():
+            boundary = max(cut.rfind("\n"), cut.rfind(" "))
+            if boundary > len(cut) * 0.8:
+                cut = cut[:boundary]
+        self.truncations += 1
+        return cut.rstrip()
+
+    def fit(self, content: str, max_tokens: int, overhead: int) -> str:
+        """Return ``content`` truncated to fit the window next to the prompt template and completion.
+
+        Args:
+            content: Variable part of the prompt (document, context)
+            max_tokens: Completion tokens reserved
+            overhead: Prompt tokens without the content
+        """
+        budget = self.input_budget(max_tokens, overhead)
+        fitted = self.truncate(content, budget)
+        if fitted is not content:
+            logger.warning(
+                "Prompt content truncated to fit the context window",
+                extra={"model": self.model, "budget_tokens": budget, "chars": len(content), "kept_chars": len(fitted)},
+            )
+        return fitted
+
+    def check(self, messages: List[Dict], max_tokens: int) -> int:
+        """Return the prompt tokens of ``messages``.
+
+        Raises:
+            ValueError: If the prompt and completion do not fit the context window
+        """
+        prompt_tokens = self.count_messages(messages)
+        if prompt_tokens + max_tokens > self.context_window:
+            raise ValueError(
+                f"Prompt of {prompt_tokens} tokens plus {max_tokens} completion tokens "
+                f"exceeds the {self.context_window}-token context window of {self.model}"
+            )
+        return prompt_tokens
+
+    def stats(self) -> Dict:
+        return {
+            "model": self.model,
+            "context_window": self.context_window,
+            "max_output_tokens": self.max_output_tokens,
+            "tokenizer": "tiktoken" if self.encoding is not None else "estimate",
+            "truncations": self.truncations,
+        }
+
+
+__all__ = ["TokenBudget", "get_encoding", "model_limits"]
@@ -3,8 +3,18 @@
 This module provides async HTML fetching with production-grade features:
 - Async/await support with httpx
 - Automatic retry with exponential backoff
-- Rate limit detection and handling
+- Rate limit detection and handling with per-host politeness scheduling
+- Streaming, size-bounded body reads
+- Conditional-GET response cache (see services.http_cache)
 - Metadata extraction (title, timestamps)
+- Optional borrowing of a shared pooled client (see services.http_pool)
+- Sync wrapper backed by a persistent background loop (see services.loop_thread)
+- Single-pass parse engine with pluggable backends (selectolax, lxml, html.parser)
+- Process-pool parse executor keeping CPU-bound extraction off the event loop
+- Breadth-first site crawling (see services.crawler)
+- Sitemap-driven incremental re-crawls (see services.sitemap)
+- Content fingerprints for duplicate detection (see services.fingerprint)
+- Readability-style main-content extraction to shrink LLM prompts
 - Comprehensive error handling
 Designed for integration with RAG engine and AI services.
 """
@@ -12,14 +22,24 @@ Designed for integration with RAG engine and AI services.
 from __future__ import annotations
 
 import asyncio
+import atexit
+import codecs
 import hashlib
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple, Union
 from urllib.parse import urljoin
 
 import httpx
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
 from tenacity import (
     retry,
     stop_after_attempt,
@@ -27,12 +47,695 @@ from tenacity import (
     retry_if_exception_type,
 )
 
+from services.crawler import CrawlConfig, CrawlStats, SiteCrawler
+from services.fingerprint import ContentFingerprint
+from services.http_cache import CachedResponse, HTTPResponseCache
+from services.http_pool import HTTPConnectionPool
+from services.loop_thread import BackgroundLoop
+from services.politeness import HostBlockedError, HostScheduler, parse_retry_after
+from services.sitemap import SitemapStateStore, SitemapSync, SitemapSyncStats
+
+try:  # Optional C-based backends, picked up automatically when installed
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # pragma: no cover - depends on environment
+    LexborHTMLParser = None
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # pragma: no cover - depends on environment
+    lxml = None
+    etree = None
+
 logger = logging.getLogger(__name__)
 
+# Elements whose content never counts as page text or links
+NOISE_TAGS = ("script", "style", "noscript", "iframe", "header", "footer", "nav")
+SKIPPED_LINK_SCHEMES = ("javascript:", "mailto:", "tel:")
+HEADING_TAGS = ("h1", "h2", "h3")
+
+
+def _is_utf8(encoding: Optional[str]) -> bool:
+    if encoding is None:
+        return True
+    try:
+        return codecs.lookup(encoding).name == "utf-8"
+    except LookupError:
+        return True
+
+
+def decode_body(body: Union[str, bytes], encoding: Optional[str] = None) -> str:
+    """Decode a response body, replacing undecodable bytes (unknown charsets fall back to UTF-8)."""
+    if isinstance(body, str):
+        return body
+    try:
+        return body.decode(encoding or "utf-8", errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+def _utf8_bytes(html: Union[str, bytes], encoding: Optional[str] = None) -> bytes:
+    """Document as UTF-8 bytes; UTF-8 bodies are returned as-is, without a copy."""
+    if isinstance(html, str):
+        return html.encode("utf-8")
+    if _is_utf8(encoding):
+        return html
+    return decode_body(html, encoding).encode("utf-8")
+
 
 class RateLimitError(Exception):
     """Raised when a rate limit is detected."""
-    pass
+
+    def __init__(self, message: str, retry_after: float = 60.0) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class ParsedPage:
+    """Title, text and links extracted from one HTML document."""
+
+    title: str
+    text: str
+    links: List[str] = field(default_factory=list)
+    # Length of the whole-page text when main-content extraction replaced it
+    full_length: Optional[int] = None
+    # Content fingerprint of ``text``, when requested from ParseExecutor.parse
+    fingerprint: Optional[ContentFingerprint] = None
+
+
+@dataclass
+class _WalkState:
+    """Accumulator filled while walking a document tree."""
+
+    texts: List[str] = field(default_factory=list)
+    hrefs: List[str] = field(default_factory=list)
+    title: Optional[str] = None
+    h1: Optional[str] = None
+    og_title: Optional[str] = None
+    headings: List[str] = field(default_factory=list)
+
+
+def _lxml_root(html: bytes):
+    """Parse UTF-8 HTML into an lxml tree, or None for an empty or unparsable document."""
+    if not html.strip():
+        return None
+    try:
+        return lxml.html.document_fromstring(html, parser=lxml.html.HTMLParser(encoding="utf-8"))
+    except etree.ParserError:
+        return None
+
+
+class HTMLParseEngine:
+    """Build one cleaned tree per page and extract title, text and links in one walk.
+
+    Backends:
+    - ``selectolax``: lexbor C parser (fastest, requires ``selectolax``)
+    - ``lxml``: libxml2 HTML parser (requires ``lxml``)
+    - ``html.parser``: pure-Python BeautifulSoup fallback, always available
+    - ``auto``: first available backend in the order above
+    """
+
+    BACKENDS = ("selectolax", "lxml", "html.parser")
+
+    def __init__(self, backend: str = "auto") -> None:
+        """Initialize the engine.
+
+        Args:
+            backend: Parser backend name or ``"auto"``
+
+        Raises:
+            ValueError: On unknown or unavailable backend
+        """
+        self.backend = self._resolve_backend(backend)
+
+    @classmethod
+    def available_backends(cls) -> List[str]:
+        """Return the backends importable in this environment, fastest first."""
+        available = []
+        if LexborHTMLParser is not None:
+            available.append("selectolax")
+        if etree is not None:
+            available.append("lxml")
+        available.append("html.parser")
+        return available
+
+    @classmethod
+    def _resolve_backend(cls, backend: str) -> str:
+        available = cls.available_backends()
+        if backend == "auto":
+            return available[0]
+        if backend not in cls.BACKENDS:
+            raise ValueError(f"Unknown parser backend: {backend}")
+        if backend not in available:
+            raise ValueError(f"Parser backend not installed: {backend}")
+        return backend
+
+    def parse(
+        self,
+        html: Union[str, bytes],
+        base_url: Optional[str] = None,
+        extractor: Optional[MainContentExtractor] = None,
+        encoding: Optional[str] = None,
+    ) -> ParsedPage:
+        """Parse HTML once and extract everything downstream consumers need.
+
+        Args:
+            html: Document as text or raw bytes
+            base_url: URL used to resolve relative links; links are skipped when None
+            extractor: When given, ``text`` holds only the page's main content;
+                title and links still come from the whole document. The
+                document is then walked as an lxml tree whatever the backend,
+                and the extractor reuses that tree instead of parsing again.
+            encoding: Charset of ``html`` when it is bytes (default UTF-8)
+
+        Returns:
+            ParsedPage with title, normalized text and deduplicated absolute links
+        """
+        state = _WalkState()
+        root = None
+        if extractor is not None or self.backend == "lxml":
+            root = _lxml_root(_utf8_bytes(html, encoding))
+            if root is not None:
+                self._walk_lxml(root, state)
+        elif self.backend == "selectolax":
+            self._walk_selectolax(_utf8_bytes(html, encoding), state)
+        else:
+            self._walk_soup(decode_body(html, encoding), state)
+
+        text = " ".join(" ".join(state.texts).split())
+        links = self._resolve_links(base_url, state.hrefs) if base_url is not None else []
+        title = self._pick_title(state)
+        if extractor is not None and root is not None:
+            # The walk is done with the tree, so the extractor may strip it in place
+            main_text = extractor.extract_tree(root)
+            if main_text:
+                return ParsedPage(title=title, text=main_text, links=links, full_length=len(text))
+        return ParsedPage(title=title, text=text, links=links)
+
+    @staticmethod
+    def _walk_soup(html: str, state: _WalkState) -> None:
+        """Walk a BeautifulSoup tree, skipping noise subtrees instead of decomposing them."""
+        soup = BeautifulSoup(html, "html.parser")
+        stack = [iter(soup.contents)]
+        while stack:
+            for node in stack[-1]:
+                if isinstance(node, Tag):
+                    name = node.name
+                    if name in NOISE_TAGS:
+                        continue
+                    if name == "a" and node.has_attr("href"):
+                        state.hrefs.append(node.get("href"))
+                    elif name == "title" and state.title is None:
+                        state.title = node.get_text(strip=True)
+                    elif name == "meta" and state.og_title is None and node.get("property") == "og:title":
+                        state.og_title = str(node.get("content") or "").strip()
+                    elif name in HEADING_TAGS:
+                        heading = node.get_text(strip=True)
+                        if name == "h1" and state.h1 is None:
+                            state.h1 = heading
+                        state.headings.append(heading)
+                    stack.append(iter(node.contents))
+                    break
+                if type(node) is NavigableString or type(node) is CData:
+                    state.texts.append(node)
+            else:
+                stack.pop()
+
+    @staticmethod
+    def _walk_lxml(root, state: _WalkState) -> None:
+        """Walk an lxml tree with start/end events so text and tails stay in order."""
+        walker = etree.iterwalk(root, events=("start", "end", "comment", "pi"))
+        for event, element in walker:
+            if event == "end":
+                if element.tail and element is not root:
+                    state.texts.append(element.tail)
+                continue
+            if event != "start":
+                # Comments and processing instructions only carry a tail
+                if element.tail:
+                    state.texts.append(element.tail)
+                continue
+
+            name = element.tag
+            if name in NOISE_TAGS:
+                walker.skip_subtree()
+                continue
+            if name == "a":
+                href = element.get("href")
+                if href is not None:
+                    state.hrefs.append(href)
+            elif name == "title" and state.title is None:
+                state.title = "".join(part.strip() for part in element.itertext())
+            elif name == "meta" and state.og_title is None and element.get("property") == "og:title":
+                state.og_title = (element.get("content") or "").strip()
+            elif name in HEADING_TAGS:
+                heading = "".join(part.strip() for part in element.itertext())
+                if name == "h1" and state.h1 is None:
+                    state.h1 = heading
+                state.headings.append(heading)
+            if element.text:
+                state.texts.append(element.text)
+
+    @staticmethod
+    def _walk_selectolax(html: bytes, state: _WalkState) -> None:
+        """Walk a lexbor DOM after stripping noise subtrees in C."""
+        tree = LexborHTMLParser(html)
+        tree.strip_tags(list(NOISE_TAGS))
+        if tree.root is None:
+            return
+
+        for node in tree.root.traverse(include_text=True):
+            name = node.tag
+            if name == "-text":
+                state.texts.append(node.text(deep=False))
+            elif name == "a":
+                attributes = node.attributes
+                if "href" in attributes:
+                    state.hrefs.append(attributes["href"] or "")
+            elif name == "title" and state.title is None:
+                state.title = node.text(strip=True)
+            elif name == "meta" and state.og_title is None and node.attributes.get("property") == "og:title":
+                state.og_title = (node.attributes.get("content") or "").strip()
+            elif name in HEADING_TAGS:
+                heading = node.text(strip=True)
+                if name == "h1" and state.h1 is None:
+                    state.h1 = heading
+                state.headings.append(heading)
+
+    @staticmethod
+    def _pick_title(state: _WalkState) -> str:
+        """Pick the <title>, else the first <h1>, else og:title, else any heading."""
+        for candidate in (state.title, state.h1, state.og_title, *state.headings):
+            if candidate:
+                return candidate
+        return "Untitled"
+
+    @staticmethod
+    def _resolve_links(base_url: str, hrefs: List[str]) -> List[str]:
+        """Resolve hrefs against the base URL, dropping non-HTTP schemes and duplicates."""
+        links: Dict[str, None] = {}
+        for href in hrefs:
+            if not href or href.startswith(SKIPPED_LINK_SCHEMES):
+                continue
+            try:
+                links.setdefault(urljoin(base_url, href))
+            except ValueError:
+                logger.debug("Invalid URL", extra={"href": href})
+        return list(links)
+
+
+@dataclass
+class _Block:
+    """A run of text that is laid out as one unit (paragraph, list item, heading)."""
+
+    element: "etree._Element"
+    text: str
+    kind: str
+    link_length: int = 0
+    level: int = 0
+
+    @property
+    def link_density(self) -> float:
+        return self.link_length / len(self.text) if self.text else 1.0
+
+
+class MainContentExtractor:
+    """Keep a page's main content and drop its boilerplate, readability style.
+
+    Hidden elements and subtrees whose class or id looks like a sidebar,
+    cookie banner, comment thread, reference list or related-articles box
+    are removed first. Every paragraph then adds a score (length and commas)
+    to its parent and half of it to its grandparent; containers are weighted
+    by their class/id and discounted by their link density. The best
+    container, plus siblings that score close to it, is the main content,
+    and its blocks are emitted one per line, minus link-heavy ones.
+
+    With ``keep_structure`` headings become Markdown headings and list items
+    bullets; without it only prose is kept (headings are dropped, list items
+    become plain lines), which is the cheapest prompt.
+
+    Requires ``lxml``.
+    """
+
+    # Subtrees that never hold main content (on top of NOISE_TAGS)
+    BOILERPLATE_TAGS = ("aside", "form", "button", "select", "svg", "template", "object", "embed")
+    # Elements whose whole text is laid out as one block
+    LEAF_BLOCK_TAGS = ("p", "pre", "blockquote", "li", "figcaption", "h1", "h2", "h3", "h4", "h5", "h6")
+    # Containers that form a block of loose text when nothing block-level is nested inside
+    TEXT_CONTAINER_TAGS = ("div", "section", "article", "main", "td", "th", "dd", "dt")
+    BLOCK_LEVEL_TAGS = LEAF_BLOCK_TAGS + TEXT_CONTAINER_TAGS + ("ul", "ol", "dl", "table")
+    HEADING_LEVELS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+    KEPT_CONTAINERS = ("html", "body", "article", "main")
+    TAG_SCORES = {
+        "div": 5, "article": 5, "main": 5, "section": 3, "pre": 3, "td": 3, "blockquote": 3,
+        "ol": -3, "ul": -3, "dl": -3, "dd": -3, "dt": -3, "li": -3, "th": -5,
+    }
+
+    UNLIKELY_CANDIDATES = re.compile(
+        r"banner|breadcrumb|comment|community|consent|cookie|disqus|footer|gdpr|menu|modal|navbar|"
+        r"newsletter|pager|pagination|popup|promo|related|references|bibliograph|share|sharing|"
+        r"sidebar|social|sponsor|subscribe|widget|advert|^ads?$|-ad-",
+        re.I,
+    )
+    MAYBE_CANDIDATES = re.compile(r"article|body|column|content|main|shadow", re.I)
+    POSITIVE_HINTS = re.compile(r"article|abstract|body|content|entry|main|page|post|story|text", re.I)
+    NEGATIVE_HINTS = re.compile(
+        r"banner|comment|contact|footer|footnote|masthead|media|meta|promo|related|references|"
+        r"share|sidebar|sponsor|tags|tool|widget|cookie",
+        re.I,
+    )
+
+    def __init__(
+        self,
+        keep_structure: bool = True,
+        min_text_length: int = 25,
+        max_link_density: float = 0.5,
+    ) -> None:
+        """Initialize extraction settings.
+
+        Args:
+            keep_structure: Keep headings and list items as Markdown structure
+            min_text_length: Shortest paragraph that contributes to scoring
+            max_link_density: Blocks with a larger share of link text are dropped
+
+        Raises:
+            ValueError: When lxml is not installed
+        """
+        if etree is None:
+            raise ValueError("Main-content extraction requires lxml")
+        self.keep_structure = keep_structure
+        self.min_text_length = min_text_length
+        self.max_link_density = max_link_density
+
+    @classmethod
+    def from_env(cls) -> "MainContentExtractor":
+        """Build an extractor from the ``SCRAPER_KEEP_STRUCTURE`` environment variable."""
+        return cls(keep_structure=os.getenv("SCRAPER_KEEP_STRUCTURE", "true").lower() == "true")
+
+    def extract(self, html: Union[str, bytes]) -> str:
+        """Return the main content of a document, one block per line.
+
+        Pages without a single scorable paragraph keep all their blocks.
+        """
+        if isinstance(html, str):
+            html = html.encode("utf-8")
+        root = _lxml_root(html)
+        return self.extract_tree(root) if root is not None else ""
+
+    def extract_tree(self, root) -> str:
+        """Like ``extract`` for a document already parsed by lxml.
+
+        The tree is modified in place (boilerplate is dropped), so callers
+        must be done reading it.
+        """
+        self._strip_boilerplate(root)
+        blocks = self._collect_blocks(root)
+        selected = self._select_content(root, blocks)
+
+        lines = []
+        for block in blocks:
+            if block.link_density > self.max_link_density or not self._within(block.element, selected):
+                continue
+            if block.kind == "heading":
+                if self.keep_structure:
+                    lines.append(f"{'#' * block.level} {block.text}")
+            elif block.kind == "item" and self.keep_structure:
+                lines.append(f"- {block.text}")
+            else:
+                lines.append(block.text)
+        return "\n".join(lines)
+
+    def _strip_boilerplate(self, root) -> None:
+        """Drop noise tags, comments, hidden elements and unlikely containers in place."""
+        etree.strip_elements(root, etree.Comment, *NOISE_TAGS, *self.BOILERPLATE_TAGS, with_tail=False)
+        doomed = []
+        for element in root.iter():
+            if not isinstance(element.tag, str) or element.tag in self.KEPT_CONTAINERS:
+                continue
+            style = (element.get("style") or "").replace(" ", "").lower()
+            if (
+                element.get("hidden") is not None
+                or element.get("aria-hidden") == "true"
+                or "display:none" in style
+            ):
+                doomed.append(element)
+                continue
+            hints = f"{element.get('class', '')} {element.get('id', '')}"
+            if (
+                hints.strip()
+                and self.UNLIKELY_CANDIDATES.search(hints)
+                and not self.MAYBE_CANDIDATES.search(hints)
+            ):
+                doomed.append(element)
+        for element in doomed:
+            # drop_tree keeps the element's tail text in the document
+            element.drop_tree()
+
+    def _collect_blocks(self, root) -> List[_Block]:
+        """Split the document into text blocks, in document order."""
+        blocks = []
+        walker = etree.iterwalk(root, events=("start",))
+        for _, element in walker:
+            tag = element.tag
+            if not isinstance(tag, str):
+                continue
+            if tag not in self.LEAF_BLOCK_TAGS and (
+                tag not in self.TEXT_CONTAINER_TAGS
+                or any(True for _ in element.iterdescendants(*self.BLOCK_LEVEL_TAGS))
+            ):
+                continue
+            walker.skip_subtree()
+            text = " ".join(element.text_content().split())
+            if not text:
+                continue
+            if tag in self.HEADING_LEVELS:
+                kind = "heading"
+            elif tag == "li":
+                kind = "item"
+            else:
+                kind = "text"
+            blocks.append(_Block(
+                element=element,
+                text=text,
+                kind=kind,
+                link_length=sum(len(" ".join(a.text_content().split())) for a in element.iter("a")),
+                level=self.HEADING_LEVELS.get(tag, 0),
+            ))
+        return blocks
+
+    def _class_weight(self, element) -> int:
+        weight = 0
+        for hints in (element.get("class"), element.get("id")):
+            if not hints:
+                continue
+            if self.NEGATIVE_HINTS.search(hints):
+                weight -= 25
+            if self.POSITIVE_HINTS.search(hints):
+                weight += 25
+        return weight
+
+    def _select_content(self, root, blocks: List[_Block]) -> Set:
+        """Return the elements whose subtrees make up the main content."""
+        scores: Dict = {}
+        for block in blocks:
+            if block.kind == "heading" or len(block.text) < self.min_text_length:
+                continue
+            score = 1 + block.text.count(",") + min(len(block.text) // 100, 3)
+            parent = block.element.getparent()
+            for ancestor, share in ((parent, 1.0), (parent.getparent() if parent is not None else None, 0.5)):
+                if ancestor is None or not isinstance(ancestor.tag, str):
+                    continue
+                if ancestor not in scores:
+                    scores[ancestor] = self._class_weight(ancestor) + self.TAG_SCORES.get(ancestor.tag, 0)
+                scores[ancestor] += score * share
+        if not scores:
+            return {root}
+
+        # Link density of each candidate, summed from the blocks already measured inside it
+        lengths = {element: [0, 0] for element in scores}
+        for block in blocks:
+            for ancestor in block.element.iterancestors():
+                if ancestor in lengths:
+                    lengths[ancestor][0] += len(block.text)
+                    lengths[ancestor][1] += block.link_length
+        final = {}
+        for element, score in scores.items():
+            text_length, link_length = lengths[element]
+            final[element] = score * (1 - link_length / text_length) if text_length else 0.0
+        top = max(final, key=final.get)
+        parent = top.getparent()
+        if parent is None:
+            return {top}
+
+        # Siblings scoring close to the winner (or plainly prose) belong to the same article
+        threshold = max(10.0, final[top] * 0.2)
+        by_element = {block.element: block for block in blocks}
+        siblings = [child for child in parent if isinstance(child.tag, str)]
+        keep = []
+        for sibling in siblings:
+            block = by_element.get(sibling)
+            if sibling is top or final.get(sibling, float("-inf")) >= threshold:
+                keep.append(True)
+            elif block is not None and block.kind == "text":
+                keep.append(
+                    (len(block.text) >= 80 and block.link_density < 0.25)
+                    or (block.link_length == 0 and block.text.endswith("."))
+                )
+            else:
+                keep.append(False)
+        # A sibling heading is kept when the content that follows it is
+        for index in range(len(siblings) - 2, -1, -1):
+            block = by_element.get(siblings[index])
+            if block is not None and block.kind == "heading":
+                keep[index] = keep[index + 1]
+        return {sibling for sibling, kept in zip(siblings, keep) if kept}
+
+    @staticmethod
+    def _within(element, selected: Set) -> bool:
+        if element in selected:
+            return True
+        return any(ancestor in selected for ancestor in element.iterancestors())
+
+
+# Engine owned by each parse worker process, built once by the pool initializer
+_worker_engine: Optional[HTMLParseEngine] = None
+
+
+def _init_parse_worker(backend: str) -> None:
+    global _worker_engine
+    _worker_engine = HTMLParseEngine(backend)
+
+
+def _warm_parse_worker() -> str:
+    # Force the first parse (and lazy imports inside the backend) to happen before real work
+    return _worker_engine.parse(b"<html><body><p>warm</p></body></html>").text
+
+
+def _parse_in_worker(
+    html: bytes,
+    base_url: Optional[str],
+    extractor: Optional[MainContentExtractor] = None,
+    encoding: Optional[str] = None,
+    fingerprint: bool = False,
+) -> ParsedPage:
+    return _fingerprinted(_worker_engine.parse(html, base_url, extractor, encoding), fingerprint)
+
+
+def _fingerprinted(page: ParsedPage, fingerprint: bool) -> ParsedPage:
+    if fingerprint:
+        page.fingerprint = ContentFingerprint.from_text(page.text)
+    return page
+
+
+class ParseExecutor:
+    """Run CPU-bound HTML extraction off the event loop.
+
+    Modes:
+    - ``process``: a warm ``ProcessPoolExecutor``; only the raw response
+      bytes (and their charset) go in and a compact ParsedPage comes back,
+      never a document tree
+    - ``inline``: parse on the calling thread (tests, tiny deployments)
+    """
+
+    MODES = ("process", "inline")
+
+    def __init__(
+        self,
+        backend: str = "auto",
+        mode: str = "process",
+        max_workers: int = 2,
+        start_method: str = "spawn",
+    ) -> None:
+        """Initialize executor settings; worker processes start in ``start``.
+
+        Args:
+            backend: Parser backend used by every worker
+            mode: "process" or "inline"
+            max_workers: Number of worker processes
+            start_method: multiprocessing start method for workers
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown parse mode: {mode}")
+        self.engine = HTMLParseEngine(backend)
+        self.mode = mode
+        self.max_workers = max_workers
+        self.start_method = start_method
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.pages_parsed = 0
+        self.parse_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "ParseExecutor":
+        """Build an executor from ``SCRAPER_PARSE_*`` environment variables."""
+        return cls(
+            backend=os.getenv("SCRAPER_PARSER", "auto"),
+            mode=os.getenv("SCRAPER_PARSE_MODE", "process"),
+            max_workers=int(os.getenv("SCRAPER_PARSE_WORKERS", "2")),
+            start_method=os.getenv("SCRAPER_PARSE_START_METHOD", "spawn"),
+        )
+
+    async def start(self) -> None:
+        """Start worker processes and wait until every one has parsed a page."""
+        if self.mode != "process" or self._pool is not None:
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_parse_worker,
+            initargs=(self.engine.backend,),
+        )
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(self._pool, _warm_parse_worker) for _ in range(self.max_workers)
+        ))
+        logger.info(
+            "Parse executor started",
+            extra={"workers": self.max_workers, "backend": self.engine.backend},
+        )
+
+    async def shutdown(self) -> None:
+        """Stop worker processes, waiting for them off the event loop."""
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+
+    async def parse(
+        self,
+        html: Union[str, bytes],
+        base_url: Optional[str] = None,
+        extractor: Optional[MainContentExtractor] = None,
+        encoding: Optional[str] = None,
+        fingerprint: bool = False,
+    ) -> ParsedPage:
+        """Parse a page in a worker process (or inline) and return its extraction.
+
+        Bytes are handed to the worker untouched, decoding happens there.
+        With ``fingerprint`` the worker also computes the text's content
+        fingerprint, so the text never has to be sent back for it.
+        """
+        started = time.perf_counter()
+        if self.mode == "inline" or self._pool is None:
+            page = _fingerprinted(self.engine.parse(html, base_url, extractor, encoding), fingerprint)
+        else:
+            if isinstance(html, str):
+                html, encoding = html.encode("utf-8"), "utf-8"
+            loop = asyncio.get_running_loop()
+            page = await loop.run_in_executor(
+                self._pool, _parse_in_worker, html, base_url, extractor, encoding, fingerprint
+            )
+        self.pages_parsed += 1
+        self.parse_seconds += time.perf_counter() - started
+        return page
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "backend": self.engine.backend,
+            "workers": self.max_workers if self._pool is not None else 0,
+            "pages_parsed": self.pages_parsed,
+            "avg_parse_ms": round(1000 * self.parse_seconds / self.pages_parsed, 2) if self.pages_parsed else 0.0,
+        }
 
 
 class AsyncWebScraper:
@@ -48,6 +751,14 @@ class AsyncWebScraper:
             "Chrome/119.0 Safari/537.36"
         ),
         max_response_size: int = 10 * 1024 * 1024,  # 10MB
+        parser: str = "auto",
+        client: Optional[httpx.AsyncClient] = None,
+        stream_body: bool = False,
+        cache: Optional[HTTPResponseCache] = None,
+        scheduler: Optional[HostScheduler] = None,
+        max_rate_limit_retries: int = 3,
+        parse_executor: Optional[ParseExecutor] = None,
+        content_extractor: Optional[MainContentExtractor] = None,
     ) -> None:
         """Initialize scraper with configurable settings.
         
@@ -56,44 +767,82 @@ class AsyncWebScraper:
             max_redirects: Maximum number of redirects to follow
             user_agent: User agent string for requests
             max_response_size: Maximum response size in bytes
+            parser: HTML parser backend ("auto", "selectolax", "lxml", "html.parser")
+            client: Shared client to borrow (e.g. from HTTPConnectionPool). A
+                borrowed client is not closed on exit and its own timeout,
+                headers and redirect settings apply.
+            stream_body: Read bodies incrementally and abort as soon as
+                max_response_size is exceeded, even without content-length
+            cache: Shared conditional-GET response cache; fresh entries skip
+                the network and stale ones are revalidated with ETag/Last-Modified
+            scheduler: Shared per-host politeness scheduler (token bucket,
+                in-flight cap, Retry-After backoff)
+            max_rate_limit_retries: Times a 429'd URL is requeued before
+                RateLimitError propagates (only with a scheduler)
+            parse_executor: Shared executor that parses pages off the event
+                loop; without one, fetch_and_parse parses inline
+            content_extractor: Main-content extractor; when set, page text
+                excludes sidebars, banners and other boilerplate
         """
         self.timeout = timeout
         self.max_redirects = max_redirects
         self.user_agent = user_agent
         self.max_response_size = max_response_size
-        self.client: Optional[httpx.AsyncClient] = None
+        self.parse_engine = HTMLParseEngine(parser)
+        self.stream_body = stream_body
+        self.cache = cache
+        self.scheduler = scheduler
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.parse_executor = parse_executor
+        self.content_extractor = content_extractor
+        self._owns_client = client is None
+        self.client: Optional[httpx.AsyncClient] = client
 
     async def __aenter__(self):
-        """Context manager entry - initialize HTTP client."""
-        self.client = httpx.AsyncClient(
-            timeout=self.timeout,
-            headers={"User-Agent": self.user_agent},
-            follow_redirects=True,
-            limits=httpx.Limits(max_redirects=self.max_redirects),
-        )
+        """Context manager entry - initialize HTTP client unless one was borrowed."""
+        if self._owns_client:
+            self.client = httpx.AsyncClient(
+                timeout=self.timeout,
+                headers={"User-Agent": self.user_agent},
+                follow_redirects=True,
+                max_redirects=self.max_redirects,
+            )
         return self
 
     async def __aexit__(self, *args):
-        """Context manager exit - close HTTP client."""
-        if self.client:
+        """Context manager exit - close HTTP client if this scraper owns it."""
+        if self.client and self._owns_client:
             await self.client.aclose()
+            self.client = None
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((httpx.TimeoutException, httpx.NetworkError)),
-    )
     async def fetch_html(self, url: str) -> tuple[str, Dict]:
-        """Fetch raw HTML with automatic retry on transient failures.
+        """Fetch HTML as text with automatic retry on transient failures.
+        
+        See ``fetch_body``; the body is decoded with the response charset.
+        
+        Returns:
+            Tuple of (html_content, metadata_dict)
+        """
+        body, metadata = await self.fetch_body(url)
+        return decode_body(body, metadata.get("encoding")), metadata
+
+    async def fetch_body(self, url: str) -> tuple[Union[str, bytes], Dict]:
+        """Fetch a page body with automatic retry on transient failures.
+        
+        Fresh cache entries are returned without contacting the host. With a
+        scheduler configured, each request waits for its host's turn and a
+        429 delays and requeues the URL (honouring Retry-After) instead of
+        failing it, up to max_rate_limit_retries times.
         
         Args:
             url: URL to fetch
             
         Returns:
-            Tuple of (html_content, metadata_dict)
+            Tuple of (body, metadata_dict). Network responses are the raw
+            bytes in ``metadata["encoding"]``; cache hits are already text.
             
         Raises:
-            RateLimitError: When rate limit is detected
+            RateLimitError: When rate limit is detected (and retries are exhausted)
             httpx.HTTPStatusError: On HTTP errors
             httpx.TimeoutException: On timeout
             ValueError: On invalid content type or size
@@ -101,24 +850,71 @@ class AsyncWebScraper:
         if not self.client:
             raise RuntimeError("Scraper not initialized. Use 'async with' context manager.")
         
+        cached = await self._cache_lookup(url)
+        if cached is not None and cached.is_fresh():
+            self.cache.record("hit")
+            return cached.body, self._cached_metadata(cached, "hit")
+        
+        if self.scheduler is None:
+            return await self._fetch_body_once(url, cached)
+        
+        attempts = 0
+        while True:
+            try:
+                result = await self._fetch_body_once(url, cached)
+            except HostBlockedError as e:
+                raise RateLimitError(str(e), retry_after=e.retry_after) from e
+            except RateLimitError as e:
+                attempts += 1
+                if attempts > self.max_rate_limit_retries:
+                    raise
+                self.scheduler.penalize(url, e.retry_after)
+                continue
+            self.scheduler.record_success(url)
+            return result
+
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10),
+        retry=retry_if_exception_type((httpx.TimeoutException, httpx.NetworkError)),
+        reraise=True,
+    )
+    async def _fetch_body_once(
+        self, url: str, cached: Optional[CachedResponse] = None
+    ) -> tuple[Union[str, bytes], Dict]:
+        """Perform one GET (revalidating ``cached`` when given), retrying network errors.
+        
+        With a scheduler, each attempt takes its own host slot, so the
+        backoff between attempts does not hold up other URLs of the host.
+        """
+        slot = self.scheduler.slot(url) if self.scheduler is not None else nullcontext()
+        async with slot:
+            return await self._get_body(url, cached)
+
+    async def _get_body(
+        self, url: str, cached: Optional[CachedResponse] = None
+    ) -> tuple[Union[str, bytes], Dict]:
+        """Send one GET and validate and read its response."""
+        request_headers = cached.validators() if cached is not None else None
+        
         try:
-            response = await self.client.get(url)
-            
-            # Check for rate limiting
-            if response.status_code == 429:
-                retry_after = response.headers.get("Retry-After", "60")
-                logger.warning(
-                    "Rate limit detected",
-                    extra={"url": url, "retry_after": retry_after}
-                )
-                raise RateLimitError(f"Rate limited. Retry after {retry_after}s")
-            
-            # Check response size
-            content_length = response.headers.get("content-length")
-            if content_length and int(content_length) > self.max_response_size:
-                raise ValueError(f"Response too large: {content_length} bytes")
-            
-            response.raise_for_status()
+            if self.stream_body:
+                async with self.client.stream("GET", url, headers=request_headers) as response:
+                    if response.status_code == 304 and cached is not None:
+                        return await self._serve_revalidated(url, cached, response)
+                    self._check_response(url, response)
+                    body, encoding, bytes_received = await self._read_bounded_body(response)
+            else:
+                response = await self.client.get(url, headers=request_headers)
+                if response.status_code == 304 and cached is not None:
+                    return await self._serve_revalidated(url, cached, response)
+                self._check_response(url, response)
+                body = response.content
+                encoding = response.encoding or "utf-8"
+                bytes_received = None
+                # Chunked responses carry no content-length; reject after the fact
+                if len(body) > self.max_response_size:
+                    raise ValueError(f"Response too large: {len(body)} bytes")
             
             # Validate content type
             content_type = response.headers.get("content-type", "")
@@ -133,18 +929,27 @@ class AsyncWebScraper:
                 extra={
                     "url": url,
                     "status_code": response.status_code,
-                    "content_length": len(response.text),
+                    "content_length": len(body),
                 }
             )
             
             metadata = {
                 "status_code": response.status_code,
                 "content_type": content_type,
-                "encoding": response.encoding or "utf-8",
-                "scraped_at": datetime.utcnow().isoformat(),
+                "encoding": encoding,
+                "scraped_at": datetime.now(timezone.utc).isoformat(),
             }
+            if bytes_received is not None:
+                metadata["bytes_received"] = bytes_received
+            if self.cache is not None:
+                self.cache.record("miss")
+                metadata["cache"] = "miss"
+                if response.status_code == 200:
+                    await asyncio.to_thread(
+                        self.cache.put, url, body, response.headers, response.status_code, encoding
+                    )
             
-            return response.text, metadata
+            return body, metadata
             
         except httpx.TimeoutException:
             logger.error("Request timeout", extra={"url": url})
@@ -165,80 +970,151 @@ class AsyncWebScraper:
             logger.error("Unexpected error", extra={"url": url, "error": str(e)})
             raise
 
-    @staticmethod
-    def _clean_html(html: str) -> BeautifulSoup:
-        """Clean HTML by removing scripts, styles, and other non-content elements."""
-        soup = BeautifulSoup(html, "html.parser")
-        for tag in soup(["script", "style", "noscript", "iframe", "header", "footer", "nav"]):
-            tag.decompose()
-        return soup
+    async def _cache_lookup(self, url: str) -> Optional[CachedResponse]:
+        """Look up ``url`` in the response cache off the event loop."""
+        if self.cache is None:
+            return None
+        return await asyncio.to_thread(self.cache.get, url)
+
+    async def _serve_revalidated(
+        self, url: str, cached: CachedResponse, response: httpx.Response
+    ) -> tuple[Union[str, bytes], Dict]:
+        """Serve a cached body after a 304 and extend its freshness."""
+        await asyncio.to_thread(self.cache.refresh, url, response.headers)
+        self.cache.record("revalidated")
+        logger.info("Revalidated cached URL", extra={"url": url})
+        return cached.body, self._cached_metadata(cached, "revalidated")
 
     @staticmethod
-    def _extract_title(soup: BeautifulSoup) -> str:
-        """Extract title from HTML.
+    def _cached_metadata(cached: CachedResponse, outcome: str) -> Dict:
+        return {
+            "status_code": cached.status_code,
+            "content_type": cached.content_type,
+            "encoding": cached.encoding,
+            "scraped_at": datetime.now(timezone.utc).isoformat(),
+            "cache": outcome,
+        }
+
+    def _check_response(self, url: str, response: httpx.Response, max_size: Optional[int] = None) -> None:
+        """Validate status and declared size before any body bytes are read.
         
-        Tries multiple strategies:
-        1. <title> tag
-        2. <h1> tag
-        3. og:title meta tag
-        4. First heading found
+        Args:
+            url: Requested URL (for logging)
+            response: Response whose headers have arrived
+            max_size: Byte limit; defaults to max_response_size
+        
+        Raises:
+            RateLimitError: On HTTP 429
+            httpx.HTTPStatusError: On other HTTP errors
+            ValueError: When content-length exceeds max_response_size
         """
-        # Try <title> tag
-        if title_tag := soup.find("title"):
-            if title := title_tag.get_text(strip=True):
-                return title
+        # Check for rate limiting
+        if response.status_code == 429:
+            retry_after = response.headers.get("Retry-After", "60")
+            logger.warning(
+                "Rate limit detected",
+                extra={"url": url, "retry_after": retry_after}
+            )
+            raise RateLimitError(
+                f"Rate limited. Retry after {retry_after}s",
+                retry_after=parse_retry_after(retry_after),
+            )
         
-        # Try <h1> tag
-        if h1 := soup.find("h1"):
-            if title := h1.get_text(strip=True):
-                return title
+        response.raise_for_status()
         
-        # Try og:title meta tag
-        if og_title := soup.find("meta", property="og:title"):
-            if title := og_title.get("content"):
-                return str(title).strip()
+        # Check response size
+        max_size = self.max_response_size if max_size is None else max_size
+        content_length = response.headers.get("content-length")
+        if content_length and int(content_length) > max_size:
+            raise ValueError(f"Response too large: {content_length} bytes")
+
+    async def _read_bounded_body(self, response: httpx.Response) -> tuple[bytes, str, int]:
+        """Read a streamed body chunk by chunk, aborting once the byte budget is exceeded.
         
-        # Try any heading
-        for heading in soup.find_all(["h1", "h2", "h3"]):
-            if title := heading.get_text(strip=True):
-                return title
+        Chunks are consumed as they arrive from the network and kept as
+        bytes; the body is joined once and handed to the parser undecoded.
+        The budget counts decoded (decompressed) bytes, which also bounds
+        compression bombs.
         
-        return "Untitled"
+        Returns:
+            Tuple of (body, encoding, bytes_received)
+            
+        Raises:
+            ValueError: When the body exceeds max_response_size
+        """
+        encoding = response.charset_encoding or "utf-8"
+        try:
+            codecs.lookup(encoding)
+        except LookupError:
+            encoding = "utf-8"
+        
+        parts: List[bytes] = []
+        bytes_received = 0
+        async for chunk in response.aiter_bytes():
+            bytes_received += len(chunk)
+            if bytes_received > self.max_response_size:
+                raise ValueError(
+                    f"Response too large: exceeded {self.max_response_size} bytes while streaming"
+                )
+            parts.append(chunk)
+        
+        return b"".join(parts), encoding, bytes_received
+
+    async def iter_bytes(self, url: str, max_bytes: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Stream a raw response body chunk by chunk without buffering it.
+        
+        Meant for large machine-readable documents such as sitemaps. There is
+        no cache or retry; with a scheduler the host's slot is held while the
+        body streams and a 429 penalizes the host before RateLimitError is raised.
+        
+        Args:
+            url: URL to fetch
+            max_bytes: Limit on (decoded) body bytes; defaults to max_response_size
+            
+        Yields:
+            Body chunks as they arrive
+            
+        Raises:
+            RateLimitError: On HTTP 429 or a blocked host
+            httpx.HTTPStatusError: On HTTP errors
+            ValueError: When the body exceeds max_bytes
+        """
+        if not self.client:
+            raise RuntimeError("Scraper not initialized. Use 'async with' context manager.")
+        
+        max_bytes = self.max_response_size if max_bytes is None else max_bytes
+        slot = self.scheduler.slot(url) if self.scheduler is not None else nullcontext()
+        try:
+            async with slot:
+                async with self.client.stream("GET", url) as response:
+                    try:
+                        self._check_response(url, response, max_bytes)
+                    except RateLimitError as e:
+                        if self.scheduler is not None:
+                            self.scheduler.penalize(url, e.retry_after)
+                        raise
+                    received = 0
+                    async for chunk in response.aiter_bytes():
+                        received += len(chunk)
+                        if received > max_bytes:
+                            raise ValueError(f"Response too large: exceeded {max_bytes} bytes while streaming")
+                        yield chunk
+        except HostBlockedError as e:
+            raise RateLimitError(str(e), retry_after=e.retry_after) from e
+        if self.scheduler is not None:
+            self.scheduler.record_success(url)
 
     def extract_text(self, html: str) -> str:
-        """Extract readable text from HTML, trimming excessive whitespace."""
-        soup = self._clean_html(html)
-        text = soup.get_text(" ")
-        normalized = " ".join(text.split())
-        return normalized
+        """Extract readable text from HTML.
+
+        Without a content extractor this is the whole page with whitespace
+        collapsed; with one, the main-content blocks joined by newlines.
+        """
+        return self.parse_engine.parse(html, extractor=self.content_extractor).text
 
     def extract_links(self, base_url: str, html: str) -> List[str]:
         """Extract and normalize all links from HTML."""
-        soup = self._clean_html(html)
-        links: List[str] = []
-
-        for anchor in soup.find_all("a", href=True):
-            href = anchor.get("href")
-            if not href or href.startswith(("javascript:", "mailto:", "tel:")):
-                continue
-            
-            try:
-                full_url = urljoin(base_url, href)
-                links.append(full_url)
-            except ValueError:
-                logger.debug("Invalid URL", extra={"href": href})
-                continue
-
-        # Deduplicate while preserving order
-        seen = set()
-        deduped: List[str] = []
-        for link in links:
-            if link in seen:
-                continue
-            seen.add(link)
-            deduped.append(link)
-
-        return deduped
+        return self.parse_engine.parse(html, base_url).links
 
     async def fetch_and_parse(self, url: str) -> Dict:
         """Fetch a URL and return structured content for downstream use.
@@ -253,53 +1129,162 @@ class AsyncWebScraper:
             - text: Normalized text content
             - links: List of discovered links
             - length: Character count of text
-            - id: Content hash (MD5)
-            - metadata: Scraping metadata (status, encoding, timestamp)
+            - id: URL hash (MD5)
+            - fingerprint: Exact content hash and SimHash of the text
+            - metadata: Scraping metadata (status, encoding, timestamp, and
+              full_length when main-content extraction shortened the text)
         """
-        html, metadata = await self.fetch_html(url)
-        soup = self._clean_html(html)
-        text = self.extract_text(html)
-        
+        body, metadata = await self.fetch_body(url)
+        encoding = metadata.get("encoding")
+        if self.parse_executor is not None:
+            page = await self.parse_executor.parse(body, url, self.content_extractor, encoding, fingerprint=True)
+        else:
+            page = _fingerprinted(self.parse_engine.parse(body, url, self.content_extractor, encoding), True)
+        return self._page_result(url, page, page.fingerprint, metadata)
+
+    @staticmethod
+    def _page_result(url: str, page: ParsedPage, fingerprint: ContentFingerprint, metadata: Dict) -> Dict:
+        """Assemble the fetch_and_parse dictionary for a parsed page."""
+        if page.full_length is not None:
+            metadata["full_length"] = page.full_length
         return {
             "url": url,
-            "title": self._extract_title(soup),
-            "text": text,
-            "links": self.extract_links(url, html),
-            "length": len(text),
+            "title": page.title,
+            "text": page.text,
+            "links": page.links,
+            "length": len(page.text),
             "id": hashlib.md5(url.encode()).hexdigest(),
+            "fingerprint": fingerprint.to_dict(),
             "metadata": metadata,
         }
 
-    async def fetch_and_parse_batch(self, urls: List[str]) -> List[Dict]:
+    async def iter_fetch_and_parse(
+        self,
+        urls: Iterable[str],
+        max_concurrent: int = 10,
+        include_errors: bool = False,
+    ) -> AsyncIterator[Dict]:
+        """Fetch and parse every URL with bounded concurrency, yielding results as they finish.
+        
+        At most ``max_concurrent`` fetches are in flight; a new URL is started
+        as soon as one completes, so memory stays flat regardless of how many
+        URLs are supplied. Closing the generator early cancels in-flight work.
+        
+        Args:
+            urls: URLs to scrape (any iterable, consumed lazily)
+            max_concurrent: Maximum number of concurrent fetches
+            include_errors: Yield ``{"url": ..., "error": ...}`` for failed URLs
+                instead of only logging them
+            
+        Yields:
+            Parsed content dictionaries in completion order
+        """
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        
+        url_iter = iter(urls)
+        pending: Set[asyncio.Task] = set()
+        
+        def fill() -> None:
+            while len(pending) < max_concurrent:
+                url = next(url_iter, None)
+                if url is None:
+                    return
+                pending.add(asyncio.create_task(self._fetch_for_batch(url, include_errors)))
+        
+        fill()
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                fill()
+                for task in done:
+                    result = task.result()
+                    if result is not None:
+                        yield result
+        finally:
+            for task in pending:
+                task.cancel()
+            # Let cancelled fetches unwind before the generator is gone
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _fetch_for_batch(self, url: str, include_errors: bool) -> Optional[Dict]:
+        try:
+            return await self.fetch_and_parse(url)
+        except Exception as e:
+            logger.error("Error in batch scraping", extra={"url": url, "error": str(e)})
+            return {"url": url, "error": str(e)} if include_errors else None
+
+    async def fetch_and_parse_batch(self, urls: List[str], max_concurrent: int = 10) -> List[Dict]:
         """Fetch and parse multiple URLs concurrently.
         
         Args:
             urls: List of URLs to scrape
+            max_concurrent: Maximum number of concurrent fetches
             
         Returns:
-            List of parsed content dictionaries
+            List of parsed content dictionaries (failed URLs are skipped)
         """
-        tasks = [self.fetch_and_parse(url) for url in urls]
-        results = []
+        return [result async for result in self.iter_fetch_and_parse(urls, max_concurrent)]
+
+    def crawl(
+        self,
+        start_url: str,
+        config: Optional[CrawlConfig] = None,
+        stats: Optional[CrawlStats] = None,
+    ) -> AsyncIterator[Dict]:
+        """Crawl a site breadth-first from ``start_url``, following extracted links.
         
-        for coro in asyncio.as_completed(tasks):
-            try:
-                result = await coro
-                results.append(result)
-            except Exception as e:
-                logger.error("Error in batch scraping", extra={"error": str(e)})
+        Args:
+            start_url: Seed URL
+            config: Depth/page limits and domain/path filters
+            stats: Progress object updated while crawling
+            
+        Yields:
+            Parsed content dictionaries (with ``depth``) as pages are fetched
+        """
+        return SiteCrawler(self, config).crawl(start_url, stats)
+
+    def sync_sitemap(
+        self,
+        sitemap_url: str,
+        state: SitemapStateStore,
+        max_concurrent: int = 10,
+        recheck_undated: bool = False,
+        stats: Optional[SitemapSyncStats] = None,
+    ) -> AsyncIterator[Dict]:
+        """Fetch only the URLs of a sitemap (or sitemap index) that are new or changed.
         
-        return results
+        Args:
+            sitemap_url: sitemap.xml or sitemap index URL
+            state: Per-URL lastmod state from previous syncs
+            max_concurrent: Maximum number of concurrent page fetches
+            recheck_undated: Also refetch known URLs that have no lastmod
+            stats: Progress object updated while syncing
+            
+        Yields:
+            Parsed content dictionaries (with ``lastmod``) as pages are fetched
+        """
+        return SitemapSync(self, state, max_concurrent, recheck_undated).sync(sitemap_url, stats)
 
 
 # Legacy sync wrapper for backward compatibility
 class WebScraper:
     """Synchronous wrapper for AsyncWebScraper (deprecated).
-    
+
     This class is maintained for backward compatibility only.
     New code should use AsyncWebScraper directly.
+
+    Calls run on one background event loop shared by every instance, with a
+    pooled client per (timeout, user agent), so consecutive calls reuse warm
+    connections instead of paying loop and TLS setup each time. A
+    requests-style ``session`` passed in is used as-is instead.
     """
-    
+
+    _loop = BackgroundLoop(name="web-scraper-loop")
+    _pools: Dict[Tuple[float, str], HTTPConnectionPool] = {}
+    _lock = threading.Lock()
+    _atexit_registered = False
+
     def __init__(
         self,
         timeout: int = 10,
@@ -309,37 +1294,130 @@ class WebScraper:
             "Chrome/119.0 Safari/537.36"
         ),
         session=None,
+        max_concurrent: int = 10,
     ) -> None:
-        """Initialize sync scraper (deprecated)."""
+        """Initialize sync scraper (deprecated).
+
+        Args:
+            timeout: Request timeout in seconds
+            user_agent: User agent string for requests
+            session: requests-style session (``get(url, timeout=...)``) used
+                for fetching instead of the shared pooled client
+            max_concurrent: Default fan-out of fetch_and_parse_batch
+        """
         logger.warning(
             "WebScraper is deprecated. Use AsyncWebScraper instead.",
             extra={"class": "WebScraper"}
         )
         self.timeout = timeout
         self.user_agent = user_agent
+        self.session = session
+        self.max_concurrent = max_concurrent
+
+    @classmethod
+    def _run(cls, coro):
+        """Run a coroutine on the shared loop, starting it on first use."""
+        with cls._lock:
+            if not cls._loop.is_running:
+                # Clients from a previous (or the parent process's) loop are unusable
+                cls._pools.clear()
+                cls._loop.start()
+                if not cls._atexit_registered:
+                    atexit.register(cls.close_shared)
+                    cls._atexit_registered = True
+        return cls._loop.run(coro)
+
+    @classmethod
+    def close_shared(cls) -> None:
+        """Close the pooled clients and stop the background loop (also run at exit)."""
+        with cls._lock:
+            if cls._loop.is_running:
+                pools = list(cls._pools.values())
+
+                async def close_pools() -> None:
+                    for pool in pools:
+                        await pool.aclose()
+
+                cls._loop.run(close_pools())
+            cls._pools.clear()
+            cls._loop.stop()
+
+    async def _scraper(self) -> AsyncWebScraper:
+        # Runs on the loop thread, so the pool registry needs no extra locking
+        key = (float(self.timeout), self.user_agent)
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = HTTPConnectionPool(timeout=float(self.timeout), user_agent=self.user_agent)
+        return AsyncWebScraper(
+            timeout=float(self.timeout),
+            user_agent=self.user_agent,
+            client=await pool.start(),
+        )
+
+    def _session_fetch(self, url: str) -> tuple[str, Dict]:
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        headers = getattr(response, "headers", None) or {}
+        return response.text, {
+            "status_code": response.status_code,
+            "content_type": headers.get("content-type", ""),
+            "encoding": getattr(response, "encoding", None),
+            "scraped_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def _session_fetch_and_parse(self, url: str) -> Dict:
+        html, metadata = self._session_fetch(url)
+        scraper = AsyncWebScraper()
+        page = scraper.parse_engine.parse(html, url)
+        return scraper._page_result(url, page, ContentFingerprint.from_text(page.text), metadata)
 
     def fetch_and_parse(self, url: str) -> Dict:
         """Sync version of fetch_and_parse (deprecated)."""
+        if self.session is not None:
+            return self._session_fetch_and_parse(url)
+
         async def _async_fetch():
-            async with AsyncWebScraper(
-                timeout=float(self.timeout),
-                user_agent=self.user_agent
-            ) as scraper:
+            async with await self._scraper() as scraper:
                 return await scraper.fetch_and_parse(url)
-        
-        return asyncio.run(_async_fetch())
+
+        return self._run(_async_fetch())
 
     def fetch_html(self, url: str) -> str:
         """Sync version of fetch_html (deprecated)."""
+        if self.session is not None:
+            return self._session_fetch(url)[0]
+
         async def _async_fetch():
-            async with AsyncWebScraper(
-                timeout=float(self.timeout),
-                user_agent=self.user_agent
-            ) as scraper:
+            async with await self._scraper() as scraper:
                 html, _ = await scraper.fetch_html(url)
                 return html
-        
-        return asyncio.run(_async_fetch())
+
+        return self._run(_async_fetch())
+
+    def fetch_and_parse_batch(self, urls: List[str], max_concurrent: Optional[int] = None) -> List[Dict]:
+        """Fetch and parse URLs concurrently on the shared loop.
+
+        Failed URLs are logged and skipped, as in the async version. With a
+        ``session`` the URLs are fetched one after another, since
+        requests-style sessions are not safe to share across threads.
+
+        Returns:
+            Parsed content dictionaries in completion order
+        """
+        if self.session is not None:
+            results = []
+            for url in urls:
+                try:
+                    results.append(self._session_fetch_and_parse(url))
+                except Exception as e:
+                    logger.error("Error scraping URL in batch", extra={"url": url, "error": str(e)})
+            return results
+
+        async def _async_batch():
+            async with await self._scraper() as scraper:
+                return await scraper.fetch_and_parse_batch(urls, max_concurrent or self.max_concurrent)
+
+        return self._run(_async_batch())
 
     @staticmethod
     def extract_text(html: str) -> str:
@@ -353,4 +1431,13 @@ class WebScraper:
         return scraper.extract_links(base_url, html)
 
 
-__all__ = ["AsyncWebScraper", "WebScraper", "RateLimitError"]
\ No newline at end of file
+__all__ = [
+    "AsyncWebScraper",
+    "WebScraper",
+    "HTMLParseEngine",
+    "MainContentExtractor",
+    "ParsedPage",
+    "ParseExecutor",
+    "RateLimitError",
+    "decode_body",
+]
\ No newline at end of file
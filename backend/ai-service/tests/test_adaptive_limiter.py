@@ -0,0 +1,162 @@
+"""Tests for the adaptive (AIMD) provider concurrency limiter."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from services.adaptive_limiter import AdaptiveLimiter, QueueTimeout, is_overload
+from services.openai_service import OpenAIService
+
+
+class RateLimitError(Exception):
+    """Stand-in for ``openai.RateLimitError``."""
+
+
+class TooManyRequests(Exception):
+    """Error carrying an HTTP status, like ``openai.APIStatusError``."""
+
+    status_code = 429
+
+
+async def run_calls(limiter, count, delay=0.01, error=None):
+    """Run ``count`` concurrent calls through the limiter, returning the peak concurrency."""
+    active = peak = 0
+
+    async def one():
+        nonlocal active, peak
+        async with limiter.acquire():
+            active += 1
+            peak = max(peak, active)
+            try:
+                await asyncio.sleep(delay)
+                if error:
+                    raise error
+            finally:
+                active -= 1
+
+    await asyncio.gather(*(one() for _ in range(count)), return_exceptions=True)
+    return peak
+
+
+class TestAdaptiveLimiter:
+    """Additive increase, multiplicative decrease, queueing and the TPM budget."""
+
+    def test_overload_classification(self):
+        assert is_overload(RateLimitError("slow down"))
+        assert is_overload(asyncio.TimeoutError())
+        assert is_overload(TooManyRequests())
+        assert not is_overload(ValueError("bad request"))
+
+    @pytest.mark.asyncio
+    async def test_concurrency_capped_at_limit(self):
+        limiter = AdaptiveLimiter("openai", initial_limit=3, max_limit=3)
+
+        assert await run_calls(limiter, 10) == 3
+        assert limiter.stats()["calls"] == 10
+        assert limiter.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_additive_increase_on_success(self):
+        """Test the limit grows by about one per round of ``limit`` successes."""
+        limiter = AdaptiveLimiter("openai", initial_limit=2, max_limit=4)
+
+        for _ in range(4):
+            await run_calls(limiter, int(limiter.limit), delay=0)
+
+        assert 3.5 <= limiter.limit <= 4
+        await run_calls(limiter, 100, delay=0)
+        assert limiter.limit == 4
+
+    @pytest.mark.asyncio
+    async def test_multiplicative_decrease_once_per_burst(self):
+        """Test a burst of 429s halves the limit once rather than collapsing it."""
+        limiter = AdaptiveLimiter("openai", initial_limit=8, decrease_interval=1.0)
+
+        await run_calls(limiter, 8, error=RateLimitError("429"))
+
+        assert limiter.limit == 4
+        assert limiter.stats()["overloads"] == 8
+
+    @pytest.mark.asyncio
+    async def test_decrease_floor_and_other_errors(self):
+        limiter = AdaptiveLimiter("openai", initial_limit=2, min_limit=1, decrease_interval=0)
+
+        for _ in range(3):
+            await run_calls(limiter, 1, error=asyncio.TimeoutError())
+        assert limiter.limit == 1
+
+        await run_calls(limiter, 1, error=ValueError("bad request"))
+        assert limiter.limit == 1
+        assert limiter.stats()["overloads"] == 3
+
+    @pytest.mark.asyncio
+    async def test_queue_deadline(self):
+        limiter = AdaptiveLimiter("openai", initial_limit=1, max_limit=1, queue_timeout=0.05)
+
+        async with limiter.acquire():
+            with pytest.raises(QueueTimeout):
+                async with limiter.acquire():
+                    pass
+
+        assert limiter.stats()["queue_timeouts"] == 1
+        assert limiter.stats()["waiting"] == 0
+
+    @pytest.mark.asyncio
+    async def test_tokens_per_minute_budget(self):
+        """Test calls wait for the token bucket to refill, and unused tokens are refunded."""
+        limiter = AdaptiveLimiter("openai", tokens_per_minute=6000)
+
+        async with limiter.acquire(6000) as permit:
+            permit.record_usage(1000)
+        assert limiter.stats()["tokens_available"] >= 5000
+
+        async with limiter.acquire(5000):
+            pass
+        started = time.perf_counter()
+        async with limiter.acquire(30):
+            pass
+        # The bucket refills at 100 tokens/s, so the 30 tokens take about 0.3s
+        assert 0.1 < time.perf_counter() - started < 1.0
+
+    @pytest.mark.asyncio
+    async def test_shared_by_service_calls(self, monkeypatch):
+        """Test OpenAIService calls go through the limiter and report usage."""
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        limiter = AdaptiveLimiter("openai", tokens_per_minute=100_000)
+        service = OpenAIService(limiter=limiter)
+        response = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="Summary"))],
+            usage=SimpleNamespace(total_tokens=50),
+        )
+        service.client.chat.completions.create = AsyncMock(return_value=response)
+
+        assert await service.summarize("Long text", 200) == "Summary"
+
+        assert limiter.stats()["calls"] == 1
+        assert limiter.stats()["tokens_available"] >= 100_000 - 50
+
+    @pytest.mark.asyncio
+    async def test_stream_usage_from_final_chunk(self, monkeypatch):
+        """Test a streamed completion is charged the usage its final chunk reports."""
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        limiter = AdaptiveLimiter("openai", tokens_per_minute=100_000)
+        service = OpenAIService(limiter=limiter)
+
+        class Stream:
+            async def __aiter__(self):
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="Summary"))], usage=None)
+                yield SimpleNamespace(choices=[], usage=SimpleNamespace(total_tokens=50))
+
+            async def close(self):
+                pass
+
+        create = AsyncMock(return_value=Stream())
+        service.client.chat.completions.create = create
+
+        assert [token async for token in service.stream_summarize("Long text", 200)] == ["Summary"]
+
+        assert create.call_args.kwargs["stream_options"] == {"include_usage": True}
+        assert limiter.stats()["tokens_available"] >= 100_000 - 50
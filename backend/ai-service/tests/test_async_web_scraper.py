@@ -1,10 +1,20 @@
 """Comprehensive tests for AsyncWebScraper."""
 
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, Mock, patch
 import httpx
+import lxml.html
 
-from services.web_scraper import AsyncWebScraper, RateLimitError
+from services.fingerprint import ContentFingerprint
+from services.web_scraper import (
+    AsyncWebScraper,
+    HTMLParseEngine,
+    MainContentExtractor,
+    ParseExecutor,
+    RateLimitError,
+)
 
 
 class TestAsyncWebScraper:
@@ -25,7 +35,7 @@ class TestAsyncWebScraper:
         """Test successful HTML fetching."""
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.text = "<html><body>Test</body></html>"
+        mock_response.content = b"<html><body>Test</body></html>"
         mock_response.headers = {
             "content-type": "text/html",
             "content-length": "100"
@@ -143,23 +153,19 @@ class TestAsyncWebScraper:
 
     def test_extract_title_from_title_tag(self):
         """Test title extraction from <title> tag."""
-        html = "<html><head><title>Test Page</title></head><body></body></html>"
+        html = "<html><head><title>Test Page</title></head><body><h1>Heading</h1></body></html>"
         scraper = AsyncWebScraper()
         
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html, "html.parser")
-        title = scraper._extract_title(soup)
+        title = scraper.parse_engine.parse(html).title
         
         assert title == "Test Page"
 
     def test_extract_title_from_h1_tag(self):
         """Test title extraction from <h1> tag when <title> absent."""
-        html = "<html><body><h1>Main Heading</h1></body></html>"
+        html = "<html><body><h2>Sub</h2><h1>Main Heading</h1></body></html>"
         scraper = AsyncWebScraper()
         
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html, "html.parser")
-        title = scraper._extract_title(soup)
+        title = scraper.parse_engine.parse(html).title
         
         assert title == "Main Heading"
 
@@ -168,9 +174,7 @@ class TestAsyncWebScraper:
         html = '<html><head><meta property="og:title" content="OG Title"></head><body></body></html>'
         scraper = AsyncWebScraper()
         
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html, "html.parser")
-        title = scraper._extract_title(soup)
+        title = scraper.parse_engine.parse(html).title
         
         assert title == "OG Title"
 
@@ -179,9 +183,7 @@ class TestAsyncWebScraper:
         html = "<html><body><p>No title here</p></body></html>"
         scraper = AsyncWebScraper()
         
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html, "html.parser")
-        title = scraper._extract_title(soup)
+        title = scraper.parse_engine.parse(html).title
         
         assert title == "Untitled"
 
@@ -298,7 +300,7 @@ class TestAsyncWebScraper:
         
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.text = html
+        mock_response.content = html.encode()
         mock_response.headers = {"content-type": "text/html"}
         mock_response.encoding = "utf-8"
         mock_response.raise_for_status = Mock()
@@ -326,7 +328,7 @@ class TestAsyncWebScraper:
         
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.text = html
+        mock_response.content = html.encode()
         mock_response.headers = {"content-type": "text/html"}
         mock_response.encoding = "utf-8"
         mock_response.raise_for_status = Mock()
@@ -373,8 +375,120 @@ class TestAsyncWebScraper:
                 # Should have 2 successful results (1 failed)
                 assert len(results) == 2
 
-    def test_clean_html_removes_unwanted_tags(self):
-        """Test that _clean_html removes scripts, styles, nav, etc."""
+    @pytest.mark.asyncio
+    async def test_batch_processes_every_url_with_bounded_concurrency(self):
+        """Test max_concurrent limits parallelism, not the number of URLs."""
+        in_flight = 0
+        peak = 0
+
+        async def mock_fetch_and_parse(url):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+            return {"url": url}
+
+        urls = [f"https://example.com/page{i}" for i in range(25)]
+        async with AsyncWebScraper() as scraper:
+            with patch.object(scraper, 'fetch_and_parse', side_effect=mock_fetch_and_parse):
+                results = await scraper.fetch_and_parse_batch(urls, max_concurrent=3)
+
+        assert sorted(r["url"] for r in results) == sorted(urls)
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_iter_fetch_and_parse_yields_in_completion_order(self):
+        """Test fast pages are yielded before slow ones finish."""
+        delays = {"https://example.com/slow": 0.05, "https://example.com/fast": 0.0}
+
+        async def mock_fetch_and_parse(url):
+            await asyncio.sleep(delays[url])
+            return {"url": url}
+
+        async with AsyncWebScraper() as scraper:
+            with patch.object(scraper, 'fetch_and_parse', side_effect=mock_fetch_and_parse):
+                order = [
+                    r["url"]
+                    async for r in scraper.iter_fetch_and_parse(list(delays), max_concurrent=2)
+                ]
+
+        assert order == ["https://example.com/fast", "https://example.com/slow"]
+
+    @pytest.mark.asyncio
+    async def test_iter_fetch_and_parse_reports_errors(self):
+        """Test include_errors yields failed URLs instead of dropping them."""
+        async def mock_fetch_and_parse(url):
+            if url.endswith("bad"):
+                raise httpx.TimeoutException("Timeout")
+            return {"url": url}
+
+        async with AsyncWebScraper() as scraper:
+            with patch.object(scraper, 'fetch_and_parse', side_effect=mock_fetch_and_parse):
+                results = [
+                    r
+                    async for r in scraper.iter_fetch_and_parse(
+                        ["https://example.com/ok", "https://example.com/bad"], include_errors=True
+                    )
+                ]
+
+        errors = [r for r in results if "error" in r]
+        assert len(results) == 2
+        assert errors == [{"url": "https://example.com/bad", "error": "Timeout"}]
+
+    @pytest.mark.asyncio
+    async def test_iter_fetch_and_parse_close_cancels_pending(self):
+        """Test closing the generator early cancels in-flight fetches."""
+        cancelled = []
+
+        async def mock_fetch_and_parse(url):
+            if url.endswith("fast"):
+                return {"url": url}
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(url)
+                raise
+
+        async with AsyncWebScraper() as scraper:
+            with patch.object(scraper, 'fetch_and_parse', side_effect=mock_fetch_and_parse):
+                results = scraper.iter_fetch_and_parse(
+                    ["https://example.com/fast", "https://example.com/slow"], max_concurrent=2
+                )
+                first = await results.__anext__()
+                await results.aclose()
+                await asyncio.sleep(0)
+
+        assert first["url"] == "https://example.com/fast"
+        assert cancelled == ["https://example.com/slow"]
+
+    @pytest.mark.asyncio
+    async def test_iter_fetch_and_parse_close_waits_for_cancelled(self):
+        """Test aclose returns only after cancelled fetches have finished unwinding."""
+        unwound = []
+
+        async def mock_fetch_and_parse(url):
+            if url.endswith("fast"):
+                return {"url": url}
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                await asyncio.sleep(0.01)
+                unwound.append(url)
+                raise
+
+        async with AsyncWebScraper() as scraper:
+            with patch.object(scraper, 'fetch_and_parse', side_effect=mock_fetch_and_parse):
+                results = scraper.iter_fetch_and_parse(
+                    ["https://example.com/fast", "https://example.com/slow"], max_concurrent=2
+                )
+                await results.__anext__()
+                await results.aclose()
+
+                assert unwound == ["https://example.com/slow"]
+
+    def test_extract_text_skips_unwanted_tags(self):
+        """Test that scripts, styles, nav, header and footer stay out of the text."""
         html = """
         <html>
         <head><style>body{}</style></head>
@@ -389,14 +503,9 @@ class TestAsyncWebScraper:
         """
         
         scraper = AsyncWebScraper()
-        soup = scraper._clean_html(html)
+        text = scraper.extract_text(html)
         
-        assert soup.find("script") is None
-        assert soup.find("style") is None
-        assert soup.find("nav") is None
-        assert soup.find("header") is None
-        assert soup.find("footer") is None
-        assert soup.find("main") is not None
+        assert text == "Main Content"
 
     @pytest.mark.asyncio
     async def test_retry_mechanism(self):
@@ -411,7 +520,7 @@ class TestAsyncWebScraper:
             
             mock_response = Mock()
             mock_response.status_code = 200
-            mock_response.text = "<html><body>Success</body></html>"
+            mock_response.content = b"<html><body>Success</body></html>"
             mock_response.headers = {"content-type": "text/html"}
             mock_response.encoding = "utf-8"
             mock_response.raise_for_status = Mock()
@@ -436,6 +545,364 @@ class TestAsyncWebScraper:
                     await scraper.fetch_html("https://example.com")
 
 
+class TestStreamingFetch:
+    """Streaming, size-bounded body reads."""
+
+    @staticmethod
+    def _client(chunks, headers=None, served=None):
+        async def body():
+            for chunk in chunks:
+                if served is not None:
+                    served.append(chunk)
+                yield chunk
+
+        def handler(request):
+            return httpx.Response(200, headers=headers or {"content-type": "text/html"}, content=body())
+
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    @pytest.mark.asyncio
+    async def test_stream_reads_body_within_budget(self):
+        """Test streamed body is decoded and byte count reported."""
+        client = self._client([b"<html><body>", b"Hello", b"</body></html>"])
+
+        async with AsyncWebScraper(client=client, stream_body=True) as scraper:
+            html, metadata = await scraper.fetch_html("https://example.com")
+
+        assert html == "<html><body>Hello</body></html>"
+        assert metadata["bytes_received"] == len(html)
+        assert metadata["encoding"] == "utf-8"
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_stream_aborts_chunked_body_over_budget(self):
+        """Test chunked bodies without content-length stop at the byte budget."""
+        served = []
+        client = self._client([b"x" * 100] * 50, served=served)
+
+        async with AsyncWebScraper(client=client, stream_body=True, max_response_size=250) as scraper:
+            with pytest.raises(ValueError) as exc_info:
+                await scraper.fetch_html("https://example.com/huge")
+
+        assert "too large" in str(exc_info.value).lower()
+        assert len(served) < 50
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_stream_decodes_multibyte_split_across_chunks(self):
+        """Test incremental decoding keeps characters split between chunks."""
+        encoded = "Insulina é hormônio".encode("utf-8")
+        split = encoded.index("é".encode("utf-8")) + 1
+        client = self._client(
+            [encoded[:split], encoded[split:]],
+            headers={"content-type": "text/html; charset=utf-8"},
+        )
+
+        async with AsyncWebScraper(client=client, stream_body=True) as scraper:
+            html, _ = await scraper.fetch_html("https://example.com")
+
+        assert html == "Insulina é hormônio"
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_stream_honors_declared_charset(self):
+        """Test the charset from content-type drives decoding."""
+        client = self._client(
+            ["Coração".encode("latin-1")],
+            headers={"content-type": "text/html; charset=iso-8859-1"},
+        )
+
+        async with AsyncWebScraper(client=client, stream_body=True) as scraper:
+            html, metadata = await scraper.fetch_html("https://example.com")
+
+        assert html == "Coração"
+        assert metadata["encoding"] == "iso-8859-1"
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_buffered_budget_counts_bytes(self):
+        """Test the buffered path compares body bytes, not characters, with the budget."""
+        body = ("é" * 100).encode("utf-8")
+        client = httpx.AsyncClient(transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, headers={"content-type": "text/html; charset=utf-8"}, content=body)
+        ))
+
+        async with AsyncWebScraper(client=client, max_response_size=150) as scraper:
+            with pytest.raises(ValueError, match="200 bytes"):
+                await scraper.fetch_html("https://example.com")
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("stream_body", [False, True])
+    async def test_parser_gets_raw_bytes_and_charset(self, stream_body):
+        """Test fetch_and_parse hands the undecoded body and its charset to the parser."""
+        body = "<html><head><title>Coração</title></head><body><p>Insuficiência cardíaca</p></body></html>"
+        client = self._client(
+            [body.encode("latin-1")],
+            headers={"content-type": "text/html; charset=iso-8859-1"},
+        )
+
+        async with AsyncWebScraper(client=client, stream_body=stream_body) as scraper:
+            with patch.object(scraper.parse_engine, "parse", wraps=scraper.parse_engine.parse) as parse:
+                result = await scraper.fetch_and_parse("https://example.com")
+
+        assert result["title"] == "Coração"
+        assert result["text"] == "Coração Insuficiência cardíaca"
+        html, _, _, encoding = parse.call_args.args
+        assert html == body.encode("latin-1")
+        assert encoding == "iso-8859-1"
+        await client.aclose()
+
+
+class TestHTMLParseEngine:
+    """Single-pass parse engine must agree across every installed backend."""
+
+    PAGE = """
+    <html>
+    <head><title>Guideline</title><meta property="og:title" content="OG"></head>
+    <body>
+        <nav><a href="/home">Home</a></nav>
+        <header><h1>Site Header</h1></header>
+        <h1>Hypertension</h1>
+        <p>First-line <b>therapy</b> includes thiazides.</p>
+        <!-- comment -->
+        <a href="/drugs">Drugs</a>
+        <a href="/drugs">Drugs again</a>
+        <a href="mailto:team@example.com">Email</a>
+        <script>track();</script>
+        <footer>Footer</footer>
+    </body>
+    </html>
+    """
+
+    @pytest.mark.parametrize("backend", HTMLParseEngine.available_backends())
+    def test_parse_extracts_title_text_and_links(self, backend):
+        """Test one parse yields the same result as the legacy helpers."""
+        page = HTMLParseEngine(backend).parse(self.PAGE, "https://example.com/guide/")
+
+        assert page.title == "Guideline"
+        assert page.text == "Guideline Hypertension First-line therapy includes thiazides. Drugs Drugs again Email"
+        assert page.links == ["https://example.com/drugs"]
+
+    @pytest.mark.parametrize("backend", HTMLParseEngine.available_backends())
+    def test_parse_title_fallbacks(self, backend):
+        """Test title precedence: <title>, first <h1>, og:title, any heading."""
+        engine = HTMLParseEngine(backend)
+
+        assert engine.parse("<html><body><h1>Main</h1></body></html>").title == "Main"
+        assert engine.parse('<html><head><meta property="og:title" content=" OG "></head></html>').title == "OG"
+        assert engine.parse("<html><body><h1></h1><h3>Third</h3></body></html>").title == "Third"
+        assert engine.parse("").title == "Untitled"
+
+    @pytest.mark.parametrize("backend", HTMLParseEngine.available_backends())
+    def test_parse_without_base_url_skips_links(self, backend):
+        """Test links are only resolved when a base URL is given."""
+        page = HTMLParseEngine(backend).parse('<a href="/x">X</a>')
+
+        assert page.links == []
+        assert page.text == "X"
+
+    def test_auto_backend_prefers_fastest_available(self):
+        """Test 'auto' resolves to the first available backend."""
+        assert HTMLParseEngine("auto").backend == HTMLParseEngine.available_backends()[0]
+
+    def test_unknown_backend_rejected(self):
+        """Test invalid backend names raise ValueError."""
+        with pytest.raises(ValueError):
+            HTMLParseEngine("html5lib")
+
+    def test_scraper_uses_configured_backend(self):
+        """Test backend is picked at scraper construction time."""
+        scraper = AsyncWebScraper(parser="html.parser")
+
+        assert scraper.parse_engine.backend == "html.parser"
+
+
+class TestMainContentExtractor:
+    """Readability-style boilerplate removal."""
+
+    PAGE = """
+    <html><head><title>Hypertension</title></head>
+    <body>
+    <div id="cookie-consent">We use cookies to improve your experience. Accept all cookies to continue.</div>
+    <div class="layout">
+      <div class="sidebar"><h3>Popular</h3><ul><li><a href="/a">Diabetes basics for everyone</a></li></ul></div>
+      <div class="article-body">
+        <h1>Management of hypertension</h1>
+        <p>First-line therapy includes thiazide diuretics, ACE inhibitors, ARBs and calcium channel blockers.</p>
+        <h2>Targets</h2>
+        <p>Target blood pressure is below 130/80 mmHg for most adults, including those with diabetes.</p>
+        <ul><li>Recheck in 4 weeks</li><li>Assess adherence</li></ul>
+        <p>Read <a href="/x">our complete drug monographs</a>.</p>
+      </div>
+      <div class="related-articles"><p><a href="/r">Heart failure: a complete clinical overview</a></p></div>
+      <ol class="references"><li>Whelton PK, et al. 2017 ACC/AHA guideline. Hypertension. 2018;71:e13.</li></ol>
+    </div>
+    <div style="display: none">Hidden survey text that nobody ever reads on this page.</div>
+    </body></html>
+    """
+
+    def test_keeps_article_with_structure(self):
+        """Test sidebars, banners, references and link-heavy blocks are dropped."""
+        text = MainContentExtractor().extract(self.PAGE)
+
+        assert text.splitlines() == [
+            "# Management of hypertension",
+            "First-line therapy includes thiazide diuretics, ACE inhibitors, ARBs and calcium channel blockers.",
+            "## Targets",
+            "Target blood pressure is below 130/80 mmHg for most adults, including those with diabetes.",
+            "- Recheck in 4 weeks",
+            "- Assess adherence",
+        ]
+
+    def test_prose_only_without_structure(self):
+        """Test headings are dropped and list items flattened when structure is off."""
+        text = MainContentExtractor(keep_structure=False).extract(self.PAGE)
+
+        assert "Targets" not in text
+        assert "Recheck in 4 weeks" in text.splitlines()
+        assert not any(line.startswith(("#", "-")) for line in text.splitlines())
+
+    def test_page_without_paragraphs_keeps_all_blocks(self):
+        """Test pages with nothing to score fall back to every readable block."""
+        text = MainContentExtractor().extract("<html><body><ul><li>Aspirin</li><li>Heparin</li></ul></body></html>")
+
+        assert text == "- Aspirin\n- Heparin"
+
+    def test_empty_document(self):
+        assert MainContentExtractor().extract("") == ""
+
+    @pytest.mark.parametrize("backend", HTMLParseEngine.available_backends())
+    def test_engine_reports_full_length(self, backend):
+        """Test the engine swaps in main content but keeps whole-page title and links."""
+        engine = HTMLParseEngine(backend)
+        full = engine.parse(self.PAGE, "https://example.com/")
+
+        page = engine.parse(self.PAGE, "https://example.com/", MainContentExtractor())
+
+        assert page.title == full.title
+        assert page.links == full.links
+        assert page.full_length == len(full.text)
+        assert len(page.text) < len(full.text) / 2
+
+    @pytest.mark.parametrize("backend", HTMLParseEngine.available_backends())
+    def test_engine_parses_document_once(self, backend, monkeypatch):
+        """Test the extractor reuses the engine's tree instead of parsing the page again."""
+        parse = lxml.html.document_fromstring
+        calls = []
+        monkeypatch.setattr(lxml.html, "document_fromstring", lambda *args, **kwargs: calls.append(1) or parse(*args, **kwargs))
+
+        page = HTMLParseEngine(backend).parse(self.PAGE, "https://example.com/", MainContentExtractor())
+
+        assert len(calls) == 1
+        assert page.text.startswith("# Management of hypertension\n")
+
+    @pytest.mark.asyncio
+    async def test_process_mode_matches_inline(self):
+        """Test the extractor is applied inside parse worker processes."""
+        executor = ParseExecutor(mode="process", max_workers=1)
+        extractor = MainContentExtractor()
+        await executor.start()
+        try:
+            page = await executor.parse(self.PAGE, "https://example.com/", extractor)
+        finally:
+            await executor.shutdown()
+
+        assert page == executor.engine.parse(self.PAGE, "https://example.com/", extractor)
+
+    @pytest.mark.asyncio
+    async def test_fetch_and_parse_uses_extractor(self):
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, headers={"content-type": "text/html"}, text=self.PAGE)
+            )
+        )
+
+        async with AsyncWebScraper(client=client, content_extractor=MainContentExtractor()) as scraper:
+            result = await scraper.fetch_and_parse("https://example.com/")
+
+        assert "cookies" not in result["text"]
+        assert result["metadata"]["full_length"] > result["length"]
+        await client.aclose()
+
+
+class TestParseExecutor:
+    """Parsing off the event loop."""
+
+    PAGE = "<html><head><title>Insulina</title></head><body><p>Hormônio</p><a href='/x'>x</a></body></html>"
+
+    @pytest.mark.asyncio
+    async def test_inline_mode_parses_on_caller(self):
+        """Test inline mode needs no worker processes."""
+        executor = ParseExecutor(mode="inline")
+        await executor.start()
+
+        page = await executor.parse(self.PAGE, "https://example.com/")
+
+        assert page.title == "Insulina"
+        assert page.links == ["https://example.com/x"]
+        assert executor.stats()["pages_parsed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_process_mode_round_trip(self):
+        """Test pages parsed in a worker process match inline results."""
+        executor = ParseExecutor(mode="process", max_workers=1)
+        await executor.start()
+        try:
+            page = await executor.parse(self.PAGE, "https://example.com/")
+        finally:
+            await executor.shutdown()
+
+        assert page == executor.engine.parse(self.PAGE, "https://example.com/")
+        assert "Hormônio" in page.text
+
+    @pytest.mark.asyncio
+    async def test_process_mode_decodes_raw_bytes_in_worker(self):
+        """Test raw bytes in the page's charset are decoded by the worker, not the caller."""
+        executor = ParseExecutor(mode="process", max_workers=1)
+        await executor.start()
+        try:
+            page = await executor.parse(self.PAGE.encode("latin-1"), "https://example.com/", encoding="iso-8859-1")
+        finally:
+            await executor.shutdown()
+
+        assert page == executor.engine.parse(self.PAGE, "https://example.com/")
+        assert executor.stats()["workers"] == 0
+
+    @pytest.mark.asyncio
+    async def test_process_mode_fingerprint(self):
+        """Test the worker returns the page's fingerprint with the parse result."""
+        executor = ParseExecutor(mode="process", max_workers=1)
+        await executor.start()
+        try:
+            page = await executor.parse(self.PAGE, "https://example.com/", fingerprint=True)
+        finally:
+            await executor.shutdown()
+
+        assert page.fingerprint == ContentFingerprint.from_text(page.text)
+        inline = await ParseExecutor(mode="inline").parse(self.PAGE, "https://example.com/", fingerprint=True)
+        assert inline == page
+
+    def test_unknown_mode_rejected(self):
+        with pytest.raises(ValueError):
+            ParseExecutor(mode="threads")
+
+    @pytest.mark.asyncio
+    async def test_scraper_parses_through_executor(self):
+        """Test fetch_and_parse delegates to the configured executor."""
+        executor = ParseExecutor(mode="inline")
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, text=self.PAGE))
+        )
+
+        async with AsyncWebScraper(client=client, parse_executor=executor) as scraper:
+            result = await scraper.fetch_and_parse("https://example.com/")
+
+        assert result["title"] == "Insulina"
+        assert executor.pages_parsed == 1
+        await client.aclose()
+
+
 class TestWebScraperBackwardCompatibility:
     """Test backward compatibility of sync WebScraper wrapper."""
     
@@ -447,7 +914,7 @@ class TestWebScraperBackwardCompatibility:
         
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.text = html
+        mock_response.content = html.encode()
         mock_response.headers = {"content-type": "text/html"}
         mock_response.encoding = "utf-8"
         mock_response.raise_for_status = Mock()
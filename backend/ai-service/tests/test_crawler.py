@@ -0,0 +1,225 @@
+"""Tests for breadth-first site crawling."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from services.crawler import BloomFilter, CrawlConfig, CrawlManager, CrawlStats, canonicalize_url
+from services.web_scraper import AsyncWebScraper
+
+SITE = {
+    "/": ['/a', '/b', 'https://other.example/x', '/a#section', 'mailto:me@example.com'],
+    "/a": ['/a/1', '/b', '/files/notes.pdf'],
+    "/b": ['/b/1', '/docs/guide'],
+    "/a/1": ['/a/1/deep'],
+    "/b/1": [],
+    "/docs/guide": ['/docs/guide/2'],
+    "/docs/guide/2": [],
+    "/a/1/deep": [],
+}
+
+
+def site_handler(requests):
+    def handler(request):
+        requests.append(request.url.path)
+        links = SITE.get(request.url.path)
+        if links is None:
+            return httpx.Response(404)
+        anchors = "".join(f'<a href="{href}">link</a>' for href in links)
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/html"},
+            text=f"<html><title>{request.url.path}</title><body><p>Page</p>{anchors}</body></html>",
+        )
+    return handler
+
+
+class TestCanonicalizeUrl:
+    """URL normalization."""
+
+    def test_equivalent_spellings_match(self):
+        """Test case, default port, fragment and dot segments are normalized."""
+        assert canonicalize_url("HTTPS://Example.COM:443/a/./b/../c#top") == "https://example.com/a/c"
+
+    def test_query_is_sorted_and_tracking_dropped(self):
+        """Test query ordering is stable and tracking parameters are removed."""
+        url = "https://example.com/p?b=2&utm_source=x&a=1&fbclid=y"
+
+        assert canonicalize_url(url) == "https://example.com/p?a=1&b=2"
+
+    def test_empty_path_and_trailing_slash(self):
+        assert canonicalize_url("http://example.com") == "http://example.com/"
+        assert canonicalize_url("http://example.com/dir/") == "http://example.com/dir/"
+
+    def test_non_default_port_kept(self):
+        assert canonicalize_url("http://example.com:8080/") == "http://example.com:8080/"
+
+    def test_non_http_rejected(self):
+        assert canonicalize_url("mailto:me@example.com") is None
+        assert canonicalize_url("ftp://example.com/file") is None
+
+
+class TestBloomFilter:
+    """Visited-set behaviour."""
+
+    def test_no_false_negatives(self):
+        """Test every added item is reported present."""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        items = [f"https://example.com/{i}" for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+
+        assert all(item in bloom for item in items)
+
+    def test_false_positive_rate_near_target(self):
+        """Test unseen items are rarely reported present at capacity."""
+        bloom = BloomFilter(capacity=5000, error_rate=0.01)
+        for i in range(5000):
+            bloom.add(f"https://example.com/{i}")
+
+        false_positives = sum(f"https://other.example/{i}" in bloom for i in range(5000))
+
+        assert false_positives < 5000 * 0.03
+
+    def test_add_reports_duplicates(self):
+        bloom = BloomFilter(capacity=100)
+
+        assert bloom.add("https://example.com/") is True
+        assert bloom.add("https://example.com/") is False
+        assert len(bloom) == 1
+
+    def test_compact_for_millions(self):
+        """Test a million-URL filter stays around 2 MB."""
+        assert BloomFilter(capacity=1_000_000, error_rate=0.001).memory_bytes < 2 * 1024 * 1024
+
+
+class TestSiteCrawler:
+    """Crawling through AsyncWebScraper.crawl."""
+
+    @staticmethod
+    async def _crawl(config, start="https://example.com/"):
+        requests = []
+        client = httpx.AsyncClient(transport=httpx.MockTransport(site_handler(requests)))
+        stats = CrawlStats(start_url=start)
+        async with AsyncWebScraper(client=client) as scraper:
+            pages = [page async for page in scraper.crawl(start, config, stats)]
+        await client.aclose()
+        return pages, requests, stats
+
+    @pytest.mark.asyncio
+    async def test_breadth_first_within_depth(self):
+        """Test pages come in depth order and the depth limit holds."""
+        pages, requests, stats = await self._crawl(CrawlConfig(max_depth=1))
+
+        depths = [page["depth"] for page in pages]
+        assert depths == sorted(depths)
+        assert sorted(requests) == ["/", "/a", "/b"]
+        assert stats.pages_fetched == 3
+        assert stats.state == "running"
+
+    @pytest.mark.asyncio
+    async def test_same_domain_dedup_and_skipped_files(self):
+        """Test off-site links, fragments, duplicates and binary files are not fetched."""
+        pages, requests, _ = await self._crawl(CrawlConfig(max_depth=5))
+
+        assert sorted(requests) == sorted(SITE)
+        assert len(requests) == len(set(requests))
+        assert {page["depth"] for page in pages if page["url"].endswith("/deep")} == {3}
+
+    @pytest.mark.asyncio
+    async def test_max_pages_limits_fetches(self):
+        pages, requests, _ = await self._crawl(CrawlConfig(max_depth=5, max_pages=4))
+
+        assert len(requests) == 4
+        assert len(pages) == 4
+
+    @pytest.mark.asyncio
+    async def test_path_prefix_filter(self):
+        """Test only links under the prefix are followed."""
+        _, requests, _ = await self._crawl(
+            CrawlConfig(max_depth=5, path_prefix="/docs/"), start="https://example.com/b"
+        )
+
+        assert sorted(requests) == ["/b", "/docs/guide", "/docs/guide/2"]
+
+    @pytest.mark.asyncio
+    async def test_failed_pages_are_counted(self):
+        """Test broken links are reported without stopping the crawl."""
+        SITE["/"].append("/missing")
+        try:
+            pages, _, stats = await self._crawl(CrawlConfig(max_depth=1))
+        finally:
+            SITE["/"].remove("/missing")
+
+        assert stats.pages_failed == 1
+        assert len(pages) == 3
+
+    @pytest.mark.asyncio
+    async def test_rejects_non_http_start(self):
+        async with AsyncWebScraper(client=httpx.AsyncClient()) as scraper:
+            with pytest.raises(ValueError):
+                [page async for page in scraper.crawl("ftp://example.com/")]
+
+
+class TestCrawlManager:
+    """Background crawl registry."""
+
+    @pytest.mark.asyncio
+    async def test_completed_crawl_reports_state(self):
+        manager = CrawlManager()
+
+        async def run(stats):
+            stats.pages_fetched = 2
+
+        stats = manager.start("https://example.com/", run)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        assert manager.get(stats.crawl_id).state == "completed"
+        assert manager.get(stats.crawl_id).finished_at is not None
+
+    @pytest.mark.asyncio
+    async def test_shutdown_before_start_marks_cancelled(self):
+        """Test crawls cancelled before their first step still finish."""
+        manager = CrawlManager()
+
+        async def run(stats):
+            pass
+
+        stats = manager.start("https://example.com/", run)
+        await manager.shutdown()
+
+        assert stats.state == "cancelled"
+        assert stats.finished_at is not None
+
+    @pytest.mark.asyncio
+    async def test_failed_crawl_records_error(self):
+        manager = CrawlManager()
+
+        async def run(stats):
+            raise RuntimeError("boom")
+
+        stats = manager.start("https://example.com/", run)
+        await asyncio.sleep(0.01)
+
+        assert stats.state == "failed"
+        assert stats.error == "boom"
+
+    @pytest.mark.asyncio
+    async def test_cancel_running_crawl(self):
+        manager = CrawlManager()
+        started = asyncio.Event()
+
+        async def run(stats):
+            started.set()
+            await asyncio.sleep(60)
+
+        stats = manager.start("https://example.com/", run)
+        await started.wait()
+
+        assert manager.cancel(stats.crawl_id) is True
+        await manager.shutdown()
+        await asyncio.sleep(0)
+        assert stats.state == "cancelled"
+        assert manager.cancel(stats.crawl_id) is False
@@ -0,0 +1,152 @@
+"""Tests for content fingerprints and the duplicate index."""
+
+import random
+
+import httpx
+import pytest
+
+from services.fingerprint import ContentFingerprint, FingerprintIndex, hamming_distance, simhash
+from services.web_scraper import AsyncWebScraper
+
+
+def article(seed=7, words=1500):
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(3000)]
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = FingerprintIndex(path=str(tmp_path / "fingerprints.sqlite3"))
+    yield index
+    index.close()
+
+
+class TestContentFingerprint:
+    """Exact hash and SimHash."""
+
+    def test_exact_hash_ignores_case_and_whitespace(self):
+        first = ContentFingerprint.from_text("Cardiac  Output\n is HR x SV")
+        second = ContentFingerprint.from_text("cardiac output is hr x sv")
+
+        assert first.content_hash == second.content_hash
+
+    def test_small_edit_stays_near(self):
+        """Test a syndicated copy with a footer lands within a few bits."""
+        text = article()
+        copy = text + " share this article with your colleagues"
+
+        assert hamming_distance(simhash(text), simhash(copy)) <= 3
+
+    def test_different_text_is_far(self):
+        assert hamming_distance(simhash(article(1)), simhash(article(2))) > 10
+
+    def test_dict_round_trip(self):
+        fingerprint = ContentFingerprint.from_text(article())
+
+        assert ContentFingerprint.from_dict(fingerprint.to_dict()) == fingerprint
+
+    def test_empty_text(self):
+        assert simhash("") == 0
+
+
+class TestFingerprintIndex:
+    """Persistent lookups and skip accounting."""
+
+    def test_exact_duplicate(self, index):
+        fingerprint = ContentFingerprint.from_text(article())
+        index.add(fingerprint, "https://a.example/page", "note-a", chunks=7)
+
+        match = index.lookup(ContentFingerprint.from_text(article()))
+
+        assert match.kind == "exact"
+        assert match.url == "https://a.example/page"
+        assert match.chunks == 7
+
+    def test_near_duplicate(self, index):
+        """Test banded SimHash finds near-identical content."""
+        text = article()
+        index.add(ContentFingerprint.from_text(text), "https://a.example/page", "note-a", chunks=3)
+
+        match = index.lookup(ContentFingerprint.from_text(text + " share this article with your colleagues"))
+
+        assert match.kind == "near"
+        assert match.distance <= 3
+        assert match.note_id == "note-a"
+
+    def test_edited_page_at_same_url_is_not_a_duplicate(self, index):
+        """Test a corrected version of an indexed page is re-indexed, replacing the old version."""
+        text = article()
+        old = ContentFingerprint.from_text(text)
+        edited = ContentFingerprint.from_text(text + " dose corrected to 5 mg")
+        index.add(old, "https://a.example/page", "note-a", chunks=3)
+
+        assert index.lookup(edited, "https://a.example/page") is None
+        assert index.lookup(edited, "https://mirror.example/page").kind == "near"
+        assert index.lookup(old, "https://a.example/page").kind == "exact"
+        assert index.content_hash_for("https://a.example/page") == old.content_hash
+
+        index.add(edited, "https://a.example/page", "note-a", chunks=4)
+
+        assert index.content_hash_for("https://a.example/page") == edited.content_hash
+        assert index.lookup(old, "https://b.example/page").content_hash == edited.content_hash
+        assert index.stats()["entries"] == 1
+
+    def test_unrelated_content_misses(self, index):
+        index.add(ContentFingerprint.from_text(article(1)), "https://a.example", "a")
+
+        assert index.lookup(ContentFingerprint.from_text(article(2))) is None
+
+    def test_artifacts_and_skip_stats(self, index):
+        """Test stored artifacts round-trip and skipped work is reported."""
+        fingerprint = ContentFingerprint.from_text(article())
+        index.add(fingerprint, "https://a.example", "a", chunks=4)
+        index.put_artifact(fingerprint.content_hash, "flashcards:openai:5", [{"front": "Q", "back": "A"}])
+
+        index.lookup(fingerprint)
+        index.record_skip(chunks=4, llm_calls=1)
+
+        assert index.get_artifact(fingerprint.content_hash, "flashcards:openai:5") == [{"front": "Q", "back": "A"}]
+        assert index.get_artifact(fingerprint.content_hash, "flashcards:gemini:5") is None
+        stats = index.stats()
+        assert stats["entries"] == 1
+        assert stats["exact_duplicates"] == 1
+        assert stats["skipped_chunks"] == 4
+        assert stats["skipped_llm_calls"] == 1
+
+    def test_persists_across_reopen(self, tmp_path):
+        path = str(tmp_path / "persist.sqlite3")
+        fingerprint = ContentFingerprint.from_text(article())
+        first = FingerprintIndex(path=path)
+        first.add(fingerprint, "https://a.example", "a")
+        first.close()
+
+        second = FingerprintIndex(path=path)
+        assert second.lookup(fingerprint).kind == "exact"
+        second.close()
+
+    def test_rejects_unsupported_distance(self, tmp_path):
+        with pytest.raises(ValueError):
+            FingerprintIndex(path=str(tmp_path / "x.sqlite3"), max_distance=4)
+
+
+class TestScraperFingerprint:
+    """fetch_and_parse attaches fingerprints."""
+
+    @pytest.mark.asyncio
+    async def test_mirrors_share_fingerprint(self):
+        """Test the same article on different URLs gets the same content hash."""
+        body = f"<html><title>Heart</title><body><p>{article()}</p></body></html>"
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, headers={"content-type": "text/html"}, text=body)
+            )
+        )
+
+        async with AsyncWebScraper(client=client) as scraper:
+            first = await scraper.fetch_and_parse("https://a.example/heart")
+            mirror = await scraper.fetch_and_parse("https://mirror.example/heart?ref=feed")
+
+        assert first["id"] != mirror["id"]
+        assert first["fingerprint"] == mirror["fingerprint"]
+        await client.aclose()
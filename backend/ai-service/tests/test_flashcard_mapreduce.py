@@ -0,0 +1,173 @@
+"""Tests for map-reduce flashcard generation."""
+
+import asyncio
+import time
+
+import pytest
+
+from services.flashcard_mapreduce import (
+    ChunkedFlashcardGenerator,
+    allocate_counts,
+    merge_flashcards,
+    split_content,
+)
+
+
+def section(title, sentences=20):
+    body = " ".join(f"{title} finding number {i} is clinically relevant." for i in range(sentences))
+    return f"# {title}\n\n{body}"
+
+
+class FakeService:
+    """Service whose latency grows with the number of cards requested."""
+
+    def __init__(self, seconds_per_card=0.01, fail_on=None):
+        self.seconds_per_card = seconds_per_card
+        self.fail_on = fail_on
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def generate_flashcards(self, content, count=10):
+        self.calls.append((content, count))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.seconds_per_card * count)
+            if self.fail_on and self.fail_on in content:
+                raise RuntimeError("provider error")
+            topic = content.split("\n", 1)[0].lstrip("# ")
+            return [{"question": f"What is fact {i} of {topic}?", "answer": "A"} for i in range(count)]
+        finally:
+            self.active -= 1
+
+
+class TestSplitContent:
+    """Structure-aware chunking."""
+
+    def test_short_content_single_chunk(self):
+        assert split_content("  Short text  ", 100) == ["Short text"]
+        assert split_content("", 100) == []
+
+    def test_splits_on_headings(self):
+        text = "\n".join(section(title, 5) for title in ("Cardiology", "Nephrology", "Neurology"))
+        chunks = split_content(text, 400)
+
+        assert len(chunks) == 3
+        assert [chunk.split("\n", 1)[0] for chunk in chunks] == ["# Cardiology", "# Nephrology", "# Neurology"]
+
+    def test_long_paragraph_falls_back_to_sentences(self):
+        """Test unstructured text is cut at sentence ends, never above the limit."""
+        text = " ".join(f"Sentence {i} about renal physiology." for i in range(200))
+        chunks = split_content(text, 1000)
+
+        assert all(len(chunk) <= 1000 for chunk in chunks)
+        assert all(chunk.endswith(".") for chunk in chunks)
+        assert "".join(chunks).replace("\n", "").replace(" ", "") == text.replace(" ", "")
+
+    def test_chunks_balanced(self):
+        """Test packing aims for even chunks instead of a full one and a small remainder."""
+        text = "\n\n".join(f"Paragraph {i} " + "x" * 90 for i in range(30))
+        sizes = [len(chunk) for chunk in split_content(text, 2000)]
+
+        assert len(sizes) == 2
+        assert max(sizes) - min(sizes) < 300
+
+
+class TestMerge:
+    """Deduplication and trimming."""
+
+    def test_allocate_counts_proportional_and_oversampled(self):
+        assert allocate_counts(["a" * 300, "b" * 100], 8) == [9, 3]
+        assert allocate_counts(["a" * 1000, "b"], 2) == [3, 1]
+
+    def test_near_duplicates_dropped_and_round_robin(self):
+        first = [{"question": "What is the normal GFR?"}, {"question": "What does ACE stand for?"}]
+        second = [
+            {"question": "what is the NORMAL gfr"},
+            {"question": "Which drugs cause hyperkalemia?"},
+            {"question": "What is nephrotic syndrome?"},
+        ]
+
+        merged, duplicates = merge_flashcards([first, second], 3)
+
+        assert duplicates == 1
+        assert [card["question"] for card in merged] == [
+            "What is the normal GFR?",
+            "Which drugs cause hyperkalemia?",
+            "What does ACE stand for?",
+        ]
+
+    def test_invalid_cards_skipped(self):
+        merged, _ = merge_flashcards([[{"answer": "no question"}, "text", {"question": "Q?"}]], 5)
+
+        assert merged == [{"question": "Q?"}]
+
+
+class TestChunkedFlashcardGenerator:
+    """Concurrent generation across chunks."""
+
+    @pytest.mark.asyncio
+    async def test_short_content_single_call(self):
+        service = FakeService()
+        cards = await ChunkedFlashcardGenerator(max_chunk_chars=1000).generate(service, "Short note", 3)
+
+        assert len(cards) == 3
+        assert service.calls == [("Short note", 3)]
+
+    @pytest.mark.asyncio
+    async def test_single_mode_never_splits(self):
+        service = FakeService()
+        text = "\n".join(section(title) for title in ("A", "B"))
+        await ChunkedFlashcardGenerator(max_chunk_chars=500).generate(service, text, 4, mode="single")
+
+        assert service.calls == [(text, 4)]
+
+    @pytest.mark.asyncio
+    async def test_chunks_generated_concurrently(self):
+        """Test wall-clock time follows the longest chunk, not the sum of all chunks."""
+        text = "\n".join(section(title) for title in ("Cardiology", "Nephrology", "Neurology", "Oncology"))
+        generator = ChunkedFlashcardGenerator(max_chunk_chars=1200, max_concurrent=4)
+        service = FakeService(seconds_per_card=0.02)
+
+        started = time.perf_counter()
+        cards = await generator.generate(service, text, 12)
+        elapsed = time.perf_counter() - started
+
+        assert len(cards) == 12
+        assert len(service.calls) == 4
+        assert service.max_active == 4
+        serial = sum(count for _, count in service.calls) * 0.02
+        assert elapsed < serial / 2
+        assert {card["question"].rsplit(" ", 1)[1] for card in cards[:4]} == {
+            "Cardiology?", "Nephrology?", "Neurology?", "Oncology?"
+        }
+        assert generator.stats()["chunks"] == 4
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self):
+        text = "\n".join(section(f"Topic {i}") for i in range(6))
+        service = FakeService(seconds_per_card=0.001)
+        await ChunkedFlashcardGenerator(max_chunk_chars=1200, max_concurrent=2).generate(service, text, 6)
+
+        assert len(service.calls) == 6
+        assert service.max_active == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_skipped(self):
+        """Test one failing chunk costs its cards, not the whole request."""
+        text = "\n".join(section(title) for title in ("Cardiology", "Nephrology"))
+        generator = ChunkedFlashcardGenerator(max_chunk_chars=1200)
+
+        cards = await generator.generate(FakeService(fail_on="Nephrology"), text, 4, mode="chunked")
+
+        assert cards and all("Cardiology" in card["question"] for card in cards)
+        assert generator.stats()["failed_chunks"] == 1
+
+        with pytest.raises(RuntimeError):
+            await generator.generate(FakeService(fail_on="finding"), text, 4)
+
+    @pytest.mark.asyncio
+    async def test_unknown_mode(self):
+        with pytest.raises(ValueError):
+            await ChunkedFlashcardGenerator().generate(FakeService(), "text", 1, mode="fast")
@@ -0,0 +1,141 @@
+"""Tests for tolerant flashcard parsing and top-up requests."""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+import services.gemini_service as gemini_module
+from services.flashcard_parsing import complete_flashcards, parse_flashcards, validate_flashcard
+from services.gemini_service import GeminiService
+from services.openai_service import OpenAIService
+
+
+def cards(*questions):
+    return [{"question": question, "answer": f"Answer to {question}"} for question in questions]
+
+
+def completion(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+class TestParseFlashcards:
+    """Validation and parsing of whole completions."""
+
+    def test_validate_normalizes_fields(self):
+        card = validate_flashcard(
+            {"question": "Q", "answer": "A", "tags": "renal, pharm", "difficulty": "Hard", "source": "x"}
+        )
+
+        assert card == {"question": "Q", "answer": "A", "tags": ["renal", "pharm"], "difficulty": "hard"}
+        assert validate_flashcard({"question": "Q", "answer": "A", "difficulty": "tricky"})["difficulty"] == "medium"
+        assert validate_flashcard({"question": "Q", "answer": "  "}) is None
+        assert validate_flashcard("Q: A") is None
+
+    def test_json_mode_object(self):
+        parsed = parse_flashcards(json.dumps({"flashcards": cards("Q1", "Q2")}))
+
+        assert parsed.cards == cards("Q1", "Q2")
+        assert parsed.invalid == 0 and not parsed.truncated
+
+    def test_valid_subset_of_defective_completion(self):
+        """Test prose, a trailing comma, an invalid card and a truncated tail cost only themselves."""
+        text = (
+            "Here you go:\n```json\n"
+            '[{"question": "Q1", "answer": "A1",}, {"question": "Q2"}, '
+            '{"question": "Q3", "answer": "A3"}, {"question": "Q4", "ans'
+        )
+
+        parsed = parse_flashcards(text)
+
+        assert [card["question"] for card in parsed.cards] == ["Q1", "Q3"]
+        assert parsed.invalid == 1
+        assert parsed.truncated
+
+    def test_truncated_json_mode_object(self):
+        text = json.dumps({"flashcards": cards("Q1", "Q2")})[:-10]
+
+        assert parse_flashcards(text).cards == cards("Q1")
+
+
+class TestCompleteFlashcards:
+    """Re-requesting only the missing cards."""
+
+    @pytest.mark.asyncio
+    async def test_only_missing_cards_requested(self):
+        calls = []
+
+        async def request(missing, exclude):
+            calls.append((missing, list(exclude)))
+            if len(calls) == 1:
+                return json.dumps(cards("Q1", "Q2", "Q3"))[:-20]
+            return json.dumps(cards("Q2", "Q4", "Q5", "Q6"))
+
+        result = await complete_flashcards(request, 5)
+
+        assert [card["question"] for card in result] == ["Q1", "Q2", "Q4", "Q5", "Q6"]
+        assert calls == [(5, []), (3, ["Q1", "Q2"])]
+
+    @pytest.mark.asyncio
+    async def test_partial_set_when_top_up_fails(self):
+        async def request(missing, exclude):
+            if exclude:
+                raise RuntimeError("rate limited")
+            return json.dumps(cards("Q1"))
+
+        assert await complete_flashcards(request, 3) == cards("Q1")
+
+    @pytest.mark.asyncio
+    async def test_no_valid_cards(self):
+        async def request(missing, exclude):
+            return "I cannot help with that."
+
+        with pytest.raises(ValueError, match="No valid flashcards"):
+            await complete_flashcards(request, 3, attempts=2)
+
+
+class TestProviderJSONModes:
+    """Structured-output modes requested from the providers."""
+
+    @pytest.mark.asyncio
+    async def test_openai_json_mode_and_top_up(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        monkeypatch.setenv("OPENAI_MODEL", "gpt-4o-mini")
+        service = OpenAIService()
+        create = AsyncMock(side_effect=[
+            completion(json.dumps({"flashcards": cards("Q1", "Q2")})),
+            completion(json.dumps({"flashcards": cards("Q3")})),
+        ])
+        service.client.chat.completions.create = create
+
+        result = await service.generate_flashcards("Insulin notes", 3)
+
+        assert [card["question"] for card in result] == ["Q1", "Q2", "Q3"]
+        first, second = create.await_args_list
+        assert first.kwargs["response_format"] == {"type": "json_object"}
+        assert second.kwargs["max_tokens"] == service.budget.flashcard_tokens(1)
+        assert "- Q1" in second.kwargs["messages"][1]["content"]
+
+    @pytest.mark.asyncio
+    async def test_openai_without_json_mode(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        monkeypatch.setenv("OPENAI_MODEL", "gpt-4")
+        service = OpenAIService()
+        create = AsyncMock(return_value=completion(json.dumps(cards("Q1"))))
+        service.client.chat.completions.create = create
+
+        await service.generate_flashcards("Insulin notes", 1)
+
+        assert "response_format" not in create.await_args.kwargs
+
+    @pytest.mark.asyncio
+    async def test_gemini_json_mime_type(self, monkeypatch):
+        monkeypatch.setenv("GEMINI_MODEL", "gemini-1.5-flash")
+        monkeypatch.setattr(gemini_module.genai, "GenerativeModel", lambda name: None)
+        service = GeminiService()
+        generate = AsyncMock(return_value=SimpleNamespace(text=json.dumps(cards("Q1", "Q2"))))
+        service.model = SimpleNamespace(generate_content_async=generate)
+
+        assert len(await service.generate_flashcards("Insulin notes", 2)) == 2
+        assert generate.await_args.kwargs["generation_config"] == {"response_mime_type": "application/json"}
@@ -0,0 +1,176 @@
+"""Tests for incremental flashcard parsing."""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from services.flashcard_stream import FlashcardStream, JSONObjectStream, is_flashcard, repair_json
+from services.llm_cache import LLMResponseCache
+from services.openai_service import OpenAIService
+
+CARDS = [
+    {"question": "What does {ACE} stand for?", "answer": "Angiotensin-converting enzyme", "tags": ["pharm"]},
+    {"question": "Normal \"GFR\"?", "answer": "About 120 mL/min\\n", "tags": ["renal", "physiology"]},
+    {"question": "Insulin source?", "answer": "Beta cells [islets]", "tags": [], "difficulty": "easy"},
+]
+COMPLETION = "Here are your cards:\n```json\n" + json.dumps(CARDS, indent=2) + "\n```"
+
+
+def pieces(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+async def chunks(parts, fail=False):
+    for part in parts:
+        yield part
+    if fail:
+        raise RuntimeError("connection reset")
+
+
+class FakeCompletionStream:
+    """Async iterator shaped like ``openai.AsyncStream`` of chat chunks."""
+
+    def __init__(self, deltas):
+        self.deltas = deltas
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for delta in self.deltas:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+    async def close(self):
+        pass
+
+
+class TestJSONObjectStream:
+    """Object extraction from arbitrarily split text."""
+
+    @pytest.mark.parametrize("size", [1, 3, 17, len(COMPLETION)])
+    def test_objects_emitted_as_they_close(self, size):
+        """Test braces, brackets and escaped quotes inside strings never split objects."""
+        parser = JSONObjectStream()
+        emitted = []
+        for part in pieces(COMPLETION, size):
+            emitted.extend(parser.feed(part))
+
+        assert emitted == CARDS
+        assert not parser.pending
+
+    def test_card_available_before_array_closes(self):
+        parser = JSONObjectStream()
+        first = json.dumps(CARDS[0])
+
+        assert parser.feed("[" + first[:-1]) == []
+        assert parser.feed("}, {\"question\": ") == [CARDS[0]]
+        assert parser.pending
+
+    def test_malformed_object_costs_only_itself(self):
+        parser = JSONObjectStream()
+        text = '[{"question": "Q1", "answer": "A1"}, {"question": "Q2" "answer": "A2"}, {"question": "Q3", "answer": "A3"}]'
+
+        assert [card["question"] for card in parser.feed(text)] == ["Q1", "Q3"]
+        assert parser.skipped == 1
+
+    def test_common_defects_repaired(self):
+        """Test trailing commas and raw newlines in strings no longer cost the card."""
+        parser = JSONObjectStream()
+        text = '[{"question": "Q1", "answer": "Line one\nline two", "tags": ["a", "b",],}, {"question": "Q2", "answer": "A2"},]'
+
+        cards = parser.feed(text)
+
+        assert cards == [{"question": "Q1", "answer": "Line one\nline two", "tags": ["a", "b"]}, {"question": "Q2", "answer": "A2"}]
+        assert parser.skipped == 0
+        assert repair_json('{"a": "x, }", }') == '{"a": "x, }" }'
+
+    def test_is_flashcard(self):
+        assert is_flashcard({"question": "Q", "answer": "A"})
+        assert not is_flashcard({"question": "Q", "answer": " "})
+        assert not is_flashcard({"question": "Q"})
+        assert not is_flashcard(["Q", "A"])
+
+
+class TestFlashcardStream:
+    """Cards from a provider stream."""
+
+    @pytest.mark.asyncio
+    async def test_truncated_generation_keeps_complete_cards(self):
+        """Test a completion cut off mid-card still yields every finished card."""
+        text = json.dumps(CARDS)
+        cards = FlashcardStream(chunks(pieces(text[:len(text) - 20], 5)))
+
+        assert [card async for card in cards] == CARDS[:2]
+        assert cards.incomplete
+
+    @pytest.mark.asyncio
+    async def test_cards_before_provider_error_are_yielded(self):
+        received = []
+        with pytest.raises(RuntimeError):
+            async for card in FlashcardStream(chunks(pieces(json.dumps(CARDS[:1]), 4), fail=True)):
+                received.append(card)
+
+        assert received == CARDS[:1]
+
+    @pytest.mark.asyncio
+    async def test_invalid_cards_dropped(self):
+        cards = FlashcardStream(chunks(['[{"question": "Q"}, {"question": "Q2", "answer": "A2"}]']))
+
+        assert [card async for card in cards] == [{"question": "Q2", "answer": "A2"}]
+        assert cards.invalid == 1 and cards.incomplete
+
+
+class TestServiceStreamFlashcards:
+    """OpenAIService.stream_flashcards and the response cache."""
+
+    @pytest.mark.asyncio
+    async def test_complete_stream_cached_for_both_paths(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        service = OpenAIService(cache=LLMResponseCache())
+        create = AsyncMock(return_value=FakeCompletionStream(pieces(COMPLETION, 8)))
+        service.client.chat.completions.create = create
+
+        assert [card async for card in service.stream_flashcards("Pharmacology", 3)] == CARDS
+        assert await service.generate_flashcards("Pharmacology", 3) == CARDS
+        assert [card async for card in service.stream_flashcards("Pharmacology", 3)] == CARDS
+        assert create.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_truncated_stream_not_cached(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        cache = LLMResponseCache()
+        service = OpenAIService(cache=cache)
+        text = json.dumps(CARDS)
+        service.client.chat.completions.create = AsyncMock(
+            return_value=FakeCompletionStream(pieces(text[:-20], 8))
+        )
+
+        assert len([card async for card in service.stream_flashcards("Pharmacology", 3)]) == 2
+        assert cache.stats()["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_short_stream_not_cached(self, monkeypatch):
+        """Test fewer well-formed cards than requested leave generate_flashcards to top up."""
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        cache = LLMResponseCache()
+        service = OpenAIService(cache=cache)
+        service.client.chat.completions.create = AsyncMock(
+            return_value=FakeCompletionStream(pieces(json.dumps(CARDS[:2]), 8))
+        )
+
+        assert len([card async for card in service.stream_flashcards("Pharmacology", 3)]) == 2
+        assert cache.stats()["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_streamed_cards_validated_like_generated(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        service = OpenAIService(cache=LLMResponseCache())
+        raw = [{"question": "Q", "answer": "A", "tags": "renal, acid-base", "difficulty": "Hard", "source": "x"}]
+        service.client.chat.completions.create = AsyncMock(return_value=FakeCompletionStream([json.dumps(raw)]))
+
+        cards = [card async for card in service.stream_flashcards("Renal", 1)]
+
+        assert cards == [{"question": "Q", "answer": "A", "tags": ["renal", "acid-base"], "difficulty": "hard"}]
+        assert await service.generate_flashcards("Renal", 1) == cards
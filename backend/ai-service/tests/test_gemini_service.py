@@ -0,0 +1,151 @@
+"""Tests for the non-blocking GeminiService."""
+
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import services.gemini_service as gemini_module
+from services.adaptive_limiter import AdaptiveLimiter
+from services.gemini_service import GeminiService
+from services.loop_monitor import LoopLagMonitor
+
+
+class FakeModel:
+    """Async half of ``genai.GenerativeModel`` with a fixed latency."""
+
+    def __init__(self, text, delay=0.05, chunks=None, usage=None):
+        self.text = text
+        self.delay = delay
+        self.chunks = chunks or []
+        self.usage = usage
+        self.active = 0
+        self.max_active = 0
+
+    async def generate_content_async(self, prompt, stream=False):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            if not stream:
+                self.active -= 1
+        if stream:
+            return self._stream()
+        return SimpleNamespace(text=self.text)
+
+    async def _stream(self):
+        try:
+            for index, chunk in enumerate(self.chunks):
+                await asyncio.sleep(0)
+                last = index == len(self.chunks) - 1 and self.usage is not None
+                usage = SimpleNamespace(total_token_count=self.usage) if last else None
+                yield SimpleNamespace(parts=[chunk] if chunk else [], text=chunk, usage_metadata=usage)
+        finally:
+            self.active -= 1
+
+
+@pytest.fixture
+def service(monkeypatch):
+    built = []
+    monkeypatch.setattr(gemini_module.genai, "GenerativeModel", lambda name: built.append(name) or object())
+    service = GeminiService(max_concurrent=2)
+    service.built = built
+    return service
+
+
+class TestGeminiService:
+    """Async calls, model reuse and the concurrency limit."""
+
+    @pytest.mark.asyncio
+    async def test_calls_do_not_block_event_loop(self, service):
+        """Test the loop keeps serving other work for the whole Gemini round trip."""
+        service.model = FakeModel("answer", delay=0.2)
+        monitor = LoopLagMonitor(interval=0.01)
+        monitor.start()
+
+        assert await service.generate_text("question") == "answer"
+        await monitor.stop()
+
+        stats = monitor.stats()
+        assert stats["samples"] >= 10
+        assert stats["max_ms"] < 100
+
+    @pytest.mark.asyncio
+    async def test_model_built_once(self, service):
+        service.model = FakeModel(json.dumps([{"question": "Q", "answer": "A"}]), delay=0)
+
+        await service.generate_text("one")
+        await service.generate_text("two")
+        await service.generate_flashcards("content", 1)
+
+        assert service.built == ["gemini-pro"]
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self, service):
+        """Test calls beyond max_concurrent wait for a slot."""
+        service.model = FakeModel("text", delay=0.05)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(service.generate_text(f"prompt {i}") for i in range(6)))
+        elapsed = time.perf_counter() - started
+
+        assert service.model.max_active == 2
+        assert elapsed >= 0.15
+        assert service.stats()["calls"] == 6
+        assert service.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_stream_holds_slot_until_done(self, service):
+        service.model = FakeModel("", delay=0, chunks=["Insulin ", "", "lowers glucose."])
+
+        stream = service.stream_text("question")
+        assert await stream.__anext__() == "Insulin "
+        assert service.stats()["in_flight"] == 1
+        assert [token async for token in stream] == ["lowers glucose."]
+        assert service.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_wrapped(self, service):
+        async def fail(prompt, stream=False):
+            raise RuntimeError("quota exceeded")
+
+        service.model = SimpleNamespace(generate_content_async=fail)
+
+        with pytest.raises(Exception, match="Gemini API error: quota exceeded"):
+            await service.generate_flashcards("content", 3)
+        assert service.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_reserves_prompt_and_expected_output(self, service):
+        """Test the limiter reservation covers the reply, not just the prompt."""
+        service.model = FakeModel("Summary", delay=0)
+        reserved = []
+        acquire = service.limiter.acquire
+        service.limiter.acquire = lambda tokens=0: reserved.append(tokens) or acquire(tokens)
+
+        await service.summarize("Long text", 400)
+
+        assert reserved == [service.budget.count(service._summary_prompt("Long text", 400)) + service.budget.summary_tokens(400)]
+
+    @pytest.mark.asyncio
+    async def test_stream_records_usage(self, service):
+        """Test a finished stream is charged its reported usage and a closed one what it produced."""
+        service.limiter = AdaptiveLimiter("gemini", tokens_per_minute=100_000)
+        service.model = FakeModel("", delay=0, chunks=["Insulin ", "lowers glucose."], usage=40)
+
+        assert [token async for token in service.stream_text("question")] == ["Insulin ", "lowers glucose."]
+        assert service.limiter.stats()["tokens_available"] >= 100_000 - 40
+
+        service.model = FakeModel("", delay=0, chunks=["Insulin ", "lowers glucose."], usage=40)
+        stream = service.stream_text("other question")
+        assert await stream.__anext__() == "Insulin "
+        await stream.aclose()
+        # The provider stream underneath is closed by the loop's async-generator finalizer
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+        assert service.limiter.stats()["in_flight"] == 0
+        assert service.limiter.stats()["tokens_available"] >= 100_000 - 40 - 20
@@ -0,0 +1,190 @@
+"""Tests for the conditional-GET response cache."""
+
+import zlib
+
+import httpx
+import pytest
+
+from services.http_cache import HTTPResponseCache, freshness_lifetime, parse_cache_control
+from services.web_scraper import AsyncWebScraper
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = HTTPResponseCache(path=str(tmp_path / "cache.sqlite3"))
+    yield cache
+    cache.close()
+
+
+class TestCacheHeaders:
+    """Cache-Control parsing and freshness."""
+
+    def test_parse_cache_control(self):
+        """Test directives and arguments are split."""
+        directives = parse_cache_control('public, max-age=300, no-cache="set-cookie"')
+
+        assert directives == {"public": None, "max-age": "300", "no-cache": "set-cookie"}
+
+    def test_freshness_from_max_age(self):
+        """Test max-age drives freshness."""
+        assert freshness_lifetime({"cache-control": "max-age=60"}) == 60
+
+    def test_freshness_no_cache_is_zero(self):
+        """Test no-cache forces revalidation."""
+        assert freshness_lifetime({"cache-control": "no-cache, max-age=60"}) == 0
+
+    def test_freshness_from_expires(self):
+        """Test Expires is used when max-age is absent."""
+        headers = {"expires": "Thu, 01 Jan 2037 00:00:00 GMT"}
+
+        assert freshness_lifetime(headers, now=2114380800 - 30) == 30
+
+
+class TestHTTPResponseCache:
+    """Storage, eviction and counters."""
+
+    def test_put_and_get_round_trip(self, cache):
+        """Test bodies and validators survive storage."""
+        stored = cache.put(
+            "https://example.com",
+            "<p>Olá</p>",
+            {"etag": '"v1"', "last-modified": "Wed, 01 Jan 2025 00:00:00 GMT", "content-type": "text/html"},
+        )
+
+        entry = cache.get("https://example.com")
+        assert stored is True
+        assert entry.body == "<p>Olá</p>"
+        assert entry.validators() == {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Wed, 01 Jan 2025 00:00:00 GMT",
+        }
+        assert not entry.is_fresh()
+
+    def test_put_raw_bytes_in_page_charset(self, cache):
+        """Test raw response bytes are stored as text regardless of their charset."""
+        cache.put("https://a.example", "<p>Olá</p>".encode("utf-8"), {"etag": '"a"'}, encoding="utf-8")
+        cache.put("https://b.example", "<p>Olá</p>".encode("latin-1"), {"etag": '"b"'}, encoding="iso-8859-1")
+
+        assert cache.get("https://a.example").body == "<p>Olá</p>"
+        assert cache.get("https://b.example").body == "<p>Olá</p>"
+        assert cache.get("https://b.example").encoding == "utf-8"
+
+    def test_varying_response_is_skipped(self, cache):
+        """Test responses varying on request headers are not stored under the bare URL."""
+        assert cache.put("https://example.com", "x", {"etag": '"a"', "vary": "Accept-Language"}) is False
+        assert cache.put("https://example.com", "x", {"etag": '"a"', "vary": "*"}) is False
+        assert cache.put("https://example.com", "x", {"etag": '"a"', "vary": "Accept-Encoding"}) is True
+
+    def test_no_store_is_skipped(self, cache):
+        """Test no-store responses are never written."""
+        assert cache.put("https://example.com", "x", {"cache-control": "no-store", "etag": '"a"'}) is False
+        assert cache.get("https://example.com") is None
+
+    def test_unrevalidatable_response_is_skipped(self, cache):
+        """Test responses with no freshness and no validators are not stored."""
+        assert cache.put("https://example.com", "x", {}) is False
+
+    def test_lru_eviction_by_size(self, tmp_path):
+        """Test least-recently-used entries are evicted when over budget."""
+        entry_size = len(zlib.compress(b"a" * 10))
+        cache = HTTPResponseCache(path=str(tmp_path / "lru.sqlite3"), max_bytes=2 * entry_size)
+        headers = {"cache-control": "max-age=60"}
+        cache.put("https://a.example", "a" * 10, headers)
+        cache.put("https://b.example", "b" * 10, headers)
+        cache.get("https://a.example")  # a is now most recently used
+        cache.put("https://c.example", "c" * 10, headers)
+
+        assert cache.get("https://b.example") is None
+        assert cache.get("https://a.example") is not None
+        assert cache.get("https://c.example") is not None
+        assert cache.evictions == 1
+        assert cache.total_bytes == 2 * entry_size
+        cache.close()
+
+    def test_size_persists_across_reopen(self, tmp_path):
+        """Test the cache is disk-backed."""
+        path = str(tmp_path / "persist.sqlite3")
+        first = HTTPResponseCache(path=path)
+        first.put("https://example.com", "body", {"etag": '"a"'})
+        total = first.total_bytes
+        first.close()
+
+        second = HTTPResponseCache(path=path)
+        assert second.get("https://example.com").body == "body"
+        assert second.total_bytes == total
+        second.close()
+
+
+class TestScraperWithCache:
+    """AsyncWebScraper integration."""
+
+    @staticmethod
+    def _client(handler):
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("stream_body", [False, True])
+    async def test_fresh_entry_skips_network(self, cache, stream_body):
+        """Test a fresh cached page is served without a request."""
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, headers={"cache-control": "max-age=300"}, text="<p>v1</p>")
+
+        client = self._client(handler)
+        async with AsyncWebScraper(client=client, cache=cache, stream_body=stream_body) as scraper:
+            first, first_meta = await scraper.fetch_html("https://example.com")
+            second, second_meta = await scraper.fetch_html("https://example.com")
+
+        assert first == second == "<p>v1</p>"
+        assert first_meta["cache"] == "miss"
+        assert second_meta["cache"] == "hit"
+        assert len(requests) == 1
+        assert cache.stats()["hits"] == 1
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("stream_body", [False, True])
+    async def test_stale_entry_revalidates_with_304(self, cache, stream_body):
+        """Test stale entries send validators and serve the cached body on 304."""
+        seen_headers = []
+
+        def handler(request):
+            seen_headers.append(dict(request.headers))
+            if request.headers.get("if-none-match") == '"v1"':
+                return httpx.Response(304, headers={"cache-control": "max-age=300"})
+            return httpx.Response(200, headers={"etag": '"v1"'}, text="<p>v1</p>")
+
+        client = self._client(handler)
+        async with AsyncWebScraper(client=client, cache=cache, stream_body=stream_body) as scraper:
+            await scraper.fetch_html("https://example.com")
+            html, metadata = await scraper.fetch_html("https://example.com")
+            _, third_meta = await scraper.fetch_html("https://example.com")
+
+        assert html == "<p>v1</p>"
+        assert metadata["cache"] == "revalidated"
+        assert metadata["status_code"] == 200
+        assert seen_headers[1]["if-none-match"] == '"v1"'
+        assert third_meta["cache"] == "hit"  # 304 refreshed max-age
+        assert len(seen_headers) == 2
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_changed_page_replaces_entry(self, cache):
+        """Test a 200 on revalidation stores the new body."""
+        versions = iter(["<p>v1</p>", "<p>v2</p>"])
+
+        def handler(request):
+            body = next(versions)
+            return httpx.Response(200, headers={"etag": f'"{body}"'}, text=body)
+
+        client = self._client(handler)
+        async with AsyncWebScraper(client=client, cache=cache) as scraper:
+            await scraper.fetch_html("https://example.com")
+            html, metadata = await scraper.fetch_html("https://example.com")
+
+        assert html == "<p>v2</p>"
+        assert metadata["cache"] == "miss"
+        assert cache.get("https://example.com").body == "<p>v2</p>"
+        await client.aclose()
@@ -0,0 +1,201 @@
+"""Tests for the shared scraping connection pool."""
+
+import asyncio
+import ssl
+
+import httpx
+import pytest
+
+from services.http_pool import CachingDNSBackend, HostLimitedTransport, HTTPConnectionPool
+from services.web_scraper import AsyncWebScraper
+
+
+class TestCachingDNSBackend:
+    """DNS cache behaviour."""
+
+    @pytest.mark.asyncio
+    async def test_resolve_caches_until_ttl(self, monkeypatch):
+        """Test repeated lookups are served from cache."""
+        calls = []
+
+        async def fake_getaddrinfo(host, port, **kwargs):
+            calls.append(host)
+            return [(None, None, None, "", ("10.0.0.1", port))]
+
+        loop = asyncio.get_running_loop()
+        monkeypatch.setattr(loop, "getaddrinfo", fake_getaddrinfo)
+        backend = CachingDNSBackend(ttl=60)
+
+        assert await backend.resolve("example.com", 443) == ["10.0.0.1"]
+        assert await backend.resolve("example.com", 443) == ["10.0.0.1"]
+
+        assert calls == ["example.com"]
+        assert backend.hits == 1
+        assert backend.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_resolve_expired_entry_refreshes(self, monkeypatch):
+        """Test an expired entry triggers a new lookup."""
+        calls = []
+
+        async def fake_getaddrinfo(host, port, **kwargs):
+            calls.append(host)
+            return [(None, None, None, "", ("10.0.0.1", port))]
+
+        loop = asyncio.get_running_loop()
+        monkeypatch.setattr(loop, "getaddrinfo", fake_getaddrinfo)
+        backend = CachingDNSBackend(ttl=0)
+
+        await backend.resolve("example.com", 443)
+        await backend.resolve("example.com", 443)
+
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_resolve_ip_literal_skips_lookup(self):
+        """Test IP literals are returned as-is."""
+        backend = CachingDNSBackend()
+
+        assert await backend.resolve("127.0.0.1", 80) == ["127.0.0.1"]
+        assert backend.misses == 0
+
+
+class TestHostLimitedTransport:
+    """Per-host concurrency limits."""
+
+    @pytest.mark.asyncio
+    async def test_limits_concurrent_requests_per_host(self):
+        """Test no more than max_per_host requests run at once for one host."""
+        in_flight = 0
+        peak = 0
+
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, text="ok")
+
+        transport = HostLimitedTransport(httpx.MockTransport(handler), max_per_host=2)
+        async with httpx.AsyncClient(transport=transport) as client:
+            await asyncio.gather(*(client.get("https://example.com/") for _ in range(6)))
+
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_slot_released_after_error(self):
+        """Test a failed request does not leak its slot."""
+        async def handler(request):
+            raise httpx.ConnectError("boom")
+
+        transport = HostLimitedTransport(httpx.MockTransport(handler), max_per_host=1)
+        async with httpx.AsyncClient(transport=transport) as client:
+            for _ in range(2):
+                with pytest.raises(httpx.ConnectError):
+                    await client.get("https://example.com/")
+
+        assert transport._semaphores == {}
+
+    @pytest.mark.asyncio
+    async def test_idle_host_state_dropped(self):
+        """Test per-host semaphores do not accumulate for every host ever contacted."""
+        transport = HostLimitedTransport(httpx.MockTransport(lambda request: httpx.Response(200)), max_per_host=1)
+        async with httpx.AsyncClient(transport=transport) as client:
+            for i in range(5):
+                await client.get(f"https://host{i}.example/")
+
+        assert transport._semaphores == {}
+
+
+class TestHTTPConnectionPool:
+    """Pool lifecycle and scraper borrowing."""
+
+    @pytest.mark.asyncio
+    async def test_start_and_close(self):
+        """Test the client is created once and released on close."""
+        pool = HTTPConnectionPool()
+
+        client = await pool.start()
+        assert await pool.start() is client
+        assert pool.client is client
+
+        await pool.aclose()
+        with pytest.raises(RuntimeError):
+            _ = pool.client
+
+    def test_from_env(self, monkeypatch):
+        """Test settings are read from SCRAPER_* variables."""
+        monkeypatch.setenv("SCRAPER_MAX_CONNECTIONS", "42")
+        monkeypatch.setenv("SCRAPER_MAX_CONNECTIONS_PER_HOST", "3")
+        monkeypatch.setenv("SCRAPER_HTTP2", "false")
+
+        pool = HTTPConnectionPool.from_env()
+
+        assert pool.limits.max_connections == 42
+        assert pool.max_connections_per_host == 3
+        assert pool.http2 is False
+
+    @pytest.mark.asyncio
+    async def test_transport_sends_through_dns_backend(self, monkeypatch):
+        """Test requests go through the pool's own backend and connection errors map to httpx."""
+        pool = HTTPConnectionPool(retries=0)
+        resolved = []
+
+        async def resolve(host, port):
+            resolved.append((host, port))
+            raise OSError("unreachable")
+
+        monkeypatch.setattr(pool.dns, "resolve", resolve)
+        client = await pool.start()
+
+        with pytest.raises(httpx.ConnectError, match="unreachable"):
+            await client.get("http://example.invalid/")
+
+        assert resolved == [("example.invalid", 80)]
+        await pool.aclose()
+
+    def test_tls_settings_applied(self):
+        """Test verify/cert settings reach the SSL context instead of a default one."""
+        pool = HTTPConnectionPool(verify=False)
+        context = pool._build_transport()._transport._pool._ssl_context
+
+        assert context.verify_mode == ssl.CERT_NONE
+
+    @pytest.mark.asyncio
+    async def test_environment_proxies_mounted(self, monkeypatch):
+        """Test HTTPS_PROXY / NO_PROXY are honoured although the default transport is replaced."""
+        monkeypatch.setenv("HTTPS_PROXY", "http://proxy.internal:3128")
+        monkeypatch.setenv("NO_PROXY", "intranet.example")
+        pool = HTTPConnectionPool()
+        client = await pool.start()
+
+        proxied = client._transport_for_url(httpx.URL("https://example.com/"))
+        assert isinstance(proxied._transport, httpx.AsyncHTTPTransport)
+        assert proxied._transport._pool._proxy_url.host == b"proxy.internal"
+        assert client._transport_for_url(httpx.URL("https://intranet.example/")) is client._transport
+        assert client._transport_for_url(httpx.URL("http://example.com/")) is client._transport
+        await pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_environment_proxies_ignored_without_trust_env(self, monkeypatch):
+        """Test trust_env=False keeps every request on the pooled transport."""
+        monkeypatch.setenv("HTTPS_PROXY", "http://proxy.internal:3128")
+        pool = HTTPConnectionPool(trust_env=False)
+        client = await pool.start()
+
+        assert client._transport_for_url(httpx.URL("https://example.com/")) is client._transport
+        await pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_scraper_borrows_without_closing(self):
+        """Test a borrowed client survives the scraper context."""
+        pool = HTTPConnectionPool()
+        client = await pool.start()
+
+        async with AsyncWebScraper(client=client) as scraper:
+            assert scraper.client is client
+
+        assert not client.is_closed
+        await pool.aclose()
+        assert client.is_closed
@@ -0,0 +1,230 @@
+"""Tests for the persistent background job queue."""
+
+import asyncio
+import threading
+
+import pytest
+
+from services.job_queue import Job, JobQueue, JobStore
+
+
+async def wait_finished(queue, job_id, timeout=2.0):
+    async def poll():
+        while not (await queue.get(job_id)).finished:
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(poll(), timeout)
+    return await queue.get(job_id)
+
+
+class GatedStore(JobStore):
+    """Store whose saves of finished jobs wait until ``gate`` is set."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.saving = threading.Event()
+        self.gate = threading.Event()
+
+    def save(self, job):
+        if job.finished:
+            self.saving.set()
+            self.gate.wait(5)
+        super().save(job)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(path=str(tmp_path / "jobs.sqlite3"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def queue(store):
+    return JobQueue(store, workers=2, heartbeat=0.05)
+
+
+async def echo(params, progress):
+    progress(stage="working")
+    await asyncio.sleep(params.get("delay", 0))
+    if params.get("fail"):
+        raise RuntimeError("pipeline failed")
+    return {"echo": params["value"]}
+
+
+class TestJobQueue:
+    """Submit, run, poll, stream, cancel and persist jobs."""
+
+    @pytest.mark.asyncio
+    async def test_submit_returns_before_job_runs(self, queue):
+        queue.register("echo", echo)
+        await queue.start()
+
+        job = await queue.submit("echo", {"value": 1, "delay": 0.1})
+        assert job.state == "queued"
+
+        finished = await wait_finished(queue, job.job_id)
+        assert finished.state == "completed"
+        assert finished.result == {"echo": 1}
+        assert finished.progress == {"stage": "working"}
+        await queue.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_failure_recorded(self, queue):
+        queue.register("echo", echo)
+        await queue.start()
+
+        job = await queue.submit("echo", {"value": 1, "fail": True})
+
+        finished = await wait_finished(queue, job.job_id)
+        assert finished.state == "failed"
+        assert finished.error == "pipeline failed"
+        await queue.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_worker_pool_is_bounded(self, queue):
+        active = peak = 0
+
+        async def slow(params, progress):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.05)
+            active -= 1
+            return {}
+
+        queue.register("slow", slow)
+        await queue.start()
+        jobs = [await queue.submit("slow", {"n": i}) for i in range(6)]
+        for job in jobs:
+            await wait_finished(queue, job.job_id)
+
+        assert peak == 2
+        await queue.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_duplicate_submission_coalesced(self, queue):
+        """Test a retried request joins the job already running instead of repeating the work."""
+        queue.register("echo", echo)
+        await queue.start()
+
+        first = await queue.submit("echo", {"value": 1, "delay": 0.1})
+        second = await queue.submit("echo", {"value": 1, "delay": 0.1})
+        await wait_finished(queue, first.job_id)
+        third = await queue.submit("echo", {"value": 1, "delay": 0.1})
+
+        assert second.job_id == first.job_id
+        assert third.job_id != first.job_id
+        assert queue.stats()["coalesced"] == 1
+        await queue.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_finished_job_not_reused_while_saving(self, tmp_path):
+        """Test a job whose final state is being saved is neither coalesced nor cancelled."""
+        store = GatedStore(str(tmp_path / "jobs.sqlite3"))
+        queue = JobQueue(store, workers=1)
+        queue.register("echo", echo)
+        await queue.start()
+        first = await queue.submit("echo", {"value": 1})
+        await asyncio.to_thread(store.saving.wait, 2)
+
+        again = await queue.submit("echo", {"value": 1})
+        cancelled = await queue.cancel(first.job_id)
+        finishing = await queue.get(first.job_id)
+        store.gate.set()
+
+        assert again.job_id != first.job_id
+        assert not cancelled
+        assert finishing.state == "completed"
+        assert (await wait_finished(queue, again.job_id)).result == {"echo": 1}
+        assert store.get(first.job_id).result == {"echo": 1}
+        await queue.shutdown()
+        store.close()
+
+    @pytest.mark.asyncio
+    async def test_cancel_running_and_queued(self, store):
+        queue = JobQueue(store, workers=1)
+        queue.register("echo", echo)
+        await queue.start()
+
+        running = await queue.submit("echo", {"value": 1, "delay": 10})
+        queued = await queue.submit("echo", {"value": 2})
+        await asyncio.sleep(0.05)
+
+        assert await queue.cancel(running.job_id)
+        assert await queue.cancel(queued.job_id)
+        assert (await wait_finished(queue, running.job_id)).state == "cancelled"
+        assert (await queue.get(queued.job_id)).state == "cancelled"
+        assert not await queue.cancel(running.job_id)
+        await queue.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_watch_streams_progress_until_finished(self, queue):
+        async def staged(params, progress):
+            for stage in ("scraping", "indexing", "generating"):
+                progress(stage=stage)
+                await asyncio.sleep(0.02)
+            return {"done": True}
+
+        queue.register("staged", staged)
+        await queue.start()
+        job = await queue.submit("staged", {})
+
+        seen = [(update.state, update.progress.get("stage")) async for update in queue.watch(job.job_id)]
+
+        assert seen[-1] == ("completed", "generating")
+        assert ("running", "indexing") in seen
+        await queue.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_interrupted_jobs_resume_after_restart(self, store):
+        """Test jobs running at shutdown are queued again and run by the next process."""
+        first = JobQueue(store, workers=1)
+        first.register("echo", echo)
+        await first.start()
+        job = await first.submit("echo", {"value": 7, "delay": 10})
+        await asyncio.sleep(0.05)
+        await first.shutdown()
+        assert store.get(job.job_id).state == "queued"
+
+        second = JobQueue(store, workers=1)
+        second.register("echo", lambda params, progress: echo({**params, "delay": 0}, progress))
+        await second.start()
+
+        finished = await wait_finished(second, job.job_id)
+        assert finished.result == {"echo": 7}
+        await second.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_finished_jobs_pruned(self, store, queue):
+        queue.register("echo", echo)
+        await queue.start()
+        job = await queue.submit("echo", {"value": 1})
+        await wait_finished(queue, job.job_id)
+
+        assert store.prune(older_than=60) == 0
+        assert store.prune(older_than=-1) == 1
+        assert await queue.get(job.job_id) is None
+        await queue.shutdown()
+
+    def test_naive_timestamps_migrated(self, tmp_path):
+        """Test rows from before aware timestamps are pruned and ordered alongside new ones."""
+        path = str(tmp_path / "jobs.sqlite3")
+        store = JobStore(path)
+        store.save(Job(kind="echo", params={}, state="completed", created_at="2020-01-01T00:00:00.000001"))
+        store.save(Job(kind="echo", params={}, state="completed", created_at="2099-01-01T00:00:00.000001"))
+        store.save(Job(kind="echo", params={}, state="completed"))
+        store.close()
+
+        store = JobStore(path)
+        jobs = store.list()
+
+        assert all(job.created_at.endswith("+00:00") for job in jobs)
+        assert jobs[0].created_at.startswith("2099") and jobs[-1].created_at.startswith("2020")
+        assert store.prune(older_than=86400) == 1
+        store.close()
+
+    @pytest.mark.asyncio
+    async def test_unknown_kind_rejected(self, queue):
+        with pytest.raises(ValueError, match="Unknown job kind"):
+            await queue.submit("missing", {})
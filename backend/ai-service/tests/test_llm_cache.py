@@ -0,0 +1,196 @@
+"""Tests for the two-tier LLM response cache."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from services.llm_cache import LLMResponseCache, cached_response
+from services.openai_service import OpenAIService
+from services.single_flight import SingleFlight
+
+
+class InMemoryRedis:
+    """Just enough of ``redis.asyncio.Redis`` for the shared tier."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value.encode("utf-8")
+        self.ttls[key] = ex
+
+    async def aclose(self):
+        pass
+
+
+class CountingService:
+    """Minimal service shaped like OpenAIService/GeminiService."""
+
+    def __init__(self, cache, model="model-a", single_flight=None):
+        self.cache = cache
+        self.single_flight = single_flight
+        self.model = model
+        self.calls = 0
+
+    def cache_scope(self):
+        return f"test:{self.model}:v1"
+
+    @cached_response
+    async def generate_flashcards(self, content, count=10):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return [{"question": f"Q{i} about {content}", "answer": "A"} for i in range(count)]
+
+
+class TestLLMResponseCache:
+    """LRU tier, Redis tier and metrics."""
+
+    @pytest.mark.asyncio
+    async def test_set_get_returns_copies(self):
+        cache = LLMResponseCache()
+        await cache.set("k", [{"question": "Q"}])
+
+        first = await cache.get("k")
+        first.append("mutated")
+
+        assert await cache.get("k") == [{"question": "Q"}]
+        assert await cache.get("missing") is None
+        assert cache.stats()["memory_hits"] == 2
+        assert cache.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self):
+        cache = LLMResponseCache()
+        await cache.set("k", "value", ttl=0.01)
+        time.sleep(0.02)
+
+        assert await cache.get("k") is None
+        assert cache.stats()["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction_by_count_and_size(self):
+        """Test least recently used entries go first when either limit is hit."""
+        cache = LLMResponseCache(max_entries=2, max_bytes=1000)
+        await cache.set("a", "x")
+        await cache.set("b", "x")
+        await cache.get("a")
+        await cache.set("c", "x")
+
+        assert await cache.get("b") is None
+        assert await cache.get("a") == "x"
+
+        await cache.set("big", "y" * 996)
+        assert cache.stats()["entries"] == 1
+        assert cache.stats()["evictions"] == 3
+
+    @pytest.mark.asyncio
+    async def test_redis_tier_shared_between_processes(self):
+        """Test a second cache (another worker) is served from Redis and warms its LRU."""
+        redis = InMemoryRedis()
+        writer = LLMResponseCache(redis_client=redis, ttl=600)
+        reader = LLMResponseCache(redis_client=redis)
+        await writer.set("k", {"summary": "Short"})
+
+        assert await reader.get("k") == {"summary": "Short"}
+        assert await reader.get("k") == {"summary": "Short"}
+        assert redis.ttls["k"] == 600
+        assert reader.stats()["redis_hits"] == 1
+        assert reader.stats()["memory_hits"] == 1
+        assert reader.stats()["hit_rate"] == 1.0
+
+    @pytest.mark.asyncio
+    async def test_unreachable_redis_degrades_to_memory(self):
+        """Test a dead Redis is reported and bypassed instead of failing calls."""
+        cache = LLMResponseCache(redis_url="redis://127.0.0.1:1/0")
+
+        await cache.set("k", "value")
+        assert await cache.get("k") == "value"
+        assert await cache.get("other") is None
+
+        stats = cache.stats()
+        assert stats["redis_enabled"]
+        assert stats["redis_errors"] == 1
+        await cache.aclose()
+
+    def test_key_depends_on_every_input(self):
+        cache = LLMResponseCache()
+        base = cache.make_key("openai:gpt:v1", "summarize", {"content": "x", "max_length": 500})
+
+        assert base == cache.make_key("openai:gpt:v1", "summarize", {"max_length": 500, "content": "x"})
+        assert base != cache.make_key("openai:gpt:v2", "summarize", {"content": "x", "max_length": 500})
+        assert base != cache.make_key("openai:gpt:v1", "summarize", {"content": "x", "max_length": 300})
+        assert base != cache.make_key("gemini:gpt:v1", "summarize", {"content": "x", "max_length": 500})
+
+
+class TestCachedResponse:
+    """Service methods served from cache."""
+
+    @pytest.mark.asyncio
+    async def test_repeat_request_skips_provider(self):
+        """Test the same call (positional or keyword, defaults applied) hits the cache."""
+        service = CountingService(LLMResponseCache())
+
+        first = await service.generate_flashcards("insulin", 3)
+        started = time.perf_counter()
+        second = await service.generate_flashcards(content="insulin", count=3)
+        elapsed = time.perf_counter() - started
+
+        assert first == second
+        assert service.calls == 1
+        assert elapsed < 0.005
+
+    @pytest.mark.asyncio
+    async def test_different_parameters_or_model_miss(self):
+        cache = LLMResponseCache()
+        service = CountingService(cache)
+
+        await service.generate_flashcards("insulin")
+        await service.generate_flashcards("insulin", 5)
+        await CountingService(cache, model="model-b").generate_flashcards("insulin")
+
+        assert cache.stats()["misses"] == 3
+
+    @pytest.mark.asyncio
+    async def test_without_cache_calls_provider(self):
+        service = CountingService(None)
+
+        await service.generate_flashcards("insulin")
+        await service.generate_flashcards("insulin")
+
+        assert service.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_coalesced(self):
+        """Test simultaneous identical requests make one provider call and get independent copies."""
+        cache = LLMResponseCache()
+        flights = SingleFlight()
+        service = CountingService(cache, single_flight=flights)
+
+        results = await asyncio.gather(*(service.generate_flashcards("shared note", 2) for _ in range(4)))
+        results[0].clear()
+
+        assert service.calls == 1
+        assert results[1] == results[3] and len(results[1]) == 2
+        assert flights.stats()["coalesced"] == 3
+        assert await service.generate_flashcards("shared note", 2) == results[1]
+        assert service.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_openai_service_summarize_cached(self, monkeypatch):
+        """Test OpenAIService only reaches the API once for identical content."""
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        service = OpenAIService(cache=LLMResponseCache())
+        response = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Summary"))])
+        service.client.chat.completions.create = AsyncMock(return_value=response)
+
+        assert await service.summarize("Long text", 200) == "Summary"
+        assert await service.summarize("Long text", 200) == "Summary"
+
+        assert service.client.chat.completions.create.await_count == 1
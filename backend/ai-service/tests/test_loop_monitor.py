@@ -0,0 +1,38 @@
+"""Tests for event-loop lag monitoring."""
+
+import asyncio
+import time
+
+import pytest
+
+from services.loop_monitor import LoopLagMonitor
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_shows_up_as_lag():
+    """Test a blocking section on the loop is recorded as lag."""
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.03)
+
+    time.sleep(0.2)  # simulate CPU-bound work on the event loop
+    await asyncio.sleep(0.03)
+    await monitor.stop()
+
+    stats = monitor.stats()
+    assert stats["samples"] > 0
+    assert stats["max_ms"] >= 150
+
+
+@pytest.mark.asyncio
+async def test_idle_loop_has_low_lag():
+    """Test an idle loop reports near-zero lag and reset clears samples."""
+    monitor = LoopLagMonitor(interval=0.01)
+    monitor.start()
+    await asyncio.sleep(0.1)
+    await monitor.stop()
+
+    assert monitor.stats()["p50_ms"] < 50
+
+    monitor.reset()
+    assert monitor.stats()["samples"] == 0
@@ -0,0 +1,71 @@
+"""Tests for the background event loop thread."""
+
+import asyncio
+import threading
+
+import pytest
+
+from services.loop_thread import BackgroundLoop
+
+
+@pytest.fixture
+def background():
+    loop = BackgroundLoop(name="test-loop")
+    yield loop
+    loop.stop()
+
+
+class TestBackgroundLoop:
+    """Submitting coroutines from synchronous code."""
+
+    def test_runs_on_one_persistent_thread(self, background):
+        """Test consecutive calls share the same loop and thread."""
+        async def current():
+            return asyncio.get_running_loop(), threading.current_thread().name
+
+        first = background.run(current())
+        second = background.run(current())
+
+        assert first == second
+        assert first[1] == "test-loop"
+        assert background.stats() == {"running": True, "calls": 2}
+
+    def test_exceptions_propagate(self, background):
+        async def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            background.run(fail())
+
+    def test_timeout_cancels_coroutine(self, background):
+        """Test a timed-out call cancels its coroutine on the loop."""
+        cancelled = threading.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(TimeoutError):
+            background.run(slow(), timeout=0.05)
+
+        assert cancelled.wait(1)
+
+    def test_run_from_loop_thread_rejected(self, background):
+        """Test re-entrant calls fail fast instead of deadlocking."""
+        async def reenter():
+            async def noop():
+                return None
+            background.run(noop())
+
+        with pytest.raises(RuntimeError):
+            background.run(reenter())
+
+    def test_stop_and_restart(self, background):
+        background.run(asyncio.sleep(0))
+        background.stop()
+
+        assert not background.is_running
+        assert background.run(asyncio.sleep(0, result="again")) == "again"
@@ -0,0 +1,180 @@
+"""Tests for page-range PDF extraction and RAG feeding."""
+
+import pytest
+
+from services.pdf_ingest import (
+    PDFExtractor,
+    count_pages,
+    extract_page_range,
+    index_pdf_pages,
+    iter_pdf_pages,
+)
+
+
+def make_pdf(texts, tree=None):
+    """Build a minimal PDF with one line of Helvetica text per page.
+
+    ``tree`` nests page indexes in lists, each list an intermediate /Pages
+    node; by default every page is a direct kid of the root.
+    """
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    pages = []
+    for text in texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        pages.append(f"{len(objects)} 0 R")
+
+    def build(items):
+        kids, count = [], 0
+        for item in items:
+            if isinstance(item, list):
+                sub_kids, sub_count = build(item)
+                objects.append(f"<< /Type /Pages /Parent 2 0 R /Kids [{' '.join(sub_kids)}] /Count {sub_count} >>")
+                kids.append(f"{len(objects)} 0 R")
+                count += sub_count
+            else:
+                kids.append(pages[item])
+                count += 1
+        return kids, count
+
+    kids, count = build(list(range(len(texts))) if tree is None else tree)
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {count} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+@pytest.fixture
+def book(tmp_path):
+    path = tmp_path / "book.pdf"
+    path.write_bytes(make_pdf([f"Cardiology chapter page {i}" for i in range(1, 46)]))
+    return str(path)
+
+
+class TestExtraction:
+    """Page-by-page extraction helpers."""
+
+    def test_count_pages(self, book):
+        assert count_pages(book) == 45
+
+    def test_extract_page_range(self, book):
+        pages = extract_page_range(book, 10, 13)
+
+        assert [page.number for page in pages] == [11, 12, 13]
+        assert pages[0].text == "Cardiology chapter page 11"
+
+    def test_range_past_end_is_clamped(self, book):
+        assert [page.number for page in extract_page_range(book, 40, 60)] == [41, 42, 43, 44, 45]
+
+    def test_nested_tree_with_as_many_kids_as_pages(self, tmp_path):
+        """Test kids adding up to /Count are not mistaken for one page each."""
+        path = tmp_path / "nested.pdf"
+        path.write_bytes(make_pdf(["Page zero", "Page one", "Page two"], tree=[[], [0, 1], 2]))
+
+        pages = extract_page_range(str(path), 1, 3)
+
+        assert [(page.number, page.text) for page in pages] == [(2, "Page one"), (3, "Page two")]
+
+    def test_iter_pdf_pages_reopens_reader(self, book):
+        """Test the generator walks every page in order across reader ranges."""
+        pages = list(iter_pdf_pages(book, pages_per_reader=7))
+
+        assert [page.number for page in pages] == list(range(1, 46))
+
+
+class TestPDFExtractor:
+    """Parallel, ordered extraction."""
+
+    @pytest.mark.asyncio
+    async def test_inline_pages_in_order(self, book):
+        extractor = PDFExtractor(mode="inline", pages_per_task=4)
+
+        pages = [page async for page in extractor.iter_pages(book)]
+
+        assert [page.number for page in pages] == list(range(1, 46))
+        assert extractor.stats()["pages_extracted"] == 45
+
+    @pytest.mark.asyncio
+    async def test_process_pool_matches_inline(self, book):
+        """Test ranges extracted in worker processes come back in page order."""
+        extractor = PDFExtractor(mode="process", max_workers=2, pages_per_task=10)
+        extractor.start()
+        try:
+            pages = [page async for page in extractor.iter_pages(book)]
+        finally:
+            await extractor.shutdown()
+
+        assert [page.text for page in pages] == [page.text for page in iter_pdf_pages(book)]
+
+    @pytest.mark.asyncio
+    async def test_invalid_pdf_raises_value_error(self, tmp_path):
+        path = tmp_path / "broken.pdf"
+        path.write_bytes(b"not a pdf")
+
+        with pytest.raises(ValueError):
+            [page async for page in PDFExtractor(mode="inline").iter_pages(str(path))]
+
+    def test_invalid_settings(self):
+        with pytest.raises(ValueError):
+            PDFExtractor(mode="threads")
+        with pytest.raises(ValueError):
+            PDFExtractor(pages_per_task=0)
+
+
+class TestIndexPDFPages:
+    """Feeding pages to the RAG chunker."""
+
+    @pytest.mark.asyncio
+    async def test_batches_pages_into_notes(self, book):
+        """Test pages become per-page notes indexed in bounded batches."""
+        batches = []
+
+        async def index_notes(notes):
+            batches.append(list(notes))
+            return len(notes) * 2
+
+        progress = [
+            update async for update in index_pdf_pages(
+                PDFExtractor(mode="inline").iter_pages(book), index_notes, "pdf-1", "Cardiology", batch_pages=20
+            )
+        ]
+
+        assert [len(batch) for batch in batches] == [20, 20, 5]
+        assert batches[0][0] == {
+            "id": "pdf-1:p1",
+            "title": "Cardiology (p. 1)",
+            "content": "Cardiology chapter page 1",
+        }
+        assert progress[-1] == {"pages_done": 45, "pages_indexed": 45, "chunks_indexed": 90}
+
+    @pytest.mark.asyncio
+    async def test_blank_pages_skipped(self, tmp_path):
+        path = tmp_path / "blank.pdf"
+        path.write_bytes(make_pdf(["Intro", "", "Outro"]))
+        indexed = []
+
+        async def index_notes(notes):
+            indexed.extend(note["id"] for note in notes)
+            return len(notes)
+
+        progress = [
+            update async for update in index_pdf_pages(
+                PDFExtractor(mode="inline").iter_pages(str(path)), index_notes, "doc", "Doc"
+            )
+        ]
+
+        assert indexed == ["doc:p1", "doc:p3"]
+        assert progress[-1]["pages_done"] == 3
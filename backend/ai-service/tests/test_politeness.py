@@ -0,0 +1,198 @@
+"""Tests for per-host politeness scheduling."""
+
+import asyncio
+import time
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+from services.politeness import HostBlockedError, HostScheduler, parse_retry_after
+from services.web_scraper import AsyncWebScraper, RateLimitError
+
+
+class TestParseRetryAfter:
+    """Retry-After header parsing."""
+
+    def test_delta_seconds(self):
+        assert parse_retry_after("120") == 120
+
+    def test_http_date(self):
+        """Test HTTP-date values become a delay from now."""
+        delay = parse_retry_after(formatdate(time.time() + 30, usegmt=True))
+
+        assert 25 <= delay <= 31
+
+    def test_missing_or_invalid_uses_default(self):
+        assert parse_retry_after(None, default=5) == 5
+        assert parse_retry_after("soon", default=5) == 5
+
+
+class TestHostScheduler:
+    """Token bucket, in-flight caps and blocking."""
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_paces_requests(self):
+        """Test requests beyond the burst wait for refill."""
+        scheduler = HostScheduler(rate=20, burst=1)
+
+        start = time.monotonic()
+        for _ in range(3):
+            async with scheduler.slot("https://example.com/a"):
+                pass
+
+        assert time.monotonic() - start >= 0.09
+
+    @pytest.mark.asyncio
+    async def test_caps_in_flight_per_host(self):
+        """Test at most max_in_flight requests run together for one host."""
+        scheduler = HostScheduler(rate=1000, burst=100, max_in_flight=2)
+        in_flight = 0
+        peak = 0
+
+        async def request():
+            nonlocal in_flight, peak
+            async with scheduler.slot("https://example.com/"):
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+
+        await asyncio.gather(*(request() for _ in range(6)))
+
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_penalty_only_blocks_that_host(self):
+        """Test a rate-limited host does not delay other hosts."""
+        scheduler = HostScheduler(max_delay=30)
+        scheduler.penalize("https://slow.example/", 20)
+
+        start = time.monotonic()
+        async with scheduler.slot("https://fast.example/"):
+            pass
+
+        assert time.monotonic() - start < 0.1
+        assert scheduler.stats()["hosts"]["slow.example"]["rate_limited"] == 1
+
+    @pytest.mark.asyncio
+    async def test_block_longer_than_max_delay_fails_fast(self):
+        """Test hosts blocked beyond max_delay raise instead of stalling."""
+        scheduler = HostScheduler(max_delay=5)
+        scheduler.penalize("https://example.com/", 3600)
+
+        with pytest.raises(HostBlockedError):
+            async with scheduler.slot("https://example.com/"):
+                pass
+
+    def test_penalty_halves_rate_and_success_recovers(self):
+        """Test multiplicative decrease on 429 and additive recovery."""
+        scheduler = HostScheduler(rate=2.0, recovery=0.5)
+        scheduler.penalize("https://example.com/", 0)
+        assert scheduler.stats()["hosts"]["example.com"]["rate"] == 1.0
+
+        scheduler.record_success("https://example.com/")
+        scheduler.record_success("https://example.com/")
+        assert scheduler.stats()["hosts"]["example.com"]["rate"] == 2.0
+
+    @pytest.mark.asyncio
+    async def test_idle_hosts_evicted(self):
+        """Test host state is dropped once idle, unless the host is still blocked."""
+        scheduler = HostScheduler(rate=1000, burst=10, idle_ttl=0.05)
+        async with scheduler.slot("https://idle.example/"):
+            pass
+        scheduler.penalize("https://blocked.example/", 10)
+
+        await asyncio.sleep(0.06)
+        async with scheduler.slot("https://other.example/"):
+            pass
+
+        assert set(scheduler.stats()["hosts"]) == {"blocked.example", "other.example"}
+        assert scheduler.stats()["evicted_hosts"] == 1
+
+
+class TestScraperWithScheduler:
+    """AsyncWebScraper requeues rate-limited URLs."""
+
+    @pytest.mark.asyncio
+    async def test_429_is_delayed_and_requeued(self):
+        """Test a 429 followed by success returns the page."""
+        responses = iter([
+            httpx.Response(429, headers={"Retry-After": "0"}),
+            httpx.Response(200, headers={"content-type": "text/html"}, text="<p>ok</p>"),
+        ])
+        client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: next(responses)))
+        scheduler = HostScheduler(rate=1000, burst=10)
+
+        async with AsyncWebScraper(client=client, scheduler=scheduler) as scraper:
+            html, _ = await scraper.fetch_html("https://example.com/page")
+
+        assert html == "<p>ok</p>"
+        assert scheduler.requeued == 1
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_retries_exhausted_raises(self):
+        """Test persistent 429s eventually surface RateLimitError."""
+        calls = 0
+
+        def handler(request):
+            nonlocal calls
+            calls += 1
+            return httpx.Response(429, headers={"Retry-After": "0"})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        scheduler = HostScheduler(rate=1000, burst=10)
+
+        async with AsyncWebScraper(client=client, scheduler=scheduler, max_rate_limit_retries=2) as scraper:
+            with pytest.raises(RateLimitError) as exc_info:
+                await scraper.fetch_html("https://example.com/page")
+
+        assert calls == 3
+        assert exc_info.value.retry_after == 0
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_retry_backoff_releases_host_slot(self, monkeypatch):
+        """Test a URL backing off after a network error does not block its host's other URLs."""
+        from tenacity import wait_fixed
+
+        monkeypatch.setattr(AsyncWebScraper._fetch_body_once.retry, "wait", wait_fixed(0.3))
+        failed = set()
+
+        def handler(request):
+            if request.url.path == "/flaky" and not failed:
+                failed.add(request.url.path)
+                raise httpx.ConnectError("reset")
+            return httpx.Response(200, text=request.url.path)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        scheduler = HostScheduler(rate=1000, burst=10, max_in_flight=1)
+        finished = []
+
+        async def fetch(path):
+            html, _ = await scraper.fetch_html(f"https://example.com{path}")
+            finished.append(html)
+
+        async with AsyncWebScraper(client=client, scheduler=scheduler) as scraper:
+            flaky = asyncio.create_task(fetch("/flaky"))
+            await asyncio.sleep(0.05)
+            await asyncio.wait_for(fetch("/other"), 0.2)
+            await flaky
+
+        assert finished == ["/other", "/flaky"]
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_long_retry_after_fails_fast(self):
+        """Test a Retry-After beyond max_delay is not waited out."""
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(429, headers={"Retry-After": "3600"}))
+        )
+        scheduler = HostScheduler(max_delay=10)
+
+        async with AsyncWebScraper(client=client, scheduler=scheduler) as scraper:
+            with pytest.raises(RateLimitError):
+                await scraper.fetch_html("https://example.com/page")
+
+        await client.aclose()
@@ -0,0 +1,200 @@
+"""Tests for latency-aware provider routing."""
+
+import asyncio
+import time
+
+import pytest
+
+from services.flashcard_mapreduce import ChunkedFlashcardGenerator
+from services.provider_router import ProviderRouter, is_provider_failure
+
+
+class FakeProvider:
+    """Provider service with scripted latency and failures."""
+
+    def __init__(self, name, delay=0.01, fail=False, error=None):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    async def _respond(self, value):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        if self.fail:
+            raise ConnectionError(f"{self.name} unavailable")
+        return value
+
+    async def generate_text(self, prompt):
+        return await self._respond(f"{self.name}: {prompt}")
+
+    async def generate_flashcards(self, content, count=10):
+        words = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"]
+        return await self._respond(
+            [{"question": f"{self.name}: what is {words[i]} in {content[:9]}?", "answer": "A"} for i in range(count)]
+        )
+
+    async def answer_with_context(self, question, context):
+        return await self._respond(f"{self.name}: {question}")
+
+    async def summarize(self, content, max_length=500):
+        return await self._respond(f"{self.name}: summary")
+
+
+def make_router(openai, gemini, **kwargs):
+    kwargs.setdefault("max_hedge_ratio", 1.0)
+    return ProviderRouter({"openai": openai, "gemini": gemini}, **kwargs)
+
+
+class TestProviderRouter:
+    """Preference, hedging, failover and cooldown."""
+
+    @pytest.mark.asyncio
+    async def test_preferred_provider_used(self):
+        openai, gemini = FakeProvider("openai"), FakeProvider("gemini")
+        router = make_router(openai, gemini)
+
+        assert await router.call("generate_text", "hi", preferred="gemini") == "gemini: hi"
+        assert await router.service("openai").summarize("text") == "openai: summary"
+        assert (openai.calls, gemini.calls) == (1, 1)
+        assert router.stats()["hedges"] == 0
+
+    @pytest.mark.asyncio
+    async def test_slow_provider_hedged(self):
+        """Test a call past the hedge delay is duplicated and the faster answer wins."""
+        openai, gemini = FakeProvider("openai", delay=1.0), FakeProvider("gemini", delay=0.02)
+        router = make_router(openai, gemini, default_hedge_delay=0.05)
+
+        started = time.perf_counter()
+        result = await router.call("generate_text", "hi", preferred="openai")
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(0)
+
+        assert result == "gemini: hi"
+        assert elapsed < 0.3
+        assert openai.cancelled == 1
+        stats = router.stats()
+        assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+        assert stats["providers"]["openai"]["errors"] == 0
+
+    @pytest.mark.asyncio
+    async def test_hedge_delay_follows_rolling_p95(self):
+        openai, gemini = FakeProvider("openai", delay=0.01), FakeProvider("gemini")
+        router = make_router(openai, gemini, min_samples=5, min_hedge_delay=0.0)
+
+        assert router.hedge_delay("openai", "generate_text") == router.default_hedge_delay
+        for _ in range(10):
+            await router.call("generate_text", "hi", preferred="openai")
+
+        assert 0.005 < router.hedge_delay("openai", "generate_text") < 0.1
+        assert router.hedge_delay("openai", "summarize") == router.default_hedge_delay
+
+    @pytest.mark.asyncio
+    async def test_failover_on_error(self):
+        openai, gemini = FakeProvider("openai", fail=True), FakeProvider("gemini")
+        router = make_router(openai, gemini)
+
+        assert await router.route("generate_text", "hi", preferred="openai") == ("gemini", "gemini: hi")
+        assert router.stats()["failovers"] == 1
+        assert router.stats()["providers"]["openai"]["error_rate"] == 1.0
+
+    @pytest.mark.asyncio
+    async def test_cooldown_after_consecutive_failures(self):
+        """Test a failing provider is tried last until its cooldown expires."""
+        openai, gemini = FakeProvider("openai", fail=True), FakeProvider("gemini")
+        router = make_router(openai, gemini, failure_threshold=2, cooldown=0.1)
+
+        for _ in range(4):
+            await router.call("generate_text", "hi", preferred="openai")
+
+        assert openai.calls == 2
+        assert not router.stats()["providers"]["openai"]["healthy"]
+
+        await asyncio.sleep(0.1)
+        openai.fail = False
+        assert await router.call("generate_text", "hi", preferred="openai") == "openai: hi"
+
+    @pytest.mark.asyncio
+    async def test_all_providers_fail(self):
+        router = make_router(FakeProvider("openai", fail=True), FakeProvider("gemini", fail=True))
+
+        with pytest.raises(ConnectionError, match="gemini unavailable"):
+            await router.call("generate_text", "hi", preferred="openai")
+
+    @pytest.mark.asyncio
+    async def test_caller_error_not_failed_over(self):
+        """Test an input error propagates at once without counting against the provider."""
+        openai = FakeProvider("openai", error=ValueError("Prompt needs 9000 tokens"))
+        gemini = FakeProvider("gemini")
+        router = make_router(openai, gemini, failure_threshold=1)
+
+        with pytest.raises(ValueError, match="9000 tokens"):
+            await router.call("generate_text", "hi", preferred="openai")
+
+        assert gemini.calls == 0
+        stats = router.stats()
+        assert stats["failovers"] == 0
+        assert stats["providers"]["openai"]["errors"] == 0 and stats["providers"]["openai"]["healthy"]
+
+    @pytest.mark.parametrize("error", [
+        TimeoutError("read timed out"),
+        type("InternalServerError", (Exception,), {"status_code": 503})("overloaded"),
+    ])
+    def test_provider_failures_classified(self, error):
+        """Test wrapped transport, timeout and 5xx errors count against the provider."""
+        try:
+            try:
+                raise error
+            except Exception as e:
+                raise Exception(f"OpenAI API error: {str(e)}")
+        except Exception as wrapped:
+            assert is_provider_failure(wrapped)
+
+        assert not is_provider_failure(Exception("Failed to generate flashcards: Expecting value"))
+
+    @pytest.mark.asyncio
+    async def test_hedge_budget(self):
+        """Test hedging stops at max_hedge_ratio when every call is slow."""
+        openai, gemini = FakeProvider("openai", delay=0.05), FakeProvider("gemini", delay=0.05)
+        router = make_router(openai, gemini, default_hedge_delay=0.01, max_hedge_ratio=0.25)
+
+        await asyncio.gather(*(router.call("generate_text", str(i), preferred="openai") for i in range(8)))
+
+        assert router.stats()["hedges"] == 2
+
+    @pytest.mark.asyncio
+    async def test_caller_cancellation_cancels_providers(self):
+        openai, gemini = FakeProvider("openai", delay=1.0), FakeProvider("gemini", delay=1.0)
+        router = make_router(openai, gemini, default_hedge_delay=0.01)
+
+        task = asyncio.ensure_future(router.call("generate_text", "hi"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0)
+
+        assert openai.cancelled == 1 and gemini.cancelled == 1
+
+    @pytest.mark.asyncio
+    async def test_routed_service_with_chunked_generator(self):
+        """Test map-reduce chunks fail over individually through the routed service."""
+        openai, gemini = FakeProvider("openai", fail=True), FakeProvider("gemini")
+        router = make_router(openai, gemini, failure_threshold=100)
+        content = "\n".join(f"# Topic {i}\n" + "Relevant clinical detail. " * 40 for i in range(3))
+
+        service = router.service("openai")
+
+        cards = await ChunkedFlashcardGenerator(max_chunk_chars=1200).generate(service, content, 6)
+
+        assert len(cards) == 6
+        assert all(card["question"].startswith("gemini") for card in cards)
+        assert service.provider == "gemini"
@@ -0,0 +1,137 @@
+"""Tests for the semantic cache of RAG answers."""
+
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.language_models import FakeListChatModel
+
+import services.semantic_cache as semantic_cache
+from services.rag_engine import RAGEngine
+from services.semantic_cache import SemanticAnswerCache
+
+VOCABULARY = ["how", "does", "metformin", "work", "insulin", "what", "is", "the", "mechanism", "of"]
+
+
+class BagOfWordsEmbeddings:
+    """Word-count vectors: questions sharing most words are near-identical."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def aembed_query(self, text):
+        self.calls += 1
+        words = text.lower().strip("?").split()
+        return [float(words.count(word)) for word in VOCABULARY]
+
+
+def make_engine(monkeypatch, cache, responses):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    engine = RAGEngine(answer_cache=cache)
+    docs = [Document(page_content="Metformin lowers hepatic glucose output.", metadata={"note_id": 1, "title": "Metformin"})]
+    searches = []
+    engine.embeddings = BagOfWordsEmbeddings()
+    engine.vectorstore = SimpleNamespace(
+        similarity_search=lambda question, k: searches.append(question) or docs,
+        similarity_search_by_vector=lambda embedding, k: searches.append(embedding) or docs,
+        add_texts=lambda texts, metadatas: None,
+        persist=lambda: None,
+    )
+    engine.llm = FakeListChatModel(responses=responses)
+    return engine, searches
+
+
+class TestSemanticAnswerCache:
+    """Threshold matching, scoping and eviction."""
+
+    def test_similar_question_hits(self):
+        cache = SemanticAnswerCache(threshold=0.9)
+        cache.store("how does metformin work", [1.0, 1.0, 0.0], "v0", {"answer": "A"})
+
+        value, metadata = cache.lookup([1.0, 0.9, 0.0], "v0")
+
+        assert value == {"answer": "A"}
+        assert metadata["hit"] and metadata["matched_question"] == "how does metformin work"
+        assert metadata["similarity"] >= 0.9
+        assert cache.lookup([1.0, 0.0, 1.0], "v0") is None
+        assert cache.stats()["hit_rate"] == 0.5
+
+    def test_scope_isolated(self):
+        cache = SemanticAnswerCache()
+        cache.store("q", [1.0, 0.0], "v0", {"answer": "old"})
+
+        assert cache.lookup([1.0, 0.0], "v1") is None
+
+    def test_hit_returns_copy(self):
+        cache = SemanticAnswerCache()
+        cache.store("q", [1.0, 0.0], "v0", {"sources": [1]})
+
+        cache.lookup([1.0, 0.0], "v0")[0]["sources"].append(2)
+
+        assert cache.lookup([1.0, 0.0], "v0")[0] == {"sources": [1]}
+
+    def test_least_recently_used_evicted(self):
+        cache = SemanticAnswerCache(max_entries=2)
+        cache.store("a", [1.0, 0.0, 0.0], "v0", {"answer": "a"})
+        cache.store("b", [0.0, 1.0, 0.0], "v0", {"answer": "b"})
+        cache.lookup([1.0, 0.0, 0.0], "v0")
+        cache.store("c", [0.0, 0.0, 1.0], "v0", {"answer": "c"})
+
+        assert cache.lookup([0.0, 1.0, 0.0], "v0") is None
+        assert cache.lookup([1.0, 0.0, 0.0], "v0") is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_entries_expire(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(semantic_cache.time, "time", lambda: now[0])
+        cache = SemanticAnswerCache(ttl=60)
+        cache.store("q", [1.0, 0.0], "v0", {"answer": "A"})
+
+        now[0] += 61
+
+        assert cache.lookup([1.0, 0.0], "v0") is None
+        assert cache.stats()["entries"] == 0
+
+
+class TestRAGAnswerCache:
+    """RAGEngine answers served from and invalidated in the cache."""
+
+    @pytest.mark.asyncio
+    async def test_similar_question_skips_llm(self, monkeypatch):
+        """Test a rephrased question is answered from the cache, reusing the lookup embedding for retrieval."""
+        engine, searches = make_engine(monkeypatch, SemanticAnswerCache(threshold=0.8), ["Cached answer"])
+
+        first = await engine.answer_with_context("How does metformin work?")
+        second = await engine.answer_with_context("how does metformin work")
+
+        assert first["cache"] == {"hit": False}
+        assert second["answer"] == "Cached answer"
+        assert second["sources"] == first["sources"]
+        assert second["cache"]["hit"]
+        assert len(searches) == 1 and isinstance(searches[0], list)
+        assert engine.embeddings.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_indexing_notes_invalidates(self, monkeypatch):
+        cache = SemanticAnswerCache()
+        engine, _ = make_engine(monkeypatch, cache, ["Before", "After"])
+
+        await engine.answer_with_context("How does metformin work?")
+        await engine.index_notes([{"id": 2, "title": "Metformin", "content": "Also activates AMPK."}])
+        answer = await engine.answer_with_context("How does metformin work?")
+
+        assert answer["answer"] == "After"
+        assert not answer["cache"]["hit"]
+        assert cache.stats()["invalidations"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cache_bypassed(self, monkeypatch):
+        engine, searches = make_engine(monkeypatch, SemanticAnswerCache(), ["One", "Two"])
+
+        await engine.answer_with_context("How does metformin work?", use_cache=False)
+        answer = await engine.answer_with_context("How does metformin work?", use_cache=False)
+
+        assert answer["answer"] == "Two"
+        assert "cache" not in answer
+        assert searches == ["How does metformin work?"] * 2
+        assert engine.embeddings.calls == 0
@@ -0,0 +1,111 @@
+"""Tests for single-flight coalescing of concurrent calls."""
+
+import asyncio
+
+import pytest
+
+from services.single_flight import SingleFlight
+
+
+class Provider:
+    """Slow call that records how often it really ran."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.started = 0
+        self.cancelled = 0
+
+    async def call(self, value="cards"):
+        self.started += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return [value]
+
+
+class TestSingleFlight:
+    """Sharing, failure and cancellation semantics."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_execution(self):
+        flights = SingleFlight()
+        provider = Provider()
+
+        results = await asyncio.gather(*(flights.do("note-1", provider.call) for _ in range(5)))
+
+        assert results == [["cards"]] * 5
+        assert provider.started == 1
+        stats = flights.stats()
+        assert stats["executions"] == 1
+        assert stats["coalesced"] == 4
+        assert stats["dedup_rate"] == 0.8
+        assert stats["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_and_later_calls_run_separately(self):
+        """Test only overlapping calls with the same key are coalesced."""
+        flights = SingleFlight()
+        provider = Provider(delay=0.01)
+
+        await asyncio.gather(flights.do("a", provider.call), flights.do("b", provider.call))
+        await flights.do("a", provider.call)
+
+        assert provider.started == 3
+        assert flights.stats()["coalesced"] == 0
+
+    @pytest.mark.asyncio
+    async def test_exception_fans_out_and_is_not_remembered(self):
+        flights = SingleFlight()
+        attempts = 0
+
+        async def failing():
+            nonlocal attempts
+            attempts += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("rate limited")
+
+        results = await asyncio.gather(
+            flights.do("k", failing), flights.do("k", failing), return_exceptions=True
+        )
+        with pytest.raises(RuntimeError):
+            await flights.do("k", failing)
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert attempts == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_others(self):
+        """Test the first caller leaving does not take the shared call with it."""
+        flights = SingleFlight()
+        provider = Provider()
+
+        first = asyncio.create_task(flights.do("k", provider.call))
+        second = asyncio.create_task(flights.do("k", provider.call))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert await second == ["cards"]
+        assert first.cancelled()
+        assert provider.cancelled == 0
+        assert flights.stats()["abandoned"] == 0
+
+    @pytest.mark.asyncio
+    async def test_all_waiters_cancelled_cancels_call(self):
+        """Test the provider call stops once nobody waits, and new callers start fresh."""
+        flights = SingleFlight()
+        provider = Provider()
+
+        waiters = [asyncio.create_task(flights.do("k", provider.call)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        result = await flights.do("k", provider.call)
+        await asyncio.sleep(0)
+
+        assert provider.cancelled == 1
+        assert provider.started == 2
+        assert result == ["cards"]
+        assert flights.stats()["abandoned"] == 1
@@ -0,0 +1,196 @@
+"""Tests for sitemap streaming and incremental sync."""
+
+import gzip
+
+import httpx
+import pytest
+
+from services.sitemap import (
+    SitemapEntry,
+    SitemapStateStore,
+    SitemapSyncStats,
+    normalize_lastmod,
+    parse_sitemap,
+)
+from services.web_scraper import AsyncWebScraper
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def urlset(entries):
+    body = "".join(
+        f"<url><loc>{loc}</loc>" + (f"<lastmod>{lastmod}</lastmod>" if lastmod else "") + "</url>"
+        for loc, lastmod in entries
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset {NS}>{body}</urlset>'.encode()
+
+
+def sitemap_index(entries):
+    body = "".join(f"<sitemap><loc>{loc}</loc><lastmod>{lastmod}</lastmod></sitemap>" for loc, lastmod in entries)
+    return f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex {NS}>{body}</sitemapindex>'.encode()
+
+
+async def chunked(data, size=7):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+@pytest.fixture
+def state(tmp_path):
+    state = SitemapStateStore(path=str(tmp_path / "state.sqlite3"))
+    yield state
+    state.close()
+
+
+class TestParseSitemap:
+    """Incremental XML parsing."""
+
+    @pytest.mark.asyncio
+    async def test_urlset_split_across_chunks(self):
+        """Test entries are parsed even when tags straddle chunk boundaries."""
+        data = urlset([("https://example.com/a", "2025-01-02"), ("https://example.com/b", None)])
+
+        entries = [entry async for entry in parse_sitemap(chunked(data))]
+
+        assert [entry.loc for entry in entries] == ["https://example.com/a", "https://example.com/b"]
+        assert entries[0].lastmod == "2025-01-02T00:00:00+00:00"
+        assert entries[1].lastmod is None
+        assert not entries[0].is_sitemap
+
+    @pytest.mark.asyncio
+    async def test_gzipped_sitemap_index(self):
+        data = gzip.compress(sitemap_index([("https://example.com/s1.xml", "2025-01-01T10:00:00Z")]))
+
+        entries = [entry async for entry in parse_sitemap(chunked(data, 5))]
+
+        assert entries[0].is_sitemap
+        assert entries[0].loc == "https://example.com/s1.xml"
+
+    @pytest.mark.asyncio
+    async def test_malformed_raises_value_error(self):
+        with pytest.raises(ValueError):
+            [entry async for entry in parse_sitemap(chunked(b"<urlset><url><loc>x</url>"))]
+
+    def test_normalize_lastmod(self):
+        """Test equivalent W3C datetimes compare equal."""
+        assert normalize_lastmod("2025-01-01T12:00:00+02:00") == normalize_lastmod("2025-01-01T10:00:00Z")
+        assert normalize_lastmod(" ") is None
+        assert normalize_lastmod("yesterday") == "yesterday"
+
+
+class TestSitemapStateStore:
+    """Per-URL lastmod comparison."""
+
+    def test_filter_changed(self, state):
+        state.mark_url("https://example.com/same", "2025-01-01T00:00:00+00:00")
+        state.mark_url("https://example.com/edited", "2025-01-01T00:00:00+00:00")
+        state.mark_url("https://example.com/undated", None)
+        entries = [
+            SitemapEntry("https://example.com/same", "2025-01-01T00:00:00+00:00"),
+            SitemapEntry("https://example.com/edited", "2025-02-01T00:00:00+00:00"),
+            SitemapEntry("https://example.com/undated"),
+            SitemapEntry("https://example.com/new"),
+        ]
+
+        changed = [entry.loc for entry in state.filter_changed(entries)]
+        rechecked = [entry.loc for entry in state.filter_changed(entries, recheck_undated=True)]
+
+        assert changed == ["https://example.com/edited", "https://example.com/new"]
+        assert rechecked == ["https://example.com/edited", "https://example.com/undated", "https://example.com/new"]
+
+
+class TestSitemapSync:
+    """AsyncWebScraper.sync_sitemap end to end."""
+
+    @staticmethod
+    def _site(documents, requests):
+        def handler(request):
+            requests.append(str(request.url))
+            body = documents.get(str(request.url))
+            if body is None:
+                return httpx.Response(404)
+            if isinstance(body, bytes):
+                return httpx.Response(200, headers={"content-type": "application/xml"}, content=body)
+            return httpx.Response(200, headers={"content-type": "text/html"}, text=body)
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    async def _sync(self, documents, state, url="https://example.com/sitemap.xml", **kwargs):
+        requests = []
+        client = self._site(documents, requests)
+        stats = SitemapSyncStats(start_url=url)
+        async with AsyncWebScraper(client=client) as scraper:
+            pages = [page async for page in scraper.sync_sitemap(url, state, stats=stats, **kwargs)]
+        await client.aclose()
+        return pages, requests, stats
+
+    @pytest.mark.asyncio
+    async def test_second_sync_fetches_only_changes(self, state):
+        """Test an unchanged sitemap costs one request and an edit refetches one page."""
+        documents = {
+            "https://example.com/sitemap.xml": urlset([
+                ("https://example.com/a", "2025-01-01"),
+                ("https://example.com/b", "2025-01-01"),
+            ]),
+            "https://example.com/a": "<title>A</title><p>alpha</p>",
+            "https://example.com/b": "<title>B</title><p>beta</p>",
+        }
+
+        first, _, _ = await self._sync(documents, state)
+        _, requests, stats = await self._sync(documents, state)
+        documents["https://example.com/sitemap.xml"] = urlset([
+            ("https://example.com/a", "2025-01-01"),
+            ("https://example.com/b", "2025-03-01"),
+        ])
+        third, _, _ = await self._sync(documents, state)
+
+        assert sorted(page["title"] for page in first) == ["A", "B"]
+        assert requests == ["https://example.com/sitemap.xml"]
+        assert stats.urls_listed == 2
+        assert stats.urls_unchanged == 2
+        assert [page["url"] for page in third] == ["https://example.com/b"]
+        assert third[0]["lastmod"] == "2025-03-01T00:00:00+00:00"
+
+    @pytest.mark.asyncio
+    async def test_unchanged_child_sitemaps_are_skipped(self, state):
+        """Test children whose lastmod did not move are not downloaded again."""
+        documents = {
+            "https://example.com/sitemap.xml": sitemap_index([
+                ("https://example.com/s1.xml", "2025-01-01"),
+                ("https://example.com/s2.xml", "2025-01-01"),
+            ]),
+            "https://example.com/s1.xml": urlset([("https://example.com/a", "2025-01-01")]),
+            "https://example.com/s2.xml": gzip.compress(urlset([("https://example.com/b", "2025-01-01")])),
+            "https://example.com/a": "<p>alpha</p>",
+            "https://example.com/b": "<p>beta</p>",
+        }
+
+        first, _, first_stats = await self._sync(documents, state)
+        documents["https://example.com/sitemap.xml"] = sitemap_index([
+            ("https://example.com/s1.xml", "2025-01-01"),
+            ("https://example.com/s2.xml", "2025-02-01"),
+        ])
+        _, requests, stats = await self._sync(documents, state)
+
+        assert len(first) == 2
+        assert first_stats.sitemaps_fetched == 3
+        assert requests == ["https://example.com/sitemap.xml", "https://example.com/s2.xml"]
+        assert stats.sitemaps_skipped == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_pages_retried_next_sync(self, state):
+        """Test a page that failed is not recorded and is fetched again."""
+        documents = {
+            "https://example.com/sitemap.xml": urlset([("https://example.com/a", "2025-01-01")]),
+        }
+
+        _, _, stats = await self._sync(documents, state)
+        documents["https://example.com/a"] = "<p>alpha</p>"
+        pages, _, _ = await self._sync(documents, state)
+
+        assert stats.pages_failed == 1
+        assert [page["url"] for page in pages] == ["https://example.com/a"]
+
+    @pytest.mark.asyncio
+    async def test_missing_root_sitemap_raises(self, state):
+        with pytest.raises(httpx.HTTPStatusError):
+            await self._sync({}, state)
@@ -0,0 +1,142 @@
+"""Tests for SSE streaming of provider tokens."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from services.llm_cache import LLMResponseCache
+from services.openai_service import OpenAIService
+from services.streaming import StreamMetrics, format_sse, sse_events, start_stream
+
+
+async def tokens(*parts, fail_after=None, delay=0.0):
+    for index, part in enumerate(parts):
+        if fail_after is not None and index == fail_after:
+            raise RuntimeError("provider dropped")
+        await asyncio.sleep(delay)
+        yield part
+
+
+def parse_events(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines.get("event"), json.loads(lines["data"])))
+    return events
+
+
+class FakeCompletionStream:
+    """Async iterator shaped like ``openai.AsyncStream`` of chat chunks."""
+
+    def __init__(self, deltas):
+        self.deltas = deltas
+        self.closed = False
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for delta in self.deltas:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=delta))])
+
+    async def close(self):
+        self.closed = True
+
+
+async def collect(stream):
+    return [part async for part in stream]
+
+
+class TestSSE:
+    """Event formatting and stream lifecycle."""
+
+    def test_format_sse(self):
+        assert format_sse({"text": "olá"}, "token") == 'event: token\ndata: {"text": "olá"}\n\n'
+        assert format_sse({}) == "data: {}\n\n"
+
+    @pytest.mark.asyncio
+    async def test_events_in_order_with_metrics(self):
+        metrics = StreamMetrics()
+        stream = await start_stream(tokens("Insulin ", "lowers ", "glucose."))
+        text = "".join(await collect(sse_events(stream, [("sources", [{"title": "Note"}])], {"method": "rag"}, metrics)))
+
+        assert parse_events(text) == [
+            ("sources", [{"title": "Note"}]),
+            ("token", {"text": "Insulin "}),
+            ("token", {"text": "lowers "}),
+            ("token", {"text": "glucose."}),
+            ("done", {"method": "rag"}),
+        ]
+        assert metrics.stats()["streams"] == 1
+        assert metrics.stats()["errors"] == 0
+
+    @pytest.mark.asyncio
+    async def test_error_before_first_token_raises(self):
+        """Test an outright provider failure surfaces before the response starts."""
+        with pytest.raises(RuntimeError):
+            await start_stream(tokens("never", fail_after=0))
+
+    @pytest.mark.asyncio
+    async def test_error_mid_stream_becomes_event(self):
+        metrics = StreamMetrics()
+        stream = await start_stream(tokens("Partial ", "answer", fail_after=1))
+        events = parse_events("".join(await collect(sse_events(stream, metrics=metrics))))
+
+        assert events == [("token", {"text": "Partial "}), ("error", {"detail": "provider dropped"})]
+        assert metrics.stats()["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_first_token_time_recorded(self):
+        """Test time-to-first-token reflects the first delta, not the whole stream."""
+        metrics = StreamMetrics()
+        stream = await start_stream(tokens(*["x"] * 5, delay=0.02))
+        await collect(sse_events(stream, metrics=metrics))
+
+        stats = metrics.stats()
+        assert stats["ttft_p50_ms"] < stats["duration_p50_ms"] / 2
+
+
+class TestOpenAIStreaming:
+    """OpenAIService streaming methods."""
+
+    @pytest.mark.asyncio
+    async def test_stream_summarize_forwards_deltas_and_fills_cache(self, monkeypatch):
+        """Test deltas are forwarded, and a completed stream serves the non-streaming call."""
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        service = OpenAIService(cache=LLMResponseCache())
+        stream = FakeCompletionStream(["Short", None, " summary"])
+        create = AsyncMock(return_value=stream)
+        service.client.chat.completions.create = create
+
+        assert await collect(service.stream_summarize("Long text", 200)) == ["Short", " summary"]
+        assert create.await_args.kwargs["stream"] is True
+        assert stream.closed
+
+        assert await service.summarize("Long text", 200) == "Short summary"
+        assert await collect(service.stream_summarize("Long text", 200)) == ["Short summary"]
+        assert create.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_abandoned_stream_not_cached(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        cache = LLMResponseCache()
+        service = OpenAIService(cache=cache)
+        service.client.chat.completions.create = AsyncMock(return_value=FakeCompletionStream(["a", "b", "c"]))
+
+        stream = service.stream_text("Question?")
+        assert await stream.__anext__() == "a"
+        await stream.aclose()
+
+        assert cache.stats()["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_provider_error_wrapped(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        service = OpenAIService()
+        service.client.chat.completions.create = AsyncMock(side_effect=RuntimeError("rate limited"))
+
+        with pytest.raises(Exception, match="Failed to answer question: rate limited"):
+            await start_stream(service.stream_answer_with_context("Q?", "Context"))
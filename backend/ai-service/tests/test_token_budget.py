@@ -0,0 +1,144 @@
+"""Tests for token accounting and prompt sizing."""
+
+import json
+import re
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.language_models import FakeListChatModel
+
+import services.token_budget as token_budget
+from services.openai_service import OpenAIService
+from services.rag_engine import RAGEngine
+from services.token_budget import TokenBudget, model_limits
+
+
+class WordEncoding:
+    """Tokenizer stand-in: one token per word (with its leading whitespace)."""
+
+    def encode(self, text, disallowed_special=()):
+        return re.findall(r"\s*\S+|\s+", text)
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+@pytest.fixture
+def words(monkeypatch):
+    monkeypatch.setattr(token_budget, "get_encoding", lambda model: WordEncoding())
+
+
+def completion(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+class TestTokenBudget:
+    """Counting, sizing and truncation."""
+
+    def test_model_limits_longest_prefix(self):
+        assert model_limits("gpt-4-turbo-preview") == (128_000, 4_096)
+        assert model_limits("gpt-4o-mini-2024-07-18") == (128_000, 16_384)
+        assert model_limits("gpt-4-0613") == (8_192, 4_096)
+        assert model_limits("unknown-model") == token_budget.DEFAULT_LIMITS
+
+    def test_completion_sizes_follow_request(self):
+        budget = TokenBudget("gpt-4-turbo")
+
+        assert budget.flashcard_tokens(1) < budget.flashcard_tokens(10) < budget.flashcard_tokens(20)
+        assert budget.flashcard_tokens(500) == 4_096
+        assert budget.summary_tokens(200) < budget.summary_tokens(1000)
+        assert budget.summary_tokens(10) == token_budget.MIN_SUMMARY_TOKENS
+
+    def test_estimate_without_tokenizer(self, monkeypatch):
+        monkeypatch.setattr(token_budget, "get_encoding", lambda model: None)
+        budget = TokenBudget("gpt-4")
+
+        assert budget.count("x" * 10) == 3
+        assert len(budget.truncate("word " * 100, 10)) <= 40
+        assert budget.stats()["tokenizer"] == "estimate"
+
+    def test_truncate_at_word_boundary(self, words):
+        budget = TokenBudget("gpt-4")
+        text = "Insulin lowers blood glucose by promoting uptake into muscle and fat."
+
+        assert budget.truncate(text, 4) == "Insulin lowers blood glucose"
+        assert budget.truncate(text, 100) is text
+        assert budget.truncations == 1
+
+    def test_fit_reserves_completion_and_template(self, words):
+        budget = TokenBudget("gpt-4", context_window=1000, margin=0)
+        content = "word " * 5000
+
+        fitted = budget.fit(content, max_tokens=300, overhead=200)
+
+        assert budget.count(fitted) == 500
+        assert budget.fit("short", 300, 200) == "short"
+
+    def test_check_rejects_oversized_prompt(self, words):
+        budget = TokenBudget("gpt-4", context_window=100)
+
+        assert budget.check([{"role": "user", "content": " ".join(["word"] * 10)}], 50) == 10 + 4 + 3
+        with pytest.raises(ValueError, match="context window"):
+            budget.check([{"role": "user", "content": "word " * 90}], 50)
+
+
+class TestServiceBudgets:
+    """OpenAIService and RAGEngine prompt sizing."""
+
+    @pytest.mark.asyncio
+    async def test_flashcard_max_tokens_from_count_and_content_fitted(self, monkeypatch, words):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        service = OpenAIService()
+        service.budget = TokenBudget(service.model, context_window=3000, margin=0)
+        cards = [{"question": f"Q{i}", "answer": "A"} for i in range(5)]
+        create = AsyncMock(return_value=completion(json.dumps(cards)))
+        service.client.chat.completions.create = create
+
+        await service.generate_flashcards("word " * 10000, 5)
+
+        kwargs = create.await_args.kwargs
+        assert kwargs["max_tokens"] == token_budget.FLASHCARD_OVERHEAD_TOKENS + 5 * token_budget.TOKENS_PER_FLASHCARD
+        assert service.budget.count_messages(kwargs["messages"]) + kwargs["max_tokens"] <= 3000
+
+    @pytest.mark.asyncio
+    async def test_summary_max_tokens_from_length(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        service = OpenAIService()
+        create = AsyncMock(return_value=completion("Summary"))
+        service.client.chat.completions.create = create
+
+        await service.summarize("Long text", 200)
+
+        assert create.await_args.kwargs["max_tokens"] == service.budget.summary_tokens(200)
+
+    @pytest.mark.asyncio
+    async def test_oversized_prompt_fails_before_request(self, monkeypatch, words):
+        monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+        service = OpenAIService()
+        service.budget = TokenBudget(service.model, context_window=1000)
+        create = AsyncMock(return_value=completion("text"))
+        service.client.chat.completions.create = create
+
+        with pytest.raises(ValueError):
+            await service.generate_text("word " * 1000)
+        create.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_rag_drops_chunks_that_do_not_fit(self, monkeypatch, words):
+        """Test the lowest-ranked chunks are left out instead of overflowing the window."""
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        engine = RAGEngine()
+        engine.budget = TokenBudget("gpt-4", context_window=1500, max_output_tokens=1000, margin=0)
+        docs = [
+            Document(page_content=f"chunk{i} " + "word " * 120, metadata={"note_id": i, "title": f"Note {i}"})
+            for i in range(5)
+        ]
+        engine.vectorstore = SimpleNamespace(similarity_search=lambda question, k: docs[:k])
+        engine.llm = FakeListChatModel(responses=["Answer"])
+
+        result = await engine.answer_with_context("What is insulin?")
+
+        assert result["answer"] == "Answer"
+        assert [source["note_id"] for source in result["sources"]] == [0, 1, 2]
@@ -1,8 +1,39 @@
+import asyncio
+import threading
+
+import httpx
 import pytest
 
+from services.http_pool import HTTPConnectionPool
 from services.web_scraper import WebScraper
 
 
+@pytest.fixture
+def pooled_site(monkeypatch):
+    """Serve pages from a mock transport through the shared pooled client."""
+    state = {"in_flight": 0, "peak": 0, "threads": set()}
+
+    async def handler(request):
+        state["threads"].add(threading.current_thread().name)
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(0.05)
+        state["in_flight"] -= 1
+        if request.url.path == "/missing":
+            return httpx.Response(404)
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/html"},
+            text=f"<html><title>{request.url.path}</title><p>page</p></html>",
+        )
+
+    # Drop clients pooled by earlier tests (which may have patched httpx)
+    WebScraper.close_shared()
+    monkeypatch.setattr(HTTPConnectionPool, "_build_transport", lambda self: httpx.MockTransport(handler))
+    yield state
+    WebScraper.close_shared()
+
+
 class _FakeResponse:
     def __init__(self, text: str, status_code: int = 200):
         self.text = text
@@ -55,4 +86,50 @@ def test_fetch_html_raises_timeout(monkeypatch):
     scraper = WebScraper(session=_TimeoutSession())
 
     with pytest.raises(TimeoutError):
-        scraper.fetch_html("https://slow.example.com")
\ No newline at end of file
+        scraper.fetch_html("https://slow.example.com")
+
+def test_fetch_and_parse_batch_with_session_skips_failures():
+    class _Session:
+        headers = {}
+
+        def get(self, url: str, timeout: int):  # noqa: ARG002
+            if url.endswith("/bad"):
+                raise TimeoutError("timeout")
+            return _FakeResponse(f"<title>{url}</title>")
+
+    results = WebScraper(session=_Session()).fetch_and_parse_batch(
+        ["https://example.com/a", "https://example.com/bad", "https://example.com/b"]
+    )
+
+    assert [result["title"] for result in results] == ["https://example.com/a", "https://example.com/b"]
+
+
+def test_calls_reuse_background_loop_and_pool(pooled_site):
+    """Test sync calls share one loop thread and one pooled client."""
+    first = WebScraper()
+    second = WebScraper()
+
+    assert first.fetch_and_parse("https://example.com/one")["title"] == "/one"
+    assert "page" in second.fetch_html("https://example.com/two")
+
+    assert pooled_site["threads"] == {"web-scraper-loop"}
+    assert len(WebScraper._pools) == 1
+
+
+def test_fetch_and_parse_batch_fans_out(pooled_site):
+    """Test the sync batch runs concurrently on the loop and drops failures."""
+    urls = [f"https://example.com/{i}" for i in range(8)] + ["https://example.com/missing"]
+
+    results = WebScraper().fetch_and_parse_batch(urls, max_concurrent=4)
+
+    assert sorted(result["title"] for result in results) == sorted(f"/{i}" for i in range(8))
+    assert pooled_site["peak"] == 4
+
+
+def test_close_shared_stops_loop(pooled_site):
+    WebScraper().fetch_html("https://example.com/x")
+
+    WebScraper.close_shared()
+
+    assert not WebScraper._loop.is_running
+    assert WebScraper._pools == {}